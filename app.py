@@ -7,36 +7,51 @@
 # =============================================================================
 
 import os
-import re
-import json
 import logging
 import datetime
+import uuid
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
 import pandas as pd
 import streamlit as st
 from dotenv import load_dotenv
-from openai import OpenAI
+
+from src.core import (
+    ModelUnavailableError,
+    PredictorError,
+    ReferenceDataError,
+    get_predictor,
+)
+from src.core import metrics, profiling, reference, tracing
+from src.core.profiling import ProfileReport, profiling_requested, start_profile
+from src.core.metrics import PREDICTION_ERRORS, start_metrics_exporter, touch_session
+from src.core.predictor import ENGINE_PYCARET
+from src.core.tracing import annotate, span, start_span, start_trace
+from src.core.worker_pool import COHORT_AGE_RANGE, WORKER_PROCESSES, get_worker_pool, rank_prediction
+from src.utils import data_processing
+from src.utils.cohort_stats import CohortCube
+from src.utils.density import DENSITY_THRESHOLD, ScatterDensity, use_density_mode
+from src.utils.key_verification import VERIFICATION_TIMEOUT, get_key_verifier
+from src.utils.lazy_imports import is_available, preload_in_background
+from src.utils.openai_client import get_openai_client, openai_pool_stats
+from src.utils.reference_index import ReferenceIndex
 
 # Importy opcjonalne (PyCaret, Plotly)
-try:
-    from pycaret.regression import load_model as pycaret_load_model, predict_model as pycaret_predict_model
-    PYCARET_AVAILABLE = True
-    load_model = pycaret_load_model
-    predict_model = pycaret_predict_model  # type: ignore[assignment]
-except ImportError:
-    PYCARET_AVAILABLE = False
-    def load_model(model_name, platform=None, authentication=None, verbose=True):
-        st.error("❌ PyCaret nie jest zainstalowany. Zainstaluj go komendą: pip install pycaret")
-        logging.getLogger(__name__).error("PyCaret nie jest dostępny - model %s nie może być załadowany", model_name)
-        return None
-    def predict_model(estimator, data=None, round_digits=4, verbose=True):
-        st.error("❌ PyCaret nie jest zainstalowany. Nie można wykonać przewidywania.")
-        logging.getLogger(__name__).error("PyCaret nie jest dostępny - przewidywanie niemożliwe")
-        return None
+# PyCaret importowany jest leniwie - import trwa kilka sekund, a natywny silnik
+# przewidywania go nie potrzebuje
+PYCARET_AVAILABLE = is_available("pycaret")
 
 PLOTLY_AVAILABLE = False
 try:
     import plotly.express as px
     import plotly.graph_objects as go
+    from src.utils.visualization import (
+        create_tempo_density_chart,
+        display_usage_stats,
+        increment_prediction_counter,
+        record_request_trace,
+    )
     PLOTLY_AVAILABLE = True
 except ImportError:
     class PlotlyFigure:
@@ -64,6 +79,24 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+def profile_query_param() -> Optional[str]:
+    """
+    Wartość parametru ?profile= - odczytywana tylko przy ustawionym PROFILE_TOKEN.
+    st.query_params istnieje od Streamlit 1.30, wcześniej experimental_get_query_params.
+    """
+    if not profiling.PROFILE_TOKEN:
+        return None
+    query_params = getattr(st, "query_params", None)
+    if query_params is not None:
+        return query_params.get("profile")
+    values = st.experimental_get_query_params().get("profile")
+    return values[0] if values else None
+
+
+# Profilowanie przebiegu na żądanie (PROFILE_RERUNS=1 albo ?profile=<PROFILE_TOKEN>);
+# bez flagi nie jest uruchamiany profiler ani tracemalloc
+rerun_profile = start_profile() if profiling_requested(profile_query_param()) else None
+
 # Wymuszenie poprawnego tytułu karty z emoji w Chrome i innych przeglądarkach
 st.markdown("""
 <script>
@@ -559,7 +592,20 @@ class Config:
     """Klasa konfiguracyjna aplikacji."""
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     MODEL_PATH = "huber_model_halfmarathon_time"
+    NATIVE_MODEL_PATH = "huber_model_halfmarathon_time.json"
     DATA_PATH = "df_cleaned.csv" 
+    # Powyżej tylu wierszy wykres tempo vs czas rysowany jest jako gęstość
+    SCATTER_DENSITY_THRESHOLD = DENSITY_THRESHOLD
+    # Po tylu sekundach bez odpowiedzi OpenAI używany jest wynik regex
+    EXTRACTION_DEADLINE = data_processing.EXTRACTION_DEADLINE
+    # Procesy puli przewidywania (PREDICTION_WORKERS; 0 = w procesie Streamlit)
+    PREDICTION_WORKERS = WORKER_PROCESSES
+    PREDICTION_TIMEOUT = 30
+    # Plik JSON Lines ze śladami żądań (TRACE_FILE; pusty = tylko log)
+    TRACE_FILE = tracing.TRACE_FILE
+    # Eksport metryk Prometheus (METRICS_PORT / METRICS_FILE; domyślnie wyłączony)
+    METRICS_PORT = metrics.METRICS_PORT
+    METRICS_FILE = metrics.METRICS_FILE
     MIN_AGE = 10
     MAX_AGE = 100
     MIN_TEMPO = 3.0
@@ -567,58 +613,43 @@ class Config:
 
 config = Config()
 
+# Eksport metryk uruchamiany raz na proces (wspólny dla wszystkich sesji)
+start_metrics_exporter(config.METRICS_PORT, config.METRICS_FILE)
+
+# Bez natywnego silnika przewidywanie wymaga PyCaret - import w tle, zanim użytkownik kliknie "Oblicz"
+if PYCARET_AVAILABLE and get_predictor(config.NATIVE_MODEL_PATH, config.MODEL_PATH).engine == ENGINE_PYCARET:
+    preload_in_background(["pycaret.regression"])
+
 # Inicjalizacja klienta OpenAI
 client = None
 OPENAI_AVAILABLE = False
 
-def verify_openai_key(api_key: str) -> tuple[bool, str]:
+def verify_openai_key(api_key: str, force: bool = False) -> tuple[bool, str]:
     """
-    Weryfikuje klucz OpenAI API poprzez wysłanie testowego zapytania.
+    Weryfikuje klucz OpenAI API (lista modeli, bez zużycia tokenów).
+    Wynik jest zapamiętywany według skrótu klucza, więc kolejne wywołania
+    nie łączą się z API do upływu czasu ważności.
     
     Args:
         api_key: Klucz API do weryfikacji
+        force: Czy pominąć zapamiętany wynik
         
     Returns:
         tuple: (czy_klucz_prawidlowy, wiadomosc_o_statusie)
     """
-    if not api_key or not api_key.strip():
-        return False, "Klucz API jest pusty"
-    
-    if not api_key.startswith("sk-"):
-        return False, "Klucz API ma nieprawidłowy format (powinien zaczynać się od 'sk-')"
-    
-    try:
-        test_client = OpenAI(api_key=api_key)        
-        # Wysyłanie krótkiego testowego zapytania
-        response = test_client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": "Test"}],
-            max_tokens=1,
-            timeout=10
-        )
-        
-        if response and response.choices:
-            return True, "Klucz API jest prawidłowy i funkcjonalny"
-        else:
-            return False, "Otrzymano nieprawidłową odpowiedź z OpenAI"
-            
-    except (ValueError, TypeError, ConnectionError, TimeoutError) as e:
-        error_msg = str(e)
-        if "authentication" in error_msg.lower() or "unauthorized" in error_msg.lower():
-            return False, "Klucz API jest nieprawidłowy lub wygasł"
-        elif "quota" in error_msg.lower() or "billing" in error_msg.lower():
-            return False, "Problem z rozliczeniami lub przekroczono limit"
-        elif "timeout" in error_msg.lower():
-            return False, "Przekroczono czas oczekiwania na odpowiedź"
-        else:
-            return False, f"Błąd weryfikacji: {error_msg}"
+    result = get_key_verifier().verify(api_key, timeout=VERIFICATION_TIMEOUT, force=force)
+    return result.is_valid, result.message
 
-def initialize_openai_client(api_key: str | None = None) -> tuple[bool, str]:
+def initialize_openai_client(api_key: Optional[str] = None,
+                             wait: Optional[float] = None) -> tuple[bool, str]:
     """
     Inicjalizuje klienta OpenAI z podanym kluczem.
+    Domyślnie nie czeka na weryfikację: dopóki trwa ona w tle,
+    aplikacja działa w trybie regex, a sidebar pokazuje "weryfikacja...".
     
     Args:
         api_key: Klucz API (opcjonalny, domyślnie z .env)
+        wait: Ile sekund czekać na wynik weryfikacji (None = nie czekaj)
         
     Returns:
         tuple: (czy_inicjalizacja_udana, wiadomosc_o_statusie)
@@ -634,25 +665,27 @@ def initialize_openai_client(api_key: str | None = None) -> tuple[bool, str]:
         OPENAI_AVAILABLE = False
         return False, "Brak klucza OpenAI API"
     
-    try:        # Weryfikuj klucz przed inicjalizacją
-        key_is_valid, init_message = verify_openai_key(key_to_use)
-        
-        if key_is_valid:
-            client = OpenAI(api_key=key_to_use)
-            OPENAI_AVAILABLE = True
-            logger.info("OpenAI klient zainicjalizowany pomyślnie")
-            return True, "OpenAI zostało pomyślnie zainicjalizowane"
-        else:
+    verifier = get_key_verifier()
+    result = verifier.status(key_to_use) if wait is None else verifier.verify(key_to_use, timeout=wait)
+    
+    if result.is_valid:
+        try:
+            client = get_openai_client(key_to_use)
+        except (ValueError, TypeError, ImportError) as e:
             client = None
             OPENAI_AVAILABLE = False
-            logger.warning("Nieprawidłowy klucz OpenAI: %s", init_message)
-            return False, f"Błąd weryfikacji klucza: {init_message}"
-            
-    except (ValueError, TypeError, ImportError) as e:
-        client = None
-        OPENAI_AVAILABLE = False
-        logger.error("Błąd inicjalizacji OpenAI: %s", str(e))
-        return False, f"Błąd inicjalizacji: {str(e)}"
+            logger.error("Błąd inicjalizacji OpenAI: %s", str(e))
+            return False, f"Błąd inicjalizacji: {str(e)}"
+        OPENAI_AVAILABLE = True
+        logger.info("OpenAI klient zainicjalizowany pomyślnie")
+        return True, "OpenAI zostało pomyślnie zainicjalizowane"
+    
+    client = None
+    OPENAI_AVAILABLE = False
+    if result.is_pending:
+        return False, result.message
+    logger.warning("Nieprawidłowy klucz OpenAI: %s", result.message)
+    return False, f"Błąd weryfikacji klucza: {result.message}"
 
 # Początkowa inicjalizacja klienta OpenAI z .env
 initial_success, initial_message = initialize_openai_client()
@@ -673,6 +706,24 @@ def create_fallback_chart(title, message):
     </div>
     """
 
+
+def display_rerun_profile(report: ProfileReport):
+    """Wyświetla w sidebarze panel administracyjny z zestawieniem profilu przebiegu."""
+    with st.sidebar.expander(f"🩺 Profil przebiegu {report.trace_id}", expanded=False):
+        st.caption(f"{report.seconds * 1000:.0f} ms, {report.samples} próbek"
+                   + (f", szczyt pamięci {report.peak_memory_kib:.0f} KiB"
+                      if report.peak_memory_kib is not None else ""))
+        if not report.complete:
+            st.warning("Profil niepełny - przebieg przerwano lub przekroczył limit czasu")
+        if report.path:
+            st.caption(f"Zapisano: {report.path}")
+        st.markdown("**Czas własny funkcji**")
+        st.dataframe(pd.DataFrame(report.top_self), hide_index=True, use_container_width=True)
+        st.markdown("**Czas łączny funkcji**")
+        st.dataframe(pd.DataFrame(report.top_cumulative), hide_index=True, use_container_width=True)
+        st.markdown("**Największe alokacje (tracemalloc)**")
+        st.dataframe(pd.DataFrame(report.top_allocations), hide_index=True, use_container_width=True)
+
 # =============================================================================
 # FUNKCJE POMOCNICZE - WALIDACJA
 # =============================================================================
@@ -753,140 +804,67 @@ def validate_user_data(data):
 # FUNKCJE POMOCNICZE - MODEL I DANE
 # =============================================================================
 
-def calculate_5km_time(tempo):
+def load_reference_data():
     """
-    Przelicza tempo biegu (min/km) na całkowity czas w sekundach dla dystansu 5km.
-    Obsługuje formaty: 5.0, "5.0", "4:30"
+    Wczytuje dane referencyjne (src.core - jedna ramka współdzielona w procesie).
     
-    Args:
-        tempo: Tempo biegu w minutach na kilometr (float, str lub format MM:SS)
-        
     Returns:
-        float: Całkowity czas w sekundach
+        DataFrame: Dane referencyjne z czasami biegaczy (pusty przy błędzie)
     """
-    if isinstance(tempo, str) and ':' in tempo:
-        # Konwersja formatu MM:SS na minuty dziesiętne
-        minutes, seconds = tempo.split(':')
-        tempo_decimal = float(minutes) + float(seconds) / 60
-    else:
-        tempo_decimal = float(tempo)
-    
-    return tempo_decimal * 5 * 60
+    try:
+        return reference.load_reference_data(config.DATA_PATH)
+    except ReferenceDataError as e:
+        logger.error("Błąd ładowania danych referencyjnych: %s", str(e))
+        st.error("❌ Nie udało się załadować danych referencyjnych.")
+        return pd.DataFrame()
 
 
-@st.cache_resource(ttl=3600)  # Cache na 1 godzinę
-def load_model_cached(model_path):
+def load_reference_index():
     """
-    Ładuje model ML z cache'owaniem przez Streamlit.
+    Zwraca raz zbudowany, posortowany indeks czasów referencyjnych (percentyl, miejsce).
     
-    Args:        model_path: Ścieżka do modelu
-        
     Returns:
-        Model lub None w przypadku błędu
+        ReferenceIndex: Indeks zbudowany na danych z load_reference_data()
     """
     try:
-        model = load_model(model_path)
-        logger.info("Model %s załadowany pomyślnie", model_path)
-        return model
-    except (FileNotFoundError, ImportError, ValueError) as e:
-        logger.error("Błąd ładowania modelu %s: %s", model_path, str(e))
-        st.error("❌ Nie udało się załadować modelu. Spróbuj ponownie później.")
-        return None
+        return reference.load_reference_index(config.DATA_PATH)
+    except ReferenceDataError:
+        return ReferenceIndex(load_reference_data())
 
 
-@st.cache_data
-def load_reference_data():
+def load_cohort_cube():
     """
-    Wczytuje dane referencyjne z pliku CSV. Wynik jest cachowany przez Streamlit.
+    Zwraca raz zbudowaną kostkę statystyk (płeć × wiek) dla analizy porównawczej.
     
     Returns:
-        DataFrame: Dane referencyjne z czasami biegaczy
+        CohortCube: Kostka zbudowana na danych z load_reference_data()
     """
     try:
-        df = pd.read_csv(config.DATA_PATH)
-        logger.info("Dane referencyjne załadowane: %d rekordów", len(df))
-        return df
-    except (FileNotFoundError, pd.errors.EmptyDataError, pd.errors.ParserError) as e:
-        logger.error("Błąd ładowania danych referencyjnych: %s", str(e))
-        st.error("❌ Nie udało się załadować danych referencyjnych.")
-        return pd.DataFrame()
+        return reference.load_cohort_cube(config.DATA_PATH)
+    except ReferenceDataError:
+        return CohortCube(load_reference_data())
 
 
-def extract_data_with_regex(input_text):
+def load_scatter_density():
     """
-    Fallback function: ekstraktuje dane przy użyciu wyrażeń regularnych.    
-    Args:
-        input_text: Tekst wprowadzony przez użytkownika
-          Returns:
-        dict lub None: Wyekstraktowane dane lub None w przypadku błędu
+    Zwraca raz policzoną gęstość i próbkę punktów dla wykresu tempo vs czas
+    (src.core - trafienia pamięci podręcznej widoczne w metrykach).
+    
+    Returns:
+        ScatterDensity: Gęstość policzona na danych z load_reference_data()
     """
     try:
-        # Rozszerzone wyrażenia regularne
-        age_match = re.search(r'(\d{1,3})\s*(?:lat|l\b|roku|years?)', input_text.lower())
-        gender_match = re.search(r'(?:jestem\s+)?(kobiet[ąaę]|kobieta|mężczyzn[ąaę]|mężczyzna|k\b|m\b|facet|chłop)', input_text.lower())
-        
-        # Szukanie tempa w różnych formatach
-        pace_patterns = [
-            r'(\d{1,2}[.,]\d{1,2})\s*(?:min(?:ut)?(?:y|ę)?(?:\s*(?:na|\/|\s+)\s*km)?)',
-            r'(\d{1,2}:\d{2})\s*(?:min(?:ut)?(?:y|ę)?(?:\s*(?:na|\/|\s+)\s*km)?)?',
-            r'tempo[:\s]*(\d{1,2}[.,]\d{1,2})',
-            r'tempo[:\s]*(\d{1,2}:\d{2})',
-            r'biegam[^0-9]*(\d{1,2}[.,]\d{1,2})',
-            r'(\d{1,2}:\d{2})(?!\d)',  # Format MM:SS bez wymagania słów kluczowych
-            r'(\d{1,2}[.,]\d{1,2})(?!\d)'  # Format dziesiętny bez wymagania słów kluczowych
-        ]
-        
-        pace_match = None
-        for pattern in pace_patterns:
-            pace_match = re.search(pattern, input_text.lower())
-            if pace_match:
-                break
-        
-        # Walidacja i konwersja
-        if not age_match:
-            return None
-        age = int(age_match.group(1))
-        
-        if not gender_match:
-            return None
-        gender_text = gender_match.group(1).lower()
-        # Bardziej rozbudowana logika rozpoznawania płci - sprawdzamy najpierw dłuższe wzorce
-        if any(word in gender_text for word in ['kobiet']):
-            gender = 'K'
-        elif any(word in gender_text for word in ['mężczyzn', 'facet', 'chłop']):
-            gender = 'M'
-        elif gender_text.strip() == 'k':
-            gender = 'K'
-        elif gender_text.strip() == 'm':
-            gender = 'M'
-        else:
-            gender = 'M'  # domyślnie
-        
-        if not pace_match:
-            return None
-        pace_str = pace_match.group(1).replace(',', '.')
-        
-        # Konwersja formatu MM:SS na minuty dziesiętne
-        if ':' in pace_str:
-            minutes, seconds = pace_str.split(':')
-            pace = float(minutes) + float(seconds) / 60
-        else:
-            pace = float(pace_str)
-        
-        return {
-            'Wiek': age,
-            'Płeć': gender,
-            '5 km Tempo': pace
-        }
-        
-    except (ValueError, AttributeError, TypeError):
-        return None
+        return reference.load_scatter_density(config.DATA_PATH)
+    except ReferenceDataError:
+        return ScatterDensity(load_reference_data())
 
 
 def extract_user_data(input_text):
     """
     Ekstraktuje dane użytkownika z tekstu wprowadzonego w dowolnej formie.
     Wykorzystuje OpenAI GPT-4 do analizy tekstu (jeśli dostępne), z fallbackiem do regex.
+    Wyniki są zapamiętywane w pamięci podręcznej ekstrakcji (LRU + SQLite).
+    Na odpowiedź OpenAI czeka najwyżej Config.EXTRACTION_DEADLINE sekund.
     
     Args:
         input_text: Tekst wprowadzony przez użytkownika
@@ -894,128 +872,82 @@ def extract_user_data(input_text):
     Returns:
         dict lub None: Słownik z danymi użytkownika (wiek, płeć, tempo) lub None w przypadku błędu
     """
-    # Walidacja wejścia
-    if not input_text or not input_text.strip():
-        logger.warning("Pusty tekst wejściowy")
-        return None
-    
-    # Sprawdzenie dostępności OpenAI
-    if OPENAI_AVAILABLE and client:
-        prompt = f"""
-        Przeanalizuj poniższy tekst i wyodrębnij następujące informacje niezależnie od ich kolejności:
-        1. Wiek osoby (liczba całkowita)
-        2. Płeć (zamień na 'M' dla mężczyzny lub 'K' dla kobiety)
-        3. Tempo biegu na 5km (liczba z przecinkiem lub kropką, w minutach na kilometr)
-
-        Zwróć dane w formacie JSON z kluczami: 'Wiek', 'Płeć', '5 km Tempo'
-        Ignoruj dodatkowe informacje w tekście.
-        
-        Przykłady różnych formatów wejściowych:
-        "Kobieta lat 35, biegam 5.30 min/km" → {{"Wiek": 35, "Płeć": "K", "5 km Tempo": 5.3}}
-        "Tempo mam 6,20, jestem facetem i mam 42 lata" → {{"Wiek": 42, "Płeć": "M", "5 km Tempo": 6.2}}
-        "Mężczyzna, 28 lat, 4:45/km" → {{"Wiek": 28, "Płeć": "M", "5 km Tempo": 4.75}}
-        
-        Tekst do przeanalizowania: {input_text}
-        """        
-        try:
-            # Próba użycia OpenAI API
-            completion = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "Jesteś asystentem specjalizującym się w analizie danych biegowych. Twoje zadanie to dokładne wyodrębnienie wieku, płci i tempa biegu z tekstu, niezależnie od kolejności i formatu wprowadzania. Zawsze zwracaj poprawny JSON."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0,
-                max_tokens=200
-            )
-            
-            response = completion.choices[0].message.content
-            if response:
-                response = response.strip()
-                logger.info("Otrzymana odpowiedź z OpenAI: %s", response)
-                
-                # Próba parsowania JSON
-                try:
-                    data = json.loads(response)
-                    data_is_valid, data_errors = validate_user_data(data)
-                    
-                    if data_is_valid:
-                        logger.info("Dane wyekstraktowane pomyślnie przez OpenAI")
-                        return data
-                    else:
-                        logger.warning("Dane z OpenAI nieprawidłowe: %s", data_errors)
-                        
-                except json.JSONDecodeError as e:
-                    logger.warning("Błąd parsowania JSON z OpenAI: %s", str(e))
-                
-        except (ValueError, TypeError, KeyError) as e:
-            logger.error("Błąd OpenAI API: %s", str(e))
-    
-    # Fallback: użycie regex
-    logger.info("Próba ekstrakcji danych przy użyciu regex (OpenAI niedostępne: %s)", not OPENAI_AVAILABLE)
-    data = extract_data_with_regex(input_text)
-    
-    if data:
-        data_is_valid, data_errors = validate_user_data(data)
-        if data_is_valid:
-            logger.info("Dane wyekstraktowane pomyślnie przez regex")
-            return data
-        else:
-            logger.warning("Dane z regex nieprawidłowe: %s", data_errors)
-    
-    logger.error("Nie udało się wyekstraktować danych")
-    return None
+    outcome = data_processing.extract_user_data_detailed(
+        input_text,
+        openai_client=client if OPENAI_AVAILABLE else None,
+        deadline=config.EXTRACTION_DEADLINE
+    )
+    annotate(extraction_tier=outcome.tier)
+    return outcome.data
 
 
 def make_prediction(prediction_data):
     """
-    Wykonuje przewidywanie czasu półmaratonu.
+    Wykonuje przewidywanie czasu półmaratonu (src.core.Predictor).
+    Korzysta z natywnego silnika NumPy, a PyCaret służy jako zapasowa ścieżka.
+    Przy PREDICTION_WORKERS > 0 obliczenia - razem z percentylem i statystykami
+    kohorty - trafiają do puli procesów.
     
     Args:
-        prediction_data: Słownik z danymi użytkownika        
+        prediction_data: Słownik z danymi użytkownika (już zwalidowany)
+        
     Returns:
-        tuple lub None: (czas_w_sekundach, sformatowany_czas) lub None
+        RankedPrediction lub None: Przewidywanie z percentylem i oknem kohorty lub None
     """
     try:
-        model = load_model_cached(config.MODEL_PATH)
-        if model is None:
-            return None
-        
-        # Sprawdzenie dostępności PyCaret
-        if not PYCARET_AVAILABLE:
-            st.error("❌ PyCaret nie jest zainstalowany. Zainstaluj go komendą: pip install pycaret")
-            return None
-            
-        input_df = pd.DataFrame({
-            'Wiek': [prediction_data['Wiek']],
-            'Płeć': [prediction_data['Płeć']],
-            '5 km Tempo': [float(prediction_data['5 km Tempo'])],
-            '5 km Czas': [calculate_5km_time(prediction_data['5 km Tempo'])]
-        })
-        
-        prediction = predict_model(model, data=input_df)
-        if prediction is None:
-            return None
-            
-        result_seconds = round(prediction["prediction_label"].iloc[0], 2)
-        result_time = str(datetime.timedelta(seconds=int(result_seconds)))
-        
-        logger.info("Przewidywanie wykonane pomyślnie: %s", result_time)
-        return result_seconds, result_time
-        
-    except (ValueError, KeyError, ImportError) as e:
+        if config.PREDICTION_WORKERS > 0:
+            # Obliczenia w puli procesów - wątki sesji nie konkurują o GIL
+            with span("model_load"):
+                pool = get_worker_pool(config.PREDICTION_WORKERS, config.NATIVE_MODEL_PATH,
+                                       config.MODEL_PATH, config.DATA_PATH)
+            with span("prediction"):
+                prediction = pool.submit(prediction_data).result(timeout=config.PREDICTION_TIMEOUT)
+        else:
+            with span("model_load"):
+                predictor = get_predictor(config.NATIVE_MODEL_PATH, config.MODEL_PATH)
+                engine = predictor.load()
+            with span("prediction"):
+                prediction = predictor.predict(prediction_data, validate=False)
+            annotate(engine=engine)
+            with span("cohort"):
+                prediction = rank_prediction(prediction, prediction_data, load_reference_index(),
+                                             load_cohort_cube(), COHORT_AGE_RANGE)
+    except ModelUnavailableError as e:
+        logger.error("Model niedostępny: %s", str(e))
+        st.error(f"❌ {e}")
+        return None
+    except (PredictorError, FutureTimeoutError, BrokenProcessPool) as e:
         logger.error("Błąd podczas przewidywania: %s", str(e))
         st.error(f"❌ Wystąpił błąd podczas generowania przewidywania: {str(e)}")
         return None
+    return prediction
 
 
 def initialize_session_state():
     """Inicjalizuje stan sesji."""
     if 'user_input' not in st.session_state:
         st.session_state['user_input'] = "Np.: Mam 28 lat, jestem kobietą i biegam 5 km w tempie 4.45 min/km"
+    if 'session_id' not in st.session_state:
+        st.session_state['session_id'] = uuid.uuid4().hex
+    # Każdy przebieg skryptu oznacza sesję jako aktywną (metryka active_sessions)
+    touch_session(st.session_state['session_id'])
+
+
+def wait_for_key_verification():
+    """
+    Czeka w tle na wynik weryfikacji klucza z .env i odświeża aplikację,
+    gdy wynik jest gotowy (wymaga st.fragment, Streamlit >= 1.37).
+    """
+    fragment = getattr(st, "fragment", None)
+    if fragment is None:
+        return
+    
+    @fragment(run_every=1.0)
+    def _poll_verification():
+        if not get_key_verifier().status(config.OPENAI_API_KEY).is_pending:
+            st.rerun()
+    
+    _poll_verification()
 
 
 def display_openai_status():
@@ -1025,6 +957,11 @@ def display_openai_status():
         if OPENAI_AVAILABLE:
             st.success("✅ **Klucz OpenAI prawidłowy**")
             st.info("🤖 **AI włączone** - Aplikacja korzysta z zaawansowanej analizy tekstu")
+        elif get_key_verifier().status(config.OPENAI_API_KEY).is_pending:
+            # Weryfikacja trwa w tle - do tego czasu działa analiza regex
+            st.info("⏳ **Klucz OpenAI: weryfikacja...**")
+            st.caption("Do czasu weryfikacji używany jest podstawowy tryb analizy")
+            wait_for_key_verification()
         else:
             # Klucz istnieje ale nie jest prawidłowy
             st.error("❌ **Klucz OpenAI nieprawidłowy**")
@@ -1061,7 +998,9 @@ def display_sidebar_content():
                 if st.button("✅ Aktywuj", use_container_width=True):
                     if user_api_key:
                         with st.spinner("Aktywuję AI..."):
-                            success, message = initialize_openai_client(user_api_key)
+                            success, message = initialize_openai_client(
+                                user_api_key, wait=VERIFICATION_TIMEOUT
+                            )
                         if success:
                             st.success(f"✅ {message}")
                             st.rerun()
@@ -1082,7 +1021,7 @@ def display_sidebar_content():
                     st.markdown("**🔑 Klucz z pliku .env:**")
                     if st.button("🧪 Testuj klucz z .env", use_container_width=True):
                         with st.spinner("Testuję klucz z .env..."):
-                            success, message = initialize_openai_client()
+                            success, message = initialize_openai_client(wait=VERIFICATION_TIMEOUT)
                             if success:
                                 st.success(f"✅ {message}")
                                 st.rerun()
@@ -1097,7 +1036,7 @@ def display_sidebar_content():
                         # Sprawdź aktualny klucz
                         current_key = config.OPENAI_API_KEY if client else None
                         if current_key:
-                            key_is_valid, status_message = verify_openai_key(current_key)
+                            key_is_valid, status_message = verify_openai_key(current_key, force=True)
                             if key_is_valid:
                                 st.success(f"✅ {status_message}")
                             else:
@@ -1120,6 +1059,10 @@ def display_sidebar_content():
                 st.write("• Model: GPT-3.5-turbo")
                 st.write("• Funkcja: Analiza tekstu naturalnego")
                 st.write("• Backup: Analiza regex")
+                pool = openai_pool_stats()
+                if pool['requests']:
+                    st.write(f"• Połączenia HTTP: {pool['open_connections']} otwarte, "
+                             f"{pool['reuse_ratio']:.0%} zapytań bez nowego połączenia")
 
         st.divider()
 
@@ -1135,6 +1078,9 @@ def display_sidebar_content():
                 st.session_state['user_input'] = example
                 st.rerun()
 
+    if PLOTLY_AVAILABLE:
+        display_usage_stats()
+
 
 # =============================================================================
 # INTERFEJS UŻYTKOWNIKA - GŁÓWNY WIDOK
@@ -1143,6 +1089,8 @@ def display_sidebar_content():
 # Inicjalizacja
 initialize_session_state()
 reference_df = load_reference_data()
+reference_index = load_reference_index()
+cohort_cube = load_cohort_cube()
 
 # Nagłówek z emoji i opisem
 st.markdown("""
@@ -1236,29 +1184,33 @@ if wyczysc:
     st.rerun()
 
 # Logika główna
-if oblicz:
+def run_prediction_flow():
+    """Przepływ "Oblicz": ekstrakcja, walidacja, przewidywanie i analiza porównawcza."""
     if not user_input or user_input.strip() == "":
         st.warning("⚠️ Proszę wprowadzić dane.")
     else:
-        with st.spinner('🤖 Analizuję dane...'):
+        with st.spinner('🤖 Analizuję dane...'), span("extraction"):
             user_data = extract_user_data(user_input)
             
         if user_data is None:
+            PREDICTION_ERRORS.inc(type="ExtractionError")
             st.error("❌ Nie udało się przetworzyć danych. Upewnij się, że podałeś wszystkie wymagane informacje.")
         else:
             # Walidacja danych
-            valid_data, errors_list = validate_user_data(user_data)
+            with span("validation"):
+                valid_data, errors_list = validate_user_data(user_data)
 
             if not valid_data:
+                PREDICTION_ERRORS.inc(type="InvalidInputError")
                 st.warning("⚠️ Problemy z danymi:")
                 for error in errors_list:
                     st.write(f"• {error}")
             else:
                 with st.spinner('🏃‍♂️ Przewiduję czas...'):
-                    result = make_prediction(user_data)
+                    ranked = make_prediction(user_data)
                 
-                if result:
-                    predicted_seconds, predicted_time = result
+                if ranked:
+                    predicted_seconds, predicted_time = ranked.seconds, ranked.time
                     
                     # Wyświetlenie wyniku
                     st.markdown(f"""
@@ -1276,18 +1228,15 @@ if oblicz:
                     
                     # Porównanie z danymi referencyjnymi
                     if not reference_df.empty:
-                        # Filtrowanie danych dla podobnej grupy wiekowej i płci
-                        age_range = 5
-                        similar_data = reference_df[
-                            (reference_df['Wiek'] >= user_data['Wiek'] - age_range) &
-                            (reference_df['Wiek'] <= user_data['Wiek'] + age_range) &
-                            (reference_df['Płeć'] == user_data['Płeć'])                        ]
+                        # Percentyl i okno kohorty (płeć, wiek ± age_range) policzone
+                        # razem z przewidywaniem - także w procesie roboczym
+                        age_range = COHORT_AGE_RANGE
                         
                         col1, col2, col3 = st.columns(3)
                         
                         with col1:
-                            if len(similar_data) > 0:
-                                avg_time = similar_data['Czas'].mean()
+                            if ranked.cohort_count > 0:
+                                avg_time = ranked.cohort_mean_time
                                 avg_time_formatted = str(datetime.timedelta(seconds=int(avg_time)))
                                 delta = predicted_seconds - avg_time
                                 delta_formatted = f"{'+' if delta > 0 else ''}{int(delta)} sek"
@@ -1300,15 +1249,12 @@ if oblicz:
                                 st.metric("Średnia dla podobnych", "Brak danych", "")
                         
                         with col2:
-                            percentile = 50
-                            if len(reference_df) > 0:
-                                percentile = (reference_df['Czas'] < predicted_seconds).mean() * 100
-                            st.metric("Percentyl", f"{percentile:.0f}%", "")
+                            st.metric("Percentyl", f"{ranked.percentile:.0f}%", "")
                         
                         with col3:
-                            if len(similar_data) > 0:
-                                better_count = (similar_data['Czas'] > predicted_seconds).sum()
-                                total_count = len(similar_data)
+                            if ranked.cohort_count > 0:
+                                better_count = ranked.cohort_slower
+                                total_count = ranked.cohort_count
                                 percentage = (better_count / total_count) * 100 if total_count > 0 else 0
                                 st.metric("Lepszy od", f"{percentage:.0f}%", f"z {total_count} osób")
                             else:
@@ -1316,14 +1262,24 @@ if oblicz:
                           # Wykres porównawczy
                         st.markdown("#### 📈 Rozkład czasów w Twojej grupie")
                         
-                        if PLOTLY_AVAILABLE and len(similar_data) > 0:
+                        histogram_span = start_span("figures.cohort_histogram")
+                        if PLOTLY_AVAILABLE and ranked.cohort_count > 0:
                             try:
                                 fig = go.Figure()
                                 
-                                # Histogram czasów podobnych biegaczy
-                                fig.add_trace(go.Histogram(
-                                    x=similar_data['Czas'] / 60,  # Konwersja na minuty
-                                    nbinsx=20,
+                                # Histogram czasów podobnych biegaczy - liczony na serwerze
+                                # (w minutach) i cachowany w kostce dla danej kohorty
+                                bins = cohort_cube.histogram(
+                                    user_data['Płeć'],
+                                    user_data['Wiek'] - age_range,
+                                    user_data['Wiek'] + age_range,
+                                    nbins=20,
+                                    scale=60
+                                )
+                                fig.add_trace(go.Bar(
+                                    x=bins.centers,
+                                    y=bins.counts,
+                                    width=bins.width,
                                     name='Podobni biegacze',
                                     opacity=0.7,
                                     marker_color='lightblue'
@@ -1343,7 +1299,8 @@ if oblicz:
                                     xaxis_title="Czas (minuty)",
                                     yaxis_title="Liczba biegaczy",
                                     template="plotly_dark",
-                                    showlegend=False
+                                    showlegend=False,
+                                    bargap=0
                                 )
                                 
                                 st.plotly_chart(fig, use_container_width=True)
@@ -1352,47 +1309,58 @@ if oblicz:
                                 logger.error("Błąd tworzenia wykresu: %s", str(e))
                                 st.markdown(create_fallback_chart(
                                     "Rozkład czasów w Twojej grupie",
-                                    f"Wykres porównujący Twój przewidywany czas z {len(similar_data)} podobnymi biegaczami"
+                                    f"Wykres porównujący Twój przewidywany czas z {ranked.cohort_count} podobnymi biegaczami"
                                 ), unsafe_allow_html=True)
                         else:
                             st.markdown(create_fallback_chart(
                                 "Rozkład czasów w Twojej grupie",
-                                f"Analiza porównawcza z {len(similar_data)} podobnymi biegaczami" if len(similar_data) > 0 else "Brak danych do porównania"
+                                f"Analiza porównawcza z {ranked.cohort_count} podobnymi biegaczami" if ranked.cohort_count > 0 else "Brak danych do porównania"
                             ), unsafe_allow_html=True)
+                        histogram_span.close()
                         
                         # Analiza tempa vs czas
                         st.markdown("#### 🎯 Zależność tempo vs czas półmaratonu")
                         
+                        tempo_chart_span = start_span("figures.tempo_vs_time")
                         if PLOTLY_AVAILABLE and len(reference_df) > 10:
-                            try:                                # Scatter plot tempo vs czas półmaratonu
-                                fig = px.scatter(
-                                    reference_df, 
-                                    x='5 km Tempo', 
-                                    y='Czas',
-                                    color='Płeć',
-                                    title="Zależność między tempem na 5km a czasem półmaratonu",
-                                    labels={
-                                        '5 km Tempo': 'Tempo na 5km (min/km)',
-                                        'Czas': 'Czas półmaratonu (sekundy)',
-                                        'Płeć': 'Płeć'
-                                    },
-                                    template="plotly_dark"
-                                )
+                            try:
+                                if use_density_mode(len(reference_df), config.SCATTER_DENSITY_THRESHOLD):
+                                    # Duży zbiór: histogram 2D + próbka punktów + punkt użytkownika
+                                    fig = create_tempo_density_chart(
+                                        load_scatter_density(),
+                                        user_data['5 km Tempo'],
+                                        predicted_seconds
+                                    )
+                                else:
+                                    # Scatter plot tempo vs czas półmaratonu
+                                    fig = px.scatter(
+                                        reference_df, 
+                                        x='5 km Tempo', 
+                                        y='Czas',
+                                        color='Płeć',
+                                        title="Zależność między tempem na 5km a czasem półmaratonu",
+                                        labels={
+                                            '5 km Tempo': 'Tempo na 5km (min/km)',
+                                            'Czas': 'Czas półmaratonu (sekundy)',
+                                            'Płeć': 'Płeć'
+                                        },
+                                        template="plotly_dark"
+                                    )
                                 
-                                # Dodaj punkt użytkownika
-                                fig.add_trace(go.Scatter(
-                                    x=[user_data['5 km Tempo']],
-                                    y=[predicted_seconds],
-                                    mode='markers',
-                                    marker=dict(size=15, color='red', symbol='star'),
-                                    name='Twój wynik',
-                                    showlegend=True
-                                ))
+                                    # Dodaj punkt użytkownika
+                                    fig.add_trace(go.Scatter(
+                                        x=[user_data['5 km Tempo']],
+                                        y=[predicted_seconds],
+                                        mode='markers',
+                                        marker=dict(size=15, color='red', symbol='star'),
+                                        name='Twój wynik',
+                                        showlegend=True
+                                    ))
                                 
-                                fig.update_layout(
-                                    height=500,
-                                    showlegend=True
-                                )
+                                    fig.update_layout(
+                                        height=500,
+                                        showlegend=True
+                                    )
                                 
                                 st.plotly_chart(fig, use_container_width=True)
                                 
@@ -1407,6 +1375,7 @@ if oblicz:
                                 "Zależność tempo vs czas półmaratonu",
                                 "Analiza korelacji między tempem na 5km a czasem półmaratonu"
                             ), unsafe_allow_html=True)
+                        tempo_chart_span.close()
                         
                         # Dodatkowe statystyki
                         st.markdown("#### 📋 Dodatkowe statystyki")
@@ -1420,18 +1389,29 @@ if oblicz:
                             st.write(f"• Przewidywany czas: {predicted_time}")
                         
                         with col2:
-                            if len(similar_data) > 0:
+                            if ranked.cohort_count > 0:
                                 st.markdown("**Statystyki grupy porównawczej:**")
-                                st.write(f"• Liczba osób: {len(similar_data)}")
-                                st.write(f"• Średnie tempo 5km: {similar_data['5 km Tempo'].mean():.2f} min/km")
-                                st.write(f"• Średni czas półmaratonu: {str(datetime.timedelta(seconds=int(similar_data['Czas'].mean())))}")
-                                best_time = similar_data['Czas'].min()
+                                st.write(f"• Liczba osób: {ranked.cohort_count}")
+                                st.write(f"• Średnie tempo 5km: {ranked.cohort_mean_tempo:.2f} min/km")
+                                st.write(f"• Średni czas półmaratonu: {str(datetime.timedelta(seconds=int(ranked.cohort_mean_time)))}")
+                                best_time = ranked.cohort_min_time
                                 st.write(f"• Najlepszy czas: {str(datetime.timedelta(seconds=int(best_time)))}")
                     
                     st.session_state['last_result_success'] = True
+                    if PLOTLY_AVAILABLE:
+                        increment_prediction_counter()
                 else:
                     st.session_state['last_result_success'] = False
 
+
+if oblicz:
+    # Profilowany przebieg dzieli identyfikator z profilem (profile-<trace_id>.json)
+    with start_trace("oblicz", config.TRACE_FILE,
+                     trace_id=rerun_profile.trace_id if rerun_profile else None) as request_trace:
+        run_prediction_flow()
+    if PLOTLY_AVAILABLE:
+        record_request_trace(request_trace)
+
 # Wyświetl sidebar
 display_sidebar_content()
 
@@ -1445,4 +1425,8 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# Zakończenie profilowania przebiegu (zestawienie top-N w panelu administracyjnym)
+if rerun_profile is not None:
+    display_rerun_profile(rerun_profile.stop())
+
 # =============================================================================
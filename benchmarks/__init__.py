@@ -0,0 +1 @@
+# Pakiet benchmarks - mikro-benchmarki wydajności kalkulatora biegacza
@@ -0,0 +1,152 @@
+# =============================================================================
+# MIKRO-BENCHMARK EKSTRAKCJI DANYCH WYRAŻENIAMI REGULARNYMI
+# Porównanie jednoprzebiegowego tokenizera z poprzednią implementacją:
+#   python -m benchmarks.regex_extraction
+# =============================================================================
+
+import argparse
+import os
+import re
+import sys
+import timeit
+from typing import Callable, Optional
+
+# Dodanie głównego katalogu do ścieżki
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.validation import extract_data_with_regex  # pylint: disable=wrong-import-position
+
+# Krótkie wejścia - typowe zdania z pola tekstowego i przykładów w sidebarze
+SHORT_INPUTS = [
+    "Mam 28 lat, jestem kobietą, tempo 5km: 4:45",
+    "35 lat, mężczyzna, biegam 5km w 5:20",
+    "Kobieta, 42 lata, mój czas na 5km to 6:10",
+    "Facet, 30 lat, 5 kilometrów w 4.5 minuty na km",
+    "K 25 lat 5,30 min/km",
+]
+
+# Długi wklejony akapit - dane na końcu, przed nimi dużo tekstu bez dopasowań
+LONG_INPUT = (
+    "Zacząłem biegać dwa sezony temu, najpierw po parku, potem z grupą biegową "
+    "w każdą sobotę rano. Trener mówi, że powinienem spokojniej zaczynać "
+    "treningi i pilnować regeneracji, bo wiosną przesadziłem z objętością. "
+) * 12 + "Podsumowując: jestem facetem, mam 41 lat i biegam 5 km w tempie 5:05 min/km."
+
+
+def legacy_extract_data_with_regex(user_input: str) -> Optional[dict]:
+    """
+    Poprzednia implementacja extract_data_with_regex (siedem kolejnych re.search),
+    zachowana jako punkt odniesienia dla testów zgodności i benchmarku.
+    
+    Args:
+        user_input: Tekst wprowadzony przez użytkownika
+        
+    Returns:
+        dict lub None: Wyekstraktowane dane lub None w przypadku błędu
+    """
+    try:
+        # Rozszerzone wyrażenia regularne
+        age_match = re.search(r'(\d{1,3})\s*(?:lat|l\b|roku|years?)', user_input.lower())
+        gender_match = re.search(r'(?:jestem\s+)?(kobiet[ąaę]|kobieta|mężczyzn[ąaę]|mężczyzna|k\b|m\b|facet|chłop)', user_input.lower())
+        
+        # Szukanie tempa w różnych formatach
+        pace_patterns = [
+            r'(\d{1,2}[.,]\d{1,2})\s*(?:min(?:ut)?(?:y|ę)?(?:\s*(?:na|\/|\s+)\s*km)?)',
+            r'(\d{1,2}:\d{2})\s*(?:min(?:ut)?(?:y|ę)?(?:\s*(?:na|\/|\s+)\s*km)?)?',
+            r'tempo[:\s]*(\d{1,2}[.,]\d{1,2})',
+            r'tempo[:\s]*(\d{1,2}:\d{2})',
+            r'biegam[^0-9]*(\d{1,2}[.,]\d{1,2})',
+            r'(\d{1,2}:\d{2})(?!\d)',  # Format MM:SS bez wymagania słów kluczowych
+            r'(\d{1,2}[.,]\d{1,2})(?!\d)'  # Format dziesiętny bez wymagania słów kluczowych
+        ]
+        
+        pace_match = None
+        for pattern in pace_patterns:
+            pace_match = re.search(pattern, user_input.lower())
+            if pace_match:
+                break
+        
+        # Walidacja i konwersja
+        if not age_match:
+            return None
+        age = int(age_match.group(1))
+        
+        if not gender_match:
+            return None
+        gender_text = gender_match.group(1).lower()
+        # Bardziej rozbudowana logika rozpoznawania płci - sprawdzamy najpierw dłuższe wzorce
+        if any(word in gender_text for word in ['kobiet']):
+            gender = 'K'
+        elif any(word in gender_text for word in ['mężczyzn', 'facet', 'chłop']):
+            gender = 'M'
+        elif gender_text.strip() == 'k':
+            gender = 'K'
+        elif gender_text.strip() == 'm':
+            gender = 'M'
+        else:
+            gender = 'M'  # domyślnie
+        
+        if not pace_match:
+            return None
+        pace_str = pace_match.group(1).replace(',', '.')
+        
+        # Konwersja formatu MM:SS na minuty dziesiętne
+        if ':' in pace_str:
+            minutes, seconds = pace_str.split(':')
+            pace = float(minutes) + float(seconds) / 60
+        else:
+            pace = float(pace_str)
+        
+        return {
+            'Wiek': age,
+            'Płeć': gender,
+            '5 km Tempo': pace
+        }
+        
+    except (ValueError, AttributeError, TypeError):
+        return None
+
+
+def time_per_call(func: Callable[[str], Optional[dict]], inputs: list[str],
+                  repeat: int = 5, number: int = 2000) -> float:
+    """Najlepszy z `repeat` pomiarów średniego czasu jednego wywołania (w µs)."""
+    timer = timeit.Timer(lambda: [func(text) for text in inputs])
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / (number * len(inputs)) * 1e6
+
+
+def run(number: int = 2000) -> dict:
+    """
+    Mierzy czas wywołania obu implementacji dla krótkich i długich wejść.
+
+    Returns:
+        dict: {nazwa_przypadku: {implementacja: µs_na_wywołanie}}
+    """
+    cases = {'short': SHORT_INPUTS, 'long': [LONG_INPUT]}
+    implementations = {'legacy': legacy_extract_data_with_regex,
+                       'single_pass': extract_data_with_regex}
+    results = {}
+    for case, inputs in cases.items():
+        case_number = number if case == 'short' else max(number // 10, 1)
+        results[case] = {name: time_per_call(func, inputs, number=case_number)
+                         for name, func in implementations.items()}
+    return results
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Punkt wejścia benchmarku."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=2000,
+                        help="Liczba wywołań na pomiar dla krótkich wejść")
+    args = parser.parse_args(argv)
+
+    for case, timings in run(args.number).items():
+        speedup = timings['legacy'] / timings['single_pass']
+        print(f"{case:>6}: legacy {timings['legacy']:8.2f} µs/wywołanie, "
+              f"single_pass {timings['single_pass']:8.2f} µs/wywołanie "
+              f"(x{speedup:.2f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+# =============================================================================
+# TEST OBCIĄŻENIOWY SERWISU HTTP
+# Równoległe żądania POST /predict (lub /predict/batch) do serwisu src.service:
+#   python -m benchmarks.service_load                      # serwis w tle
+#   python -m benchmarks.service_load --url http://127.0.0.1:8000 --clients 32
+# =============================================================================
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+from urllib.parse import urlsplit
+
+import numpy as np
+
+# Dodanie głównego katalogu do ścieżki
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RUNNER = {'Wiek': 28, 'Płeć': 'M', '5 km Tempo': 4.75}
+
+
+@dataclass
+class LoadReport:
+    """Wyniki testu obciążeniowego."""
+    seconds: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+    status_counts: dict[int, int] = field(default_factory=dict)
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies)
+
+    def summary(self) -> str:
+        if not self.latencies:
+            return "Brak wykonanych żądań"
+        latencies = np.array(self.latencies) * 1000
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(self.status_counts.items()))
+        return "\n".join([
+            f"Żądania: {self.requests} w {self.seconds:.2f} s "
+            f"({self.requests / self.seconds:,.0f} żądań/s)",
+            f"Statusy: {statuses}",
+            f"Opóźnienie [ms]: p50 {np.percentile(latencies, 50):.2f}, "
+            f"p95 {np.percentile(latencies, 95):.2f}, p99 {np.percentile(latencies, 99):.2f}, "
+            f"max {latencies.max():.2f}",
+        ])
+
+
+def run_load(url: str, path: str, payload: bytes, clients: int, duration: float) -> LoadReport:
+    """
+    Wysyła żądania z `clients` wątków (połączenia keep-alive) przez `duration` sekund.
+
+    Args:
+        url: Bazowy URL serwisu
+        path: Ścieżka endpointu
+        payload: Treść żądania (JSON)
+        clients: Liczba równoległych klientów
+        duration: Czas trwania testu w sekundach
+
+    Returns:
+        LoadReport: Liczba żądań, opóźnienia i statusy odpowiedzi
+    """
+    target = urlsplit(url)
+    report = LoadReport()
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    headers = {'Content-Type': 'application/json'}
+
+    def client():
+        connection = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+        latencies, statuses = [], {}
+        try:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                connection.request("POST", path, body=payload, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+        finally:
+            connection.close()
+        with lock:
+            report.latencies.extend(latencies)
+            for status, count in statuses.items():
+                report.status_counts[status] = report.status_counts.get(status, 0) + count
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Punkt wejścia testu obciążeniowego."""
+    parser = argparse.ArgumentParser(description="Test obciążeniowy serwisu HTTP")
+    parser.add_argument('--url', default=None,
+                        help="Adres działającego serwisu (domyślnie serwis uruchamiany w tle)")
+    parser.add_argument('--clients', type=int, default=16, help="Liczba równoległych klientów")
+    parser.add_argument('--duration', type=float, default=5.0, help="Czas trwania w sekundach")
+    parser.add_argument('--batch', type=int, default=0,
+                        help="Rozmiar wsadu dla /predict/batch (0 = pojedyncze /predict)")
+    args = parser.parse_args(argv)
+
+    server = thread = None
+    url = args.url
+    if url is None:
+        from src.service import create_app, start_background_server  # pylint: disable=import-outside-toplevel
+        server, thread, url = start_background_server(create_app())
+
+    path = "/predict/batch" if args.batch else "/predict"
+    body = [RUNNER] * args.batch if args.batch else RUNNER
+    try:
+        report = run_load(url, path, json.dumps(body).encode("utf-8"), args.clients, args.duration)
+    finally:
+        if server is not None:
+            server.should_exit = True
+            thread.join()
+
+    print(f"{path} @ {url}, klienci: {args.clients}")
+    print(report.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
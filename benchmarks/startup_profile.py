@@ -0,0 +1,114 @@
+# =============================================================================
+# PROFIL CZASU STARTU - IMPORTY MODUŁÓW
+# Rozbicie czasu importu modułów aplikacji na pakiety (python -X importtime):
+#   python -m benchmarks.startup_profile
+#   python -m benchmarks.startup_profile --module app --top 30
+# =============================================================================
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Moduły ładowane przy starcie aplikacji (bez samego skryptu Streamlit)
+CORE_MODULES = [
+    "src.core",
+    "src.utils.validation",
+    "src.utils.data_processing",
+    "src.utils.model_utils",
+    "src.utils.visualization",
+]
+
+# Ciężkie pakiety, które nie powinny być importowane przy starcie
+LAZY_PACKAGES = ["pycaret"]
+
+# Wiersz -X importtime: "import time:   self [us] | cumulative | imported package"
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)')
+
+
+@dataclass
+class ImportTiming:
+    """Czas importu modułu (w sekundach) i głębokość w drzewie importów."""
+    module: str
+    self_seconds: float
+    cumulative_seconds: float
+    depth: int
+
+
+def parse_importtime(stderr: str) -> list[ImportTiming]:
+    """Odczytuje wiersze -X importtime (kolejność: moduły zagnieżdżone przed rodzicem)."""
+    timings = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            timings.append(ImportTiming(module, int(self_us) / 1e6, int(cumulative_us) / 1e6,
+                                        (len(indent) - 1) // 2))
+    return timings
+
+
+def profile_imports(modules: list[str], python: str = sys.executable) -> tuple[float, list[ImportTiming]]:
+    """
+    Importuje moduły w świeżym interpreterze z -X importtime.
+
+    Args:
+        modules: Nazwy modułów do zaimportowania
+        python: Interpreter
+
+    Returns:
+        tuple: (czas importu zmierzony w procesie w sekundach, lista czasów modułów)
+    """
+    code = ("import sys, time; sys.path.insert(0, %r); started = time.perf_counter(); %s; "
+            "print(time.perf_counter() - started)"
+            % (ROOT_DIR, "; ".join(f"import {module}" for module in modules)))
+    completed = subprocess.run([python, "-X", "importtime", "-c", code], cwd=ROOT_DIR,
+                               capture_output=True, text=True, check=True)
+    return float(completed.stdout.strip().splitlines()[-1]), parse_importtime(completed.stderr)
+
+
+def package_breakdown(timings: list[ImportTiming]) -> list[tuple[str, float]]:
+    """
+    Sumuje czas importu według pakietu głównego (np. 'pycaret', 'pandas').
+
+    Liczony jest czas własny wszystkich modułów pakietu, więc suma nie
+    zawiera podwójnie modułów zagnieżdżonych.
+    """
+    totals: dict[str, float] = {}
+    for timing in timings:
+        package = timing.module.split('.')[0]
+        totals[package] = totals.get(package, 0.0) + timing.self_seconds
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Punkt wejścia profilu startu."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", action="append", default=None,
+                        help="Moduł do profilowania (domyślnie moduły src.utils)")
+    parser.add_argument("--top", type=int, default=15, help="Liczba wyświetlanych pakietów")
+    args = parser.parse_args(argv)
+
+    modules = args.module or CORE_MODULES
+    started = time.perf_counter()
+    total, timings = profile_imports(modules)
+    print(f"Import {', '.join(modules)}: {total:.2f} s "
+          f"(z uruchomieniem interpretera {time.perf_counter() - started:.2f} s)")
+    print(f"{'pakiet':<28}{'czas własny [s]':>16}")
+    for package, seconds in package_breakdown(timings)[:args.top]:
+        print(f"{package:<28}{seconds:>16.3f}")
+
+    loaded = {timing.module.split('.')[0] for timing in timings}
+    eager = [package for package in LAZY_PACKAGES if package in loaded]
+    if eager:
+        print(f"Uwaga: przy starcie importowane są pakiety ładowane leniwie: {', '.join(eager)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
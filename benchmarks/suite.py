@@ -0,0 +1,456 @@
+# =============================================================================
+# ZESTAW BENCHMARKÓW CAŁEJ ŚCIEŻKI ŻĄDANIA
+# Pomiar każdego etapu (ekstrakcja, walidacja, cechy, przewidywanie, dane
+# referencyjne, kohorty, wykresy), zapis JSON z metadanymi środowiska
+# i porównanie z zapisaną linią bazową:
+#   python -m benchmarks.suite -o wyniki.json
+#   python -m benchmarks.suite --baseline benchmarks/baseline.json
+#   python -m benchmarks.suite compare benchmarks/baseline.json wyniki.json
+# =============================================================================
+
+import argparse
+import datetime
+import importlib.metadata
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Dodanie głównego katalogu do ścieżki
+sys.path.append(ROOT_DIR)
+
+from benchmarks.regex_extraction import LONG_INPUT, SHORT_INPUTS  # pylint: disable=wrong-import-position
+
+# Stałe konfiguracyjne
+SUITE_FORMAT_VERSION = 1
+DATA_PATH = os.path.join(ROOT_DIR, "df_cleaned.csv")
+BASELINE_PATH = os.path.join(ROOT_DIR, "benchmarks", "baseline.json")
+# Domyślny próg regresji: wzrost czasu o ponad 25% względem linii bazowej
+REGRESSION_THRESHOLD = 0.25
+# Minimalny czas jednego pomiaru (w sekundach) i liczba powtórzeń
+MIN_MEASURE_SECONDS = 0.2
+REPEAT = 5
+QUICK_MIN_MEASURE_SECONDS = 0.02
+QUICK_REPEAT = 3
+
+# Pakiety, których wersje trafiają do metadanych wyników
+TRACKED_PACKAGES = ["numpy", "pandas", "plotly", "streamlit", "pycaret", "scikit-learn", "orjson"]
+
+# Dodatkowe sformułowania (poza przykładami z benchmarks.regex_extraction)
+EXTRA_PHRASINGS = [
+    "Jestem kobietą, mam 31 lat, 5 km biegam w 27 minut",
+    "Mężczyzna lat 52, tempo 6:15 min/km",
+    "kobieta 45 lat tempo 5.45",
+    "Mam 19 lat i jestem chłopakiem, moje tempo to 4 minuty 10 sekund na kilometr",
+    "Biegaczka, 38 l., 5km: 5:50/km",
+    "M, 60 lat, 7:05",
+    "Pani 27 lat - tempo 5,15 min/km na piątce",
+    "Mam 33 lata. Płeć: mężczyzna. Tempo na 5 km: 4:55",
+]
+CORPUS = SHORT_INPUTS + EXTRA_PHRASINGS
+
+RUNNER = {'Wiek': 28, 'Płeć': 'M', '5 km Tempo': 4.75}
+BATCH_SIZE = 10_000
+
+
+@dataclass
+class Stage:
+    """Etap ścieżki żądania: setup() zwraca mierzoną funkcję bezargumentową."""
+    name: str
+    description: str
+    setup: Callable[[], Callable[[], object]]
+    items: int = 1  # liczba elementów przetwarzanych w jednym wywołaniu
+
+
+# -----------------------------------------------------------------------------
+# Etapy
+# -----------------------------------------------------------------------------
+
+def _regex_corpus():
+    from src.utils.validation import extract_data_with_regex  # pylint: disable=import-outside-toplevel
+    return lambda: [extract_data_with_regex(text) for text in CORPUS]
+
+
+def _regex_long():
+    from src.utils.validation import extract_data_with_regex  # pylint: disable=import-outside-toplevel
+    return lambda: extract_data_with_regex(LONG_INPUT)
+
+
+def _validate():
+    from src.utils.validation import validate_user_data  # pylint: disable=import-outside-toplevel
+    return lambda: validate_user_data(RUNNER)
+
+
+def _calculate_5km_time():
+    from src.core.predictor import calculate_5km_time  # pylint: disable=import-outside-toplevel
+    return lambda: (calculate_5km_time(4.75), calculate_5km_time("4:45"))
+
+
+def _predict_single():
+    from src.core import get_predictor  # pylint: disable=import-outside-toplevel
+    predictor = get_predictor()
+    return lambda: predictor.predict(RUNNER, validate=False)
+
+
+def _predict_batch():
+    from src.core import get_predictor  # pylint: disable=import-outside-toplevel
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        'Wiek': rng.integers(18, 71, BATCH_SIZE),
+        'Płeć': rng.choice(['M', 'K'], BATCH_SIZE),
+        '5 km Tempo': np.round(rng.uniform(3.5, 8.0, BATCH_SIZE), 2),
+    })
+    predictor = get_predictor()
+    return lambda: predictor.predict_many(frame)
+
+
+def _reference_csv_cold():
+    from src.utils.reference_data import read_reference_data  # pylint: disable=import-outside-toplevel
+    return lambda: read_reference_data(DATA_PATH, use_cache=False)
+
+
+def _reference_columnar_cache():
+    from src.utils.reference_data import read_reference_data  # pylint: disable=import-outside-toplevel
+    read_reference_data(DATA_PATH)  # zbudowanie pamięci podręcznej, jeśli jej brak
+    return lambda: read_reference_data(DATA_PATH)
+
+
+def _reference_warm():
+    from src.core import load_reference_data  # pylint: disable=import-outside-toplevel
+    load_reference_data(DATA_PATH)
+    return lambda: load_reference_data(DATA_PATH)
+
+
+def _cohort_statistics():
+    # Statystyki z sekcji "Analiza porównawcza" aplikacji (okno wiek ± 5 lat)
+    from src.core import load_cohort_cube  # pylint: disable=import-outside-toplevel
+    cube = load_cohort_cube(DATA_PATH)
+    seconds = 6231.64
+
+    def run():
+        window = cube.around(RUNNER['Płeć'], RUNNER['Wiek'], 5)
+        return (window.count, window.mean_time, window.mean_tempo, window.min_time,
+                window.count_slower(seconds))
+    return run
+
+
+def _cohort_percentile():
+    from src.core import load_reference_index  # pylint: disable=import-outside-toplevel
+    index = load_reference_index(DATA_PATH)
+    return lambda: index.percentile(6231.64)
+
+
+def _figure_comparison(cold: bool):
+    def setup():
+        from src.core import load_cohort_cube, load_reference_data  # pylint: disable=import-outside-toplevel
+        from src.utils import visualization  # pylint: disable=import-outside-toplevel
+        reference_df = load_reference_data(DATA_PATH)
+        cube = load_cohort_cube(DATA_PATH)
+
+        def run():
+            if cold:
+                visualization.clear_figure_cache()
+            return visualization.create_gender_comparison_chart(reference_df, 'M', 103.86, cube)
+        return run
+    return setup
+
+
+def _figure_age_comparison():
+    from src.core import load_cohort_cube, load_reference_data  # pylint: disable=import-outside-toplevel
+    from src.utils import visualization  # pylint: disable=import-outside-toplevel
+    reference_df = load_reference_data(DATA_PATH)
+    cube = load_cohort_cube(DATA_PATH)
+    return lambda: visualization.create_age_comparison_chart(reference_df, 28, 103.86, cube)
+
+
+def _figure_tempo_density():
+    from src.core import load_reference_data  # pylint: disable=import-outside-toplevel
+    from src.utils import visualization  # pylint: disable=import-outside-toplevel
+    from src.utils.density import ScatterDensity  # pylint: disable=import-outside-toplevel
+    density = ScatterDensity(load_reference_data(DATA_PATH))
+    return lambda: visualization.create_tempo_density_chart(density, 4.75, 6231.64)
+
+
+STAGES = [
+    Stage("regex.extract_corpus", "extract_data_with_regex - korpus polskich sformułowań",
+          _regex_corpus, items=len(CORPUS)),
+    Stage("regex.extract_long", "extract_data_with_regex - długi akapit", _regex_long),
+    Stage("validation.validate_user_data", "validate_user_data", _validate),
+    Stage("features.calculate_5km_time", "calculate_5km_time (liczba i MM:SS)",
+          _calculate_5km_time, items=2),
+    Stage("prediction.single", "make_prediction - jeden biegacz (Predictor.predict)",
+          _predict_single),
+    Stage("prediction.batch", f"make_prediction wsadowo - {BATCH_SIZE} biegaczy (predict_many)",
+          _predict_batch, items=BATCH_SIZE),
+    Stage("reference.load_cold_csv", "load_reference_data - zimny start (parsowanie CSV)",
+          _reference_csv_cold),
+    Stage("reference.load_columnar_cache", "load_reference_data - kolumnowa pamięć podręczna (mmap)",
+          _reference_columnar_cache),
+    Stage("reference.load_warm", "load_reference_data - ciepły (współdzielona ramka)",
+          _reference_warm),
+    Stage("cohort.statistics", "statystyki kohorty z app.py (liczność, średnie, minimum, wolniejsi)",
+          _cohort_statistics),
+    Stage("cohort.percentile", "percentyl w danych referencyjnych", _cohort_percentile),
+    Stage("figures.gender_comparison_cold", "create_gender_comparison_chart - bez pamięci figur",
+          _figure_comparison(cold=True)),
+    Stage("figures.gender_comparison_warm", "create_gender_comparison_chart - z pamięci figur",
+          _figure_comparison(cold=False)),
+    Stage("figures.age_comparison_warm", "create_age_comparison_chart - z pamięci figur",
+          _figure_age_comparison),
+    Stage("figures.tempo_density", "create_tempo_density_chart", _figure_tempo_density),
+]
+
+
+# -----------------------------------------------------------------------------
+# Pomiar
+# -----------------------------------------------------------------------------
+
+def measure(func: Callable[[], object], min_seconds: float = MIN_MEASURE_SECONDS,
+            repeat: int = REPEAT) -> dict:
+    """
+    Mierzy czas wywołania: liczba wywołań dobierana jest tak, aby jeden pomiar
+    trwał co najmniej min_seconds, a pomiar jest powtarzany `repeat` razy.
+
+    Returns:
+        dict: Czas jednego wywołania w sekundach (min, mediana, średnia, odchylenie)
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_seconds or number >= 1_000_000:
+            break
+        number = max(number * 2, int(number * min_seconds / max(elapsed, 1e-9) * 1.1))
+    per_call = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+    return {
+        'min': min(per_call),
+        'median': statistics.median(per_call),
+        'mean': statistics.fmean(per_call),
+        'stdev': statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def _package_version(name: str) -> Optional[str]:
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def _git_revision() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, capture_output=True,
+                                text=True, check=True, timeout=10).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+                               timeout=30).stdout.strip() != ""
+        return {'commit': commit, 'dirty': dirty}
+    except (OSError, subprocess.SubprocessError):
+        return {'commit': None, 'dirty': None}
+
+
+def environment_metadata() -> dict:
+    """Metadane środowiska zapisywane razem z wynikami."""
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'packages': {name: _package_version(name) for name in TRACKED_PACKAGES},
+        'git': _git_revision(),
+    }
+
+
+def run_suite(stage_filters: Optional[list[str]] = None, quick: bool = False,
+              progress: Callable[[str], None] = lambda line: None) -> dict:
+    """
+    Uruchamia etapy (opcjonalnie tylko te, których nazwa zawiera jeden z filtrów).
+
+    Args:
+        stage_filters: Fragmenty nazw etapów do uruchomienia (None = wszystkie)
+        quick: Krótsze pomiary (np. w testach), mniej dokładne
+        progress: Funkcja wywoływana z wierszem podsumowania po każdym etapie
+
+    Returns:
+        dict: {'format_version', 'quick', 'environment', 'results': {etap: pomiar}}
+    """
+    min_seconds = QUICK_MIN_MEASURE_SECONDS if quick else MIN_MEASURE_SECONDS
+    repeat = QUICK_REPEAT if quick else REPEAT
+    results = {}
+    for stage in STAGES:
+        if stage_filters and not any(part in stage.name for part in stage_filters):
+            continue
+        started = time.perf_counter()
+        timing = measure(stage.setup(), min_seconds, repeat)
+        timing.update(description=stage.description, items=stage.items,
+                      per_item_min=timing['min'] / stage.items)
+        results[stage.name] = timing
+        progress(f"{stage.name:<36}{_format_seconds(timing['min']):>12}"
+                 f"{_format_seconds(timing['median']):>12}   ({time.perf_counter() - started:.1f} s)")
+    return {'format_version': SUITE_FORMAT_VERSION, 'quick': quick,
+            'environment': environment_metadata(), 'results': results}
+
+
+# -----------------------------------------------------------------------------
+# Porównanie
+# -----------------------------------------------------------------------------
+
+@dataclass
+class Comparison:
+    """Porównanie jednego etapu z linią bazową."""
+    name: str
+    baseline: float
+    current: float
+    threshold: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline > 0 else float('inf')
+
+    @property
+    def status(self) -> str:
+        if self.ratio > 1 + self.threshold:
+            return "regression"
+        if self.ratio < 1 - self.threshold:
+            return "improvement"
+        return "ok"
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = REGRESSION_THRESHOLD,
+                    metric: str = 'min') -> list[Comparison]:
+    """
+    Porównuje wyniki etapów obecnych w obu plikach.
+
+    Args:
+        baseline: Wyniki linii bazowej (run_suite)
+        current: Bieżące wyniki
+        threshold: Względny wzrost czasu uznawany za regresję (0.25 = +25%)
+        metric: 'min' (najstabilniejszy) lub 'median'
+
+    Returns:
+        list[Comparison]: Porównania w kolejności etapów bieżących wyników
+    """
+    return [Comparison(name, baseline['results'][name][metric], timing[metric], threshold)
+            for name, timing in current['results'].items() if name in baseline['results']]
+
+
+def environment_differences(baseline: dict, current: dict) -> list[str]:
+    """Różnice środowiska, które mogą tłumaczyć zmiany czasów."""
+    differences = []
+    for key in ('python', 'machine', 'processor', 'cpu_count'):
+        old, new = baseline['environment'].get(key), current['environment'].get(key)
+        if old != new:
+            differences.append(f"{key}: {old} -> {new}")
+    old_packages = baseline['environment'].get('packages', {})
+    for name, version in current['environment'].get('packages', {}).items():
+        if old_packages.get(name) != version:
+            differences.append(f"{name}: {old_packages.get(name)} -> {version}")
+    if baseline.get('quick') != current.get('quick'):
+        differences.append(f"tryb quick: {baseline.get('quick')} -> {current.get('quick')}")
+    return differences
+
+
+def format_comparison(comparisons: list[Comparison], differences: list[str]) -> str:
+    """Tabela porównania z oznaczeniem regresji."""
+    labels = {'regression': "REGRESJA", 'improvement': "poprawa", 'ok': ""}
+    lines = [f"{'etap':<36}{'bazowy':>12}{'bieżący':>12}{'zmiana':>10}"]
+    for comparison in comparisons:
+        lines.append(f"{comparison.name:<36}{_format_seconds(comparison.baseline):>12}"
+                     f"{_format_seconds(comparison.current):>12}"
+                     f"{comparison.ratio - 1:>+10.0%}  {labels[comparison.status]}")
+    if differences:
+        lines.append("Uwaga - inne środowisko niż linia bazowa: " + "; ".join(differences))
+    regressions = sum(comparison.status == "regression" for comparison in comparisons)
+    lines.append(f"Regresje: {regressions} z {len(comparisons)} etapów")
+    return "\n".join(lines)
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.2f} µs"
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def _save(results: dict, path: str) -> None:
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(results, handle, ensure_ascii=False, indent=2)
+        handle.write("\n")
+
+
+def _compare_and_report(baseline: dict, current: dict, threshold: float, metric: str) -> int:
+    comparisons = compare_results(baseline, current, threshold, metric)
+    print(format_comparison(comparisons, environment_differences(baseline, current)))
+    return 1 if any(comparison.status == "regression" for comparison in comparisons) else 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Punkt wejścia zestawu benchmarków (kod 1 przy wykrytej regresji)."""
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] not in ("run", "compare"):
+        argv.insert(0, "run")
+
+    parser = argparse.ArgumentParser(description="Benchmarki całej ścieżki żądania")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Uruchomienie pomiarów (domyślne)")
+    run_parser.add_argument('-o', '--output', default=None, help="Plik JSON z wynikami")
+    run_parser.add_argument('--stage', action='append', default=None,
+                            help="Fragment nazwy etapu (można podać wiele razy)")
+    run_parser.add_argument('--quick', action='store_true', help="Krótsze, mniej dokładne pomiary")
+    run_parser.add_argument('--baseline', default=None,
+                            help="Linia bazowa do porównania po pomiarze")
+    run_parser.add_argument('--save-baseline', action='store_true',
+                            help=f"Zapisz wyniki jako linię bazową ({BASELINE_PATH})")
+
+    compare_parser = commands.add_parser("compare", help="Porównanie dwóch plików wyników")
+    compare_parser.add_argument('baseline', help="Wyniki linii bazowej")
+    compare_parser.add_argument('current', help="Bieżące wyniki")
+
+    for command in (run_parser, compare_parser):
+        command.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                             help="Próg regresji (względny wzrost czasu, domyślnie 0.25)")
+        command.add_argument('--metric', choices=['min', 'median'], default='min',
+                             help="Porównywana statystyka czasu")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        return _compare_and_report(_load(args.baseline), _load(args.current),
+                                   args.threshold, args.metric)
+
+    print(f"{'etap':<36}{'min':>12}{'mediana':>12}")
+    results = run_suite(args.stage, args.quick, progress=print)
+    if args.output:
+        _save(results, args.output)
+        print(f"Wyniki zapisane: {args.output}")
+    if args.save_baseline:
+        _save(results, BASELINE_PATH)
+        print(f"Linia bazowa zapisana: {BASELINE_PATH}")
+    if args.baseline:
+        return _compare_and_report(_load(args.baseline), results, args.threshold, args.metric)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
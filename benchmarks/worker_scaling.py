@@ -0,0 +1,100 @@
+# =============================================================================
+# BENCHMARK SKALOWANIA PULI PROCESÓW PRZEWIDYWANIA
+# Przepustowość PredictionWorkerPool dla 1..N procesów (przewidywanie
+# z percentylem i kohortą rekord po rekordzie lub fragmenty predict_many),
+# zawsze względem zmierzonej przepustowości jednego procesu:
+#   python -m benchmarks.worker_scaling
+#   python -m benchmarks.worker_scaling --processes 1 2 4 8 --mode batch
+# =============================================================================
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import wait
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Dodanie głównego katalogu do ścieżki
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.worker_pool import PredictionWorkerPool  # pylint: disable=wrong-import-position
+
+
+def make_runners(count: int, seed: int = 0) -> pd.DataFrame:
+    """Losowi biegacze w zakresach walidacji (wiek 18-70, tempo 3.5-8 min/km)."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Wiek': rng.integers(18, 71, count),
+        'Płeć': rng.choice(['M', 'K'], count),
+        '5 km Tempo': np.round(rng.uniform(3.5, 8.0, count), 2),
+    })
+
+
+def measure(processes: int, runners: pd.DataFrame, mode: str, chunk_size: int) -> float:
+    """
+    Mierzy przepustowość puli (rekordy/s) po rozgrzaniu wszystkich procesów.
+
+    Args:
+        processes: Liczba procesów
+        runners: Rekordy wejściowe
+        mode: 'single' (submit_each - rekord po rekordzie jak submit) lub
+            'batch' (submit_many)
+        chunk_size: Liczba rekordów w jednym zleceniu
+
+    Returns:
+        float: Przetworzone rekordy na sekundę
+    """
+    with PredictionWorkerPool(processes=processes) as pool:
+        pool.warm_up()
+        started = time.perf_counter()
+        if mode == 'single':
+            # Rekordy grupowane w zlecenia - mierzony jest model i kohorta, nie narzut IPC
+            records = runners.to_dict('records')
+            futures = [pool.submit_each(records[start:start + chunk_size])
+                       for start in range(0, len(records), chunk_size)]
+        else:
+            futures = pool.submit_many(runners, chunk_size=chunk_size)
+        wait(futures)
+        for future in futures:
+            future.result()
+        return len(runners) / (time.perf_counter() - started)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Punkt wejścia benchmarku skalowania."""
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Skalowanie puli procesów przewidywania")
+    parser.add_argument('--processes', type=int, nargs='+',
+                        default=sorted({1, 2, max(cpus // 2, 1), cpus}),
+                        help="Liczby procesów do zmierzenia")
+    parser.add_argument('--mode', choices=['single', 'batch'], default='single',
+                        help="Pojedyncze żądania lub fragmenty predict_many")
+    parser.add_argument('--records', type=int, default=None,
+                        help="Liczba rekordów (domyślnie 20 000 single / 2 000 000 batch)")
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help="Rekordy w jednym zleceniu (domyślnie 500 single / 20 000 batch)")
+    args = parser.parse_args(argv)
+
+    records = args.records or (20_000 if args.mode == 'single' else 2_000_000)
+    chunk_size = args.chunk_size or (500 if args.mode == 'single' else 20_000)
+    runners = make_runners(records)
+    print(f"Tryb: {args.mode}, rekordy: {records}, rdzenie: {cpus}")
+    print(f"{'procesy':>8}{'rekordy/s':>14}{'przyspieszenie':>16}{'efektywność':>14}")
+
+    # Punktem odniesienia jest zawsze zmierzony jeden proces (bez założenia liniowości)
+    baseline = None
+    for processes in [1] + [count for count in args.processes if count != 1]:
+        throughput = measure(processes, runners, args.mode, chunk_size)
+        baseline = baseline or throughput
+        speedup = throughput / baseline
+        print(f"{processes:>8}{throughput:>14,.0f}{speedup:>15.2f}x{speedup / processes:>13.0%}")
+    if max(args.processes) > cpus:
+        print(f"Uwaga: więcej procesów niż rdzeni ({cpus}) - wyniki nie skalują się liniowo")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+# =============================================================================
+# WSADOWE PRZEWIDYWANIE Z PLIKÓW CSV
+# Strumieniowe przetwarzanie list startowych bez Streamlit:
+#   python -m src.batch_score dane/halfmarathon_2024.csv -o wyniki.csv
+#   python -m src.batch_score zgloszenia.csv -o wyniki.csv --text-column Opis
+# =============================================================================
+
+import argparse
+import functools
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Dodanie głównego katalogu do ścieżki
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core import PredictorError, get_predictor, get_worker_pool  # pylint: disable=wrong-import-position
+from src.utils.batch_extraction import extract_user_data_batch  # pylint: disable=wrong-import-position
+
+# Stałe konfiguracyjne
+DEFAULT_CHUNK_SIZE = 10_000
+# Rok odniesienia do wyliczenia wieku z rocznika (jak w notatniku trenującym model)
+REFERENCE_YEAR = 2024
+OUTPUT_COLUMNS = ['prediction_label', 'prediction_time', 'is_valid', 'errors']
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScoringReport:
+    """Podsumowanie przebiegu przetwarzania wsadowego."""
+    rows: int = 0
+    valid_rows: int = 0
+    chunk_seconds: list[float] = field(default_factory=list)
+    total_seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.total_seconds if self.total_seconds > 0 else 0.0
+
+    def summary(self) -> str:
+        """Zwraca czytelne podsumowanie przepustowości i czasów fragmentów."""
+        lines = [
+            f"Wiersze: {self.rows} (poprawne: {self.valid_rows}, "
+            f"odrzucone: {self.rows - self.valid_rows})",
+            f"Czas całkowity: {self.total_seconds:.2f} s",
+            f"Przepustowość: {self.rows_per_second:,.0f} wierszy/s",
+        ]
+        if self.chunk_seconds:
+            timings = np.array(self.chunk_seconds) * 1000
+            lines.append(
+                f"Fragmenty: {len(timings)} | czas na fragment [ms]: "
+                f"min {timings.min():.1f}, średnio {timings.mean():.1f}, max {timings.max():.1f}"
+            )
+        return "\n".join(lines)
+
+
+def detect_separator(path: str, encoding: str = 'utf-8') -> str:
+    """
+    Rozpoznaje separator pliku na podstawie nagłówka.
+
+    Pliki z katalogu dane/ używają ';', a df_cleaned.csv używa ','.
+
+    Args:
+        path: Ścieżka do pliku CSV
+        encoding: Kodowanie pliku
+
+    Returns:
+        str: ';' lub ','
+    """
+    with open(path, encoding=encoding) as handle:
+        header = handle.readline()
+    return ';' if header.count(';') > header.count(',') else ','
+
+
+def prepare_features(chunk: pd.DataFrame, reference_year: int = REFERENCE_YEAR) -> pd.DataFrame:
+    """
+    Wyciąga z fragmentu pliku kolumny wymagane przez Predictor.predict_many.
+
+    Gdy brak kolumny 'Wiek', wiek wyliczany jest z kolumny 'Rocznik'.
+
+    Args:
+        chunk: Fragment pliku wczytany jako tekst
+        reference_year: Rok odniesienia dla kolumny 'Rocznik'
+
+    Returns:
+        DataFrame: Kolumny 'Wiek', 'Płeć', '5 km Tempo'
+    """
+    features = pd.DataFrame(index=chunk.index)
+    if 'Wiek' in chunk.columns:
+        features['Wiek'] = pd.to_numeric(chunk['Wiek'], errors='coerce')
+    elif 'Rocznik' in chunk.columns:
+        features['Wiek'] = reference_year - pd.to_numeric(chunk['Rocznik'], errors='coerce')
+    if 'Płeć' in chunk.columns:
+        features['Płeć'] = chunk['Płeć']
+    if '5 km Tempo' in chunk.columns:
+        features['5 km Tempo'] = pd.to_numeric(chunk['5 km Tempo'], errors='coerce')
+    return features
+
+
+class _CsvSink:
+    """Dopisuje kolejne fragmenty do pliku CSV."""
+
+    def __init__(self, path: str, sep: str):
+        self.path = path
+        self.sep = sep
+        self.header_written = False
+
+    def write(self, frame: pd.DataFrame) -> None:
+        frame.to_csv(self.path, sep=self.sep, index=False,
+                     mode='a' if self.header_written else 'w',
+                     header=not self.header_written)
+        self.header_written = True
+
+    def close(self) -> None:
+        pass
+
+
+class _ParquetSink:
+    """Dopisuje kolejne fragmenty jako grupy wierszy pliku Parquet."""
+
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa  # pylint: disable=import-outside-toplevel
+            import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+        except ImportError as e:
+            raise RuntimeError("Zapis do Parquet wymaga pakietu pyarrow: pip install pyarrow") from e
+        self._pa = pa
+        self._pq = pq
+        self.path = path
+        self.writer = None
+        self.schema = None
+
+    def write(self, frame: pd.DataFrame) -> None:
+        pa = self._pa
+        if self.schema is None:
+            fields = [pa.field(name, pa.string()) for name in frame.columns
+                      if name not in OUTPUT_COLUMNS]
+            fields += [
+                pa.field('prediction_label', pa.float64()),
+                pa.field('prediction_time', pa.string()),
+                pa.field('is_valid', pa.bool_()),
+                pa.field('errors', pa.string()),
+            ]
+            self.schema = pa.schema(fields)
+            self.writer = self._pq.ParquetWriter(self.path, self.schema)
+        table = pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False)
+        self.writer.write_table(table)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+def score_csv(input_path: str, output_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+              sep: Optional[str] = None, output_format: Optional[str] = None,
+              reference_year: int = REFERENCE_YEAR, encoding: str = 'utf-8',
+              text_column: Optional[str] = None, workers: int = 0) -> ScoringReport:
+    """
+    Przetwarza plik CSV fragmentami i zapisuje przewidywania przyrostowo.
+
+    W pamięci znajduje się naraz tylko jeden fragment, więc zużycie pamięci
+    nie zależy od rozmiaru pliku wejściowego.
+
+    Args:
+        input_path: Plik wejściowy (format dane/halfmarathon_*.csv lub df_cleaned.csv)
+        output_path: Plik wynikowy (.csv lub .parquet)
+        chunk_size: Liczba wierszy w jednym fragmencie
+        sep: Separator pliku wejściowego (domyślnie wykrywany automatycznie)
+        output_format: 'csv' lub 'parquet' (domyślnie według rozszerzenia)
+        reference_year: Rok odniesienia do wyliczenia wieku z rocznika
+        encoding: Kodowanie pliku wejściowego
+        text_column: Kolumna z opisem biegacza w wolnym tekście; gdy podana,
+            dane są z niej ekstraktowane (extract_user_data_batch)
+        workers: Liczba procesów puli przewidywania (0 = w bieżącym procesie)
+
+    Returns:
+        ScoringReport: Statystyki przetwarzania
+    """
+    sep = sep or detect_separator(input_path, encoding)
+    output_format = output_format or (
+        'parquet' if output_path.lower().endswith(('.parquet', '.pq')) else 'csv'
+    )
+    sink = _ParquetSink(output_path) if output_format == 'parquet' else _CsvSink(output_path, sep)
+
+    report = ScoringReport()
+    started = time.perf_counter()
+    try:
+        reader = pd.read_csv(input_path, sep=sep, chunksize=chunk_size, dtype=str,
+                             keep_default_na=False, na_values=[''], encoding=encoding)
+        if workers > 0:
+            pool = get_worker_pool(workers)
+            predict_many = functools.partial(pool.predict_many,
+                                             chunk_size=max(-(-chunk_size // workers), 1))
+        else:
+            predict_many = get_predictor().predict_many
+        for chunk in reader:
+            chunk_started = time.perf_counter()
+
+            if text_column:
+                if text_column not in chunk.columns:
+                    raise RuntimeError(f"Brak kolumny z opisem: {text_column}")
+                features = extract_user_data_batch(chunk[text_column])
+            else:
+                features = prepare_features(chunk, reference_year)
+            scored = predict_many(features)
+
+            output = chunk.copy()
+            output['prediction_label'] = scored['prediction_label']
+            output['prediction_time'] = scored['prediction_time']
+            output['is_valid'] = scored['is_valid']
+            output['errors'] = scored['errors'].map('; '.join)
+            sink.write(output)
+
+            elapsed = time.perf_counter() - chunk_started
+            report.rows += len(chunk)
+            report.valid_rows += int(scored['is_valid'].sum())
+            report.chunk_seconds.append(elapsed)
+            logger.info("Fragment %d: %d wierszy w %.1f ms",
+                        len(report.chunk_seconds), len(chunk), elapsed * 1000)
+    finally:
+        sink.close()
+
+    report.total_seconds = time.perf_counter() - started
+    return report
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Punkt wejścia linii poleceń."""
+    parser = argparse.ArgumentParser(
+        description="Wsadowe przewidywanie czasu półmaratonu dla pliku CSV"
+    )
+    parser.add_argument('input', help="Plik wejściowy CSV")
+    parser.add_argument('-o', '--output', required=True, help="Plik wynikowy (.csv lub .parquet)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Liczba wierszy w jednym fragmencie")
+    parser.add_argument('--sep', default=None, help="Separator wejścia (domyślnie wykrywany)")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default=None,
+                        help="Format wyjścia (domyślnie według rozszerzenia)")
+    parser.add_argument('--rok', type=int, default=REFERENCE_YEAR,
+                        help="Rok odniesienia do wyliczenia wieku z kolumny 'Rocznik'")
+    parser.add_argument('--encoding', default='utf-8', help="Kodowanie pliku wejściowego")
+    parser.add_argument('--text-column', default=None,
+                        help="Kolumna z opisem biegacza w wolnym tekście (ekstrakcja OpenAI/regex)")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="Liczba procesów puli przewidywania (domyślnie 0 - bieżący proces)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    try:
+        report = score_csv(args.input, args.output, chunk_size=args.chunk_size, sep=args.sep,
+                           output_format=args.format, reference_year=args.rok,
+                           encoding=args.encoding, text_column=args.text_column,
+                           workers=args.workers)
+    except (OSError, RuntimeError, PredictorError, pd.errors.ParserError) as e:
+        logger.error("Przetwarzanie nieudane: %s", str(e))
+        return 1
+
+    print(report.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
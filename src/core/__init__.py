@@ -0,0 +1,28 @@
+# Pakiet src.core - przewidywanie i dane referencyjne bez zależności od Streamlit
+from src.core.exceptions import (
+    InvalidInputError,
+    ModelUnavailableError,
+    PredictionError,
+    PredictorError,
+    ReferenceDataError,
+)
+from src.core.predictor import Prediction, Predictor, get_predictor
+from src.core.reference import load_cohort_cube, load_reference_data, load_reference_index
+from src.core.worker_pool import PredictionWorkerPool, RankedPrediction, get_worker_pool
+
+__all__ = [
+    "InvalidInputError",
+    "ModelUnavailableError",
+    "Prediction",
+    "PredictionError",
+    "PredictionWorkerPool",
+    "Predictor",
+    "PredictorError",
+    "RankedPrediction",
+    "ReferenceDataError",
+    "get_predictor",
+    "get_worker_pool",
+    "load_cohort_cube",
+    "load_reference_data",
+    "load_reference_index",
+]
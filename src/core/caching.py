@@ -0,0 +1,116 @@
+# =============================================================================
+# PAMIĘĆ PODRĘCZNA ZASOBÓW BEZ STREAMLIT
+# Odpowiednik st.cache_resource w czystym Pythonie: jeden współdzielony obiekt
+# na zestaw argumentów, opcjonalny czas ważności i jedno budowanie naraz
+# =============================================================================
+
+import functools
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional
+
+
+# Liczniki trafień pamięci podręcznych procesu (nazwa -> funkcja zwracająca statystyki)
+_stats_sources: dict[str, Callable[[], dict]] = {}
+_stats_lock = threading.Lock()
+
+
+def register_cache_stats(name: str, stats: Callable[[], dict]) -> None:
+    """
+    Rejestruje źródło statystyk pamięci podręcznej (eksportowane jako metryki).
+
+    Args:
+        name: Nazwa pamięci podręcznej (etykieta 'cache')
+        stats: Funkcja zwracająca słownik z kluczami 'hits' i 'misses'
+    """
+    with _stats_lock:
+        _stats_sources[name] = stats
+
+
+def cache_stats() -> dict[str, dict]:
+    """Trafienia i chybienia wszystkich zarejestrowanych pamięci podręcznych."""
+    with _stats_lock:
+        sources = dict(_stats_sources)
+    result = {}
+    for name, stats in sorted(sources.items()):
+        info = stats()
+        result[name] = {'hits': info['hits'], 'misses': info['misses']}
+    return result
+
+
+class _Entry:
+    __slots__ = ('value', 'created_at')
+
+    def __init__(self, value: Any, created_at: float):
+        self.value = value
+        self.created_at = created_at
+
+
+def cached_resource(ttl: Optional[float] = None, maxsize: int = 32) -> Callable:
+    """
+    Dekorator zapamiętujący wynik funkcji (bez kopiowania) według argumentów.
+
+    Wyjątki nie są zapamiętywane. Równoległe wywołania z tymi samymi
+    argumentami czekają na jedno budowanie zasobu. Funkcja udekorowana
+    udostępnia cache_clear() i cache_info(); liczniki trafień trafiają do
+    cache_stats() pod nazwą "moduł.funkcja".
+
+    Args:
+        ttl: Czas ważności wpisu w sekundach (None = bez limitu)
+        maxsize: Maksymalna liczba zapamiętanych zestawów argumentów
+
+    Example:
+        >>> @cached_resource(ttl=3600)
+        ... def load_model(path): ...
+    """
+    def decorator(func: Callable) -> Callable:
+        entries: dict[Hashable, _Entry] = {}
+        key_locks: dict[Hashable, threading.Lock] = {}
+        lock = threading.Lock()
+        stats = {'hits': 0, 'misses': 0}
+
+        def _fresh(entry: Optional[_Entry]) -> bool:
+            return entry is not None and (ttl is None or time.monotonic() - entry.created_at <= ttl)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            with lock:
+                entry = entries.get(key)
+                if _fresh(entry):
+                    stats['hits'] += 1
+                    return entry.value
+                key_lock = key_locks.setdefault(key, threading.Lock())
+
+            with key_lock:
+                with lock:
+                    entry = entries.get(key)
+                    if _fresh(entry):
+                        stats['hits'] += 1
+                        return entry.value
+                    stats['misses'] += 1
+                value = func(*args, **kwargs)
+                with lock:
+                    entries[key] = _Entry(value, time.monotonic())
+                    while len(entries) > maxsize:
+                        oldest = min(entries, key=lambda k: entries[k].created_at)
+                        del entries[oldest]
+                        key_locks.pop(oldest, None)
+                return value
+
+        def cache_clear() -> None:
+            with lock:
+                entries.clear()
+                key_locks.clear()
+                stats['hits'] = stats['misses'] = 0
+
+        def cache_info() -> dict:
+            with lock:
+                return {**stats, 'size': len(entries), 'maxsize': maxsize, 'ttl': ttl}
+
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_info = cache_info
+        register_cache_stats(f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}", cache_info)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,42 @@
+# =============================================================================
+# WYJĄTKI RDZENIA PRZEWIDYWANIA
+# Typowane błędy zgłaszane przez src.core zamiast komunikatów Streamlit;
+# warstwa prezentacji (aplikacja, serwis, zadania wsadowe) decyduje o ich obsłudze
+# =============================================================================
+
+from typing import Optional
+
+
+class PredictorError(Exception):
+    """Bazowy wyjątek rdzenia przewidywania."""
+
+
+class InvalidInputError(PredictorError, ValueError):
+    """Dane biegacza nie przechodzą walidacji."""
+
+    def __init__(self, errors: list[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+    def __reduce__(self):
+        # Wyjątek przekazywany jest między procesami (pula procesów przewidywania)
+        return type(self), (self.errors,)
+
+
+class ModelUnavailableError(PredictorError):
+    """Brak modelu: nie ma natywnego eksportu, a PyCaret jest niedostępny lub model się nie wczytał."""
+
+
+class PredictionError(PredictorError):
+    """Model jest dostępny, ale przewidywanie się nie powiodło."""
+
+
+class ReferenceDataError(PredictorError):
+    """Nie udało się wczytać danych referencyjnych."""
+
+    def __init__(self, message: str, path: Optional[str] = None):
+        super().__init__(message)
+        self.path = path
+
+    def __reduce__(self):
+        return type(self), (str(self), self.path)
@@ -0,0 +1,420 @@
+# =============================================================================
+# METRYKI PROCESU (FORMAT TEKSTOWY PROMETHEUS)
+# Liczniki, wskaźniki i histogramy wspólne dla całego procesu: przewidywania,
+# błędy, zapytania do OpenAI, fallback regex, czasy ekstrakcji, ładowanie
+# modelu, pamięci podręczne i aktywne sesje; eksport na porcie lub do pliku
+# =============================================================================
+
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterable, Optional, Sequence
+
+from src.core.caching import cache_stats, cached_resource
+
+# Stałe konfiguracyjne
+# Port, na którym serwowane jest /metrics (0 = bez serwera)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+# Plik dla kolektora plików tekstowych (np. node_exporter), pusty = bez zapisu
+METRICS_FILE = os.getenv("METRICS_FILE", "")
+# Co ile sekund plik metryk jest nadpisywany
+METRICS_FILE_INTERVAL = float(os.getenv("METRICS_FILE_INTERVAL", "15"))
+# Po tylu sekundach bez interakcji sesja nie jest liczona jako aktywna
+SESSION_IDLE_TIMEOUT = 1800
+# Prefiks nazw metryk
+METRIC_PREFIX = "kalkulator_"
+# Typ zawartości formatu tekstowego Prometheus
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Przedziały histogramów czasu (sekundy): od lokalnego regex po zapytania do OpenAI
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+               for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+@dataclass(frozen=True)
+class MetricFamily:
+    """Metryka do wypisania: nazwa, typ, opis i próbki (przyrostek, etykiety, wartość)."""
+    name: str
+    kind: str
+    documentation: str
+    samples: list[tuple[str, dict, float]]
+
+
+class _Metric:
+    """Wspólna część metryk: nazwa, opis, etykiety i blokada."""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metryka {self.name} wymaga etykiet {self.labelnames}, "
+                             f"podano {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            values = dict(self._values)
+        if not values and not self.labelnames:
+            values = {(): 0.0}
+        samples = [("", dict(zip(self.labelnames, key)), float(value))
+                   for key, value in sorted(values.items())]
+        return MetricFamily(self.name, self.kind, self.documentation, samples)
+
+
+class Counter(_Metric):
+    """Licznik rosnący (np. liczba przewidywań)."""
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Licznik może tylko rosnąć")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        key = self._key(labels)
+        with self._lock:
+            return float(self._values.get(key, 0.0))
+
+
+class Gauge(_Metric):
+    """Wskaźnik z bieżącą wartością (np. liczba aktywnych sesji)."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def value(self, **labels) -> float:
+        key = self._key(labels)
+        with self._lock:
+            return float(self._values.get(key, 0.0))
+
+
+class Histogram(_Metric):
+    """Histogram z przedziałami skumulowanymi (np. czas ekstrakcji)."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        # Ostatnia pozycja zlicza obserwacje powyżej największego przedziału (+Inf)
+        position = next((i for i, bound in enumerate(self.buckets) if value <= bound),
+                        len(self.buckets))
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[position] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels) -> int:
+        key = self._key(labels)
+        with self._lock:
+            counts, _total = self._values.get(key, ([0], 0.0))
+            return sum(counts)
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        samples = []
+        for key, (counts, total) in sorted(values.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append(("_bucket", {**labels, 'le': _format_value(bound)}, float(cumulative)))
+            samples.append(("_sum", labels, total))
+            samples.append(("_count", labels, float(cumulative)))
+        return MetricFamily(self.name, self.kind, self.documentation, samples)
+
+
+class MetricsRegistry:
+    """
+    Rejestr metryk procesu renderowany w formacie tekstowym Prometheus.
+
+    Poza metrykami aktualizowanymi na bieżąco przyjmuje kolektory - funkcje
+    zwracające MetricFamily w chwili odczytu (np. liczniki pamięci podręcznych).
+    """
+
+    def __init__(self, prefix: str = METRIC_PREFIX):
+        self.prefix = prefix
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], Iterable[MetricFamily]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metryka {metric.name} jest już zarejestrowana inaczej")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self.prefix + name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(self.prefix + name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(self.prefix + name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def collect(self) -> list[MetricFamily]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        families = [metric.collect() for metric in metrics]
+        for collector in collectors:
+            families.extend(collector())
+        return families
+
+    def render(self) -> str:
+        """Wszystkie metryki w formacie tekstowym Prometheus (wersja 0.0.4)."""
+        lines = []
+        for family in self.collect():
+            lines.append(f"# HELP {family.name} {family.documentation}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for suffix, labels, value in family.samples:
+                lines.append(f"{family.name}{suffix}{_format_labels(list(labels), list(labels.values()))} "
+                             f"{_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        """Zeruje metryki aktualizowane na bieżąco (np. w testach)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+
+class SessionTracker:
+    """Aktywne sesje: identyfikatory z czasem ostatniej interakcji."""
+
+    def __init__(self, idle_timeout: float = SESSION_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._last_seen: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, session_id: str) -> None:
+        with self._lock:
+            self._last_seen[session_id] = time.monotonic()
+
+    def active(self) -> int:
+        """Liczba sesji z interakcją w ciągu idle_timeout (starsze są zapominane)."""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            for session_id in [key for key, seen in self._last_seen.items() if seen < cutoff]:
+                del self._last_seen[session_id]
+            return len(self._last_seen)
+
+
+# -----------------------------------------------------------------------------
+# Metryki procesu
+# -----------------------------------------------------------------------------
+
+REGISTRY = MetricsRegistry()
+
+PREDICTIONS = REGISTRY.counter(
+    "predictions_total", "Wykonane przewidywania (liczba biegaczy)", ["engine", "mode"])
+PREDICTION_ERRORS = REGISTRY.counter(
+    "prediction_errors_total", "Nieudane przewidywania według typu błędu", ["type"])
+OPENAI_REQUESTS = REGISTRY.counter(
+    "openai_requests_total", "Zapytania ekstrakcji do OpenAI według wyniku", ["outcome"])
+REGEX_FALLBACKS = REGISTRY.counter(
+    "regex_fallbacks_total", "Ekstrakcje zakończone wynikiem regex zamiast OpenAI", ["reason"])
+EXTRACTION_SECONDS = REGISTRY.histogram(
+    "extraction_seconds", "Czas ekstrakcji danych z tekstu według warstwy", ["tier"])
+MODEL_LOADS = REGISTRY.counter(
+    "model_loads_total", "Załadowania modelu przewidywania", ["engine"])
+MODEL_LOAD_SECONDS = REGISTRY.histogram(
+    "model_load_seconds", "Czas ładowania modelu przewidywania", ["engine"])
+
+SESSIONS = SessionTracker()
+
+
+def _collect_caches() -> list[MetricFamily]:
+    stats = cache_stats()
+    return [
+        MetricFamily(REGISTRY.prefix + "cache_hits_total", "counter",
+                     "Trafienia pamięci podręcznych",
+                     [("", {'cache': name}, float(value['hits'])) for name, value in stats.items()]),
+        MetricFamily(REGISTRY.prefix + "cache_misses_total", "counter",
+                     "Chybienia pamięci podręcznych",
+                     [("", {'cache': name}, float(value['misses'])) for name, value in stats.items()]),
+    ]
+
+
+def _collect_sessions() -> list[MetricFamily]:
+    return [MetricFamily(REGISTRY.prefix + "active_sessions", "gauge",
+                         f"Sesje z interakcją w ciągu ostatnich {SESSIONS.idle_timeout:.0f} s",
+                         [("", {}, float(SESSIONS.active()))])]
+
+
+REGISTRY.register_collector(_collect_caches)
+REGISTRY.register_collector(_collect_sessions)
+
+
+def touch_session(session_id: str) -> None:
+    """Oznacza sesję jako aktywną (wywoływane przy każdym przebiegu aplikacji)."""
+    SESSIONS.touch(session_id)
+
+
+def render_metrics() -> str:
+    """Metryki procesu w formacie tekstowym Prometheus."""
+    return REGISTRY.render()
+
+
+# -----------------------------------------------------------------------------
+# Eksport
+# -----------------------------------------------------------------------------
+
+def write_metrics_file(path: str, registry: MetricsRegistry = REGISTRY) -> None:
+    """Zapisuje metryki do pliku atomowo (plik tymczasowy + zamiana)."""
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as handle:
+        handle.write(registry.render())
+    os.replace(temporary, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        if self.path.split('?', 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        logger.debug("metrics: " + format, *args)
+
+
+class MetricsExporter:
+    """
+    Eksport metryk: serwer HTTP z /metrics i/lub okresowy zapis do pliku.
+
+    Oba działają w wątkach w tle; stop() zatrzymuje je i zapisuje plik ostatni raz.
+    Port None wyłącza serwer, a 0 wybiera wolny port (adres w url).
+    """
+
+    def __init__(self, port: Optional[int] = None, host: str = METRICS_HOST, path: str = "",
+                 interval: float = METRICS_FILE_INTERVAL, registry: MetricsRegistry = REGISTRY):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+        if port is not None:
+            handler = type("MetricsHandler", (_MetricsHandler,), {'registry': registry})
+            self.server = ThreadingHTTPServer((host, port), handler)
+            self.server.daemon_threads = True
+            self._start(self.server.serve_forever, "metrics-http")
+            logger.info("Metryki dostępne pod http://%s:%d/metrics", host, self.server.server_port)
+        if path:
+            self._start(self._write_periodically, "metrics-file")
+            logger.info("Metryki zapisywane do %s co %.0f s", path, interval)
+
+    @property
+    def url(self) -> Optional[str]:
+        if self.server is None:
+            return None
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def _start(self, target: Callable[[], None], name: str) -> None:
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _write(self) -> None:
+        try:
+            write_metrics_file(self.path, self.registry)
+        except OSError as e:
+            logger.warning("Nie udało się zapisać metryk do %s: %s", self.path, str(e))
+
+    def _write_periodically(self) -> None:
+        while True:
+            self._write()
+            if self._stop.wait(self.interval):
+                return
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        if self.path:
+            self._write()
+
+
+@cached_resource()
+def start_metrics_exporter(port: int = METRICS_PORT, path: str = METRICS_FILE,
+                           host: str = METRICS_HOST) -> Optional[MetricsExporter]:
+    """
+    Uruchamia eksport metryk raz na proces (METRICS_PORT / METRICS_FILE).
+
+    Returns:
+        MetricsExporter lub None, gdy eksport jest wyłączony albo port jest zajęty
+    """
+    if not port and not path:
+        return None
+    try:
+        return MetricsExporter(port or None, host, path)
+    except OSError as e:
+        logger.warning("Nie udało się uruchomić eksportu metryk (port %s): %s", port, str(e))
+        return None
@@ -0,0 +1,355 @@
+# =============================================================================
+# PRZEWIDYWANIE CZASU PÓŁMARATONU (RDZEŃ BEZ STREAMLIT)
+# Model (natywny silnik NumPy, PyCaret jako zapasowa ścieżka), przeliczenie
+# cech i przewidywanie pojedyncze oraz wsadowe z typowanymi wyjątkami
+# =============================================================================
+
+import datetime
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# Dodanie głównego katalogu do ścieżki
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.core.caching import cached_resource  # pylint: disable=wrong-import-position
+from src.core.exceptions import (  # pylint: disable=wrong-import-position
+    InvalidInputError,
+    ModelUnavailableError,
+    PredictionError,
+    PredictorError,
+)
+from src.core.metrics import (  # pylint: disable=wrong-import-position
+    MODEL_LOAD_SECONDS,
+    MODEL_LOADS,
+    PREDICTION_ERRORS,
+    PREDICTIONS,
+)
+from src.utils.inference import (  # pylint: disable=wrong-import-position
+    MODEL_PATH,
+    NATIVE_MODEL_PATH,
+    NativeHuberModel,
+    load_native_model,
+)
+from src.utils.lazy_imports import is_available, load_module  # pylint: disable=wrong-import-position
+from src.utils.validation import (  # pylint: disable=wrong-import-position
+    missing_fields_batch,
+    validate_user_data,
+    validate_user_data_batch,
+)
+
+# Stałe konfiguracyjne
+MODEL_CACHE_TTL = 3600  # Cache na 1 godzinę
+
+# Silniki przewidywania
+ENGINE_NATIVE = "native"
+ENGINE_PYCARET = "pycaret"
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+
+def calculate_5km_time(tempo: Union[float, str]) -> float:
+    """
+    Przelicza tempo biegu (min/km) na całkowity czas w sekundach dla dystansu 5km.
+    Obsługuje formaty: 5.0, "5.0", "4:30"
+
+    Args:
+        tempo: Tempo biegu w minutach na kilometr (float, str lub format MM:SS)
+
+    Returns:
+        float: Całkowity czas w sekundach
+
+    Example:
+        >>> calculate_5km_time(5.0)
+        1500.0
+        >>> calculate_5km_time("4:30")
+        1350.0
+    """
+    if isinstance(tempo, str) and ':' in tempo:
+        # Konwersja formatu MM:SS na minuty dziesiętne
+        minutes, seconds = tempo.split(':')
+        tempo_decimal = float(minutes) + float(seconds) / 60
+    else:
+        tempo_decimal = float(tempo)
+
+    return tempo_decimal * 5 * 60
+
+
+def calculate_5km_time_batch(tempo: pd.Series) -> np.ndarray:
+    """
+    Wektorowa wersja calculate_5km_time dla całej kolumny tempa.
+    Wartości w formacie MM:SS są przeliczane na minuty dziesiętne.
+
+    Args:
+        tempo: Kolumna z tempem biegu (min/km)
+
+    Returns:
+        np.ndarray: Czasy na 5km w sekundach (NaN dla wartości nieczytelnych)
+    """
+    if pd.api.types.is_numeric_dtype(tempo):
+        tempo_decimal = tempo.to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+        text = tempo.astype(str)
+        parts = text.str.split(':', n=1, expand=True).reindex(columns=[0, 1])
+        minutes = pd.to_numeric(parts[0], errors='coerce')
+        seconds = pd.to_numeric(parts[1], errors='coerce')
+        has_seconds = text.str.contains(':', regex=False)
+        tempo_decimal = np.where(has_seconds, minutes + seconds / 60,
+                                 pd.to_numeric(tempo, errors='coerce')).astype(np.float64)
+
+    return tempo_decimal * 5 * 60
+
+
+def format_seconds_batch(seconds: np.ndarray) -> np.ndarray:
+    """
+    Formatuje wiele czasów naraz tak jak str(datetime.timedelta(seconds=int(s))).
+
+    Args:
+        seconds: Czasy w sekundach
+
+    Returns:
+        np.ndarray: Sformatowane czasy (np. "1:44:15")
+    """
+    whole = np.asarray(seconds, dtype=np.float64).astype(np.int64)
+    hours, remainder = np.divmod(whole, 3600)
+    minutes, secs = np.divmod(remainder, 60)
+    return np.array([f"{h}:{m:02d}:{s:02d}" for h, m, s in zip(hours, minutes, secs)],
+                    dtype=object)
+
+
+@cached_resource(ttl=MODEL_CACHE_TTL)
+def load_pycaret_model(model_path: str = MODEL_PATH):
+    """
+    Ładuje model PyCaret (import PyCaret przy pierwszym użyciu).
+
+    Args:
+        model_path: Ścieżka do modelu (bez .pkl)
+
+    Returns:
+        Pipeline PyCaret
+
+    Raises:
+        ModelUnavailableError: Brak PyCaret lub modelu
+    """
+    regression = load_module("pycaret.regression") if is_available("pycaret") else None
+    if regression is None:
+        raise ModelUnavailableError(
+            "PyCaret nie jest zainstalowany. Zainstaluj go komendą: pip install pycaret")
+    started = time.perf_counter()
+    try:
+        model = regression.load_model(model_path, verbose=False)
+    except (FileNotFoundError, ImportError, ValueError) as e:
+        raise ModelUnavailableError(f"Nie udało się załadować modelu {model_path}: {e}") from e
+    MODEL_LOADS.inc(engine=ENGINE_PYCARET)
+    MODEL_LOAD_SECONDS.observe(time.perf_counter() - started, engine=ENGINE_PYCARET)
+    logger.info("Model %s załadowany pomyślnie", model_path)
+    return model
+
+
+@cached_resource()
+def load_native_engine(native_model_path: str = NATIVE_MODEL_PATH,
+                       model_path: str = MODEL_PATH) -> Optional[NativeHuberModel]:
+    """
+    Wczytuje natywny silnik (load_native_model) i mierzy czas ładowania.
+
+    Returns:
+        NativeHuberModel lub None, gdy eksportu brak lub jest nieaktualny
+    """
+    started = time.perf_counter()
+    model = load_native_model(native_model_path, model_path)
+    if model is not None:
+        MODEL_LOADS.inc(engine=ENGINE_NATIVE)
+        MODEL_LOAD_SECONDS.observe(time.perf_counter() - started, engine=ENGINE_NATIVE)
+    return model
+
+
+@dataclass(frozen=True)
+class Prediction:
+    """Przewidywany czas półmaratonu."""
+    seconds: float
+    time: str
+    engine: str
+
+
+class Predictor:
+    """
+    Przewidywanie czasu półmaratonu niezależne od Streamlit.
+
+    Domyślnie korzysta z natywnego silnika NumPy, a PyCaret jest używany
+    tylko wtedy, gdy eksportu brak lub jest nieaktualny. Błędy zgłaszane
+    są jako wyjątki z src.core.exceptions.
+    """
+
+    def __init__(self, native_model_path: str = NATIVE_MODEL_PATH,
+                 model_path: str = MODEL_PATH):
+        self.native_model_path = native_model_path
+        self.model_path = model_path
+
+    @property
+    def native_model(self) -> Optional[NativeHuberModel]:
+        return load_native_engine(self.native_model_path, self.model_path)
+
+    @property
+    def engine(self) -> str:
+        """Silnik, który zostanie użyty do przewidywania."""
+        return ENGINE_NATIVE if self.native_model is not None else ENGINE_PYCARET
+
+    def load(self) -> str:
+        """
+        Ładuje model z wyprzedzeniem (przed pierwszym przewidywaniem).
+
+        Returns:
+            str: Użyty silnik
+
+        Raises:
+            ModelUnavailableError: Brak modelu
+        """
+        engine = self.engine
+        if engine == ENGINE_PYCARET:
+            load_pycaret_model(self.model_path)
+        return engine
+
+    def _predict_frame(self, features: pd.DataFrame) -> np.ndarray:
+        native_model = self.native_model
+        if native_model is not None:
+            return native_model.predict(features)
+
+        model = load_pycaret_model(self.model_path)
+        regression = load_module("pycaret.regression")
+        prediction = regression.predict_model(model, data=features.reset_index(drop=True),
+                                              verbose=False)
+        return prediction["prediction_label"].to_numpy(dtype=np.float64)
+
+    def predict(self, user_data: dict, validate: bool = True) -> Prediction:
+        """
+        Przewiduje czas półmaratonu dla jednego biegacza.
+
+        Args:
+            user_data: Słownik z kluczami 'Wiek', 'Płeć', '5 km Tempo'
+            validate: Czy sprawdzić dane (validate_user_data) przed przewidywaniem
+
+        Returns:
+            Prediction: Czas w sekundach, sformatowany czas i użyty silnik
+
+        Raises:
+            InvalidInputError: Nieprawidłowe dane
+            ModelUnavailableError: Brak modelu
+            PredictionError: Błąd modelu
+        """
+        try:
+            prediction = self._predict_record(user_data, validate)
+        except PredictorError as e:
+            PREDICTION_ERRORS.inc(type=type(e).__name__)
+            raise
+        PREDICTIONS.inc(engine=prediction.engine, mode="single")
+        return prediction
+
+    def _predict_record(self, user_data: dict, validate: bool) -> Prediction:
+        if validate:
+            is_valid, errors = validate_user_data(user_data)
+            if not is_valid:
+                raise InvalidInputError(errors)
+        try:
+            record = {
+                'Wiek': user_data['Wiek'],
+                'Płeć': user_data['Płeć'],
+                '5 km Tempo': float(user_data['5 km Tempo']),
+                '5 km Czas': calculate_5km_time(user_data['5 km Tempo'])
+            }
+        except (KeyError, ValueError, TypeError) as e:
+            raise InvalidInputError([f"Nieprawidłowe dane: {e}"]) from e
+
+        engine = self.engine
+        try:
+            if engine == ENGINE_NATIVE:
+                predicted_seconds = round(self.native_model.predict_record(record), 2)
+            else:
+                predicted_seconds = round(float(self._predict_frame(pd.DataFrame([record]))[0]), 2)
+        except ModelUnavailableError:
+            raise
+        except (ValueError, KeyError, ImportError, AttributeError) as e:
+            raise PredictionError(str(e)) from e
+
+        predicted_time = str(datetime.timedelta(seconds=int(predicted_seconds)))
+        logger.info("Przewidywanie wykonane pomyślnie: %s (%s)", predicted_time, engine)
+        return Prediction(predicted_seconds, predicted_time, engine)
+
+    def predict_many(self, data: Union[pd.DataFrame, Iterable[dict]]) -> pd.DataFrame:
+        """
+        Wykonuje przewidywanie dla wielu biegaczy jednym wywołaniem modelu.
+
+        Wiersze, które nie przechodzą walidacji (tej samej co validate_user_data),
+        nie przerywają przetwarzania - dostają is_valid=False i listę błędów.
+
+        Args:
+            data: DataFrame lub lista słowników z kluczami 'Wiek', 'Płeć', '5 km Tempo'
+
+        Returns:
+            DataFrame: Kolumny wejściowe oraz 'prediction_label' (sekundy),
+            'prediction_time' (sformatowany czas), 'is_valid' i 'errors'
+
+        Raises:
+            ModelUnavailableError: Brak modelu
+            PredictionError: Błąd modelu
+        """
+        if isinstance(data, pd.DataFrame):
+            frame, missing_fields = data, None
+        else:
+            # Jawny indeks: pusty słownik też daje wiersz (from_records go pomija)
+            records = list(data)
+            frame = pd.DataFrame(records, index=pd.RangeIndex(len(records)))
+            missing_fields = missing_fields_batch(records)
+        valid, errors = validate_user_data_batch(frame, missing_fields)
+
+        result = frame.copy()
+        result['prediction_label'] = np.nan
+        result['prediction_time'] = None
+        result['is_valid'] = valid
+        result['errors'] = errors
+
+        invalid_count = int((~valid).sum())
+        if invalid_count:
+            PREDICTION_ERRORS.inc(invalid_count, type=InvalidInputError.__name__)
+        if not valid.any():
+            return result
+
+        rows = frame.loc[valid]
+        tempo = rows['5 km Tempo']
+        features = pd.DataFrame({
+            'Wiek': pd.to_numeric(rows['Wiek'], errors='coerce'),
+            'Płeć': rows['Płeć'].astype(object),
+            '5 km Tempo': pd.to_numeric(tempo, errors='coerce'),
+            '5 km Czas': calculate_5km_time_batch(tempo)
+        }, index=rows.index)
+
+        try:
+            seconds = self._predict_frame(features)
+        except ModelUnavailableError:
+            PREDICTION_ERRORS.inc(len(rows), type=ModelUnavailableError.__name__)
+            raise
+        except (ValueError, KeyError, ImportError, AttributeError) as e:
+            PREDICTION_ERRORS.inc(len(rows), type=PredictionError.__name__)
+            raise PredictionError(str(e)) from e
+        PREDICTIONS.inc(len(rows), engine=self.engine, mode="batch")
+
+        seconds = np.round(seconds, 2)
+        result.loc[valid, 'prediction_label'] = seconds
+        result.loc[valid, 'prediction_time'] = format_seconds_batch(seconds)
+
+        logger.info("Przewidywanie wsadowe: %d poprawnych z %d rekordów",
+                    int(valid.sum()), len(frame))
+        return result
+
+
+@cached_resource()
+def get_predictor(native_model_path: str = NATIVE_MODEL_PATH,
+                  model_path: str = MODEL_PATH) -> Predictor:
+    """Wspólny dla procesu Predictor dla podanych ścieżek modelu."""
+    return Predictor(native_model_path, model_path)
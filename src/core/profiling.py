@@ -0,0 +1,374 @@
+# =============================================================================
+# PROFILOWANIE PRZEBIEGU NA ŻĄDANIE
+# Próbkujący profiler wątku skryptu Streamlit (sys._current_frames) połączony
+# z tracemalloc: zapis profilu pod identyfikatorem śladu i zestawienie top-N.
+# Wyłączony domyślnie - bez flagi nie jest uruchamiany żaden wątek ani tracemalloc
+# =============================================================================
+
+import hmac
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Optional
+
+# Stałe konfiguracyjne
+# Profilowanie każdego przebiegu skryptu (tylko do diagnostyki - spowalnia aplikację)
+PROFILE_RERUNS = os.getenv("PROFILE_RERUNS", "").lower() in ("1", "true", "yes")
+# Sekret parametru ?profile=<PROFILE_TOKEN> (pusty = parametr jest ignorowany)
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+# Katalog zapisu profili (pusty = bez zapisu na dysk)
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+# Odstęp między próbkami stosu w sekundach
+PROFILE_INTERVAL = 0.005
+# Po tylu sekundach profil jest zamykany, nawet jeśli przebieg się nie skończył
+PROFILE_MAX_SECONDS = 120.0
+# Liczba ramek zapamiętywanych przez tracemalloc dla każdej alokacji
+PROFILE_TRACEMALLOC_FRAMES = 1
+# Maksymalna głębokość próbkowanego stosu
+PROFILE_STACK_DEPTH = 128
+# Liczba pozycji w zestawieniach
+PROFILE_TOP_N = 15
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+# Jednocześnie trwa co najwyżej jeden profil (tracemalloc jest globalny dla procesu)
+_active: Optional["RerunProfile"] = None
+_active_lock = threading.Lock()
+
+
+def _short_path(filename: str) -> str:
+    """Ścieżka względem projektu albo site-packages (czytelna w zestawieniach)."""
+    if filename.startswith(ROOT_DIR + os.sep):
+        return os.path.relpath(filename, ROOT_DIR)
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    return os.path.basename(filename)
+
+
+def _stack_key(frame) -> tuple:
+    """Stos ramek jako krotka (plik, wiersz definicji, funkcja) od korzenia do liścia."""
+    stack = []
+    while frame is not None and len(stack) < PROFILE_STACK_DEPTH:
+        code = frame.f_code
+        stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def _label(code: tuple) -> str:
+    filename, lineno, name = code
+    return f"{name} ({_short_path(filename)}:{lineno})"
+
+
+class SamplingProfiler:
+    """
+    Próbkujący profiler jednego wątku.
+
+    Wątek pomocniczy co interval sekund odczytuje stos profilowanego wątku;
+    próbka ma wagę równą czasowi od poprzedniej, więc suma wag odpowiada
+    czasowi działania. Profilowany kod nie jest w żaden sposób instrumentowany.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = PROFILE_INTERVAL,
+                 max_seconds: float = PROFILE_MAX_SECONDS,
+                 on_timeout: Optional[Callable[[], None]] = None):
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.on_timeout = on_timeout
+        self.samples = 0
+        self.stacks: Counter = Counter()  # stos (krotka ramek) -> sekundy
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    def start(self) -> "SamplingProfiler":
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="rerun-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> float:
+        """Kończy próbkowanie i zwraca czas profilowania w sekundach."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        return time.perf_counter() - self._started
+
+    def _run(self) -> None:
+        last = self._started
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            # pylint: disable=protected-access
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:  # profilowany wątek zakończył działanie
+                return
+            self.stacks[_stack_key(frame)] += now - last
+            self.samples += 1
+            last = now
+            if now - self._started > self.max_seconds:
+                if self.on_timeout is not None:
+                    self.on_timeout()
+                return
+
+
+def _common_depth(stacks: Counter) -> int:
+    """Liczba ramek wspólnych dla wszystkich stosów (wątek, runner Streamlit, moduł skryptu)."""
+    stacks = [stack for stack in stacks if stack]
+    if not stacks:
+        return 0
+    shortest = min(stacks, key=len)
+    for depth, code in enumerate(shortest):
+        if any(stack[depth] != code for stack in stacks):
+            return depth
+    return len(shortest)
+
+
+def top_functions(stacks: Counter, limit: int = PROFILE_TOP_N) -> tuple[list[dict], list[dict]]:
+    """
+    Zestawienia funkcji według czasu własnego i łącznego.
+
+    Z ramek wspólnych dla wszystkich próbek w zestawieniu łącznym zostaje tylko
+    najgłębsza (np. moduł app.py) - pozostałe miałyby ten sam, pełny czas.
+
+    Args:
+        stacks: Stosy z wagami w sekundach (SamplingProfiler.stacks)
+        limit: Liczba pozycji w każdym zestawieniu
+
+    Returns:
+        tuple: (według czasu własnego, według czasu łącznego), pozycje
+        {'function', 'self_ms', 'total_ms'}
+    """
+    self_time: Counter = Counter()
+    total_time: Counter = Counter()
+    skip = max(0, _common_depth(stacks) - 1)
+    for stack, seconds in stacks.items():
+        if not stack:
+            continue
+        self_time[stack[-1]] += seconds
+        for code in set(stack[skip:]):  # rekurencja liczona raz na próbkę
+            total_time[code] += seconds
+
+    def rows(ranking: Counter) -> list[dict]:
+        return [{'function': _label(code), 'self_ms': round(float(self_time[code]) * 1000, 1),
+                 'total_ms': round(float(total_time[code]) * 1000, 1)}
+                for code, _ in ranking.most_common(limit)]
+
+    return rows(self_time), rows(total_time)
+
+
+def folded_stacks(stacks: Counter) -> list[str]:
+    """Stosy w formacie "folded" (flamegraph.pl, speedscope); waga w mikrosekundach."""
+    lines = []
+    for stack, seconds in stacks.most_common():
+        weight = int(round(seconds * 1_000_000))
+        if stack and weight > 0:
+            lines.append(";".join(_label(code) for code in stack) + f" {weight}")
+    return lines
+
+
+@dataclass
+class ProfileReport:
+    """Wynik profilowania przebiegu (zapisywany jako JSON)."""
+    trace_id: str
+    name: str
+    started_at: float
+    seconds: float
+    samples: int
+    complete: bool  # False, gdy przebieg przerwano (st.rerun) lub przekroczył limit
+    top_self: list[dict] = field(default_factory=list)
+    top_cumulative: list[dict] = field(default_factory=list)
+    top_allocations: list[dict] = field(default_factory=list)
+    peak_memory_kib: Optional[float] = None
+    path: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class RerunProfile:
+    """
+    Profil jednego przebiegu: próbkowanie stosu i tracemalloc od start() do stop().
+
+    Example:
+        >>> profile = start_profile()
+        >>> ...  # przebieg skryptu
+        >>> report = profile.stop()
+        >>> report.top_self[0]
+        {'function': 'render (app.py:936)', 'self_ms': 41.2, 'total_ms': 58.0}
+    """
+
+    def __init__(self, name: str = "rerun", trace_id: Optional[str] = None,
+                 profile_dir: str = PROFILE_DIR, top_n: int = PROFILE_TOP_N,
+                 interval: float = PROFILE_INTERVAL, max_seconds: float = PROFILE_MAX_SECONDS):
+        self.name = name
+        self.trace_id = trace_id or uuid.uuid4().hex[:16]
+        self.profile_dir = profile_dir
+        self.top_n = top_n
+        self.thread_id = threading.get_ident()
+        self.started_at = time.time()
+        self.report: Optional[ProfileReport] = None
+        self._profiler = SamplingProfiler(self.thread_id, interval, max_seconds,
+                                          on_timeout=self._on_timeout)
+        self._lock = threading.Lock()
+        self._owns_tracemalloc = False
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+
+    def start(self) -> "RerunProfile":
+        if tracemalloc.is_tracing():
+            # tracemalloc włączony przez kogoś innego - liczą się tylko przyrosty
+            self._baseline = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+            self._owns_tracemalloc = True
+        self._profiler.start()
+        return self
+
+    def stop(self, complete: bool = True) -> ProfileReport:
+        """Kończy profilowanie, zapisuje profil i zwraca raport (kolejne wywołania zwracają ten sam)."""
+        with self._lock:
+            return self._finish(complete)
+
+    def _on_timeout(self) -> None:
+        # Wywoływane z wątku próbkującego; jeśli stop() już trwa, nie ma czego zamykać
+        if self._lock.acquire(blocking=False):
+            try:
+                logger.warning("Profil %s przekroczył %.0f s - zamykam go",
+                               self.trace_id, self._profiler.max_seconds)
+                self._finish(complete=False)
+            finally:
+                self._lock.release()
+
+    def _finish(self, complete: bool) -> ProfileReport:
+        if self.report is not None:
+            return self.report
+        seconds = self._profiler.stop()
+        allocations, peak = self._memory_summary()
+        top_self, top_cumulative = top_functions(self._profiler.stacks, self.top_n)
+        self.report = ProfileReport(self.trace_id, self.name, self.started_at, seconds,
+                                    self._profiler.samples, complete, top_self, top_cumulative,
+                                    allocations, peak)
+        _release(self)
+        if self.profile_dir:
+            self.report.path = write_profile(self.report, self._profiler.stacks, self.profile_dir)
+        logger.info("Profil %s: %.0f ms, %d próbek%s", self.trace_id, seconds * 1000,
+                    self.report.samples, "" if complete else " (niepełny)")
+        return self.report
+
+    def _memory_summary(self) -> tuple[list[dict], Optional[float]]:
+        """Największe alokacje od startu profilu oraz szczyt zajętej pamięci (KiB)."""
+        if not tracemalloc.is_tracing():
+            return [], None
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+        _, peak = tracemalloc.get_traced_memory()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            stats = [(stat.traceback[0], stat.size, stat.count)
+                     for stat in snapshot.statistics('lineno')]
+        else:
+            stats = [(stat.traceback[0], stat.size_diff, stat.count_diff)
+                     for stat in snapshot.compare_to(self._baseline, 'lineno') if stat.size_diff > 0]
+            stats.sort(key=lambda item: item[1], reverse=True)
+        allocations = [{'location': f"{_short_path(frame.filename)}:{frame.lineno}",
+                        'size_kib': round(size / 1024, 1), 'count': count}
+                       for frame, size, count in stats[:self.top_n]]
+        return allocations, round(peak / 1024, 1)
+
+
+def write_profile(report: ProfileReport, stacks: Counter, profile_dir: str) -> Optional[str]:
+    """
+    Zapisuje raport (profile-<trace_id>.json) i stosy (profile-<trace_id>.folded).
+
+    Returns:
+        str | None: Ścieżka pliku JSON (None, gdy zapis się nie powiódł)
+    """
+    path = os.path.join(profile_dir, f"profile-{report.trace_id}.json")
+    try:
+        os.makedirs(profile_dir, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump({**report.to_dict(), 'path': path}, handle, ensure_ascii=False, indent=2)
+        with open(path[:-len(".json")] + ".folded", 'w', encoding='utf-8') as handle:
+            handle.writelines(line + "\n" for line in folded_stacks(stacks))
+    except OSError as e:
+        logger.warning("Nie udało się zapisać profilu do %s: %s", path, str(e))
+        return None
+    return path
+
+
+def profiling_requested(query_value: Optional[str] = None) -> bool:
+    """
+    Czy profilować bieżący przebieg.
+
+    Args:
+        query_value: Wartość parametru ?profile= (porównywana z PROFILE_TOKEN)
+
+    Returns:
+        bool: True przy PROFILE_RERUNS albo zgodnym tokenie
+    """
+    if PROFILE_RERUNS:
+        return True
+    if not PROFILE_TOKEN or not query_value:
+        return False
+    return hmac.compare_digest(query_value.encode('utf-8'), PROFILE_TOKEN.encode('utf-8'))
+
+
+def _thread_alive(thread_id: int) -> bool:
+    return any(thread.ident == thread_id for thread in threading.enumerate())
+
+
+def _release(profile: RerunProfile) -> None:
+    global _active  # pylint: disable=global-statement
+    with _active_lock:
+        if _active is profile:
+            _active = None
+
+
+def start_profile(name: str = "rerun", trace_id: Optional[str] = None,
+                  profile_dir: Optional[str] = None) -> Optional[RerunProfile]:
+    """
+    Rozpoczyna profil przebiegu w bieżącym wątku.
+
+    Profil poprzedniego przebiegu tego wątku, którego nie zamknięto (st.rerun()
+    przerywa skrypt przed końcem), jest zapisywany jako niepełny. Gdy trwa profil
+    w innym wątku (inna sesja), bieżący przebieg nie jest profilowany.
+
+    Args:
+        name: Nazwa profilu
+        trace_id: Identyfikator śladu (domyślnie nowy)
+        profile_dir: Katalog zapisu (domyślnie PROFILE_DIR)
+
+    Returns:
+        RerunProfile | None: Trwający profil albo None
+    """
+    global _active  # pylint: disable=global-statement
+    with _active_lock:
+        previous = _active
+        if (previous is not None and previous.thread_id != threading.get_ident()
+                and _thread_alive(previous.thread_id)):
+            logger.warning("Trwa profil %s innej sesji - pomijam profilowanie przebiegu",
+                           previous.trace_id)
+            return None
+        profile = RerunProfile(name, trace_id, PROFILE_DIR if profile_dir is None else profile_dir)
+        _active = profile
+
+    # Zamknięcie poza blokadą (stop() zwalnia profil przez _release); profil
+    # przejęty przez ten wątek nie może już zostać zamknięty przez inną sesję
+    if previous is not None:
+        previous.stop(complete=False)
+    return profile.start()
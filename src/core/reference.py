@@ -0,0 +1,68 @@
+# =============================================================================
+# DANE REFERENCYJNE (RDZEŃ BEZ STREAMLIT)
+# Wczytanie df_cleaned.csv oraz zbudowanie indeksu czasów, kostki kohort
+# i gęstości wykresu tempo vs czas, każde raz na proces
+# =============================================================================
+
+import logging
+import os
+import sys
+
+import pandas as pd
+
+# Dodanie głównego katalogu do ścieżki
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.core.caching import cached_resource  # pylint: disable=wrong-import-position
+from src.core.exceptions import ReferenceDataError  # pylint: disable=wrong-import-position
+from src.utils.cohort_stats import CohortCube  # pylint: disable=wrong-import-position
+from src.utils.density import ScatterDensity  # pylint: disable=wrong-import-position
+from src.utils.reference_data import read_reference_data  # pylint: disable=wrong-import-position
+from src.utils.reference_index import ReferenceIndex  # pylint: disable=wrong-import-position
+
+# Stałe konfiguracyjne
+DATA_PATH = "df_cleaned.csv"
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+
+@cached_resource()
+def load_reference_data(path: str = DATA_PATH) -> pd.DataFrame:
+    """
+    Wczytuje dane referencyjne przez kolumnową pamięć podręczną.
+    Ramka jest współdzielona (bez kopiowania), bo kolumny są mapowane z dysku.
+
+    Args:
+        path: Ścieżka do pliku CSV
+
+    Returns:
+        DataFrame: Dane referencyjne z czasami biegaczy
+
+    Raises:
+        ReferenceDataError: Brak lub uszkodzony plik
+    """
+    try:
+        df = read_reference_data(path)
+    except (FileNotFoundError, pd.errors.EmptyDataError, pd.errors.ParserError) as e:
+        raise ReferenceDataError(f"Nie udało się załadować danych referencyjnych: {e}", path) from e
+    logger.info("Dane referencyjne załadowane: %d rekordów", len(df))
+    return df
+
+
+@cached_resource()
+def load_reference_index(path: str = DATA_PATH) -> ReferenceIndex:
+    """Posortowany indeks czasów referencyjnych (percentyl, miejsce)."""
+    return ReferenceIndex(load_reference_data(path))
+
+
+@cached_resource()
+def load_cohort_cube(path: str = DATA_PATH) -> CohortCube:
+    """Kostka statystyk (płeć × wiek) dla analizy porównawczej."""
+    return CohortCube(load_reference_data(path))
+
+
+@cached_resource()
+def load_scatter_density(path: str = DATA_PATH) -> ScatterDensity:
+    """Gęstość i próbka punktów dla wykresu tempo vs czas."""
+    return ScatterDensity(load_reference_data(path))
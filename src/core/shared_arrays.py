@@ -0,0 +1,102 @@
+# =============================================================================
+# TABLICE NUMPY W PAMIĘCI WSPÓŁDZIELONEJ
+# Jeden blok multiprocessing.shared_memory z nazwanymi tablicami tylko do
+# odczytu - procesy robocze podłączają się do niego bez kopiowania danych
+# =============================================================================
+
+import logging
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+# Wyrównanie początku każdej tablicy w bloku (w bajtach)
+ALIGNMENT = 64
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SharedArraysSpec:
+    """Opis bloku (nazwa i układ tablic) przekazywany procesom roboczym."""
+    block_name: str
+    layout: tuple[tuple[str, str, tuple[int, ...], int], ...]  # (nazwa, dtype, kształt, offset)
+
+
+class SharedArrays:
+    """
+    Nazwane tablice NumPy w jednym bloku pamięci współdzielonej.
+
+    Właściciel (create) kopiuje tablice do bloku raz i odpowiada za jego
+    usunięcie (unlink); procesy robocze (attach) dostają widoki tylko do odczytu.
+    """
+
+    def __init__(self, block: shared_memory.SharedMemory, spec: SharedArraysSpec, owner: bool):
+        self._block = block
+        self.spec = spec
+        self.owner = owner
+        self.arrays: dict[str, np.ndarray] = {}
+        for name, dtype, shape, offset in spec.layout:
+            array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf, offset=offset)
+            array.flags.writeable = False
+            self.arrays[name] = array
+
+    @classmethod
+    def create(cls, arrays: dict[str, np.ndarray]) -> "SharedArrays":
+        """
+        Tworzy blok i kopiuje do niego tablice.
+
+        Args:
+            arrays: Nazwane tablice (typy liczbowe, bez obiektów Pythona)
+
+        Returns:
+            SharedArrays: Właściciel bloku
+        """
+        layout = []
+        size = 0
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            if array.dtype.hasobject:
+                raise TypeError(f"Tablica {name} zawiera obiekty Pythona")
+            size = -(-size // ALIGNMENT) * ALIGNMENT
+            layout.append((name, array.dtype.str, array.shape, size))
+            size += array.nbytes
+
+        block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for (name, dtype, shape, offset), array in zip(layout, arrays.values()):
+            target = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf, offset=offset)
+            target[...] = array
+        logger.info("Pamięć współdzielona %s: %d tablic, %.1f MB",
+                    block.name, len(layout), size / 1e6)
+        return cls(block, SharedArraysSpec(block.name, tuple(layout)), owner=True)
+
+    @classmethod
+    def attach(cls, spec: SharedArraysSpec) -> "SharedArrays":
+        """Podłącza się do istniejącego bloku (w procesie roboczym)."""
+        return cls(shared_memory.SharedMemory(name=spec.block_name), spec, owner=False)
+
+    def subset(self, prefix: str) -> dict[str, np.ndarray]:
+        """Tablice z nazwą zaczynającą się od prefix (prefiks jest usuwany)."""
+        return {name[len(prefix):]: array for name, array in self.arrays.items()
+                if name.startswith(prefix)}
+
+    def close(self, unlink: Optional[bool] = None) -> None:
+        """
+        Zamyka widoki i blok; właściciel domyślnie usuwa też blok z systemu.
+
+        Args:
+            unlink: Czy usunąć blok (domyślnie tylko właściciel)
+        """
+        self.arrays.clear()
+        try:
+            self._block.close()
+        except BufferError:
+            # Widoki tablic wciąż używane - blok zostanie zamknięty przy zwolnieniu
+            logger.debug("Blok %s ma aktywne widoki", self.spec.block_name)
+        if self.owner if unlink is None else unlink:
+            try:
+                self._block.unlink()
+            except FileNotFoundError:
+                pass
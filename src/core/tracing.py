@@ -0,0 +1,231 @@
+# =============================================================================
+# POMIAR CZASU ETAPÓW ŻĄDANIA
+# Lekkie odcinki czasu (spany) w ramach śladu z identyfikatorem żądania,
+# strukturalny wpis w logu, przesuwne percentyle p50/p95 na etap
+# oraz opcjonalny zrzut śladów do pliku JSON Lines
+# =============================================================================
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+# Stałe konfiguracyjne
+# Plik, do którego dopisywane są zakończone ślady (pusty = bez zrzutu)
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+# Liczba ostatnich pomiarów etapu branych do percentyli
+TRACE_WINDOW = 200
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+# Ślad bieżącego żądania (osobny dla każdego wątku / zadania asyncio)
+_current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar(
+    "current_trace", default=None)
+_file_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Span:
+    """Zmierzony etap żądania."""
+    stage: str
+    start: float  # sekundy od początku śladu
+    seconds: float
+    error: Optional[str] = None  # nazwa wyjątku, który przerwał etap
+
+
+@dataclass
+class Trace:
+    """
+    Ślad jednego żądania: identyfikator, etapy i dodatkowe atrybuty.
+
+    Example:
+        >>> with start_trace("oblicz") as trace:
+        ...     with span("extraction"):
+        ...         ...
+        >>> trace.durations()
+        {'extraction': 0.0012}
+    """
+    name: str
+    trace_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    started_at: float = field(default_factory=time.time)
+    spans: list[Span] = field(default_factory=list)
+    attributes: dict = field(default_factory=dict)
+    total_seconds: Optional[float] = None
+    _origin: float = field(default_factory=time.perf_counter, repr=False)
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Mierzy czas bloku jako etap stage (także gdy blok zgłosi wyjątek)."""
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.spans.append(Span(stage, started - self._origin,
+                                   time.perf_counter() - started, error))
+
+    def durations(self) -> dict[str, float]:
+        """Łączny czas każdego etapu w sekundach (etapy powtórzone są sumowane)."""
+        result: dict[str, float] = {}
+        for item in self.spans:
+            result[item.stage] = result.get(item.stage, 0.0) + item.seconds
+        return result
+
+    def finish(self) -> None:
+        self.total_seconds = time.perf_counter() - self._origin
+
+    def to_dict(self) -> dict:
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'started_at': self.started_at,
+            'total_ms': None if self.total_seconds is None else round(self.total_seconds * 1000, 3),
+            'spans': [{'stage': item.stage, 'start_ms': round(item.start * 1000, 3),
+                       'ms': round(item.seconds * 1000, 3),
+                       **({'error': item.error} if item.error else {})} for item in self.spans],
+            'attributes': self.attributes,
+        }
+
+
+@contextmanager
+def start_trace(name: str, trace_file: Optional[str] = None,
+                trace_id: Optional[str] = None) -> Iterator[Trace]:
+    """
+    Rozpoczyna ślad żądania; span() i annotate() w tym bloku trafiają do niego.
+
+    Po zakończeniu ślad jest zapisywany w logu (jeden wiersz JSON) oraz,
+    gdy ustawiono plik, dopisywany do pliku JSON Lines.
+
+    Args:
+        name: Nazwa żądania (np. "oblicz")
+        trace_file: Plik zrzutu śladów (domyślnie TRACE_FILE)
+        trace_id: Identyfikator śladu (domyślnie nowy, np. wspólny z profilem przebiegu)
+
+    Yields:
+        Trace: Bieżący ślad
+    """
+    trace = Trace(name) if trace_id is None else Trace(name, trace_id=trace_id)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.finish()
+        record = trace.to_dict()
+        logger.info("trace %s", json.dumps(record, ensure_ascii=False), extra={'trace': record})
+        path = TRACE_FILE if trace_file is None else trace_file
+        if path:
+            dump_trace(trace, path)
+
+
+def current_trace() -> Optional[Trace]:
+    """Ślad bieżącego żądania (None poza start_trace)."""
+    return _current_trace.get()
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Mierzy etap bieżącego śladu; bez aktywnego śladu nic nie robi."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    with trace.span(stage):
+        yield
+
+
+def start_span(stage: str) -> ExitStack:
+    """
+    Rozpoczyna etap bez bloku with; etap kończy close() zwróconego obiektu.
+
+    Przydatne, gdy etap obejmuje długi fragment skryptu Streamlit, którego
+    nie warto wcinać. Etap przerwany wyjątkiem nie jest zapisywany (wyjątek
+    i tak kończy ślad).
+
+    Example:
+        >>> figures = start_span("figures")
+        >>> ...
+        >>> figures.close()
+    """
+    stack = ExitStack()
+    stack.enter_context(span(stage))
+    return stack
+
+
+def annotate(**attributes) -> None:
+    """Dodaje atrybuty (np. użytą warstwę ekstrakcji) do bieżącego śladu."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.attributes.update(attributes)
+
+
+def dump_trace(trace: Trace, path: str) -> None:
+    """Dopisuje ślad jako wiersz JSON do pliku (błąd zapisu trafia tylko do logu)."""
+    line = json.dumps(trace.to_dict(), ensure_ascii=False)
+    try:
+        with _file_lock, open(path, 'a', encoding='utf-8') as handle:
+            handle.write(line + "\n")
+    except OSError as e:
+        logger.warning("Nie udało się zapisać śladu do %s: %s", path, str(e))
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    """Percentyl metodą najbliższej rangi (q w przedziale 0-100)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+class StageStats:
+    """
+    Ostatni czas oraz przesuwne p50/p95 każdego etapu z kolejnych śladów.
+
+    Bezpieczne wątkowo - jedna instancja może zbierać ślady całego procesu
+    albo (w aplikacji) jednej sesji.
+    """
+
+    def __init__(self, window: int = TRACE_WINDOW):
+        self.window = window
+        self.traces = 0
+        self.last_trace_id: Optional[str] = None
+        self._samples: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, trace: Trace) -> None:
+        """Dodaje czasy etapów (i łączny czas jako 'total') zakończonego śladu."""
+        durations = trace.durations()
+        if trace.total_seconds is not None:
+            durations['total'] = trace.total_seconds
+        with self._lock:
+            self.traces += 1
+            self.last_trace_id = trace.trace_id
+            for stage, seconds in durations.items():
+                self._samples.setdefault(stage, deque(maxlen=self.window)).append(seconds)
+
+    def summary(self) -> dict[str, dict]:
+        """
+        Statystyki etapów w kolejności pierwszego wystąpienia.
+
+        Returns:
+            dict: {etap: {'last', 'p50', 'p95' (sekundy), 'count'}}
+        """
+        with self._lock:
+            samples = {stage: list(values) for stage, values in self._samples.items()}
+        result = {}
+        for stage, values in samples.items():
+            ordered = sorted(values)
+            result[stage] = {'last': values[-1], 'p50': _percentile(ordered, 50),
+                             'p95': _percentile(ordered, 95), 'count': len(values)}
+        return result
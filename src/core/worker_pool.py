@@ -0,0 +1,348 @@
+# =============================================================================
+# WIELOPROCESOWA PULA PRZEWIDYWANIA
+# N procesów roboczych, z których każdy ładuje model raz i czyta tablice
+# referencyjne (indeks czasów, kostka kohort) z pamięci współdzielonej;
+# wywołujący (aplikacja, zadania wsadowe) dostają obiekty Future
+# =============================================================================
+
+import atexit
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# Dodanie głównego katalogu do ścieżki
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.core.caching import cached_resource  # pylint: disable=wrong-import-position
+from src.core.exceptions import InvalidInputError  # pylint: disable=wrong-import-position
+from src.core.metrics import PREDICTION_ERRORS, PREDICTIONS  # pylint: disable=wrong-import-position
+from src.core.predictor import Prediction, Predictor  # pylint: disable=wrong-import-position
+from src.core.reference import (  # pylint: disable=wrong-import-position
+    DATA_PATH,
+    load_cohort_cube,
+    load_reference_index,
+)
+from src.core.shared_arrays import SharedArrays, SharedArraysSpec  # pylint: disable=wrong-import-position
+from src.utils.cohort_stats import CohortCube  # pylint: disable=wrong-import-position
+from src.utils.inference import MODEL_PATH, NATIVE_MODEL_PATH  # pylint: disable=wrong-import-position
+from src.utils.reference_index import ReferenceIndex  # pylint: disable=wrong-import-position
+
+# Stałe konfiguracyjne
+# Liczba procesów roboczych (0 = przewidywanie w bieżącym procesie)
+WORKER_PROCESSES = int(os.getenv("PREDICTION_WORKERS", "0"))
+# Metoda startu procesów - "spawn" jest bezpieczny także w procesie z wątkami (Streamlit)
+WORKER_START_METHOD = os.getenv("PREDICTION_WORKER_START_METHOD", "spawn")
+# Rozmiar fragmentu wysyłanego do jednego procesu przy przewidywaniu wsadowym
+WORKER_CHUNK_SIZE = 5000
+# Okno wiekowe kohorty (wiek ± lata), jak w analizie porównawczej aplikacji
+COHORT_AGE_RANGE = 5
+
+# Prefiksy tablic w bloku pamięci współdzielonej
+_INDEX_PREFIX = "index/"
+_COHORT_PREFIX = "cohort/"
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RankedPrediction:
+    """Przewidywanie wraz z pozycją na tle danych referencyjnych."""
+    seconds: float
+    time: str
+    engine: str
+    percentile: float  # odsetek wszystkich biegaczy z lepszym czasem
+    cohort_count: int  # liczba biegaczy tej samej płci w oknie wieku ± COHORT_AGE_RANGE
+    cohort_mean_time: float  # średni czas w oknie (NaN dla pustego okna)
+    cohort_slower: int  # liczba biegaczy w oknie z gorszym czasem
+    cohort_mean_tempo: float  # średnie tempo na 5km w oknie (NaN dla pustego okna)
+    cohort_min_time: float  # najlepszy czas w oknie (NaN dla pustego okna)
+
+
+def rank_prediction(prediction: Prediction, user_data: dict, index: ReferenceIndex,
+                    cube: CohortCube, age_range: int = COHORT_AGE_RANGE) -> RankedPrediction:
+    """
+    Uzupełnia przewidywanie o percentyl i statystyki kohorty.
+
+    Args:
+        prediction: Wynik Predictor.predict
+        user_data: Dane biegacza ('Wiek', 'Płeć')
+        index: Indeks czasów referencyjnych
+        cube: Kostka kohort
+        age_range: Okno wiekowe kohorty
+
+    Returns:
+        RankedPrediction: Przewidywanie z pozycją
+    """
+    window = cube.around(user_data['Płeć'], float(user_data['Wiek']), age_range)
+    percentile = index.percentile(prediction.seconds) if len(index) > 0 else 50.0
+    return RankedPrediction(prediction.seconds, prediction.time, prediction.engine, percentile,
+                            window.count, window.mean_time, window.count_slower(prediction.seconds),
+                            window.mean_tempo, window.min_time)
+
+
+# -----------------------------------------------------------------------------
+# Stan procesu roboczego
+# -----------------------------------------------------------------------------
+
+_worker: dict = {}
+
+
+def _init_worker(spec: SharedArraysSpec, index_meta: dict, cube_meta: dict,
+                 native_model_path: str, model_path: str) -> None:
+    """Inicjalizacja procesu roboczego: model ładowany raz, tablice z pamięci współdzielonej."""
+    shared = SharedArrays.attach(spec)
+    predictor = Predictor(native_model_path, model_path)
+    _worker.update(
+        shared=shared,
+        index=ReferenceIndex.from_arrays(index_meta, shared.subset(_INDEX_PREFIX)),
+        cube=CohortCube.from_arrays(cube_meta, shared.subset(_COHORT_PREFIX)),
+        predictor=predictor,
+        engine=predictor.load(),
+    )
+
+
+def _worker_ping(delay: float) -> int:
+    time.sleep(delay)
+    return os.getpid()
+
+
+def _worker_predict(user_data: dict, age_range: int) -> RankedPrediction:
+    prediction = _worker['predictor'].predict(user_data)
+    return rank_prediction(prediction, user_data, _worker['index'], _worker['cube'], age_range)
+
+
+def _worker_predict_each(records: list, age_range: int) -> list:
+    return [_worker_predict(user_data, age_range) for user_data in records]
+
+
+def _worker_predict_many(chunk: Union[pd.DataFrame, list], start: int = 0) -> pd.DataFrame:
+    result = _worker['predictor'].predict_many(chunk)
+    if not isinstance(chunk, pd.DataFrame):
+        # Fragment listy rekordów: indeks jak pozycje rekordów na wejściu
+        result.index = pd.RangeIndex(start, start + len(result))
+    overall = _worker['index'].group()
+    seconds = result['prediction_label'].to_numpy(dtype=np.float64)
+    percentile = np.full(len(seconds), np.nan)
+    valid = ~np.isnan(seconds)
+    if overall.total:
+        percentile[valid] = np.searchsorted(overall.times, seconds[valid], side='left') / overall.total * 100
+    result['percentile'] = percentile
+    return result
+
+
+# -----------------------------------------------------------------------------
+# Metryki (liczone w procesie wywołującym - rejestry procesów roboczych
+# nie są eksportowane)
+# -----------------------------------------------------------------------------
+
+def _count_single(future: Future) -> None:
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        PREDICTION_ERRORS.inc(type=type(error).__name__)
+    else:
+        PREDICTIONS.inc(engine=future.result().engine, mode="single")
+
+
+def _ranked_counter(records: int):
+    def count(future: Future) -> None:
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            PREDICTION_ERRORS.inc(records, type=type(error).__name__)
+        elif records:
+            PREDICTIONS.inc(records, engine=future.result()[0].engine, mode="single")
+    return count
+
+
+def _batch_counter(engine: str, records: int):
+    def count(future: Future) -> None:
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            PREDICTION_ERRORS.inc(records, type=type(error).__name__)
+            return
+        valid = int(future.result()['is_valid'].sum())
+        if valid:
+            PREDICTIONS.inc(valid, engine=engine, mode="batch")
+        if records - valid:
+            PREDICTION_ERRORS.inc(records - valid, type=InvalidInputError.__name__)
+    return count
+
+
+# -----------------------------------------------------------------------------
+# Pula
+# -----------------------------------------------------------------------------
+
+class PredictionWorkerPool:
+    """
+    Pula procesów przewidywania z tablicami referencyjnymi w pamięci współdzielonej.
+
+    Żądania trafiają do kolejki ProcessPoolExecutor, a wywołujący dostają
+    obiekty Future. Wyjątki rdzenia (InvalidInputError, ...) są przekazywane
+    przez Future.result().
+
+    Example:
+        >>> with PredictionWorkerPool(processes=4) as pool:
+        ...     future = pool.submit({'Wiek': 28, 'Płeć': 'K', '5 km Tempo': 4.75})
+        ...     future.result().time
+    """
+
+    def __init__(self, processes: Optional[int] = None,
+                 native_model_path: str = NATIVE_MODEL_PATH, model_path: str = MODEL_PATH,
+                 data_path: str = DATA_PATH, age_range: int = COHORT_AGE_RANGE,
+                 start_method: str = WORKER_START_METHOD):
+        self.processes = processes or os.cpu_count() or 1
+        self.age_range = age_range
+        # Predyktor w procesie nadrzędnym: silnik do metryk i pusta partia w predict_many
+        self._predictor = Predictor(native_model_path, model_path)
+        self.engine = self._predictor.engine
+        self.submitted = 0
+        self._lock = threading.Lock()
+
+        index_meta, index_arrays = load_reference_index(data_path).to_arrays()
+        cube_meta, cube_arrays = load_cohort_cube(data_path).to_arrays()
+        self._shared = SharedArrays.create({
+            **{_INDEX_PREFIX + name: array for name, array in index_arrays.items()},
+            **{_COHORT_PREFIX + name: array for name, array in cube_arrays.items()},
+        })
+        try:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context(start_method),
+                initializer=_init_worker,
+                initargs=(self._shared.spec, index_meta, cube_meta, native_model_path, model_path))
+        except (ValueError, OSError):
+            self._shared.close()
+            raise
+        logger.info("Pula przewidywania: %d procesów (%s)", self.processes, start_method)
+
+    def warm_up(self, timeout: float = 60.0) -> set[int]:
+        """
+        Uruchamia wszystkie procesy (i ładuje w nich model) przed pierwszym żądaniem.
+
+        Procesy startują na żądanie, więc zlecenia kontrolne są ponawiane,
+        dopóki nie odpowie każdy z nich (lub nie minie timeout).
+
+        Returns:
+            set[int]: Identyfikatory procesów, które odpowiedziały
+        """
+        pids: set[int] = set()
+        deadline = time.monotonic() + timeout
+        while len(pids) < self.processes and time.monotonic() < deadline:
+            futures = [self._executor.submit(_worker_ping, 0.05) for _ in range(self.processes)]
+            pids.update(future.result() for future in futures)
+        return pids
+
+    def submit(self, user_data: dict) -> "Future[RankedPrediction]":
+        """
+        Zleca przewidywanie dla jednego biegacza.
+
+        Args:
+            user_data: Słownik z kluczami 'Wiek', 'Płeć', '5 km Tempo'
+
+        Returns:
+            Future[RankedPrediction]: Wynik (lub wyjątek rdzenia) w Future.result()
+        """
+        with self._lock:
+            self.submitted += 1
+        future = self._executor.submit(_worker_predict, dict(user_data), self.age_range)
+        future.add_done_callback(_count_single)
+        return future
+
+    def submit_each(self, records: Iterable[dict]) -> "Future[list[RankedPrediction]]":
+        """
+        Zleca przewidywanie z pozycją (jak submit) dla wielu biegaczy jednym
+        zleceniem - narzut IPC ponoszony jest raz na całą listę.
+
+        Args:
+            records: Słowniki z kluczami 'Wiek', 'Płeć', '5 km Tempo'
+
+        Returns:
+            Future[list[RankedPrediction]]: Wyniki w kolejności wejścia; błąd
+            dowolnego rekordu (np. InvalidInputError) przerywa całe zlecenie
+        """
+        records = [dict(user_data) for user_data in records]
+        with self._lock:
+            self.submitted += 1
+        future = self._executor.submit(_worker_predict_each, records, self.age_range)
+        future.add_done_callback(_ranked_counter(len(records)))
+        return future
+
+    def submit_many(self, data: Union[pd.DataFrame, Iterable[dict]],
+                    chunk_size: int = WORKER_CHUNK_SIZE) -> list["Future[pd.DataFrame]"]:
+        """
+        Dzieli rekordy na fragmenty i zleca je procesom (Predictor.predict_many).
+
+        Args:
+            data: DataFrame lub lista słowników
+            chunk_size: Liczba rekordów w jednym zleceniu
+
+        Returns:
+            list[Future[DataFrame]]: Wyniki fragmentów (z kolumną 'percentile') w kolejności wejścia
+        """
+        # Listy rekordów dzielone są bez zamiany na DataFrame - Predictor.predict_many
+        # w procesie roboczym zachowuje wiersz (i błędy "Brak pola") dla każdego rekordu
+        records = data if isinstance(data, pd.DataFrame) else list(data)
+        futures = []
+        for start in range(0, len(records), chunk_size):
+            if isinstance(records, pd.DataFrame):
+                chunk = records.iloc[start:start + chunk_size]
+            else:
+                chunk = records[start:start + chunk_size]
+            future = self._executor.submit(_worker_predict_many, chunk, start)
+            future.add_done_callback(_batch_counter(self.engine, len(chunk)))
+            futures.append(future)
+        with self._lock:
+            self.submitted += len(futures)
+        return futures
+
+    def predict_many(self, data: Union[pd.DataFrame, Iterable[dict]],
+                     chunk_size: int = WORKER_CHUNK_SIZE) -> pd.DataFrame:
+        """Jak Predictor.predict_many, ale fragmenty liczone są równolegle w procesach."""
+        if not isinstance(data, pd.DataFrame):
+            data = list(data)
+        futures = self.submit_many(data, chunk_size)
+        if not futures:
+            return self._predictor.predict_many(data)
+        return pd.concat([future.result() for future in futures])
+
+    def stats(self) -> dict:
+        return {'processes': self.processes, 'submitted': self.submitted,
+                'shared_block': self._shared.spec.block_name}
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Zatrzymuje procesy i usuwa blok pamięci współdzielonej."""
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+        self._shared.close()
+
+    def __enter__(self) -> "PredictionWorkerPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+
+@cached_resource()
+def get_worker_pool(processes: int = WORKER_PROCESSES,
+                    native_model_path: str = NATIVE_MODEL_PATH,
+                    model_path: str = MODEL_PATH,
+                    data_path: str = DATA_PATH) -> PredictionWorkerPool:
+    """Wspólna dla procesu pula przewidywania (tworzona przy pierwszym użyciu)."""
+    pool = PredictionWorkerPool(processes, native_model_path, model_path, data_path)
+    # Blok pamięci współdzielonej usuwany jest przy zakończeniu procesu
+    atexit.register(pool.shutdown)
+    return pool
@@ -0,0 +1,334 @@
+# =============================================================================
+# SERWIS HTTP (JSON) PRZEWIDYWANIA CZASU PÓŁMARATONU
+# Lekki serwis ASGI (Starlette + uvicorn) wokół src.core i ekstrakcji danych:
+#   python -m src.service --port 8000 --workers 4
+#   POST /predict, POST /parse, POST /predict/batch, GET /health, GET /metrics
+# =============================================================================
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+import uvicorn
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+# Dodanie głównego katalogu do ścieżki
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core import (  # pylint: disable=wrong-import-position
+    InvalidInputError,
+    ModelUnavailableError,
+    Predictor,
+    PredictorError,
+    get_predictor,
+)
+from src.core.metrics import (  # pylint: disable=wrong-import-position
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    PREDICTION_ERRORS,
+    render_metrics,
+)
+from src.utils import data_processing  # pylint: disable=wrong-import-position
+from src.utils.validation import validate_user_data  # pylint: disable=wrong-import-position
+
+# Szybki koder JSON (opcjonalny)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# Stałe konfiguracyjne
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8000"))
+# Liczba wątków wykonujących wywołania modelu
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Maksymalna liczba wywołań modelu w toku (wykonywane + oczekujące); powyżej - 503
+SERVICE_QUEUE_LIMIT = int(os.getenv("SERVICE_QUEUE_LIMIT", "64"))
+# Maksymalna liczba rekordów w jednym żądaniu /predict/batch
+SERVICE_BATCH_LIMIT = int(os.getenv("SERVICE_BATCH_LIMIT", "10000"))
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+
+class FastJSONResponse(JSONResponse):
+    """Odpowiedź JSON kodowana przez orjson (lub json, gdy orjson jest niedostępny)."""
+
+    def render(self, content: Any) -> bytes:
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False,
+                          separators=(",", ":")).encode("utf-8")
+
+
+def _loads(body: bytes) -> Any:
+    return orjson.loads(body) if ORJSON_AVAILABLE else json.loads(body)
+
+
+class ServiceOverloadedError(RuntimeError):
+    """Przekroczono limit wywołań modelu w toku."""
+
+
+class InvalidJSONError(ValueError):
+    """Treść żądania nie jest poprawnym JSON."""
+
+
+class ModelPool:
+    """
+    Ograniczona pula wątków dla wywołań modelu.
+
+    Pętla zdarzeń nie jest blokowana przez obliczenia, a liczba wywołań
+    w toku jest ograniczona - nadmiarowe żądania dostają od razu 503
+    zamiast czekać w nieograniczonej kolejce.
+    """
+
+    def __init__(self, workers: int = SERVICE_WORKERS, queue_limit: int = SERVICE_QUEUE_LIMIT):
+        self.workers = workers
+        self.queue_limit = max(queue_limit, workers)
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="model")
+
+    async def run(self, func: Callable, *args) -> Any:
+        """Wykonuje func(*args) w puli; ServiceOverloadedError przy przepełnieniu."""
+        if self.pending >= self.queue_limit:
+            self.rejected += 1
+            raise ServiceOverloadedError(
+                f"Serwis przeciążony ({self.pending} wywołań modelu w toku)")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def stats(self) -> dict:
+        return {'workers': self.workers, 'queue_limit': self.queue_limit,
+                'pending': self.pending, 'completed': self.completed,
+                'rejected': self.rejected}
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _error(status_code: int, error: str, message: str, **extra) -> FastJSONResponse:
+    return FastJSONResponse({'error': error, 'message': message, **extra}, status_code=status_code)
+
+
+def _error_from_exception(e: Exception) -> FastJSONResponse:
+    """Mapuje wyjątki rdzenia i serwisu na kody HTTP."""
+    if isinstance(e, InvalidJSONError):
+        return _error(400, "invalid_json", str(e))
+    if isinstance(e, InvalidInputError):
+        return _error(422, "invalid_input", str(e), errors=e.errors)
+    if isinstance(e, ServiceOverloadedError):
+        # Odrzucone przed wywołaniem modelu - Predictor go nie policzy
+        PREDICTION_ERRORS.inc(type=type(e).__name__)
+        return _error(503, "overloaded", str(e))
+    if isinstance(e, ModelUnavailableError):
+        return _error(503, "model_unavailable", str(e))
+    logger.error("Błąd przewidywania: %s", str(e))
+    return _error(500, "prediction_failed", str(e))
+
+
+async def _read_json(request: Request) -> Any:
+    body = await request.body()
+    try:
+        return _loads(body)
+    except ValueError as e:
+        raise InvalidJSONError(f"Nieprawidłowy JSON: {e}") from e
+
+
+def _prediction_payload(prediction) -> dict:
+    return {'seconds': prediction.seconds, 'time': prediction.time, 'engine': prediction.engine}
+
+
+def _batch_payload(result: pd.DataFrame) -> list[dict]:
+    """Zamienia wynik Predictor.predict_many na listę rekordów JSON (NaN -> null)."""
+    seconds = result['prediction_label'].to_numpy(dtype=np.float64)
+    return [
+        {'seconds': None if np.isnan(value) else float(value), 'time': time_text,
+         'is_valid': bool(is_valid), 'errors': list(errors)}
+        for value, time_text, is_valid, errors in zip(
+            seconds, result['prediction_time'], result['is_valid'], result['errors'])
+    ]
+
+
+def create_app(predictor: Optional[Predictor] = None, workers: int = SERVICE_WORKERS,
+               queue_limit: int = SERVICE_QUEUE_LIMIT, batch_limit: int = SERVICE_BATCH_LIMIT,
+               extract: Optional[Callable] = None) -> Starlette:
+    """
+    Tworzy aplikację ASGI serwisu.
+
+    Args:
+        predictor: Predictor; domyślnie wspólny dla procesu (get_predictor)
+        workers: Liczba wątków puli modelu
+        queue_limit: Maksymalna liczba wywołań modelu w toku
+        batch_limit: Maksymalna liczba rekordów w /predict/batch
+        extract: Funkcja tekst -> ExtractionOutcome; domyślnie
+            extract_user_data_detailed z terminem EXTRACTION_DEADLINE
+
+    Returns:
+        Starlette: Aplikacja do uruchomienia przez uvicorn
+    """
+    predictor = predictor or get_predictor()
+    extract = extract or functools.partial(data_processing.extract_user_data_detailed,
+                                           deadline=data_processing.EXTRACTION_DEADLINE)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette):
+        # Model ładowany raz, przed przyjęciem pierwszego żądania
+        app.state.pool = ModelPool(workers, queue_limit)
+        app.state.started_at = time.time()
+        app.state.engine = await app.state.pool.run(predictor.load)
+        logger.info("Serwis gotowy: silnik=%s, wątki=%d, limit=%d, orjson=%s",
+                    app.state.engine, workers, app.state.pool.queue_limit, ORJSON_AVAILABLE)
+        try:
+            yield
+        finally:
+            app.state.pool.shutdown()
+
+    async def health(request: Request) -> FastJSONResponse:
+        return FastJSONResponse({
+            'status': 'ok',
+            'engine': request.app.state.engine,
+            'uptime_seconds': round(time.time() - request.app.state.started_at, 3),
+            'orjson': ORJSON_AVAILABLE,
+            'pool': request.app.state.pool.stats(),
+        })
+
+    async def metrics(request: Request) -> Response:
+        # Format tekstowy Prometheus (przewidywania, ekstrakcja, pamięci podręczne)
+        return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+    async def predict(request: Request) -> FastJSONResponse:
+        try:
+            payload = await _read_json(request)
+            if not isinstance(payload, dict):
+                raise InvalidInputError(["Oczekiwano obiektu JSON z kluczami 'Wiek', 'Płeć', '5 km Tempo'"])
+            prediction = await request.app.state.pool.run(predictor.predict, payload)
+        except (PredictorError, InvalidJSONError, ServiceOverloadedError) as e:
+            return _error_from_exception(e)
+        return FastJSONResponse(_prediction_payload(prediction))
+
+    async def predict_batch(request: Request) -> FastJSONResponse:
+        try:
+            payload = await _read_json(request)
+            records = payload.get('records') if isinstance(payload, dict) else payload
+            if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+                raise InvalidInputError(["Oczekiwano tablicy obiektów JSON (lub {'records': [...]})"])
+            if len(records) > batch_limit:
+                return _error(413, "batch_too_large",
+                              f"Maksymalnie {batch_limit} rekordów w jednym żądaniu")
+            if not records:
+                return FastJSONResponse({'count': 0, 'valid': 0, 'results': []})
+            result = await request.app.state.pool.run(predictor.predict_many, records)
+        except (PredictorError, InvalidJSONError, ServiceOverloadedError) as e:
+            return _error_from_exception(e)
+        results = _batch_payload(result)
+        return FastJSONResponse({'count': len(results),
+                                 'valid': sum(item['is_valid'] for item in results),
+                                 'results': results})
+
+    async def parse(request: Request) -> FastJSONResponse:
+        try:
+            payload = await _read_json(request)
+            text = payload.get('text') if isinstance(payload, dict) else None
+            if not isinstance(text, str):
+                raise InvalidInputError(["Oczekiwano obiektu JSON z kluczem 'text'"])
+            # Ekstrakcja może czekać na OpenAI - poza pulą modelu, aby jej nie blokować
+            outcome = await run_in_threadpool(extract, text)
+
+            response = {'data': outcome.data, 'tier': outcome.tier,
+                        'confidence': round(outcome.confidence, 3),
+                        'errors': [], 'prediction': None}
+            if outcome.data is None:
+                response['errors'] = ["Nie udało się odczytać danych z tekstu"]
+                return FastJSONResponse(response, status_code=422)
+
+            is_valid, errors = validate_user_data(outcome.data)
+            if not is_valid:
+                response['errors'] = errors
+                return FastJSONResponse(response, status_code=422)
+            prediction = await request.app.state.pool.run(
+                functools.partial(predictor.predict, outcome.data, validate=False))
+        except (PredictorError, InvalidJSONError, ServiceOverloadedError) as e:
+            return _error_from_exception(e)
+        response['prediction'] = _prediction_payload(prediction)
+        return FastJSONResponse(response)
+
+    return Starlette(routes=[
+        Route("/health", health, methods=["GET"]),
+        Route("/predict", predict, methods=["POST"]),
+        Route("/predict/batch", predict_batch, methods=["POST"]),
+        Route("/parse", parse, methods=["POST"]),
+        Route("/metrics", metrics, methods=["GET"]),
+    ], lifespan=lifespan)
+
+
+def start_background_server(app: Starlette, host: str = "127.0.0.1",
+                            port: int = 0) -> tuple[uvicorn.Server, threading.Thread, str]:
+    """
+    Uruchamia serwis w wątku w tle (testy, benchmark obciążeniowy).
+
+    Args:
+        app: Aplikacja z create_app
+        host: Adres nasłuchu
+        port: Port (0 = wolny port wybrany przez system)
+
+    Returns:
+        tuple: (serwer uvicorn, wątek, bazowy URL); zatrzymanie: server.should_exit = True
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", access_log=False))
+    thread = threading.Thread(target=server.run, kwargs={'sockets': [sock]},
+                              name="service", daemon=True)
+    thread.start()
+    while not server.started and thread.is_alive():
+        time.sleep(0.01)
+    if not server.started:
+        raise RuntimeError("Serwis nie wystartował")
+    return server, thread, f"http://{host}:{sock.getsockname()[1]}"
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Punkt wejścia serwisu HTTP."""
+    parser = argparse.ArgumentParser(description="Serwis HTTP przewidywania czasu półmaratonu")
+    parser.add_argument('--host', default=SERVICE_HOST, help="Adres nasłuchu")
+    parser.add_argument('--port', type=int, default=SERVICE_PORT, help="Port")
+    parser.add_argument('--workers', type=int, default=SERVICE_WORKERS,
+                        help="Liczba wątków wywołań modelu")
+    parser.add_argument('--queue-limit', type=int, default=SERVICE_QUEUE_LIMIT,
+                        help="Maksymalna liczba wywołań modelu w toku")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    app = create_app(workers=args.workers, queue_limit=args.queue_limit)
+    uvicorn.run(app, host=args.host, port=args.port, access_log=False)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,285 @@
+# =============================================================================
+# WSADOWA EKSTRAKCJA DANYCH Z TEKSTU
+# Moduł pakujący wiele opisów biegaczy w jedno zapytanie do OpenAI (tablica
+# JSON z identyfikatorami wierszy) z fallbackiem do regex dla każdego wiersza
+# =============================================================================
+
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Optional, Union
+
+import pandas as pd
+from openai import OpenAIError
+
+# Dodanie głównego katalogu do ścieżki
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.core.metrics import OPENAI_REQUESTS, REGEX_FALLBACKS  # pylint: disable=wrong-import-position
+from src.utils import data_processing  # pylint: disable=wrong-import-position
+from src.utils.extraction_cache import (  # pylint: disable=wrong-import-position
+    BACKEND_OPENAI,
+    ExtractionCache,
+    get_extraction_cache,
+)
+from src.utils.validation import (  # pylint: disable=wrong-import-position
+    extract_data_with_confidence,
+    validate_user_data,
+)
+
+# Stałe konfiguracyjne
+BATCH_TOKEN_BUDGET = int(os.getenv("EXTRACTION_BATCH_TOKENS", "2000"))  # tokeny wejścia na zapytanie
+BATCH_MAX_ITEMS = 50
+BATCH_WORKERS = int(os.getenv("EXTRACTION_BATCH_WORKERS", "4"))
+BATCH_TIMEOUT = 60.0
+# Przybliżenie bez tokenizera: tekst polski to ok. 3 znaki na token
+CHARS_PER_TOKEN = 3
+# Narzut na jeden wiersz w zapytaniu i limit tokenów odpowiedzi na wiersz
+ITEM_OVERHEAD_TOKENS = 12
+RESPONSE_TOKENS_PER_ITEM = 30
+
+OUTPUT_COLUMNS = ['Wiek', 'Płeć', '5 km Tempo', 'extraction_tier']
+
+BATCH_SYSTEM_PROMPT = ("Jesteś asystentem specjalizującym się w analizie danych "
+                       "biegowych. Dla każdego opisu biegacza wyodrębnij wiek, płeć "
+                       "i tempo biegu. Zawsze zwracaj poprawną tablicę JSON.")
+
+BATCH_PROMPT_HEADER = """
+Każdy element poniższej tablicy JSON to opis biegacza z identyfikatorem "id".
+Dla każdego opisu wyodrębnij niezależnie od kolejności:
+1. Wiek osoby (liczba całkowita)
+2. Płeć ('M' dla mężczyzny lub 'K' dla kobiety)
+3. Tempo biegu na 5km (liczba, w minutach na kilometr; 4:45 to 4.75)
+
+Zwróć wyłącznie tablicę JSON z obiektami o kluczach: 'id', 'Wiek', 'Płeć', '5 km Tempo'.
+Jeśli opisu nie da się przeanalizować, pomiń go. Ignoruj dodatkowe informacje.
+
+Przykład:
+[{"id": 0, "text": "Kobieta lat 35, biegam 5.30 min/km"}, {"id": 1, "text": "Mężczyzna, 28 lat, 4:45/km"}]
+→ [{"id": 0, "Wiek": 35, "Płeć": "K", "5 km Tempo": 5.3}, {"id": 1, "Wiek": 28, "Płeć": "M", "5 km Tempo": 4.75}]
+
+Opisy do przeanalizowania:
+"""
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchItem:
+    """Wiersz wysyłany do OpenAI: identyfikator (pozycja wiersza) i tekst."""
+    row_id: int
+    text: str
+
+
+def estimate_tokens(text: str) -> int:
+    """Szacowana liczba tokenów tekstu (zaokrąglona w górę)."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def plan_batches(items: list[BatchItem], token_budget: int = BATCH_TOKEN_BUDGET,
+                 max_items: int = BATCH_MAX_ITEMS) -> list[list[BatchItem]]:
+    """
+    Dzieli wiersze na partie mieszczące się w budżecie tokenów wejścia.
+
+    Budżet obejmuje wspólny nagłówek z przykładami, który w partii występuje
+    tylko raz. Wiersz dłuższy niż cały budżet trafia do osobnej partii.
+
+    Args:
+        items: Wiersze do wysłania
+        token_budget: Maksymalna liczba tokenów wejścia na zapytanie
+        max_items: Maksymalna liczba wierszy na zapytanie
+
+    Returns:
+        list: Kolejne partie wierszy
+    """
+    header_tokens = estimate_tokens(BATCH_SYSTEM_PROMPT + BATCH_PROMPT_HEADER)
+    batches: list[list[BatchItem]] = []
+    current: list[BatchItem] = []
+    used = header_tokens
+    for item in items:
+        cost = estimate_tokens(item.text) + ITEM_OVERHEAD_TOKENS
+        if current and (used + cost > token_budget or len(current) >= max_items):
+            batches.append(current)
+            current, used = [], header_tokens
+        current.append(item)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _build_batch_prompt(batch: list[BatchItem]) -> str:
+    payload = [{"id": item.row_id, "text": item.text} for item in batch]
+    return BATCH_PROMPT_HEADER + json.dumps(payload, ensure_ascii=False)
+
+
+def _parse_batch_response(response: str, expected_ids: set[int]) -> Optional[dict[int, dict]]:
+    """
+    Odczytuje tablicę JSON z odpowiedzi i zwraca poprawne wyniki według id.
+
+    Elementy z nieznanym id, zduplikowane lub nieprzechodzące walidacji są
+    pomijane (te wiersze przechodzą do fallbacku regex). None oznacza
+    odpowiedź, która nie jest tablicą JSON.
+    """
+    try:
+        parsed = json.loads(response)
+    except json.JSONDecodeError as e:
+        logger.warning("Błąd parsowania JSON z OpenAI (partia): %s", str(e))
+        return None
+    if isinstance(parsed, dict):
+        # Model czasem opakowuje tablicę w obiekt, np. {"results": [...]}
+        parsed = next((value for value in parsed.values() if isinstance(value, list)), None)
+    if not isinstance(parsed, list):
+        return None
+
+    results: dict[int, dict] = {}
+    for element in parsed:
+        if not isinstance(element, dict):
+            continue
+        row_id = element.get('id')
+        if not isinstance(row_id, int) or row_id not in expected_ids or row_id in results:
+            continue
+        data = {key: element.get(key) for key in ('Wiek', 'Płeć', '5 km Tempo')}
+        is_valid, errors = validate_user_data(data)
+        if is_valid:
+            results[row_id] = data
+        else:
+            logger.debug("Wiersz %d z OpenAI nieprawidłowy: %s", row_id, errors)
+    return results
+
+
+def _ask_openai_batch(batch: list[BatchItem], openai_client,
+                      timeout: float = BATCH_TIMEOUT) -> dict[int, dict]:
+    """Wysyła jedną partię do GPT-4 i zwraca zwalidowane wyniki według id."""
+    started = time.perf_counter()
+    try:
+        completion = openai_client.chat.completions.create(
+            model="gpt-4",
+            messages=[
+                {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": _build_batch_prompt(batch)}
+            ],
+            temperature=0,
+            max_tokens=RESPONSE_TOKENS_PER_ITEM * len(batch) + 50,
+            timeout=timeout
+        )
+        response = completion.choices[0].message.content or ""
+    except (OpenAIError, ValueError, TypeError, KeyError, ConnectionError, ImportError) as e:
+        logger.error("Błąd OpenAI API (partia %d wierszy): %s", len(batch), str(e))
+        OPENAI_REQUESTS.inc(outcome="error")
+        return {}
+    if not response.strip():
+        OPENAI_REQUESTS.inc(outcome="empty")
+        return {}
+
+    results = _parse_batch_response(response.strip(), {item.row_id for item in batch})
+    if results is None:
+        OPENAI_REQUESTS.inc(outcome="invalid_json")
+        return {}
+    # Jedno zapytanie na partię; częściowa odpowiedź liczy się jako sukces
+    OPENAI_REQUESTS.inc(outcome="success" if results else "invalid_data")
+    logger.info("Partia OpenAI: %d/%d wierszy w %.2f s",
+                len(results), len(batch), time.perf_counter() - started)
+    return results
+
+
+def extract_user_data_batch(texts: Union[pd.Series, Iterable[str]],
+                            openai_client=data_processing._MODULE_CLIENT,  # pylint: disable=protected-access
+                            cache: Optional[ExtractionCache] = None,
+                            use_cache: bool = True,
+                            token_budget: int = BATCH_TOKEN_BUDGET,
+                            max_items: int = BATCH_MAX_ITEMS,
+                            max_workers: int = BATCH_WORKERS,
+                            confidence_threshold: float = data_processing.LOCAL_CONFIDENCE_THRESHOLD,
+                            timeout: float = BATCH_TIMEOUT) -> pd.DataFrame:
+    """
+    Ekstraktuje dane z wielu opisów biegaczy naraz.
+
+    Warstwy jak w extract_user_data_detailed: pamięć podręczna, pewny wynik
+    parsera lokalnego, a pozostałe wiersze trafiają do OpenAI w partiach
+    (jedno zapytanie z jednym nagłówkiem na partię, kilka partii równolegle).
+    Wiersze pominięte lub błędne w odpowiedzi dostają wynik regex.
+
+    Args:
+        texts: Opisy biegaczy (Series zachowuje swój indeks)
+        openai_client: Klient OpenAI (None = tylko regex); domyślnie klient modułu
+        cache: Pamięć podręczna; domyślnie wspólna dla procesu
+        use_cache: Czy korzystać z pamięci podręcznej
+        token_budget: Maksymalna liczba tokenów wejścia na zapytanie
+        max_items: Maksymalna liczba wierszy na zapytanie
+        max_workers: Liczba równoległych zapytań
+        confidence_threshold: Minimalna pewność parsera lokalnego (0-1)
+        timeout: Limit czasu jednego zapytania w sekundach
+
+    Returns:
+        DataFrame: Kolumny 'Wiek', 'Płeć', '5 km Tempo' (gotowe dla predict_many)
+        oraz 'extraction_tier' z warstwą, która dostarczyła wynik
+    """
+    series = texts if isinstance(texts, pd.Series) else pd.Series(list(texts), dtype=object)
+    values = ["" if pd.isna(text) else str(text) for text in series]
+
+    if openai_client is data_processing._MODULE_CLIENT:  # pylint: disable=protected-access
+        openai_client = data_processing.client
+    if use_cache and cache is None:
+        cache = get_extraction_cache()
+    elif not use_cache:
+        cache = None
+
+    results: list[Optional[dict]] = [None] * len(values)
+    tiers = [data_processing.TIER_NONE] * len(values)
+    local_results: list[Optional[dict]] = [None] * len(values)
+    pending: list[BatchItem] = []
+
+    for row_id, text in enumerate(values):
+        if not text.strip():
+            continue
+        if cache is not None:
+            entry = cache.get(text)
+            if entry is not None and (entry.backend == BACKEND_OPENAI or openai_client is None):
+                results[row_id], tiers[row_id] = dict(entry.data), data_processing.TIER_CACHE
+                continue
+        data, confidence = extract_data_with_confidence(text)
+        if data is not None and confidence >= confidence_threshold:
+            results[row_id], tiers[row_id] = data, data_processing.TIER_LOCAL
+            continue
+        local_results[row_id] = data
+        pending.append(BatchItem(row_id, text))
+
+    if pending and openai_client is not None:
+        batches = plan_batches(pending, token_budget, max_items)
+        logger.info("Ekstrakcja wsadowa: %d wierszy do OpenAI w %d partiach",
+                    len(pending), len(batches))
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches))),
+                                thread_name_prefix="openai-batch") as executor:
+            for answers in executor.map(
+                    lambda batch: _ask_openai_batch(batch, openai_client, timeout), batches):
+                for row_id, data in answers.items():
+                    results[row_id], tiers[row_id] = data, data_processing.TIER_OPENAI
+                    if cache is not None:
+                        cache.put(values[row_id], data, BACKEND_OPENAI)
+
+    fallback_reason = (data_processing.FALLBACK_NO_CLIENT if openai_client is None
+                       else data_processing.FALLBACK_OPENAI_FAILED)
+    for item in pending:
+        local = local_results[item.row_id]
+        if results[item.row_id] is None and local is not None and validate_user_data(local)[0]:
+            results[item.row_id] = local
+            tiers[item.row_id] = data_processing.TIER_REGEX_FALLBACK
+            REGEX_FALLBACKS.inc(reason=fallback_reason)
+
+    frame = pd.DataFrame({
+        'Wiek': pd.to_numeric(pd.Series([data and data['Wiek'] for data in results],
+                                        dtype=object), errors='coerce').to_numpy(),
+        'Płeć': [data and data['Płeć'] for data in results],
+        '5 km Tempo': pd.to_numeric(pd.Series([data and data['5 km Tempo'] for data in results],
+                                              dtype=object), errors='coerce').to_numpy(),
+        'extraction_tier': tiers,
+    }, index=series.index, columns=OUTPUT_COLUMNS)
+    counts = frame['extraction_tier'].value_counts().to_dict()
+    logger.info("Ekstrakcja wsadowa zakończona: %s", counts)
+    return frame
@@ -0,0 +1,355 @@
+# =============================================================================
+# KOSTKA STATYSTYK KOHORT (PŁEĆ × WIEK)
+# Moduł z prekomputowanymi sumami prefiksowymi, licznościami, minimami,
+# posortowanymi czasami i histogramami dla każdej pary (płeć, wiek)
+# =============================================================================
+
+import hashlib
+import logging
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.utils.validation import MAX_AGE, MIN_AGE
+
+# Maksymalna liczba histogramów przechowywanych w kostce
+HISTOGRAM_CACHE_SIZE = 256
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class HistogramBins:
+    """Histogram policzony po stronie serwera: krawędzie przedziałów i liczności."""
+
+    edges: np.ndarray
+    counts: np.ndarray
+
+    @property
+    def centers(self) -> np.ndarray:
+        """Środki przedziałów (oś X słupków)."""
+        return (self.edges[:-1] + self.edges[1:]) / 2
+
+    @property
+    def width(self) -> float:
+        """Szerokość przedziału."""
+        return float(self.edges[1] - self.edges[0]) if len(self.edges) > 1 else 0.0
+
+
+def _nice_bin_width(span: float, nbins: int) -> float:
+    """
+    Zaokrągla szerokość przedziału do "ładnej" wartości (1, 2, 2.5, 5 × 10^k),
+    podobnie jak robi to Plotly dla parametru nbins.
+    """
+    raw = span / max(nbins, 1)
+    magnitude = 10.0 ** math.floor(math.log10(raw))
+    candidates = [multiplier * magnitude for multiplier in (1, 2, 2.5, 5, 10)]
+    return min(candidates, key=lambda width: abs(math.log(width / raw)))
+
+
+def histogram_bins(values: np.ndarray, nbins: int, scale: float = 1.0) -> HistogramBins:
+    """
+    Liczy histogram wartości (np. czasów w sekundach) przy pomocy NumPy.
+
+    Args:
+        values: Wartości (NaN są pomijane)
+        nbins: Przybliżona liczba przedziałów
+        scale: Dzielnik wartości przed binowaniem (60 = sekundy na minuty)
+
+    Returns:
+        HistogramBins: Krawędzie i liczności (puste, gdy brak wartości)
+    """
+    data = np.asarray(values, dtype=np.float64) / scale
+    data = data[~np.isnan(data)]
+    if len(data) == 0:
+        return HistogramBins(np.empty(0), np.empty(0, dtype=np.int64))
+
+    low, high = float(data.min()), float(data.max())
+    width = _nice_bin_width(high - low, nbins) if high > low else 1.0
+    start = math.floor(low / width) * width
+    n_edges = int(math.floor((high - start) / width)) + 2
+    edges = start + width * np.arange(n_edges, dtype=np.float64)
+    counts, _ = np.histogram(data, bins=edges)
+    return HistogramBins(edges, counts)
+
+
+class _CohortArrays:
+    """
+    Tablice jednej płci (lub wszystkich biegaczy) uporządkowane po (wiek, czas).
+
+    Dzięki temu uporządkowaniu każde okno wiekowe jest ciągłym wycinkiem,
+    a czasy w obrębie jednego rocznika są posortowane rosnąco.
+    """
+
+    FIELDS = ('times', 'tempos', 'offsets', 'prefix_time', 'prefix_time_valid',
+              'prefix_tempo', 'prefix_tempo_valid', 'age_min')
+
+    def __init__(self, ages: np.ndarray, times: np.ndarray, tempos: np.ndarray,
+                 first_age: int, n_ages: int):
+        order = np.lexsort((times, ages))
+        self.times = times[order]
+        self.tempos = tempos[order]
+
+        age_index = ages[order] - first_age
+        counts = np.bincount(age_index, minlength=n_ages)
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+
+        time_valid = ~np.isnan(self.times)
+        tempo_valid = ~np.isnan(self.tempos)
+        self.prefix_time = np.concatenate(([0.0], np.cumsum(np.where(time_valid, self.times, 0.0))))
+        self.prefix_time_valid = np.concatenate(([0], np.cumsum(time_valid)))
+        self.prefix_tempo = np.concatenate(
+            ([0.0], np.cumsum(np.where(tempo_valid, self.tempos, 0.0))))
+        self.prefix_tempo_valid = np.concatenate(([0], np.cumsum(tempo_valid)))
+
+        # Minimum w roczniku to pierwszy czas segmentu (NaN sortowane są na końcu)
+        self.age_min = np.full(n_ages, np.nan)
+        non_empty = counts > 0
+        self.age_min[non_empty] = self.times[self.offsets[:-1][non_empty]]
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, np.ndarray]) -> "_CohortArrays":
+        """Odtwarza tablice bez ponownego sortowania (np. z pamięci współdzielonej)."""
+        instance = cls.__new__(cls)
+        for name in cls.FIELDS:
+            setattr(instance, name, arrays[name])
+        return instance
+
+
+class CohortWindow:
+    """Statystyki okna wiekowego jednej kohorty, liczone bez filtrowania DataFrame."""
+
+    def __init__(self, arrays: Optional[_CohortArrays], start: int, stop: int):
+        self._arrays = arrays
+        self._start = start
+        self._stop = stop
+        if arrays is None or stop <= start:
+            self._begin = self._end = 0
+        else:
+            self._begin = int(arrays.offsets[start])
+            self._end = int(arrays.offsets[stop])
+
+    @property
+    def count(self) -> int:
+        """Liczba biegaczy w oknie (także tych bez czasu)."""
+        return self._end - self._begin
+
+    @property
+    def mean_time(self) -> float:
+        """Średni czas ukończenia w sekundach (NaN dla pustego okna)."""
+        if self.count == 0:
+            return float('nan')
+        arrays = self._arrays
+        valid = arrays.prefix_time_valid[self._end] - arrays.prefix_time_valid[self._begin]
+        total = arrays.prefix_time[self._end] - arrays.prefix_time[self._begin]
+        return float(total / valid) if valid else float('nan')
+
+    @property
+    def mean_tempo(self) -> float:
+        """Średnie tempo na 5km w min/km (NaN dla pustego okna)."""
+        if self.count == 0:
+            return float('nan')
+        arrays = self._arrays
+        valid = arrays.prefix_tempo_valid[self._end] - arrays.prefix_tempo_valid[self._begin]
+        total = arrays.prefix_tempo[self._end] - arrays.prefix_tempo[self._begin]
+        return float(total / valid) if valid else float('nan')
+
+    @property
+    def min_time(self) -> float:
+        """Najlepszy czas w oknie (NaN dla pustego okna)."""
+        if self.count == 0:
+            return float('nan')
+        minima = self._arrays.age_min[self._start:self._stop]
+        if np.isnan(minima).all():
+            return float('nan')
+        return float(np.nanmin(minima))
+
+    def times(self) -> np.ndarray:
+        """Czasy wszystkich biegaczy w oknie (widok bez kopiowania)."""
+        if self.count == 0:
+            return np.empty(0)
+        return self._arrays.times[self._begin:self._end]
+
+    def count_slower(self, seconds: float) -> int:
+        """
+        Liczba biegaczy w oknie z czasem gorszym niż podany.
+        Wyszukiwanie binarne w każdym roczniku okna - O(k log n).
+        """
+        if self.count == 0:
+            return 0
+        arrays = self._arrays
+        slower = 0
+        for age in range(self._start, self._stop):
+            begin, end = arrays.offsets[age], arrays.offsets[age + 1]
+            if end == begin:
+                continue
+            valid = arrays.prefix_time_valid[end] - arrays.prefix_time_valid[begin]
+            segment = arrays.times[begin:begin + valid]
+            slower += int(valid - np.searchsorted(segment, seconds, side='right'))
+        return slower
+
+    def histogram(self, nbins: int, scale: float = 1.0) -> HistogramBins:
+        """Histogram czasów okna (bez pamięci podręcznej)."""
+        return histogram_bins(self.times(), nbins, scale)
+
+
+class CohortCube:
+    """
+    Kostka statystyk (płeć × wiek) budowana raz przy wczytaniu danych.
+
+    Każda statystyka okna wiek ± k (liczność, średni czas, średnie tempo)
+    jest różnicą dwóch sum prefiksowych, minimum pochodzi z tablicy minimów
+    ograniczonej do zakresu wieku, a liczba wolniejszych biegaczy - z wyszukiwania
+    binarnego w posortowanych czasach. Histogramy okien są liczone leniwie
+    i przechowywane w ograniczonej pamięci podręcznej LRU.
+    """
+
+    def __init__(self, reference_df: pd.DataFrame):
+        self._histograms: OrderedDict[tuple, HistogramBins] = OrderedDict()
+        self._histogram_lock = threading.Lock()
+        if reference_df.empty or 'Wiek' not in reference_df.columns:
+            self.first_age = MIN_AGE
+            self.n_ages = MAX_AGE - MIN_AGE + 1
+            self._groups: dict[Optional[str], _CohortArrays] = {}
+            self.version = "empty"
+            return
+
+        ages_raw = reference_df['Wiek'].to_numpy(dtype=np.float64, na_value=np.nan)
+        known = ~np.isnan(ages_raw)
+        # Wiek w danych referencyjnych jest liczbą całkowitą
+        ages = np.floor(ages_raw[known]).astype(np.int64)
+        self.first_age = int(min(MIN_AGE, ages.min())) if len(ages) else MIN_AGE
+        last_age = int(max(MAX_AGE, ages.max())) if len(ages) else MAX_AGE
+        self.n_ages = last_age - self.first_age + 1
+
+        times = reference_df['Czas'].to_numpy(dtype=np.float64, na_value=np.nan)[known]
+        tempos = reference_df['5 km Tempo'].to_numpy(dtype=np.float64, na_value=np.nan)[known]
+        genders = reference_df['Płeć'].astype(object).to_numpy()[known]
+
+        self._groups = {None: _CohortArrays(ages, times, tempos, self.first_age, self.n_ages)}
+        for gender in pd.unique(genders):
+            if pd.isna(gender):
+                continue
+            mask = genders == gender
+            self._groups[gender] = _CohortArrays(ages[mask], times[mask], tempos[mask],
+                                                 self.first_age, self.n_ages)
+
+        self.version = self._fingerprint()
+        logger.info("Kostka kohort zbudowana: %d grup, wiek %d-%d",
+                    len(self._groups), self.first_age, last_age)
+
+    def to_arrays(self) -> tuple[dict, dict[str, np.ndarray]]:
+        """
+        Eksportuje kostkę jako płaskie tablice NumPy (np. do pamięci współdzielonej).
+
+        Returns:
+            tuple: (metadane, tablice nazwane '<płeć>/<pole>'; '' oznacza obie płcie)
+        """
+        meta = {'first_age': self.first_age, 'n_ages': self.n_ages, 'version': self.version,
+                'genders': ['' if gender is None else gender for gender in self._groups]}
+        arrays = {f"{'' if gender is None else gender}/{name}": getattr(group, name)
+                  for gender, group in self._groups.items() for name in _CohortArrays.FIELDS}
+        return meta, arrays
+
+    @classmethod
+    def from_arrays(cls, meta: dict, arrays: dict[str, np.ndarray]) -> "CohortCube":
+        """
+        Odtwarza kostkę z wyniku to_arrays bez kopiowania tablic.
+
+        Args:
+            meta: Metadane z to_arrays
+            arrays: Tablice z to_arrays (mogą być widokami pamięci współdzielonej)
+
+        Returns:
+            CohortCube: Kostka z pustą pamięcią podręczną histogramów
+        """
+        cube = cls.__new__(cls)
+        cube._histograms = OrderedDict()
+        cube._histogram_lock = threading.Lock()
+        cube.first_age = meta['first_age']
+        cube.n_ages = meta['n_ages']
+        cube.version = meta['version']
+        cube._groups = {
+            (gender or None): _CohortArrays.from_arrays(
+                {name: arrays[f"{gender}/{name}"] for name in _CohortArrays.FIELDS})
+            for gender in meta['genders']
+        }
+        return cube
+
+    def _fingerprint(self) -> str:
+        """
+        Wersja danych kostki - skrót z czasów i tempa każdej grupy.
+        Służy jako część klucza pamięci podręcznych zależnych od danych.
+        """
+        digest = hashlib.blake2b(digest_size=8)
+        for gender in sorted(self._groups, key=str):
+            arrays = self._groups[gender]
+            digest.update(str(gender).encode())
+            digest.update(arrays.offsets.tobytes())
+            digest.update(arrays.times.tobytes())
+            digest.update(arrays.tempos.tobytes())
+        return digest.hexdigest()
+
+    def window(self, gender: Optional[str], age_from: float, age_to: float) -> CohortWindow:
+        """
+        Zwraca okno kohorty: biegacze danej płci z wiekiem w [age_from, age_to].
+
+        Args:
+            gender: 'M', 'K' lub None (obie płcie)
+            age_from: Dolna granica wieku (włącznie)
+            age_to: Górna granica wieku (włącznie)
+
+        Returns:
+            CohortWindow: Statystyki okna
+        """
+        return CohortWindow(self._groups.get(gender), *self._age_slice(age_from, age_to))
+
+    def _age_slice(self, age_from: float, age_to: float) -> tuple[int, int]:
+        """Zamienia przedział wieku na zakres indeksów roczników [start, stop)."""
+        age_from = max(age_from, self.first_age)
+        age_to = min(age_to, self.first_age + self.n_ages - 1)
+        if age_to < age_from:
+            return 0, 0
+        start = int(np.ceil(age_from)) - self.first_age
+        stop = int(np.floor(age_to)) - self.first_age + 1
+        return start, stop
+
+    def around(self, gender: Optional[str], age: float, age_range: int) -> CohortWindow:
+        """Skrót dla okna wiek ± age_range."""
+        return self.window(gender, age - age_range, age + age_range)
+
+    def histogram(self, gender: Optional[str], age_from: float, age_to: float,
+                  nbins: int, scale: float = 1.0) -> HistogramBins:
+        """
+        Zwraca histogram czasów kohorty, liczony raz dla danej kohorty i specyfikacji.
+
+        Args:
+            gender: 'M', 'K' lub None (obie płcie)
+            age_from: Dolna granica wieku (włącznie)
+            age_to: Górna granica wieku (włącznie)
+            nbins: Przybliżona liczba przedziałów
+            scale: Dzielnik czasów (60 = histogram w minutach)
+
+        Returns:
+            HistogramBins: Histogram (wspólny obiekt - nie modyfikować)
+        """
+        start, stop = self._age_slice(age_from, age_to)
+        key = (gender, start, stop, nbins, scale)
+        with self._histogram_lock:
+            bins = self._histograms.get(key)
+            if bins is not None:
+                self._histograms.move_to_end(key)
+                return bins
+
+        bins = CohortWindow(self._groups.get(gender), start, stop).histogram(nbins, scale)
+        with self._histogram_lock:
+            self._histograms[key] = bins
+            if len(self._histograms) > HISTOGRAM_CACHE_SIZE:
+                self._histograms.popitem(last=False)
+        return bins
@@ -8,46 +8,155 @@ import json
 import logging
 import os
 import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
 from typing import Optional
 
-from openai import OpenAI
+from openai import OpenAIError
 
 # Dodanie głównego katalogu do ścieżki
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from src.utils.validation import extract_data_with_regex, validate_user_data  # pylint: disable=wrong-import-position
+from src.core.metrics import (  # pylint: disable=wrong-import-position
+    EXTRACTION_SECONDS,
+    OPENAI_REQUESTS,
+    REGEX_FALLBACKS,
+)
+from src.utils.extraction_cache import (  # pylint: disable=wrong-import-position
+    BACKEND_OPENAI,
+    BACKEND_REGEX,
+    ExtractionCache,
+    get_extraction_cache,
+)
+from src.utils.openai_client import get_openai_client  # pylint: disable=wrong-import-position
+from src.utils.validation import (  # pylint: disable=wrong-import-position
+    extract_data_with_confidence,
+    validate_user_data,
+)
 
 # Konfiguracja loggera
 logger = logging.getLogger(__name__)
 
-# Inicjalizacja klienta OpenAI (opcjonalne - jeśli klucz API jest dostępny)
+# Inicjalizacja klienta OpenAI (opcjonalne - jeśli klucz API jest dostępny),
+# ze wspólnej puli połączeń procesu
 try:
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY")) if os.getenv("OPENAI_API_KEY") else None
+    client = get_openai_client(os.getenv("OPENAI_API_KEY"))
 except Exception:  # pylint: disable=broad-except
     client = None
 
+# Znacznik "użyj klienta modułu" - None oznacza jawny brak klienta
+_MODULE_CLIENT = object()
 
-def extract_user_data(user_input: str) -> Optional[dict]:
-    """
-    Ekstraktuje dane użytkownika z tekstu wprowadzonego w dowolnej formie.
-    Wykorzystuje OpenAI GPT-4 do analizy tekstu, z fallbackiem do regex.
+# Minimalna pewność parsera lokalnego, przy której pomijane jest zapytanie do OpenAI
+LOCAL_CONFIDENCE_THRESHOLD = float(os.getenv("LOCAL_CONFIDENCE_THRESHOLD", "1.0"))
 
-    Args:
-        user_input: Tekst wprowadzony przez użytkownika
+# Warstwy (tiery) ekstrakcji zapisywane dla każdego zapytania
+TIER_CACHE = "cache"
+TIER_LOCAL = "local"
+TIER_OPENAI = "openai"
+TIER_REGEX_FALLBACK = "regex_fallback"
+TIER_DEADLINE = "regex_deadline"
+TIER_NONE = "none"
 
-    Returns:
-        dict lub None: Słownik z danymi użytkownika (wiek, płeć, tempo) lub None w przypadku błędu
+# Przyczyny użycia wyniku regex zamiast OpenAI (etykieta metryki regex_fallbacks_total)
+FALLBACK_NO_CLIENT = "no_client"
+FALLBACK_OPENAI_FAILED = "openai_failed"
+FALLBACK_DEADLINE = "deadline"
 
-    Example:
-        >>> extract_user_data("Mam 28 lat, jestem kobietą, tempo 4:45")
-        {'Wiek': 28, 'Płeć': 'K', '5 km Tempo': 4.75}
+# Limit czasu (s) na odpowiedź OpenAI w trybie z terminem; po nim zwracany jest wynik regex
+EXTRACTION_DEADLINE = float(os.getenv("EXTRACTION_DEADLINE", "6.0"))
+# Maksymalna liczba równoległych zapytań do OpenAI w trybie z terminem
+EXTRACTION_WORKERS = 8
+# Liczba ostatnich pomiarów czasu ekstrakcji, z których liczone są percentyle
+LATENCY_WINDOW = 1000
+
+SYSTEM_PROMPT = ("Jesteś asystentem specjalizującym się w analizie danych "
+                 "biegowych. Twoje zadanie to dokładne wyodrębnienie wieku, "
+                 "płci i tempa biegu z tekstu, niezależnie od kolejności "
+                 "i formatu wprowadzania. Zawsze zwracaj poprawny JSON.")
+
+
+@dataclass
+class ExtractionOutcome:
+    """Wynik ekstrakcji wraz z warstwą, która go dostarczyła."""
+    data: Optional[dict]
+    tier: str
+    confidence: float
+    seconds: float
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    """Percentyl metodą najbliższej rangi (q w przedziale 0-100)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+class TierStats:
+    """
+    Liczniki użycia warstw ekstrakcji, ich łączny czas (do pomiaru oszczędności)
+    oraz przesuwne okno czasów do percentyli p50/p99.
     """
-    # Walidacja wejścia
-    if not user_input or not user_input.strip():
-        logger.warning("Pusty tekst wejściowy")
-        return None
 
-    prompt = f"""
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._counts: dict[str, int] = {}
+        self._seconds: dict[str, float] = {}
+        self._latencies: deque = deque(maxlen=window)
+
+    def record(self, tier: str, seconds: float) -> None:
+        with self._lock:
+            self._counts[tier] = self._counts.get(tier, 0) + 1
+            self._seconds[tier] = self._seconds.get(tier, 0.0) + seconds
+            self._latencies.append(seconds)
+
+    def percentiles(self) -> tuple[float, float]:
+        """Czas ekstrakcji p50 i p99 (w sekundach) z ostatnich pomiarów."""
+        with self._lock:
+            values = sorted(self._latencies)
+        return _percentile(values, 50), _percentile(values, 99)
+
+    def stats(self) -> dict:
+        """Liczba zapytań, średni czas na warstwę, udział zapytań do OpenAI i p50/p99."""
+        p50, p99 = self.percentiles()
+        with self._lock:
+            total = sum(self._counts.values())
+            tiers = {tier: {'count': count, 'mean_seconds': self._seconds[tier] / count}
+                     for tier, count in self._counts.items()}
+            return {
+                'total': total,
+                'tiers': tiers,
+                'llm_share': self._counts.get(TIER_OPENAI, 0) / total if total else 0.0,
+                'p50_seconds': p50,
+                'p99_seconds': p99,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._seconds.clear()
+            self._latencies.clear()
+
+
+_tier_stats = TierStats()
+
+# Wątki wykonujące zapytania do OpenAI w trybie z terminem
+_llm_executor = ThreadPoolExecutor(max_workers=EXTRACTION_WORKERS,
+                                   thread_name_prefix="openai-extraction")
+
+
+def extraction_tier_stats() -> dict:
+    """Statystyki warstw ekstrakcji w bieżącym procesie."""
+    return _tier_stats.stats()
+
+
+def _build_prompt(user_input: str) -> str:
+    return f"""
     Przeanalizuj poniższy tekst i wyodrębnij następujące informacje niezależnie od ich kolejności:
     1. Wiek osoby (liczba całkowita)
     2. Płeć (zamień na 'M' dla mężczyzny lub 'K' dla kobiety)
@@ -64,62 +173,208 @@ def extract_user_data(user_input: str) -> Optional[dict]:
     Tekst do przeanalizowania: {user_input}
     """
 
+
+def _ask_openai(user_input: str, openai_client, timeout: Optional[float] = None) -> Optional[dict]:
+    """
+    Wysyła tekst do GPT-4 i zwraca zwalidowane dane lub None.
+
+    Args:
+        user_input: Tekst wprowadzony przez użytkownika
+        openai_client: Klient OpenAI
+        timeout: Limit czasu zapytania HTTP w sekundach (None = domyślny klienta)
+
+    Returns:
+        dict lub None: Dane z odpowiedzi modelu, jeśli są poprawne
+    """
+    request_options = {} if timeout is None else {'timeout': timeout}
     try:
-        # Próba użycia OpenAI API
-        if client is not None:
-            completion = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": ("Jesteś asystentem specjalizującym się w analizie danych "
-                                   "biegowych. Twoje zadanie to dokładne wyodrębnienie wieku, "
-                                   "płci i tempa biegu z tekstu, niezależnie od kolejności "
-                                   "i formatu wprowadzania. Zawsze zwracaj poprawny JSON.")
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0,
-                max_tokens=200
-            )
-
-            response = completion.choices[0].message.content
-        else:
-            logger.warning("Brak klienta OpenAI, pomijanie zapytania do API.")
-            response = None
-        if response:
-            response = response.strip()
-            logger.info("Otrzymana odpowiedź z OpenAI: %s", response)
-
-            # Próba parsowania JSON
-            try:
-                data = json.loads(response)
-                is_valid, errors = validate_user_data(data)
-
-                if is_valid:
-                    logger.info("Dane wyekstraktowane pomyślnie przez OpenAI")
-                    return data
-                logger.warning("Dane z OpenAI nieprawidłowe: %s", errors)
-
-            except json.JSONDecodeError as e:
-                logger.warning("Błąd parsowania JSON z OpenAI: %s", str(e))
-
-    except (ValueError, ConnectionError, ImportError) as e:
+        completion = openai_client.chat.completions.create(
+            model="gpt-4",
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": _build_prompt(user_input)}
+            ],
+            temperature=0,
+            max_tokens=200,
+            **request_options
+        )
+        response = completion.choices[0].message.content
+    except (OpenAIError, ValueError, TypeError, KeyError, ConnectionError, ImportError) as e:
         logger.error("Błąd OpenAI API: %s", str(e))
+        OPENAI_REQUESTS.inc(outcome="error")
+        return None
+
+    if not response:
+        OPENAI_REQUESTS.inc(outcome="empty")
+        return None
+    response = response.strip()
+    logger.info("Otrzymana odpowiedź z OpenAI: %s", response)
+
+    # Próba parsowania JSON
+    try:
+        data = json.loads(response)
+    except json.JSONDecodeError as e:
+        logger.warning("Błąd parsowania JSON z OpenAI: %s", str(e))
+        OPENAI_REQUESTS.inc(outcome="invalid_json")
+        return None
+
+    is_valid, errors = validate_user_data(data)
+    if not is_valid:
+        logger.warning("Dane z OpenAI nieprawidłowe: %s", errors)
+        OPENAI_REQUESTS.inc(outcome="invalid_data")
+        return None
+    OPENAI_REQUESTS.inc(outcome="success")
+    return data
+
+
+def _ask_openai_before(user_input: str, openai_client,
+                       remaining: float) -> tuple[Optional[dict], bool]:
+    """
+    Zapytanie do OpenAI ograniczone terminem.
+
+    Returns:
+        tuple: (dane lub None, czy upłynął termin)
+    """
+    if remaining <= 0:
+        return None, True
+    future = _llm_executor.submit(_ask_openai, user_input, openai_client, remaining)
+    try:
+        return future.result(timeout=remaining), False
+    except FutureTimeoutError:
+        # Zapytanie jeszcze w kolejce zostaje anulowane; trwające kończy limit czasu HTTP
+        future.cancel()
+        logger.warning("OpenAI nie odpowiedziało w ciągu %.1f s, używam wyniku regex", remaining)
+        return None, True
+
+
+def extract_user_data_detailed(user_input: str, openai_client=_MODULE_CLIENT,
+                               cache: Optional[ExtractionCache] = None,
+                               use_cache: bool = True,
+                               confidence_threshold: float = LOCAL_CONFIDENCE_THRESHOLD,
+                               deadline: Optional[float] = None) -> ExtractionOutcome:
+    """
+    Ekstraktuje dane warstwowo i zwraca wynik wraz z użytą warstwą.
+
+    Kolejność warstw:
+    1. Pamięć podręczna (wyniki OpenAI; wyniki regex tylko bez klienta OpenAI).
+    2. Parser lokalny (regex) - wystarcza, gdy jego pewność osiąga próg.
+    3. OpenAI GPT-4 - tylko dla niejednoznacznych tekstów.
+    4. Wynik parsera lokalnego mimo niskiej pewności (brak/porażka OpenAI).
 
-    # Fallback: użycie regex
-    logger.info("Próba ekstrakcji danych przy użyciu regex")
-    data = extract_data_with_regex(user_input)
+    Z ustawionym terminem (deadline) zapytanie do OpenAI działa w osobnym
+    wątku, a wynik regex jest już gotowy; jeśli odpowiedź nie nadejdzie
+    przed terminem, zwracany jest wynik regex, a zapytanie jest porzucane
+    (limit czasu HTTP równy terminowi kończy je po stronie klienta).
 
-    if data:
-        is_valid, errors = validate_user_data(data)
+    Args:
+        user_input: Tekst wprowadzony przez użytkownika
+        openai_client: Klient OpenAI (None = bez OpenAI); domyślnie klient modułu
+        cache: Pamięć podręczna; domyślnie wspólna dla procesu
+        use_cache: Czy korzystać z pamięci podręcznej
+        confidence_threshold: Minimalna pewność parsera lokalnego (0-1)
+        deadline: Termin odpowiedzi OpenAI w sekundach (None = czekaj bez limitu)
+
+    Returns:
+        ExtractionOutcome: Dane (lub None), warstwa, pewność i czas w sekundach
+    """
+    started = time.perf_counter()
+
+    def finish(data: Optional[dict], tier: str, confidence: float) -> ExtractionOutcome:
+        seconds = time.perf_counter() - started
+        _tier_stats.record(tier, seconds)
+        EXTRACTION_SECONDS.observe(seconds, tier=tier)
+        p50, p99 = _tier_stats.percentiles()
+        logger.info("Ekstrakcja: warstwa=%s pewność=%.2f czas=%.1f ms (p50=%.1f ms, p99=%.1f ms)",
+                    tier, confidence, seconds * 1000, p50 * 1000, p99 * 1000)
+        return ExtractionOutcome(data, tier, confidence, seconds)
+
+    # Walidacja wejścia
+    if not user_input or not user_input.strip():
+        logger.warning("Pusty tekst wejściowy")
+        return finish(None, TIER_NONE, 0.0)
+
+    if openai_client is _MODULE_CLIENT:
+        openai_client = client
+    if use_cache and cache is None:
+        cache = get_extraction_cache()
+    elif not use_cache:
+        cache = None
+
+    if cache is not None:
+        entry = cache.get(user_input)
+        if entry is not None and (entry.backend == BACKEND_OPENAI or openai_client is None):
+            logger.info("Dane z pamięci podręcznej ekstrakcji (%s)", entry.backend)
+            return finish(dict(entry.data), TIER_CACHE, 1.0)
+
+    local_data, confidence = extract_data_with_confidence(user_input)
+    if local_data is not None and confidence >= confidence_threshold:
+        if cache is not None:
+            cache.put(user_input, local_data, BACKEND_REGEX)
+        return finish(local_data, TIER_LOCAL, confidence)
+
+    fallback_tier = TIER_REGEX_FALLBACK
+    fallback_reason = FALLBACK_NO_CLIENT
+    if openai_client is not None:
+        fallback_reason = FALLBACK_OPENAI_FAILED
+        if deadline is None:
+            data = _ask_openai(user_input, openai_client)
+        else:
+            data, timed_out = _ask_openai_before(user_input, openai_client,
+                                                 started + deadline - time.perf_counter())
+            if timed_out:
+                fallback_tier = TIER_DEADLINE
+                fallback_reason = FALLBACK_DEADLINE
+        if data is not None:
+            logger.info("Dane wyekstraktowane pomyślnie przez OpenAI")
+            if cache is not None:
+                cache.put(user_input, data, BACKEND_OPENAI)
+            return finish(data, TIER_OPENAI, confidence)
+    else:
+        logger.warning("Brak klienta OpenAI, pomijanie zapytania do API.")
+
+    # Fallback: wynik regex mimo niskiej pewności
+    if local_data is not None:
+        is_valid, errors = validate_user_data(local_data)
         if is_valid:
             logger.info("Dane wyekstraktowane pomyślnie przez regex")
-            return data
+            if cache is not None:
+                cache.put(user_input, local_data, BACKEND_REGEX)
+            REGEX_FALLBACKS.inc(reason=fallback_reason)
+            return finish(local_data, fallback_tier, confidence)
         logger.warning("Dane z regex nieprawidłowe: %s", errors)
 
     logger.error("Nie udało się wyekstraktować danych")
-    return None
+    return finish(None, TIER_NONE, confidence)
+
+
+def extract_user_data(user_input: str, openai_client=_MODULE_CLIENT,
+                      cache: Optional[ExtractionCache] = None,
+                      use_cache: bool = True,
+                      deadline: Optional[float] = None) -> Optional[dict]:
+    """
+    Ekstraktuje dane użytkownika z tekstu wprowadzonego w dowolnej formie.
+    Najpierw parser lokalny; OpenAI GPT-4 tylko dla niejednoznacznych tekstów.
+
+    Wynik jest zapamiętywany dla znormalizowanego tekstu (temperature=0 daje
+    deterministyczną odpowiedź), więc powtórzone zapytania nie zużywają tokenów.
+    Szczegóły (użyta warstwa, pewność) zwraca extract_user_data_detailed().
+
+    Args:
+        user_input: Tekst wprowadzony przez użytkownika
+        openai_client: Klient OpenAI (None = bez OpenAI); domyślnie klient modułu
+        cache: Pamięć podręczna; domyślnie wspólna dla procesu
+        use_cache: Czy korzystać z pamięci podręcznej
+        deadline: Termin odpowiedzi OpenAI w sekundach (None = czekaj bez limitu)
+
+    Returns:
+        dict lub None: Słownik z danymi użytkownika (wiek, płeć, tempo) lub None w przypadku błędu
+
+    Example:
+        >>> extract_user_data("Mam 28 lat, jestem kobietą, tempo 4:45")
+        {'Wiek': 28, 'Płeć': 'K', '5 km Tempo': 4.75}
+    """
+    return extract_user_data_detailed(user_input, openai_client, cache, use_cache,
+                                      deadline=deadline).data
 
 
 def format_gender_display(gender: str) -> str:
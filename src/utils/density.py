@@ -0,0 +1,75 @@
+# =============================================================================
+# TRYB GĘSTOŚCI DLA WYKRESU TEMPO VS CZAS
+# Moduł liczący raz dwuwymiarowy histogram i warstwową próbkę punktów,
+# aby rozmiar wykresu nie zależał od liczby biegaczy w danych
+# =============================================================================
+
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+# Stałe konfiguracyjne
+DENSITY_THRESHOLD = int(os.getenv("SCATTER_DENSITY_THRESHOLD", "5000"))
+DENSITY_BINS = (60, 60)
+DENSITY_SAMPLE_SIZE = 1000
+DENSITY_SEED = 42
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+
+def use_density_mode(n_rows: int, threshold: int = DENSITY_THRESHOLD) -> bool:
+    """Czy wykres z tyloma punktami powinien być rysowany w trybie gęstości."""
+    return n_rows > threshold
+
+
+class ScatterDensity:
+    """
+    Gęstość punktów (tempo na 5km, czas półmaratonu) policzona raz dla danych.
+
+    Atrybuty:
+        x_centers, y_centers: Środki przedziałów osi X (tempo) i Y (czas w sekundach)
+        counts: Liczności o kształcie (len(y_centers), len(x_centers)), gotowe dla Heatmap
+        sample: Warstwowa (po płci) próbka wierszy do nałożenia jako punkty
+    """
+
+    def __init__(self, reference_df: pd.DataFrame, x: str = '5 km Tempo', y: str = 'Czas',
+                 group: str = 'Płeć', bins: tuple[int, int] = DENSITY_BINS,
+                 sample_size: int = DENSITY_SAMPLE_SIZE, seed: int = DENSITY_SEED):
+        x_values = reference_df[x].to_numpy(dtype=np.float64, na_value=np.nan)
+        y_values = reference_df[y].to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~(np.isnan(x_values) | np.isnan(y_values))
+        self.n_points = int(valid.sum())
+
+        if self.n_points:
+            counts, x_edges, y_edges = np.histogram2d(x_values[valid], y_values[valid], bins=bins)
+        else:
+            counts, x_edges, y_edges = np.zeros((0, 0)), np.empty(0), np.empty(0)
+        self.x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+        self.y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+        self.counts = counts.T
+
+        self.sample = self._stratified_sample(reference_df.loc[valid, [x, y, group]],
+                                              group, sample_size, seed)
+        logger.info("Gęstość tempo vs czas: %d punktów, siatka %dx%d, próbka %d",
+                    self.n_points, len(self.x_centers), len(self.y_centers), len(self.sample))
+
+    @staticmethod
+    def _stratified_sample(frame: pd.DataFrame, group: str, sample_size: int,
+                           seed: int) -> pd.DataFrame:
+        """Próbka zachowująca proporcje grup (np. płci) z pełnych danych."""
+        if len(frame) <= sample_size:
+            return frame
+        rng = np.random.default_rng(seed)
+        parts = []
+        for _, part in frame.groupby(group, observed=True, sort=False):
+            size = int(round(sample_size * len(part) / len(frame)))
+            if size:
+                parts.append(part.iloc[np.sort(rng.choice(len(part), size, replace=False))])
+        return pd.concat(parts) if parts else frame.iloc[:0]
+
+    def heatmap_z(self) -> np.ndarray:
+        """Liczności z pustymi komórkami jako NaN (przezroczyste na wykresie)."""
+        return np.where(self.counts > 0, self.counts, np.nan)
@@ -0,0 +1,279 @@
+# =============================================================================
+# PAMIĘĆ PODRĘCZNA EKSTRAKCJI DANYCH
+# Moduł zapamiętujący wyniki ekstrakcji (OpenAI lub regex) dla znormalizowanego
+# tekstu: warstwa LRU w procesie oraz trwała warstwa SQLite z TTL
+# =============================================================================
+
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Dodanie głównego katalogu do ścieżki
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.core.caching import register_cache_stats  # pylint: disable=wrong-import-position
+
+# Stałe konfiguracyjne
+EXTRACTION_CACHE_PATH = os.getenv("EXTRACTION_CACHE_PATH", ".cache/extraction_cache.sqlite3")
+EXTRACTION_CACHE_TTL = int(os.getenv("EXTRACTION_CACHE_TTL", str(30 * 24 * 3600)))  # 30 dni
+EXTRACTION_CACHE_MAX_ENTRIES = 10_000
+MEMORY_CACHE_SIZE = 512
+ACCESS_FLUSH_INTERVAL = 30.0  # sekundy między zapisami last_access trafień z pamięci
+
+# Źródła wyniku ekstrakcji
+BACKEND_OPENAI = "openai"
+BACKEND_REGEX = "regex"
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+
+def normalize_input(text: str) -> str:
+    """
+    Normalizuje tekst użytkownika do klucza pamięci podręcznej:
+    Unicode NFKC, małe litery i pojedyncze spacje między słowami.
+
+    Example:
+        >>> normalize_input("  Mam 28 LAT,\\tjestem  kobietą ")
+        'mam 28 lat, jestem kobietą'
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).lower().split())
+
+
+@dataclass
+class CacheEntry:
+    """Zapamiętany wynik ekstrakcji wraz ze źródłem, które go wytworzyło."""
+
+    data: dict
+    backend: str
+    created_at: float = field(default_factory=time.time)
+
+
+class ExtractionCache:
+    """
+    Dwuwarstwowa pamięć podręczna wyników ekstrakcji.
+
+    Warstwa w pamięci (LRU) odpowiada w mikrosekundach, warstwa SQLite
+    przetrwa restart procesu i jest współdzielona przez procesy na hoście.
+    Wpisy starsze niż TTL są pomijane, a po przekroczeniu limitu wpisów
+    usuwane są najdawniej używane. Trafienia z pamięci odświeżają last_access
+    w SQLite zbiorczo (co ACCESS_FLUSH_INTERVAL sekund i przed każdym
+    usuwaniem), aby często czytane wpisy nie wypadały z bazy.
+    """
+
+    def __init__(self, db_path: Optional[str] = EXTRACTION_CACHE_PATH,
+                 ttl: float = EXTRACTION_CACHE_TTL,
+                 max_entries: int = EXTRACTION_CACHE_MAX_ENTRIES,
+                 memory_size: int = MEMORY_CACHE_SIZE,
+                 access_flush_interval: float = ACCESS_FLUSH_INTERVAL):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_size = memory_size
+        self.access_flush_interval = access_flush_interval
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._pending_access: dict[str, float] = {}
+        self._last_access_flush = time.time()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = self._open_db(db_path)
+
+    @staticmethod
+    def _open_db(db_path: str) -> Optional[sqlite3.Connection]:
+        """Otwiera bazę SQLite; przy błędzie działa tylko warstwa w pamięci."""
+        try:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(db_path, check_same_thread=False, timeout=5)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS extraction_cache ("
+                " key TEXT PRIMARY KEY,"
+                " data TEXT NOT NULL,"
+                " backend TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS idx_extraction_cache_access"
+                       " ON extraction_cache (last_access)")
+            db.commit()
+            return db
+        except sqlite3.Error as e:
+            logger.warning("Pamięć podręczna SQLite niedostępna (%s): %s", db_path, str(e))
+            return None
+
+    def _is_fresh(self, entry: CacheEntry, now: float) -> bool:
+        return now - entry.created_at <= self.ttl
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, text: str) -> Optional[CacheEntry]:
+        """
+        Szuka wyniku ekstrakcji dla tekstu (po normalizacji).
+
+        Args:
+            text: Tekst wprowadzony przez użytkownika
+
+        Returns:
+            CacheEntry lub None, gdy brak aktualnego wpisu
+        """
+        key = normalize_input(text)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._is_fresh(entry, now):
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    self._touch(key, now)
+                    return entry
+                del self._memory[key]
+
+            entry = self._get_from_db(key, now)
+            if entry is not None:
+                self._remember(key, entry)
+                self.disk_hits += 1
+                return entry
+
+            self.misses += 1
+            return None
+
+    def _touch(self, key: str, now: float) -> None:
+        """Odkłada odświeżenie last_access; zapis zbiorczy co access_flush_interval."""
+        if self._db is None:
+            return
+        self._pending_access[key] = now
+        if now - self._last_access_flush >= self.access_flush_interval:
+            try:
+                self._flush_access()
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning("Błąd zapisu czasu dostępu pamięci podręcznej: %s", str(e))
+
+    def _flush_access(self) -> None:
+        """Zapisuje w SQLite odłożone czasy dostępu trafień z pamięci (bez commit)."""
+        self._last_access_flush = time.time()
+        if not self._pending_access:
+            return
+        pending, self._pending_access = self._pending_access, {}
+        self._db.executemany(
+            "UPDATE extraction_cache SET last_access = MAX(last_access, ?) WHERE key = ?",
+            [(accessed, key) for key, accessed in pending.items()])
+
+    def _get_from_db(self, key: str, now: float) -> Optional[CacheEntry]:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT data, backend, created_at FROM extraction_cache WHERE key = ?",
+                (key,)).fetchone()
+            if row is None:
+                return None
+            entry = CacheEntry(json.loads(row[0]), row[1], row[2])
+            if not self._is_fresh(entry, now):
+                self._db.execute("DELETE FROM extraction_cache WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE extraction_cache SET last_access = ? WHERE key = ?",
+                             (now, key))
+            self._db.commit()
+            return entry
+        except (sqlite3.Error, json.JSONDecodeError) as e:
+            logger.warning("Błąd odczytu pamięci podręcznej ekstrakcji: %s", str(e))
+            return None
+
+    def put(self, text: str, data: dict, backend: str) -> CacheEntry:
+        """
+        Zapamiętuje wynik ekstrakcji w obu warstwach.
+
+        Args:
+            text: Tekst wprowadzony przez użytkownika
+            data: Wyekstraktowane dane
+            backend: Źródło wyniku (BACKEND_OPENAI lub BACKEND_REGEX)
+
+        Returns:
+            CacheEntry: Zapisany wpis
+        """
+        key = normalize_input(text)
+        entry = CacheEntry(dict(data), backend)
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO extraction_cache"
+                        " (key, data, backend, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                        (key, json.dumps(entry.data, ensure_ascii=False), backend,
+                         entry.created_at, entry.created_at))
+                    self._evict()
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.warning("Błąd zapisu pamięci podręcznej ekstrakcji: %s", str(e))
+        return entry
+
+    def _evict(self) -> None:
+        """Usuwa wpisy przeterminowane i najdawniej używane ponad limit."""
+        self._flush_access()
+        self._db.execute("DELETE FROM extraction_cache WHERE created_at < ?",
+                         (time.time() - self.ttl,))
+        self._db.execute(
+            "DELETE FROM extraction_cache WHERE key IN ("
+            " SELECT key FROM extraction_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,))
+
+    def stats(self) -> dict:
+        """Liczniki trafień (osobno dla warstw) i współczynnik trafień."""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'hits': hits,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'memory_size': len(self._memory),
+                'hit_ratio': hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        """Usuwa wszystkie wpisy z obu warstw i zeruje liczniki."""
+        with self._lock:
+            self._memory.clear()
+            self._pending_access.clear()
+            self.memory_hits = self.disk_hits = self.misses = 0
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM extraction_cache")
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.warning("Błąd czyszczenia pamięci podręcznej ekstrakcji: %s", str(e))
+
+
+_default_cache: Optional[ExtractionCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> ExtractionCache:
+    """Zwraca wspólną dla procesu pamięć podręczną (tworzoną przy pierwszym użyciu)."""
+    global _default_cache  # pylint: disable=global-statement
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ExtractionCache()
+            register_cache_stats("extraction", _default_cache.stats)
+        return _default_cache
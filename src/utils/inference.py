@@ -0,0 +1,337 @@
+# =============================================================================
+# NATYWNY SILNIK PRZEWIDYWANIA (NUMPY)
+# Moduł eksportujący wytrenowany pipeline PyCaret (imputacja, kodowanie płci,
+# skalowanie, regresja Hubera) do małego silnika opartego wyłącznie o NumPy
+# =============================================================================
+
+import argparse
+import functools
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import struct
+from typing import Mapping, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# Stałe konfiguracyjne
+MODEL_PATH = "huber_model_halfmarathon_time"
+NATIVE_MODEL_PATH = "huber_model_halfmarathon_time.json"
+NATIVE_FORMAT_VERSION = 1
+# Maksymalna dopuszczalna różnica względem predict_model (w sekundach)
+NATIVE_TOLERANCE_SECONDS = 1e-3
+
+FEATURE_COLUMNS = ['Wiek', 'Płeć', '5 km Tempo', '5 km Czas']
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+
+def _file_sha256(path: str) -> str:
+    """Zwraca skrót SHA-256 zawartości pliku."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(65536), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _to_float32(value: float) -> float:
+    """Zaokrągla liczbę do precyzji float32, tak jak robi to pipeline PyCaret."""
+    return struct.unpack('f', struct.pack('f', value))[0]
+
+
+def _affine_from_scaler(scaler) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Zamienia dopasowany skaler scikit-learn na przekształcenie x * scale + offset.
+
+    Args:
+        scaler: StandardScaler, MinMaxScaler, RobustScaler lub MaxAbsScaler
+
+    Returns:
+        tuple: (scale, offset) jako tablice NumPy
+    """
+    name = type(scaler).__name__
+    n_features = scaler.n_features_in_
+    if name == 'StandardScaler':
+        mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_features)
+        std = scaler.scale_ if scaler.scale_ is not None else np.ones(n_features)
+        return 1.0 / std, -mean / std
+    if name == 'MinMaxScaler':
+        return np.asarray(scaler.scale_), np.asarray(scaler.min_)
+    if name == 'RobustScaler':
+        center = scaler.center_ if scaler.center_ is not None else np.zeros(n_features)
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n_features)
+        return 1.0 / scale, -center / scale
+    if name == 'MaxAbsScaler':
+        return 1.0 / np.asarray(scaler.scale_), np.zeros(n_features)
+    raise ValueError(f"Nieobsługiwany typ skalera: {name}")
+
+
+def export_pipeline(pipeline) -> dict:
+    """
+    Wyciąga parametry dopasowanego pipeline'u PyCaret do słownika zapisywalnego jako JSON.
+
+    Obsługiwane kroki: imputacja (SimpleImputer), kodowanie porządkowe
+    (OrdinalEncoder), skalowanie (StandardScaler, MinMaxScaler, RobustScaler,
+    MaxAbsScaler), czyszczenie nazw kolumn oraz liniowy estymator końcowy.
+
+    Args:
+        pipeline: Pipeline załadowany przez pycaret.regression.load_model
+
+    Returns:
+        dict: Parametry silnika natywnego
+
+    Raises:
+        ValueError: Gdy pipeline zawiera krok, którego nie da się odwzorować
+    """
+    params = {
+        'format_version': NATIVE_FORMAT_VERSION,
+        'numeric_imputer': {},
+        'categorical_imputer': {},
+        'ordinal_mapping': {},
+        'unknown_category_value': -1.0,
+        'scaling': {},
+        'input_dtype': 'float32',
+    }
+    clean_names = None
+
+    for step_name, step in pipeline.steps[:-1]:
+        transformer = getattr(step, 'transformer', step)
+        kind = type(transformer).__name__
+
+        if kind == 'SimpleImputer':
+            columns = list(transformer.feature_names_in_)
+            statistics = list(transformer.statistics_)
+            if transformer.strategy in ('mean', 'median', 'constant') and \
+                    all(isinstance(value, (int, float, np.number)) for value in statistics):
+                params['numeric_imputer'].update(
+                    {column: float(value) for column, value in zip(columns, statistics)}
+                )
+            else:
+                params['categorical_imputer'].update(
+                    {column: str(value) for column, value in zip(columns, statistics)}
+                )
+        elif kind == 'OrdinalEncoder':
+            for entry in transformer.mapping:
+                params['ordinal_mapping'][entry['col']] = {
+                    str(category): float(code)
+                    for category, code in entry['mapping'].items()
+                    if not (isinstance(category, float) and math.isnan(category))
+                }
+        elif kind in ('StandardScaler', 'MinMaxScaler', 'RobustScaler', 'MaxAbsScaler'):
+            scale, offset = _affine_from_scaler(transformer)
+            columns = list(getattr(transformer, 'feature_names_in_', step.include))
+            for column, column_scale, column_offset in zip(columns, scale, offset):
+                params['scaling'][column] = [float(column_scale), float(column_offset)]
+        elif kind == 'CleanColumnNames':
+            clean_names = re.compile(transformer.match)
+        else:
+            raise ValueError(f"Nieobsługiwany krok pipeline'u: {step_name} ({kind})")
+
+    estimator = pipeline.steps[-1][1]
+    if not hasattr(estimator, 'coef_') or not hasattr(estimator, 'intercept_'):
+        raise ValueError(f"Estymator {type(estimator).__name__} nie jest modelem liniowym")
+
+    features = [str(name) for name in estimator.feature_names_in_]
+    if clean_names is not None:
+        # Odwrócenie czyszczenia nazw - silnik przyjmuje oryginalne nazwy kolumn
+        original = {clean_names.sub('', column): column for column in FEATURE_COLUMNS}
+        features = [original.get(name, name) for name in features]
+
+    params['features'] = features
+    params['coef'] = [float(value) for value in np.ravel(estimator.coef_)]
+    params['intercept'] = float(np.ravel([estimator.intercept_])[0])
+    params['estimator'] = type(estimator).__name__
+    return params
+
+
+class NativeHuberModel:
+    """
+    Liniowy model Hubera odtworzony w NumPy, bez zależności od PyCaret.
+
+    Odwzorowuje kolejne kroki pipeline'u: rzutowanie cech numerycznych na
+    float32, imputację braków, kodowanie porządkowe płci, opcjonalne
+    skalowanie oraz iloczyn skalarny ze współczynnikami regresji.
+    """
+
+    def __init__(self, params: dict):
+        if params.get('format_version') != NATIVE_FORMAT_VERSION:
+            raise ValueError(f"Nieobsługiwana wersja formatu: {params.get('format_version')}")
+
+        self.params = params
+        self.features = list(params['features'])
+        self.numeric_imputer = dict(params['numeric_imputer'])
+        self.categorical_imputer = dict(params['categorical_imputer'])
+        self.ordinal_mapping = {
+            column: dict(mapping) for column, mapping in params['ordinal_mapping'].items()
+        }
+        self.unknown_category_value = float(params['unknown_category_value'])
+        self.cast_float32 = params.get('input_dtype') == 'float32'
+
+        coef = np.asarray(params['coef'], dtype=np.float64)
+        scale = np.ones(len(self.features))
+        offset = np.zeros(len(self.features))
+        for i, feature in enumerate(self.features):
+            if feature in params['scaling']:
+                scale[i], offset[i] = params['scaling'][feature]
+
+        # Skalowanie jest liniowe, więc wchłaniamy je we współczynniki i wyraz wolny
+        self.coef = coef * scale
+        self.intercept = float(params['intercept']) + float(coef @ offset)
+        self._coef_list = [float(value) for value in self.coef]
+
+    def _encode_category(self, column: str, value) -> float:
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            value = self.categorical_imputer.get(column)
+        return self.ordinal_mapping[column].get(value, self.unknown_category_value)
+
+    def _encode_number(self, column: str, value) -> float:
+        number = float(value) if value is not None else math.nan
+        if math.isnan(number):
+            return self.numeric_imputer.get(column, math.nan)
+        return _to_float32(number) if self.cast_float32 else number
+
+    def predict_record(self, record: Mapping) -> float:
+        """
+        Przewiduje czas dla jednego biegacza (szybka ścieżka bez NumPy).
+
+        Args:
+            record: Słownik z kluczami 'Wiek', 'Płeć', '5 km Tempo', '5 km Czas'
+
+        Returns:
+            float: Przewidywany czas w sekundach
+        """
+        total = self.intercept
+        for feature, weight in zip(self.features, self._coef_list):
+            if feature in self.ordinal_mapping:
+                total += weight * self._encode_category(feature, record.get(feature))
+            else:
+                total += weight * self._encode_number(feature, record.get(feature))
+        return total
+
+    def transform(self, data: Union[pd.DataFrame, Mapping]) -> np.ndarray:
+        """
+        Przekształca dane wejściowe w macierz cech (bez skalowania).
+
+        Args:
+            data: DataFrame lub słownik kolumn
+
+        Returns:
+            np.ndarray: Macierz cech o kształcie (n, liczba_cech)
+        """
+        columns = []
+        for feature in self.features:
+            values = data[feature]
+            if feature in self.ordinal_mapping:
+                series = pd.Series(np.asarray(values, dtype=object))
+                series = series.fillna(self.categorical_imputer.get(feature))
+                encoded = series.map(self.ordinal_mapping[feature])
+                columns.append(
+                    encoded.fillna(self.unknown_category_value).to_numpy(dtype=np.float64)
+                )
+            else:
+                array = np.asarray(values, dtype=np.float64)
+                if self.cast_float32:
+                    array = array.astype(np.float32).astype(np.float64)
+                if feature in self.numeric_imputer:
+                    array = np.where(np.isnan(array), self.numeric_imputer[feature], array)
+                columns.append(array)
+        return np.column_stack(columns) if columns else np.empty((0, 0))
+
+    def predict(self, data: Union[pd.DataFrame, Mapping]) -> np.ndarray:
+        """
+        Wektorowe przewidywanie dla wielu biegaczy naraz.
+
+        Args:
+            data: DataFrame lub słownik kolumn z cechami modelu
+
+        Returns:
+            np.ndarray: Przewidywane czasy w sekundach
+        """
+        return self.transform(data) @ self.coef + self.intercept
+
+
+def export_native_model(model_path: str = MODEL_PATH,
+                        output_path: str = NATIVE_MODEL_PATH) -> dict:
+    """
+    Eksportuje model PyCaret do pliku JSON czytanego przez NativeHuberModel.
+
+    Args:
+        model_path: Ścieżka do modelu PyCaret (bez rozszerzenia .pkl)
+        output_path: Ścieżka docelowego pliku JSON
+
+    Returns:
+        dict: Zapisane parametry
+    """
+    from pycaret.regression import load_model  # pylint: disable=import-outside-toplevel
+
+    pipeline = load_model(model_path, verbose=False)
+    params = export_pipeline(pipeline)
+    params['source'] = os.path.basename(f"{model_path}.pkl")
+    params['source_sha256'] = _file_sha256(f"{model_path}.pkl")
+
+    with open(output_path, 'w', encoding='utf-8') as handle:
+        json.dump(params, handle, ensure_ascii=False, indent=2)
+        handle.write('\n')
+
+    logger.info("Model %s wyeksportowany do %s", model_path, output_path)
+    return params
+
+
+@functools.lru_cache(maxsize=4)
+def load_native_model(path: str = NATIVE_MODEL_PATH,
+                      model_path: Optional[str] = MODEL_PATH) -> Optional[NativeHuberModel]:
+    """
+    Wczytuje natywny silnik z pliku JSON. Wynik jest cachowany w procesie.
+
+    Jeśli obok leży plik .pkl, którego skrót nie zgadza się z zapisanym
+    w eksporcie, eksport uznawany jest za nieaktualny i zwracane jest None.
+
+    Args:
+        path: Ścieżka do pliku JSON z parametrami
+        model_path: Ścieżka do modelu PyCaret (bez .pkl) do kontroli aktualności
+
+    Returns:
+        NativeHuberModel lub None, gdy eksportu brak lub jest nieaktualny
+    """
+    try:
+        with open(path, encoding='utf-8') as handle:
+            params = json.load(handle)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        logger.warning("Brak natywnego modelu %s: %s", path, str(e))
+        return None
+
+    source = f"{model_path}.pkl" if model_path else None
+    if source and os.path.exists(source) and params.get('source_sha256') != _file_sha256(source):
+        logger.warning("Natywny model %s jest nieaktualny względem %s", path, source)
+        return None
+
+    try:
+        model = NativeHuberModel(params)
+    except (KeyError, ValueError) as e:
+        logger.error("Nieprawidłowy plik natywnego modelu %s: %s", path, str(e))
+        return None
+
+    logger.info("Natywny model %s załadowany pomyślnie", path)
+    return model
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Eksportuje model z linii poleceń: python -m src.utils.inference"""
+    parser = argparse.ArgumentParser(description="Eksport modelu PyCaret do silnika NumPy")
+    parser.add_argument('--model', default=MODEL_PATH, help="Model PyCaret (bez .pkl)")
+    parser.add_argument('--output', default=NATIVE_MODEL_PATH, help="Docelowy plik JSON")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    export_native_model(args.model, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
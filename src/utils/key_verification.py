@@ -0,0 +1,220 @@
+# =============================================================================
+# WERYFIKACJA KLUCZA OPENAI API
+# Moduł sprawdzający klucz w tle (lista modeli zamiast płatnego zapytania)
+# z wynikami zapamiętywanymi według skrótu klucza przez określony czas
+# =============================================================================
+
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    AuthenticationError,
+    OpenAIError,
+    PermissionDeniedError,
+    RateLimitError,
+)
+
+# Dodanie głównego katalogu do ścieżki
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.openai_client import (  # pylint: disable=wrong-import-position
+    get_openai_client,
+    key_fingerprint,
+)
+
+# Stałe konfiguracyjne
+VERIFICATION_TTL = float(os.getenv("OPENAI_KEY_VERIFICATION_TTL", "3600"))  # 1 godzina
+# Błędy połączenia są sprawdzane ponownie szybciej niż wynik rozstrzygający
+VERIFICATION_RETRY_TTL = 60.0
+VERIFICATION_TIMEOUT = 10.0
+
+# Stany weryfikacji
+STATUS_PENDING = "pending"
+STATUS_VALID = "valid"
+STATUS_INVALID = "invalid"
+STATUS_ERROR = "error"
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+
+def check_key_format(api_key: Optional[str]) -> Optional[str]:
+    """
+    Sprawdza format klucza bez połączenia z API.
+
+    Returns:
+        str lub None: Opis problemu lub None, gdy format jest poprawny
+    """
+    if not api_key or not api_key.strip():
+        return "Klucz API jest pusty"
+    if not api_key.startswith("sk-"):
+        return "Klucz API ma nieprawidłowy format (powinien zaczynać się od 'sk-')"
+    return None
+
+
+@dataclass
+class VerificationResult:
+    """Wynik weryfikacji klucza."""
+    status: str
+    message: str
+    checked_at: float = field(default_factory=time.time)
+
+    @property
+    def is_valid(self) -> bool:
+        return self.status == STATUS_VALID
+
+    @property
+    def is_pending(self) -> bool:
+        return self.status == STATUS_PENDING
+
+
+def _default_client_factory(api_key: str):
+    # Klient ze wspólnej puli połączeń, bez ponowień i z krótszym limitem czasu
+    return get_openai_client(api_key).with_options(timeout=VERIFICATION_TIMEOUT, max_retries=0)
+
+
+def verify_key_remote(api_key: str,
+                      client_factory: Callable[[str], object] = _default_client_factory
+                      ) -> VerificationResult:
+    """
+    Weryfikuje klucz zapytaniem o listę modeli (bez zużycia tokenów).
+
+    Args:
+        api_key: Klucz API do weryfikacji
+        client_factory: Funkcja tworząca klienta dla klucza
+
+    Returns:
+        VerificationResult: Wynik weryfikacji (bez stanu oczekiwania)
+    """
+    format_error = check_key_format(api_key)
+    if format_error:
+        return VerificationResult(STATUS_INVALID, format_error)
+
+    try:
+        client_factory(api_key).models.list()
+        return VerificationResult(STATUS_VALID, "Klucz API jest prawidłowy i funkcjonalny")
+    except AuthenticationError:
+        return VerificationResult(STATUS_INVALID, "Klucz API jest nieprawidłowy lub wygasł")
+    except PermissionDeniedError:
+        return VerificationResult(STATUS_INVALID, "Klucz API nie ma dostępu do modeli")
+    except RateLimitError:
+        return VerificationResult(STATUS_ERROR, "Problem z rozliczeniami lub przekroczono limit")
+    except APITimeoutError:
+        return VerificationResult(STATUS_ERROR, "Przekroczono czas oczekiwania na odpowiedź")
+    except APIConnectionError:
+        return VerificationResult(STATUS_ERROR, "Brak połączenia z OpenAI")
+    except (OpenAIError, ValueError, TypeError, ConnectionError) as e:
+        return VerificationResult(STATUS_ERROR, f"Błąd weryfikacji: {str(e)}")
+
+
+class KeyVerifier:
+    """
+    Weryfikacja kluczy w tle z pamięcią wyników według skrótu klucza.
+
+    status() nigdy nie blokuje: zwraca zapamiętany wynik albo stan
+    oczekiwania i w razie potrzeby zleca sprawdzenie w wątku roboczym.
+    """
+
+    def __init__(self, ttl: float = VERIFICATION_TTL, retry_ttl: float = VERIFICATION_RETRY_TTL,
+                 client_factory: Callable[[str], object] = _default_client_factory):
+        self.ttl = ttl
+        self.retry_ttl = retry_ttl
+        self.client_factory = client_factory
+        self._results: dict[str, VerificationResult] = {}
+        self._pending: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="openai-key-check")
+
+    def _is_fresh(self, result: VerificationResult, now: float) -> bool:
+        ttl = self.retry_ttl if result.status == STATUS_ERROR else self.ttl
+        return now - result.checked_at <= ttl
+
+    def _run(self, fingerprint: str, api_key: str) -> VerificationResult:
+        started = time.perf_counter()
+        result = verify_key_remote(api_key, self.client_factory)
+        with self._lock:
+            self._results[fingerprint] = result
+            self._pending.pop(fingerprint, None)
+        logger.info("Weryfikacja klucza %s…: %s (%.0f ms)", fingerprint[:8], result.status,
+                    (time.perf_counter() - started) * 1000)
+        return result
+
+    def submit(self, api_key: str, force: bool = False) -> Future:
+        """Zleca weryfikację w tle (jedną naraz dla danego klucza)."""
+        fingerprint = key_fingerprint(api_key)
+        with self._lock:
+            future = self._pending.get(fingerprint)
+            if future is not None:
+                return future
+            if not force:
+                cached = self._results.get(fingerprint)
+                if cached is not None and self._is_fresh(cached, time.time()):
+                    future = Future()
+                    future.set_result(cached)
+                    return future
+            future = self._executor.submit(self._run, fingerprint, api_key)
+            self._pending[fingerprint] = future
+            return future
+
+    def status(self, api_key: str) -> VerificationResult:
+        """
+        Zwraca wynik weryfikacji bez czekania na sieć.
+
+        Args:
+            api_key: Klucz API
+
+        Returns:
+            VerificationResult: Zapamiętany wynik lub STATUS_PENDING
+        """
+        format_error = check_key_format(api_key)
+        if format_error:
+            return VerificationResult(STATUS_INVALID, format_error)
+
+        fingerprint = key_fingerprint(api_key)
+        with self._lock:
+            cached = self._results.get(fingerprint)
+            pending = fingerprint in self._pending
+        if cached is not None and self._is_fresh(cached, time.time()):
+            return cached
+        if not pending:
+            self.submit(api_key)
+        return VerificationResult(STATUS_PENDING, "Weryfikacja klucza...")
+
+    def verify(self, api_key: str, timeout: Optional[float] = VERIFICATION_TIMEOUT,
+               force: bool = False) -> VerificationResult:
+        """Weryfikuje klucz, czekając na wynik najwyżej timeout sekund."""
+        format_error = check_key_format(api_key)
+        if format_error:
+            return VerificationResult(STATUS_INVALID, format_error)
+        future = self.submit(api_key, force=force)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            return VerificationResult(STATUS_PENDING, "Weryfikacja klucza...")
+
+    def forget(self, api_key: str) -> None:
+        """Usuwa zapamiętany wynik dla klucza."""
+        with self._lock:
+            self._results.pop(key_fingerprint(api_key), None)
+
+
+_default_verifier: Optional[KeyVerifier] = None
+_default_verifier_lock = threading.Lock()
+
+
+def get_key_verifier() -> KeyVerifier:
+    """Zwraca wspólny dla procesu weryfikator (tworzony przy pierwszym użyciu)."""
+    global _default_verifier  # pylint: disable=global-statement
+    with _default_verifier_lock:
+        if _default_verifier is None:
+            _default_verifier = KeyVerifier()
+        return _default_verifier
@@ -0,0 +1,101 @@
+# =============================================================================
+# LENIWE IMPORTY CIĘŻKICH ZALEŻNOŚCI
+# Moduł odkładający import pakietów (np. PyCaret) do pierwszego użycia
+# lub wykonujący go w tle, aby nie obciążać startu aplikacji
+# =============================================================================
+
+import importlib
+import importlib.util
+import logging
+import threading
+import time
+from types import ModuleType
+from typing import Iterable, Optional
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+_lock = threading.RLock()
+_modules: dict[str, Optional[ModuleType]] = {}
+_import_seconds: dict[str, float] = {}
+_scheduled: set[str] = set()
+# Osobna blokada planowania - _lock jest zajęta przez cały czas trwania importu
+_schedule_lock = threading.Lock()
+
+
+def is_available(name: str) -> bool:
+    """
+    Sprawdza, czy pakiet jest zainstalowany, bez jego importowania.
+
+    Args:
+        name: Nazwa modułu (np. 'pycaret.regression'); sprawdzany jest pakiet główny
+
+    Returns:
+        bool: True, jeśli pakiet można zaimportować
+    """
+    try:
+        return importlib.util.find_spec(name.split('.')[0]) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def load_module(name: str) -> Optional[ModuleType]:
+    """
+    Importuje moduł przy pierwszym użyciu i zapamiętuje wynik.
+
+    Równoległe wywołania czekają na jeden import; niepowodzenie również
+    jest zapamiętywane, więc brakujący pakiet nie jest szukany ponownie.
+
+    Args:
+        name: Nazwa modułu
+
+    Returns:
+        ModuleType lub None, gdy moduł nie jest dostępny
+    """
+    if name in _modules:
+        return _modules[name]
+    with _lock:
+        if name in _modules:
+            return _modules[name]
+        started = time.perf_counter()
+        try:
+            module = importlib.import_module(name)
+        except ImportError as e:
+            logger.warning("Moduł %s niedostępny: %s", name, str(e))
+            module = None
+        _import_seconds[name] = time.perf_counter() - started
+        _modules[name] = module
+        logger.info("Import %s: %.2f s", name, _import_seconds[name])
+        return module
+
+
+def preload_in_background(names: Iterable[str]) -> Optional[threading.Thread]:
+    """
+    Importuje moduły w wątku w tle (np. po wyrenderowaniu pierwszej strony).
+    Moduły już załadowane lub zlecone wcześniej są pomijane, więc wywołanie
+    przy każdym przebiegu skryptu Streamlit jest tanie.
+
+    Args:
+        names: Nazwy modułów
+
+    Returns:
+        threading.Thread lub None: Uruchomiony wątek (daemon), gdy było co ładować
+    """
+    with _schedule_lock:
+        pending = [name for name in names if name not in _modules and name not in _scheduled]
+        _scheduled.update(pending)
+    if not pending:
+        return None
+
+    def _preload():
+        for name in pending:
+            load_module(name)
+
+    thread = threading.Thread(target=_preload, name="lazy-import-preload", daemon=True)
+    thread.start()
+    return thread
+
+
+def import_times() -> dict[str, float]:
+    """Czas importu (w sekundach) modułów załadowanych przez load_module."""
+    return dict(_import_seconds)
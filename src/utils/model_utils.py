@@ -1,147 +1,130 @@
 # =============================================================================
 # FUNKCJE MODELOWANIA I PRZEWIDYWANIA
-# Moduł zawierający funkcje związane z modelem ML
+# Moduł zawierający funkcje związane z modelem ML - cienka warstwa Streamlit
+# nad src.core (wyjątki rdzenia zamieniane są na komunikaty st.error)
 # =============================================================================
 
-import pandas as pd
-import datetime
 import logging
 import streamlit as st
-from typing import Optional, Tuple, Union
+import pandas as pd
+from typing import Iterable, Optional, Tuple, Union
+
+from src.core import (
+    ModelUnavailableError,
+    PredictorError,
+    ReferenceDataError,
+    get_predictor,
+)
+from src.core import reference
+from src.core.predictor import (  # noqa: F401 - ponowny eksport dla dotychczasowych importów
+    calculate_5km_time,
+    calculate_5km_time_batch,
+    format_seconds_batch,
+)
+from src.utils.cohort_stats import CohortCube
+from src.utils.inference import MODEL_PATH, NATIVE_MODEL_PATH
+from src.utils.reference_index import ReferenceIndex
 
 # Stałe konfiguracyjne
-MODEL_PATH = "huber_model_halfmarathon_time"
-DATA_PATH = "df_cleaned.csv"
-MODEL_CACHE_TTL = 3600  # Cache na 1 godzinę
-
-# Próba importu PyCaret z obsługą błędów
-PYCARET_AVAILABLE = False
-try:
-    from pycaret.regression import load_model, predict_model
-    PYCARET_AVAILABLE = True
-except ImportError:
-    # Fallback implementations to prevent errors when module is missing
-    def load_model(*_args, **_kwargs):
-        return None
-    
-    def predict_model(*_args, **_kwargs):
-        return pd.DataFrame()
+DATA_PATH = reference.DATA_PATH
 
 # Konfiguracja loggera
 logger = logging.getLogger(__name__)
 
 
-def calculate_5km_time(tempo: Union[float, str]) -> float:
-    """
-    Przelicza tempo biegu (min/km) na całkowity czas w sekundach dla dystansu 5km.
-    Obsługuje formaty: 5.0, "5.0", "4:30"
-    
-    Args:
-        tempo: Tempo biegu w minutach na kilometr (float, str lub format MM:SS)
-        
-    Returns:
-        float: Całkowity czas w sekundach
-        
-    Example:
-        >>> calculate_5km_time(5.0)
-        1500.0
-        >>> calculate_5km_time("4:30")
-        1350.0
-    """
-    if isinstance(tempo, str) and ':' in tempo:
-        # Konwersja formatu MM:SS na minuty dziesiętne
-        minutes, seconds = tempo.split(':')
-        tempo_decimal = float(minutes) + float(seconds) / 60
+def _report_error(error: PredictorError) -> None:
+    """Zamienia wyjątek rdzenia na komunikat Streamlit."""
+    logger.error("Błąd podczas przewidywania: %s", str(error))
+    if isinstance(error, ModelUnavailableError):
+        st.error(f"❌ {error}")
     else:
-        tempo_decimal = float(tempo)
-    
-    return tempo_decimal * 5 * 60
+        st.error(f"❌ Wystąpił błąd podczas generowania przewidywania: {str(error)}")
 
 
-@st.cache_resource(ttl=MODEL_CACHE_TTL)
-def load_model_cached(model_path: str):
+def make_prediction(user_data: dict) -> Optional[Tuple[float, str]]:
     """
-    Ładuje model ML z cache'owaniem przez Streamlit.
+    Wykonuje przewidywanie czasu półmaratonu (src.core.Predictor).
+
+    Domyślnie korzysta z natywnego silnika NumPy (huber_model_halfmarathon_time.json),
+    a PyCaret jest używany tylko wtedy, gdy eksportu brak lub jest nieaktualny.
     
     Args:
-        model_path: Ścieżka do modelu
+        user_data: Słownik z danymi użytkownika
         
     Returns:
-        Model lub None w przypadku błędu
+        Tuple[float, str] lub None: (czas_w_sekundach, sformatowany_czas) lub None
     """
-    if not PYCARET_AVAILABLE:
-        st.error("❌ PyCaret nie jest zainstalowany. Zainstaluj go komendą: pip install pycaret")
-        logger.error("PyCaret nie jest dostępny - model nie może być załadowany")
-        return None
-        
     try:
-        model = load_model(model_path)
-        logger.info("Model %s załadowany pomyślnie", model_path)
-        return model
-    except (FileNotFoundError, ImportError, ValueError) as e:
-        logger.error("Błąd ładowania modelu %s: %s", model_path, str(e))
-        st.error("❌ Nie udało się załadować modelu. Spróbuj ponownie później.")
+        prediction = get_predictor(NATIVE_MODEL_PATH, MODEL_PATH).predict(user_data, validate=False)
+    except PredictorError as e:
+        _report_error(e)
         return None
+    return prediction.seconds, prediction.time
 
 
-def make_prediction(user_data: dict) -> Optional[Tuple[float, str]]:
+def predict_many(data: Union[pd.DataFrame, Iterable[dict]]) -> Optional[pd.DataFrame]:
     """
-    Wykonuje przewidywanie czasu półmaratonu.
+    Wykonuje przewidywanie dla wielu biegaczy jednym wywołaniem modelu.
+    
+    Wiersze, które nie przechodzą walidacji (tej samej co validate_user_data),
+    nie przerywają przetwarzania - dostają is_valid=False i listę błędów.
     
     Args:
-        user_data: Słownik z danymi użytkownika
+        data: DataFrame lub lista słowników z kluczami 'Wiek', 'Płeć', '5 km Tempo'
         
     Returns:
-        Tuple[float, str] lub None: (czas_w_sekundach, sformatowany_czas) lub None
+        DataFrame lub None: Kolumny wejściowe oraz 'prediction_label' (sekundy),
+        'prediction_time' (sformatowany czas), 'is_valid' i 'errors';
+        None gdy model jest niedostępny
     """
-    if not PYCARET_AVAILABLE:
-        st.error("❌ PyCaret nie jest zainstalowany. Zainstaluj go komendą: pip install pycaret")
-        logger.error("PyCaret nie jest dostępny - przewidywanie niemożliwe")
-        return None
-        
     try:
-        model = load_model_cached(MODEL_PATH)
-        if model is None:
-            return None
-            
-        prediction_data = pd.DataFrame({
-            'Wiek': [user_data['Wiek']],
-            'Płeć': [user_data['Płeć']],
-            '5 km Tempo': [float(user_data['5 km Tempo'])],
-            '5 km Czas': [calculate_5km_time(user_data['5 km Tempo'])]
-        })
-        
-        prediction = predict_model(model, data=prediction_data)
-        predicted_seconds = round(prediction["prediction_label"].iloc[0], 2)
-        predicted_time = str(datetime.timedelta(seconds=int(predicted_seconds)))
-        
-        logger.info("Przewidywanie wykonane pomyślnie: %s", predicted_time)
-        return predicted_seconds, predicted_time
-        
-    except (ValueError, KeyError, ImportError, AttributeError) as e:
-        logger.error("Błąd podczas przewidywania: %s", str(e))
-        st.error(f"❌ Wystąpił błąd podczas generowania przewidywania: {str(e)}")
+        return get_predictor(NATIVE_MODEL_PATH, MODEL_PATH).predict_many(data)
+    except PredictorError as e:
+        _report_error(e)
         return None
 
 
-@st.cache_data
 def load_reference_data() -> pd.DataFrame:
     """
-    Wczytuje dane referencyjne z pliku CSV. Wynik jest cachowany przez Streamlit.
+    Wczytuje dane referencyjne (współdzielone w procesie przez src.core).
     
     Returns:
-        DataFrame: Dane referencyjne z czasami biegaczy
+        DataFrame: Dane referencyjne z czasami biegaczy (pusty przy błędzie)
     """
     try:
-        df = pd.read_csv(DATA_PATH)
-        logger.info("Dane referencyjne załadowane: %d rekordów", len(df))
-        return df
-    except (FileNotFoundError, pd.errors.EmptyDataError, pd.errors.ParserError) as e:
+        return reference.load_reference_data(DATA_PATH)
+    except ReferenceDataError as e:
         logger.error("Błąd ładowania danych referencyjnych: %s", str(e))
         st.error("❌ Nie udało się załadować danych referencyjnych.")
         return pd.DataFrame()
 
 
+def load_reference_index() -> ReferenceIndex:
+    """
+    Zwraca raz zbudowany, posortowany indeks czasów referencyjnych.
+    
+    Returns:
+        ReferenceIndex: Indeks zbudowany na danych z load_reference_data()
+    """
+    try:
+        return reference.load_reference_index(DATA_PATH)
+    except ReferenceDataError:
+        return ReferenceIndex(load_reference_data())
+
+
+def load_cohort_cube() -> CohortCube:
+    """
+    Zwraca raz zbudowaną kostkę statystyk (płeć × wiek).
+    
+    Returns:
+        CohortCube: Kostka zbudowana na danych z load_reference_data()
+    """
+    try:
+        return reference.load_cohort_cube(DATA_PATH)
+    except ReferenceDataError:
+        return CohortCube(load_reference_data())
+
+
 def get_model_metrics() -> dict:
     """
     Zwraca metryki modelu do wyświetlenia.
@@ -0,0 +1,161 @@
+# =============================================================================
+# WSPÓLNY KLIENT OPENAI
+# Fabryka klientów OpenAI dla całego procesu: jedna pula połączeń HTTP
+# (keep-alive) z limitami czasu i ponowieniami, klienci według skrótu klucza
+# =============================================================================
+
+import hashlib
+import logging
+import os
+import threading
+from typing import Optional
+
+import openai
+from openai import DEFAULT_CONNECTION_LIMITS, OpenAI
+
+# Stałe konfiguracyjne
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_READ_TIMEOUT = float(os.getenv("OPENAI_READ_TIMEOUT", "30"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))  # z wykładniczym odstępem
+POOL_MAX_CONNECTIONS = 20
+POOL_MAX_KEEPALIVE = 10
+POOL_KEEPALIVE_EXPIRY = 60.0
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+
+def key_fingerprint(api_key: str) -> str:
+    """Skrót SHA-256 klucza - jedyna postać klucza używana jako klucz słowników i w logach."""
+    return hashlib.sha256(api_key.strip().encode("utf-8")).hexdigest()
+
+
+class OpenAIClientFactory:
+    """
+    Klienci OpenAI współdzielący jedną pulę połączeń HTTP.
+
+    Klient dla danego klucza tworzony jest raz (klucz przechowywany tylko
+    w samym kliencie, słownik używa skrótu), a wszystkie korzystają z tego
+    samego klienta HTTP, więc połączenia TLS są ponownie używane między
+    sesjami Streamlit i modułami (ekstrakcja, weryfikacja klucza).
+    """
+
+    def __init__(self, connect_timeout: float = OPENAI_CONNECT_TIMEOUT,
+                 read_timeout: float = OPENAI_READ_TIMEOUT,
+                 max_retries: int = OPENAI_MAX_RETRIES,
+                 max_connections: int = POOL_MAX_CONNECTIONS,
+                 max_keepalive: int = POOL_MAX_KEEPALIVE,
+                 keepalive_expiry: float = POOL_KEEPALIVE_EXPIRY,
+                 base_url: Optional[str] = None):
+        self.base_url = base_url
+        self.timeout = openai.Timeout(read_timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        # Klasa Limits z biblioteki HTTP używanej przez zainstalowaną wersję openai
+        self.limits = type(DEFAULT_CONNECTION_LIMITS)(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._clients: dict[str, OpenAI] = {}
+        self._http_client = None
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._connections_opened = 0
+
+    def _count_request(self, _request) -> None:
+        with self._lock:
+            self._requests += 1
+
+    def _build_http_client(self):
+        http_client = openai.DefaultHttpxClient(
+            limits=self.limits,
+            timeout=self.timeout,
+            event_hooks={'request': [self._count_request]},
+        )
+        # Liczenie nowych połączeń (pula httpcore); bez niej statystyki są niepełne
+        pool = getattr(getattr(http_client, '_transport', None), '_pool', None)
+        if pool is not None and hasattr(pool, 'create_connection'):
+            create_connection = pool.create_connection
+
+            def counting_create_connection(origin):
+                with self._lock:
+                    self._connections_opened += 1
+                return create_connection(origin)
+
+            pool.create_connection = counting_create_connection
+        return http_client
+
+    def get(self, api_key: Optional[str]) -> Optional[OpenAI]:
+        """
+        Zwraca klienta dla klucza (tworzonego przy pierwszym użyciu).
+
+        Args:
+            api_key: Klucz API
+
+        Returns:
+            OpenAI lub None, gdy klucz jest pusty
+        """
+        if not api_key or not api_key.strip():
+            return None
+        fingerprint = key_fingerprint(api_key)
+        with self._lock:
+            client = self._clients.get(fingerprint)
+            if client is None:
+                if self._http_client is None:
+                    self._http_client = self._build_http_client()
+                client = OpenAI(api_key=api_key.strip(), base_url=self.base_url,
+                                http_client=self._http_client,
+                                timeout=self.timeout, max_retries=self.max_retries)
+                self._clients[fingerprint] = client
+                logger.info("Utworzono klienta OpenAI (klucz %s…)", fingerprint[:8])
+            return client
+
+    def stats(self) -> dict:
+        """Statystyki puli: klienci, zapytania, połączenia otwarte i ponownie użyte."""
+        pool = getattr(getattr(self._http_client, '_transport', None), '_pool', None)
+        connections = list(getattr(pool, 'connections', []) or [])
+        with self._lock:
+            requests = self._requests
+            opened = self._connections_opened
+            clients = len(self._clients)
+        reused = max(0, requests - opened)
+        return {
+            'clients': clients,
+            'requests': requests,
+            'connections_opened': opened,
+            'open_connections': len(connections),
+            'idle_connections': sum(1 for conn in connections if conn.is_idle()),
+            'reused_requests': reused,
+            'reuse_ratio': reused / requests if requests else 0.0,
+        }
+
+    def close(self) -> None:
+        """Zamyka pulę połączeń i zapomina klientów."""
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+            self._http_client = None
+            self._clients.clear()
+
+
+_default_factory: Optional[OpenAIClientFactory] = None
+_default_factory_lock = threading.Lock()
+
+
+def get_client_factory() -> OpenAIClientFactory:
+    """Zwraca wspólną dla procesu fabrykę klientów (tworzoną przy pierwszym użyciu)."""
+    global _default_factory  # pylint: disable=global-statement
+    with _default_factory_lock:
+        if _default_factory is None:
+            _default_factory = OpenAIClientFactory()
+        return _default_factory
+
+
+def get_openai_client(api_key: Optional[str]) -> Optional[OpenAI]:
+    """Klient OpenAI ze wspólnej puli połączeń (None dla pustego klucza)."""
+    return get_client_factory().get(api_key)
+
+
+def openai_pool_stats() -> dict:
+    """Statystyki wspólnej puli połączeń OpenAI."""
+    return get_client_factory().stats()
@@ -0,0 +1,321 @@
+# =============================================================================
+# WCZYTYWANIE DANYCH REFERENCYJNYCH
+# Moduł z jawnym schematem typów oraz binarną, kolumnową pamięcią podręczną
+# pliku CSV, otwieraną przez mapowanie pamięci (np.load z mmap_mode)
+# =============================================================================
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Stałe konfiguracyjne
+CACHE_FORMAT_VERSION = 3
+CACHE_SUFFIX = ".cache"
+# Uprawnienia opublikowanej wersji pamięci podręcznej (mkdtemp tworzy katalog 0700,
+# a z pamięci podręcznej korzystają też procesy innych użytkowników)
+CACHE_DIR_MODE = 0o755
+CACHE_ENABLED = os.getenv("REFERENCE_DATA_CACHE", "1") != "0"
+
+# Schemat danych referencyjnych: płeć i kategoria jako kategorie, wiek i czasy
+# w sekundach jako małe liczby całkowite (nullable, bo międzyczasy mają braki),
+# tempa jako float32
+REFERENCE_SCHEMA = {
+    'Płeć': 'category',
+    'Kategoria wiekowa': 'category',
+    'Wiek': 'UInt8',
+    '5 km Czas': 'UInt16',
+    '10 km Czas': 'UInt16',
+    '15 km Czas': 'UInt16',
+    '20 km Czas': 'UInt16',
+    'Czas': 'UInt16',
+    '5 km Tempo': 'float32',
+    '10 km Tempo': 'float32',
+    '15 km Tempo': 'float32',
+    '20 km Tempo': 'float32',
+    'Tempo': 'float32',
+}
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+
+def cache_dir_for(csv_path: str) -> str:
+    """Zwraca katalog pamięci podręcznej leżący obok pliku CSV."""
+    return f"{csv_path}{CACHE_SUFFIX}"
+
+
+def _source_key(csv_path: str) -> dict:
+    """Klucz aktualności pamięci podręcznej: rozmiar i czas modyfikacji pliku CSV."""
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def cache_version_dir(csv_path: str, source: Optional[dict] = None) -> str:
+    """
+    Zwraca katalog wersji pamięci podręcznej dla bieżącej zawartości pliku CSV.
+
+    Nazwa wersji wynika z formatu i klucza źródła, więc każda zmiana pliku CSV
+    trafia do nowego katalogu, a opublikowana wersja nigdy nie jest nadpisywana.
+    """
+    source = _source_key(csv_path) if source is None else source
+    name = f"v{CACHE_FORMAT_VERSION}-{source['size']}-{source['mtime_ns']}"
+    return os.path.join(cache_dir_for(csv_path), name)
+
+
+def _fits_integer_dtype(series: pd.Series, dtype: str) -> bool:
+    """Sprawdza, czy kolumnę da się bezstratnie zapisać w danym typie całkowitym."""
+    values = series.dropna()
+    if values.empty:
+        return True
+    info = np.iinfo(pd.api.types.pandas_dtype(dtype).numpy_dtype)
+    return bool((values == np.round(values)).all() and
+                values.min() >= info.min and values.max() <= info.max)
+
+
+def apply_reference_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rzutuje kolumny danych referencyjnych na typy z REFERENCE_SCHEMA.
+
+    Kolumna całkowita, której wartości nie mieszczą się w docelowym typie
+    (ułamki, przepełnienie), zostaje bez zmian - schemat nigdy nie gubi danych.
+
+    Args:
+        df: Dane wczytane z pliku CSV
+
+    Returns:
+        DataFrame: Nowa ramka z kompaktowymi typami
+    """
+    typed = {}
+    for name in df.columns:
+        series = df[name]
+        dtype = REFERENCE_SCHEMA.get(name)
+        if dtype is None:
+            typed[name] = series
+        elif dtype in ('category', 'float32'):
+            typed[name] = series.astype(dtype)
+        elif _fits_integer_dtype(series, dtype):
+            typed[name] = series.astype(dtype)
+        else:
+            logger.warning("Kolumna %s nie mieści się w typie %s - pozostaje %s",
+                           name, dtype, series.dtype)
+            typed[name] = series
+    return pd.DataFrame(typed)
+
+
+def column_memory(df: pd.DataFrame) -> dict:
+    """Zwraca rozmiar każdej kolumny w bajtach (z napisami włącznie)."""
+    return {name: int(size) for name, size in df.memory_usage(index=False, deep=True).items()}
+
+
+# Źródła (wersje pamięci podręcznej lub pliki CSV), dla których ten proces
+# zalogował już podsumowanie pamięci w INFO
+_memory_reported: set = set()
+_memory_reported_lock = threading.Lock()
+
+
+def _log_memory_report(source: str, before: dict, df: pd.DataFrame) -> None:
+    """
+    Loguje raport pamięci: bajty przed i po zastosowaniu schematu.
+
+    Podsumowanie trafia do INFO raz na proces dla danego źródła (kolejne
+    wczytania i pracownicy puli nie powtarzają go), a rozbicie na kolumny
+    do DEBUG.
+    """
+    with _memory_reported_lock:
+        first = source not in _memory_reported
+        _memory_reported.add(source)
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if not first and not debug:
+        return
+
+    after = column_memory(df)
+    logger.log(logging.INFO if first else logging.DEBUG,
+               "Pamięć danych referencyjnych: %s -> %s B",
+               f"{sum(before.values()):,}", f"{sum(after.values()):,}")
+    if debug:
+        lines = [f"  {name}: {before.get(name, 0):,} -> {after[name]:,} B" for name in after]
+        logger.debug("Pamięć danych referencyjnych na kolumnę:\n%s", "\n".join(lines))
+
+
+def write_columnar_cache(df: pd.DataFrame, csv_path: str,
+                         memory_before: Optional[dict] = None) -> str:
+    """
+    Zapisuje DataFrame jako katalog plików .npy (jeden na kolumnę) i meta.json.
+    Kolumny nullable zapisywane są jako para plików: wartości i maska braków.
+
+    Zapis odbywa się do katalogu tymczasowego, publikowanego jednym os.rename()
+    pod nazwą wersji (cache_version_dir), więc czytelnicy nigdy nie widzą
+    niekompletnego zapisu. Jeśli inny proces opublikował już tę wersję, zapis
+    jest porzucany. Starsze wersje nie są usuwane - mogą być zmapowane w pamięci
+    działających procesów (katalog .cache można usunąć po ich zatrzymaniu).
+
+    Args:
+        df: Dane do zapisania
+        csv_path: Plik CSV, z którego pochodzą dane
+        memory_before: Rozmiary kolumn przed schematem (do raportu pamięci)
+
+    Returns:
+        str: Ścieżka katalogu wersji pamięci podręcznej
+    """
+    source = _source_key(csv_path)
+    target = cache_version_dir(csv_path, source)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=os.path.dirname(target))
+
+    try:
+        columns = []
+        for i, name in enumerate(df.columns):
+            series = df[name]
+            entry = {'name': name, 'file': f"{i}.npy"}
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                entry['kind'] = 'categorical'
+                entry['categories'] = series.cat.categories.tolist()
+                entry['ordered'] = bool(series.cat.ordered)
+                values = series.cat.codes.to_numpy()
+            elif isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and \
+                    pd.api.types.is_integer_dtype(series.dtype):
+                entry['kind'] = 'masked'
+                entry['dtype'] = str(series.dtype)
+                entry['mask_file'] = f"{i}.mask.npy"
+                np.save(os.path.join(staging, entry['mask_file']),
+                        series.isna().to_numpy(), allow_pickle=False)
+                values = series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0)
+            elif pd.api.types.is_numeric_dtype(series) and not isinstance(
+                    series.dtype, pd.api.extensions.ExtensionDtype):
+                entry['kind'] = 'numeric'
+                values = series.to_numpy()
+            else:
+                entry['kind'] = 'string'
+                values = series.astype(str).to_numpy(dtype=str)
+                entry['missing'] = series.isna().to_numpy().nonzero()[0].tolist()
+            np.save(os.path.join(staging, entry['file']), values, allow_pickle=False)
+            columns.append(entry)
+
+        meta = {
+            'format_version': CACHE_FORMAT_VERSION,
+            'source': source,
+            'rows': len(df),
+            'columns': columns,
+            'memory_before': memory_before or {},
+        }
+        with open(os.path.join(staging, "meta.json"), 'w', encoding='utf-8') as handle:
+            json.dump(meta, handle, ensure_ascii=False)
+
+        os.chmod(staging, CACHE_DIR_MODE)
+        try:
+            os.rename(staging, target)
+        except OSError:
+            if not os.path.isdir(target):
+                raise
+            # Tę samą wersję opublikował w międzyczasie inny proces
+            shutil.rmtree(staging, ignore_errors=True)
+            return target
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    logger.info("Zapisano kolumnową pamięć podręczną %s (%d kolumn)", target, len(columns))
+    return target
+
+
+def read_columnar_cache(csv_path: str) -> Optional[pd.DataFrame]:
+    """
+    Otwiera pamięć podręczną przez mapowanie pamięci, jeśli jest aktualna.
+
+    Kolumny numeryczne są widokami na pliki .npy, więc wiele procesów na
+    jednym hoście współdzieli te same strony pamięci podręcznej systemu.
+
+    Args:
+        csv_path: Plik CSV, którego dotyczy pamięć podręczna
+
+    Returns:
+        DataFrame lub None, gdy pamięci podręcznej brak lub jest nieaktualna
+    """
+    try:
+        target = cache_version_dir(csv_path)
+        with open(os.path.join(target, "meta.json"), encoding='utf-8') as handle:
+            meta = json.load(handle)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+    if meta.get('format_version') != CACHE_FORMAT_VERSION or \
+            meta.get('source') != _source_key(csv_path):
+        logger.info("Pamięć podręczna %s jest nieaktualna", target)
+        return None
+
+    data = {}
+    try:
+        for entry in meta['columns']:
+            path = os.path.join(target, entry['file'])
+            if entry['kind'] == 'numeric':
+                data[entry['name']] = np.load(path, mmap_mode='r', allow_pickle=False)
+            elif entry['kind'] == 'masked':
+                values = np.load(path, mmap_mode='r', allow_pickle=False)
+                mask = np.load(os.path.join(target, entry['mask_file']),
+                               mmap_mode='r', allow_pickle=False)
+                data[entry['name']] = pd.arrays.IntegerArray(values, mask, copy=False)
+            elif entry['kind'] == 'categorical':
+                codes = np.load(path, mmap_mode='r', allow_pickle=False)
+                data[entry['name']] = pd.Categorical.from_codes(
+                    codes, categories=entry['categories'], ordered=entry['ordered'])
+            else:
+                values = np.load(path, allow_pickle=False).astype(object)
+                values[entry['missing']] = np.nan
+                data[entry['name']] = values
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Nie udało się odczytać pamięci podręcznej %s: %s", target, str(e))
+        return None
+
+    df = pd.DataFrame(data, copy=False)
+    _log_memory_report(target, meta.get('memory_before', {}), df)
+    return df
+
+
+def read_reference_data(csv_path: str, use_cache: bool = CACHE_ENABLED) -> pd.DataFrame:
+    """
+    Wczytuje dane referencyjne, korzystając z kolumnowej pamięci podręcznej.
+
+    Kolumny są rzutowane na typy z REFERENCE_SCHEMA, a raport pamięci
+    (bajty przed i po) jest logowany przy pierwszym wczytaniu w procesie.
+    Plik CSV pozostaje źródłem prawdy: po każdej jego zmianie (rozmiar lub
+    czas modyfikacji) pamięć podręczna jest automatycznie przebudowywana.
+
+    Args:
+        csv_path: Ścieżka do pliku CSV
+        use_cache: Czy korzystać z pamięci podręcznej
+
+    Returns:
+        DataFrame: Dane referencyjne
+
+    Raises:
+        FileNotFoundError, pd.errors.EmptyDataError, pd.errors.ParserError:
+            Gdy nie da się wczytać pliku CSV
+    """
+    if use_cache:
+        df = read_columnar_cache(csv_path)
+        if df is not None:
+            logger.info("Dane referencyjne z pamięci podręcznej: %d rekordów", len(df))
+            return df
+
+    raw = pd.read_csv(csv_path)
+    memory_before = column_memory(raw)
+    df = apply_reference_schema(raw)
+
+    if use_cache:
+        try:
+            write_columnar_cache(df, csv_path, memory_before)
+            cached = read_columnar_cache(csv_path)
+            if cached is not None:
+                return cached
+        except OSError as e:
+            logger.warning("Nie udało się zapisać pamięci podręcznej dla %s: %s", csv_path, str(e))
+
+    _log_memory_report(os.path.abspath(csv_path), memory_before, df)
+    return df
@@ -0,0 +1,148 @@
+# =============================================================================
+# INDEKS POSORTOWANYCH CZASÓW REFERENCYJNYCH
+# Moduł odpowiadający w czasie O(log n) na pytania o percentyl i miejsce
+# =============================================================================
+
+import logging
+from typing import Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Kolumna z rokiem biegu - opcjonalna, df_cleaned.csv jej nie zawiera
+YEAR_COLUMN = 'Rok'
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+
+class SortedTimes:
+    """
+    Posortowana tablica czasów jednej grupy biegaczy.
+
+    Liczność grupy obejmuje także wiersze bez czasu (NaN), tak aby
+    percentyl był identyczny z (df['Czas'] < x).mean() liczonym na DataFrame.
+    """
+
+    def __init__(self, times: pd.Series):
+        values = times.to_numpy(dtype=np.float64, na_value=np.nan)
+        self.total = len(values)
+        self.times = np.sort(values[~np.isnan(values)])
+
+    @classmethod
+    def from_sorted(cls, times: np.ndarray, total: int) -> "SortedTimes":
+        """Tworzy grupę z już posortowanych czasów (bez NaN), bez kopiowania."""
+        instance = cls.__new__(cls)
+        instance.total = total
+        instance.times = times
+        return instance
+
+    def count_faster(self, seconds: float) -> int:
+        """Liczba biegaczy z czasem ostro lepszym (mniejszym) niż podany."""
+        return int(np.searchsorted(self.times, seconds, side='left'))
+
+    def count_slower(self, seconds: float) -> int:
+        """Liczba biegaczy z czasem ostro gorszym (większym) niż podany."""
+        return int(len(self.times) - np.searchsorted(self.times, seconds, side='right'))
+
+
+class ReferenceIndex:
+    """
+    Indeks czasów ukończenia budowany raz przy wczytaniu danych referencyjnych.
+
+    Przechowuje posortowane tablice dla całego zbioru, każdej płci, każdego
+    roku (jeśli dane zawierają kolumnę 'Rok') oraz każdej pary płeć-rok.
+    """
+
+    def __init__(self, reference_df: pd.DataFrame):
+        self._groups: dict[tuple[Optional[Hashable], Optional[Hashable]], SortedTimes] = {}
+        if 'Czas' not in reference_df.columns:
+            self._groups[(None, None)] = SortedTimes(pd.Series([], dtype=np.float64))
+            return
+
+        self._groups[(None, None)] = SortedTimes(reference_df['Czas'])
+
+        group_columns = [column for column in ('Płeć', YEAR_COLUMN)
+                         if column in reference_df.columns]
+        if 'Płeć' in group_columns:
+            for gender, group in reference_df.groupby('Płeć', observed=True)['Czas']:
+                self._groups[(gender, None)] = SortedTimes(group)
+        if YEAR_COLUMN in group_columns:
+            for year, group in reference_df.groupby(YEAR_COLUMN, observed=True)['Czas']:
+                self._groups[(None, year)] = SortedTimes(group)
+        if len(group_columns) == 2:
+            for (gender, year), group in reference_df.groupby(group_columns,
+                                                              observed=True)['Czas']:
+                self._groups[(gender, year)] = SortedTimes(group)
+
+        logger.info("Indeks czasów referencyjnych zbudowany: %d grup", len(self._groups))
+
+    def to_arrays(self) -> tuple[dict, dict[str, np.ndarray]]:
+        """
+        Eksportuje indeks jako płaskie tablice NumPy (np. do pamięci współdzielonej).
+
+        Returns:
+            tuple: (metadane z kluczami i licznościami grup, tablice posortowanych czasów)
+        """
+        keys = list(self._groups)
+        meta = {'groups': [(gender, year, self._groups[(gender, year)].total)
+                           for gender, year in keys]}
+        arrays = {str(position): self._groups[key].times for position, key in enumerate(keys)}
+        return meta, arrays
+
+    @classmethod
+    def from_arrays(cls, meta: dict, arrays: dict[str, np.ndarray]) -> "ReferenceIndex":
+        """Odtwarza indeks z wyniku to_arrays bez sortowania i kopiowania."""
+        index = cls.__new__(cls)
+        index._groups = {
+            (gender, year): SortedTimes.from_sorted(arrays[str(position)], total)
+            for position, (gender, year, total) in enumerate(meta['groups'])
+        }
+        return index
+
+    def group(self, gender: Optional[str] = None, year: Optional[int] = None) -> SortedTimes:
+        """
+        Zwraca posortowane czasy dla wybranej płci i/lub roku.
+
+        Args:
+            gender: 'M', 'K' lub None (wszyscy)
+            year: Rok biegu lub None (wszystkie lata)
+
+        Returns:
+            SortedTimes: Grupa (pusta, jeśli brak takich biegaczy)
+        """
+        key = (gender, year)
+        if key not in self._groups:
+            return SortedTimes(pd.Series([], dtype=np.float64))
+        return self._groups[key]
+
+    def __len__(self) -> int:
+        return self._groups[(None, None)].total
+
+    def percentile(self, seconds: float, gender: Optional[str] = None,
+                   year: Optional[int] = None) -> float:
+        """
+        Odsetek biegaczy z czasem lepszym niż podany (0-100).
+
+        Args:
+            seconds: Czas w sekundach
+            gender: Opcjonalne zawężenie do płci
+            year: Opcjonalne zawężenie do roku
+
+        Returns:
+            float: Percentyl; 50 gdy grupa jest pusta
+        """
+        times = self.group(gender, year)
+        if times.total == 0:
+            return 50.0
+        return times.count_faster(seconds) / times.total * 100
+
+    def faster_than(self, seconds: float, gender: Optional[str] = None,
+                    year: Optional[int] = None) -> int:
+        """Liczba biegaczy, od których podany czas jest lepszy."""
+        return self.group(gender, year).count_slower(seconds)
+
+    def expected_place(self, seconds: float, gender: Optional[str] = None,
+                       year: Optional[int] = None) -> int:
+        """Przewidywane miejsce w klasyfikacji (1 = zwycięzca)."""
+        return self.group(gender, year).count_faster(seconds) + 1
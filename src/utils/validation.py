@@ -6,11 +6,15 @@
 import re
 from typing import Union, Optional
 
+import numpy as np
+import pandas as pd
+
 # Stałe konfiguracyjne
 MIN_AGE = 10
 MAX_AGE = 100
 MIN_TEMPO = 3.0
 MAX_TEMPO = 10.0
+REQUIRED_FIELDS = ('Wiek', 'Płeć', '5 km Tempo')
 
 
 def is_valid_age(age: Union[int, str, float, None]) -> bool:
@@ -116,6 +120,85 @@ def validate_user_data(data: dict) -> tuple[bool, list[str]]:
     return len(errors) == 0, errors
 
 
+# Jednoprzebiegowy tokenizer tekstu użytkownika. Ciągi cyfr są konsumowane
+# w całości, a kontekst za nimi (jednostka wieku, separator i kolejny ciąg
+# cyfr, słowo "min") odczytywany jest przez lookahead. Słowa "tempo" i "biegam"
+# konsumują tylko pierwszą literę, a płeć jest dopasowaniem zerowej długości,
+# więc każda pozycja tekstu jest sprawdzana pod kątem płci - tak jak w re.search.
+# Lookahead na początku pozwala silnikowi szybko pomijać nieistotne znaki.
+_NUMBER_TOKEN = (
+    r'(?P<num>\d+)'
+    r'(?=(?P<unit>\s*(?:lat|l\b|roku|years?))?)'
+    r'(?=(?P<sep>[.,:])(?P<num2>\d+)(?P<mins>\s*min)?)?'
+    r'|t(?=empo[:\s]*(?P<tempo>\d{1,2}[.,]\d{1,2}))'
+    r'|b(?=iegam[^0-9]*(?P<biegam>\d{1,2}[.,]\d{1,2}))'
+)
+_GENDER_TOKEN = (
+    r'|(?=(?:jestem\s+)?'
+    r'(?P<gender>kobiet[ąaę]|kobieta|mężczyzn[ąaę]|mężczyzna|k\b|m\b|facet|chłop))'
+)
+_TOKEN_PATTERN = re.compile(r'(?=[\dtbjkmfc])(?:' + _NUMBER_TOKEN + _GENDER_TOKEN + ')')
+# Po znalezieniu płci dalsze dopasowania płci są zbędne
+_TOKEN_PATTERN_NO_GENDER = re.compile(r'(?=[\dtb])(?:' + _NUMBER_TOKEN + ')')
+
+
+def _scan_tokens(text: str) -> tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    Jednym przejściem wyszukuje wiek, słowo określające płeć i tempo.
+
+    Priorytet tempa odpowiada kolejności dotychczasowych wzorców:
+    1. liczba dziesiętna przed "min", 2. format MM:SS, 3. po słowie "tempo",
+    4. po słowie "biegam", 5. dowolna liczba dziesiętna. Wzorce "tempo MM:SS"
+    i "MM:SS bez słów kluczowych" zawsze przegrywały z formatem MM:SS,
+    dlatego nie są osobno sprawdzane.
+
+    Args:
+        text: Tekst po zamianie na małe litery
+
+    Returns:
+        tuple: (wiek, tekst_płci, tempo) - napisy lub None
+    """
+    age = gender = None
+    # Kandydaci tempa według priorytetu (indeks 0 = najwyższy)
+    pace: list[Optional[str]] = [None] * 5
+
+    scanner = _TOKEN_PATTERN.finditer(text)
+    match = next(scanner, None)
+    while match is not None:
+        num, unit, sep, num2, mins, tempo, biegam, *rest = match.groups()
+        if num is not None:
+            if age is None and unit is not None:
+                age = num[-3:]
+            if sep == ':':
+                if pace[1] is None and len(num2) >= 2:
+                    pace[1] = f"{num[-2:]}:{num2[:2]}"
+            elif sep is not None and len(num2) <= 2:
+                decimal = f"{num[-2:]}{sep}{num2}"
+                if pace[0] is None and mins is not None:
+                    pace[0] = decimal
+                if pace[4] is None:
+                    pace[4] = decimal
+        elif tempo is not None:
+            if pace[2] is None:
+                pace[2] = tempo
+        elif biegam is not None:
+            if pace[3] is None:
+                pace[3] = biegam
+        elif gender is None:
+            gender = rest[0]
+            # Kontynuacja od tej samej pozycji, już bez szukania płci
+            scanner = _TOKEN_PATTERN_NO_GENDER.finditer(text, match.start())
+
+        if age is not None and gender is not None and pace[0] is not None:
+            break
+        match = next(scanner, None)
+
+    for value in pace:
+        if value is not None:
+            return age, gender, value
+    return age, gender, None
+
+
 def extract_data_with_regex(user_input: str) -> Optional[dict]:
     """
     Fallback function: ekstraktuje dane przy użyciu wyrażeń regularnych.
@@ -127,50 +210,28 @@ def extract_data_with_regex(user_input: str) -> Optional[dict]:
         dict lub None: Wyekstraktowane dane lub None w przypadku błędu
     """
     try:
-        # Rozszerzone wyrażenia regularne
-        age_match = re.search(r'(\d{1,3})\s*(?:lat|l\b|roku|years?)', user_input.lower())
-        gender_match = re.search(r'(?:jestem\s+)?(kobiet[ąaę]|kobieta|mężczyzn[ąaę]|mężczyzna|k\b|m\b|facet|chłop)', user_input.lower())
-        
-        # Szukanie tempa w różnych formatach
-        pace_patterns = [
-            r'(\d{1,2}[.,]\d{1,2})\s*(?:min(?:ut)?(?:y|ę)?(?:\s*(?:na|\/|\s+)\s*km)?)',
-            r'(\d{1,2}:\d{2})\s*(?:min(?:ut)?(?:y|ę)?(?:\s*(?:na|\/|\s+)\s*km)?)?',
-            r'tempo[:\s]*(\d{1,2}[.,]\d{1,2})',
-            r'tempo[:\s]*(\d{1,2}:\d{2})',
-            r'biegam[^0-9]*(\d{1,2}[.,]\d{1,2})',
-            r'(\d{1,2}:\d{2})(?!\d)',  # Format MM:SS bez wymagania słów kluczowych
-            r'(\d{1,2}[.,]\d{1,2})(?!\d)'  # Format dziesiętny bez wymagania słów kluczowych
-        ]
-        
-        pace_match = None
-        for pattern in pace_patterns:
-            pace_match = re.search(pattern, user_input.lower())
-            if pace_match:
-                break
+        age_text, gender_text, pace_str = _scan_tokens(user_input.lower())
         
         # Walidacja i konwersja
-        if not age_match:
+        if age_text is None:
             return None
-        age = int(age_match.group(1))
+        age = int(age_text)
         
-        if not gender_match:
+        if gender_text is None:
             return None
-        gender_text = gender_match.group(1).lower()
         # Bardziej rozbudowana logika rozpoznawania płci - sprawdzamy najpierw dłuższe wzorce
-        if any(word in gender_text for word in ['kobiet']):
+        if 'kobiet' in gender_text:
             gender = 'K'
         elif any(word in gender_text for word in ['mężczyzn', 'facet', 'chłop']):
             gender = 'M'
-        elif gender_text.strip() == 'k':
+        elif gender_text == 'k':
             gender = 'K'
-        elif gender_text.strip() == 'm':
-            gender = 'M'
         else:
-            gender = 'M'  # domyślnie
+            gender = 'M'  # 'm' lub domyślnie
         
-        if not pace_match:
+        if pace_str is None:
             return None
-        pace_str = pace_match.group(1).replace(',', '.')
+        pace_str = pace_str.replace(',', '.')
         
         # Konwersja formatu MM:SS na minuty dziesiętne
         if ':' in pace_str:
@@ -187,3 +248,131 @@ def extract_data_with_regex(user_input: str) -> Optional[dict]:
         
     except (ValueError, AttributeError, TypeError):
         return None
+
+
+# Wzmianki o płci całymi słowami (pojedyncza litera tylko jako osobne słowo)
+_GENDER_WORD_PATTERN = re.compile(r'\b(kobiet\w*|mężczyzn\w*|facet\w*|chłop\w*|k|m)\b')
+# Liczby w tekście oraz liczby będące dystansem (np. "5km", "5 kilometrów")
+_NUMBER_MENTION_PATTERN = re.compile(r'\d+(?:[.,:]\d+)?')
+_DISTANCE_PATTERN = re.compile(r'\s*(?:km\b|kilometr)')
+_AGE_UNIT_PATTERN = re.compile(r'\s*(?:lat|l\b|roku|years?)')
+
+
+def extract_data_with_confidence(user_input: str) -> tuple[Optional[dict], float]:
+    """
+    Ekstraktuje dane regexem i ocenia pewność wyniku (0-1).
+
+    Ocena to odsetek spełnionych warunków: płeć podana jawnie (całym słowem),
+    brak sprzecznych wzmianek o płci, dokładnie jedna liczba z jednostką wieku
+    i dokładnie dwie liczby poza dystansem (wiek i tempo). Niekompletny lub
+    nieprawidłowy wynik ma pewność 0.
+
+    Args:
+        user_input: Tekst wprowadzony przez użytkownika
+
+    Returns:
+        tuple: (dane lub None, pewność)
+
+    Example:
+        >>> extract_data_with_confidence("28 lat, kobieta, tempo 4:45")
+        ({'Wiek': 28, 'Płeć': 'K', '5 km Tempo': 4.75}, 1.0)
+    """
+    data = extract_data_with_regex(user_input)
+    if data is None or not validate_user_data(data)[0]:
+        return data, 0.0
+
+    text = user_input.lower()
+    mentioned = set()
+    for word in _GENDER_WORD_PATTERN.findall(text):
+        mentioned.add('K' if word.startswith('k') else 'M')
+
+    numbers = 0
+    ages = 0
+    for match in _NUMBER_MENTION_PATTERN.finditer(text):
+        if _DISTANCE_PATTERN.match(text, match.end()):
+            continue
+        numbers += 1
+        if _AGE_UNIT_PATTERN.match(text, match.end()):
+            ages += 1
+
+    checks = [
+        data['Płeć'] in mentioned,
+        len(mentioned) == 1,
+        ages == 1,
+        numbers == 2,
+    ]
+    return data, sum(checks) / len(checks)
+
+
+def _batch_field_validity(values: pd.Series, row_check, lower: float, upper: float,
+                          truncate: bool) -> np.ndarray:
+    """
+    Wektorowy odpowiednik is_valid_age / is_valid_tempo dla całej kolumny.
+
+    Kolumny numeryczne sprawdzane są w NumPy, pozostałe (np. tekstowe)
+    element po elemencie funkcją row_check, aby zachować identyczną semantykę.
+    """
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        numbers = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        with np.errstate(invalid='ignore'):
+            if truncate:
+                finite = np.isfinite(numbers)
+                numbers = np.where(finite, np.trunc(np.where(finite, numbers, 0.0)), np.nan)
+            return (numbers >= lower) & (numbers <= upper)
+    return values.map(row_check).to_numpy(dtype=bool)
+
+
+def missing_fields_batch(records: list) -> list[list[str]]:
+    """
+    Wymagane pola nieobecne w każdym ze słowników (przed zamianą na DataFrame,
+    w którym brakujący klucz staje się nieodróżnialnym od wartości NaN).
+    """
+    return [[field for field in REQUIRED_FIELDS if field not in record] for record in records]
+
+
+def validate_user_data_batch(frame: pd.DataFrame,
+                             missing_fields: Optional[list[list[str]]] = None
+                             ) -> tuple[pd.Series, pd.Series]:
+    """
+    Waliduje wiele rekordów naraz, zwracając maskę poprawności zamiast przerywać.
+
+    Każdy wiersz dostaje dokładnie te same komunikaty, które zwróciłoby
+    validate_user_data dla pojedynczego słownika.
+
+    Args:
+        frame: DataFrame z kolumnami 'Wiek', 'Płeć', '5 km Tempo'
+        missing_fields: Pola nieobecne w rekordach źródłowych (missing_fields_batch),
+            gdy frame powstał z listy słowników
+
+    Returns:
+        tuple: (maska_poprawności, lista_błędów_dla_każdego_wiersza) jako Series
+    """
+    missing = [f"Brak pola: {field}" for field in REQUIRED_FIELDS if field not in frame.columns]
+    if missing:
+        errors = pd.Series([list(missing) for _ in range(len(frame))], index=frame.index,
+                           dtype=object)
+        return pd.Series(False, index=frame.index), errors
+
+    checks = [
+        (_batch_field_validity(frame['Wiek'], is_valid_age, MIN_AGE, MAX_AGE, truncate=True),
+         f"Wiek powinien być liczbą z zakresu {MIN_AGE}-{MAX_AGE} lat"),
+        (frame['Płeć'].isin(['M', 'K']).to_numpy(dtype=bool),
+         "Płeć powinna być określona jako 'M' lub 'K'"),
+        (_batch_field_validity(frame['5 km Tempo'], is_valid_tempo, MIN_TEMPO, MAX_TEMPO,
+                               truncate=False),
+         f"Tempo na 5km powinno być liczbą z zakresu {MIN_TEMPO}-{MAX_TEMPO} min/km"),
+    ]
+
+    valid = np.logical_and.reduce([passed for passed, _ in checks])
+    errors = [[] for _ in range(len(frame))]
+    for passed, message in checks:
+        for row in np.flatnonzero(~passed):
+            errors[row].append(message)
+    # Jak w validate_user_data: brak pola zastępuje pozostałe komunikaty
+    for row, fields in enumerate(missing_fields or ()):
+        if fields:
+            valid[row] = False
+            errors[row] = [f"Brak pola: {field}" for field in fields]
+
+    return (pd.Series(valid, index=frame.index),
+            pd.Series(errors, index=frame.index, dtype=object))
@@ -3,66 +3,155 @@
 # Moduł zawierający funkcje do tworzenia wykresów i wizualizacji
 # =============================================================================
 
+import numpy as np
 import pandas as pd
-import plotly.express as px
+import plotly.graph_objects as go
 import streamlit as st
 import sys
 import os
-from typing import Tuple
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+# Liczba przedziałów histogramów porównawczych
+COMPARISON_NBINS = 40
+
+# Maksymalna liczba figur bazowych w pamięci podręcznej
+FIGURE_CACHE_SIZE = 64
+
+# Kolory płci na wykresie tempo vs czas (jak domyślna paleta Plotly)
+GENDER_COLORS = {'M': '#636EFA', 'K': '#EF553B'}
 
 # Dodanie głównego katalogu do ścieżki
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+from src.core.caching import register_cache_stats
+from src.core.tracing import StageStats, Trace
+from src.utils.cohort_stats import CohortCube, HistogramBins, histogram_bins
+from src.utils.density import ScatterDensity
 from src.utils.model_utils import get_model_metrics
 
 
-def create_gender_comparison_chart(reference_df: pd.DataFrame, user_gender: str, 
-                                 predicted_minutes: float) -> Tuple[object, int, float]:
+def _cohort_times(reference_df: pd.DataFrame, cohort_cube: Optional[CohortCube],
+                  gender: Optional[str], age_from: float, age_to: float) -> np.ndarray:
     """
-    Tworzy wykres porównawczy dla danej płci.
+    Zwraca czasy (w sekundach) biegaczy z kohorty płeć / przedział wieku.
     
-    Args:
-        reference_df: DataFrame z danymi referencyjnymi
-        user_gender: Płeć użytkownika ('M' lub 'K')
-        predicted_minutes: Przewidywany czas w minutach
-        
-    Returns:
-        Tuple: (figura_plotly, liczba_osób, średnia_w_minutach)
+    Gdy dostępna jest kostka kohort, czasy są wycinkiem jej tablic,
+    w przeciwnym razie DataFrame jest filtrowany jak dotychczas.
     """
-    df_gender = reference_df[reference_df['Płeć'] == user_gender].copy()
-    group_count_gender = len(df_gender)
-    
-    if group_count_gender == 0:
-        return None, 0, 0
-    
-    avg_gender = df_gender['Czas'].mean()
-    df_gender['Czas_minuty'] = df_gender['Czas'] / 60
-    avg_gender_minutes = avg_gender / 60
+    if cohort_cube is not None:
+        return cohort_cube.window(gender, age_from, age_to).times()
     
-    gender_display = "Mężczyzna" if user_gender == "M" else "Kobieta"
+    mask = pd.Series(True, index=reference_df.index)
+    if gender is not None:
+        mask &= reference_df['Płeć'] == gender
+    if np.isfinite(age_from) or np.isfinite(age_to):
+        mask &= reference_df['Wiek'].between(age_from, age_to)
+    return reference_df.loc[mask, 'Czas'].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _cohort_histogram(times: np.ndarray, cohort_cube: Optional[CohortCube],
+                      gender: Optional[str], age_from: float, age_to: float) -> HistogramBins:
+    """
+    Zwraca histogram czasów kohorty w minutach, liczony po stronie serwera.
+    Z kostką kohort wynik jest współdzielony między zapytaniami o tę samą kohortę.
+    """
+    if cohort_cube is not None:
+        return cohort_cube.histogram(gender, age_from, age_to, COMPARISON_NBINS, scale=60)
+    return histogram_bins(times, COMPARISON_NBINS, scale=60)
+
+
+def histogram_bar_trace(bins: HistogramBins, **trace_kwargs) -> go.Bar:
+    """
+    Tworzy słupki z gotowego histogramu - do przeglądarki trafia tylko
+    po jednej liczbie na przedział, niezależnie od liczby biegaczy.
+    """
+    return go.Bar(x=bins.centers, y=bins.counts, width=bins.width, **trace_kwargs)
+
+
+class FigureCache:
+    """
+    Ograniczona pamięć podręczna LRU figur bazowych wykresów porównawczych.
+
+    Figura bazowa zawiera wszystko poza nakładką użytkownika (linią
+    "Twój wynik"), więc jest wspólna dla wszystkich zapytań o tę samą kohortę.
+    Klucz obejmuje wersję danych, dlatego zmiana zbioru unieważnia wpisy.
+    """
+
+    def __init__(self, maxsize: int = FIGURE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key: Hashable, build: Callable[[], tuple]) -> tuple:
+        """Zwraca wpis z pamięci podręcznej lub buduje go i zapamiętuje."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = build()
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def stats(self) -> dict:
+        """Liczniki trafień i chybień do monitoringu."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        """Usuwa wszystkie wpisy i zeruje liczniki."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+_figure_cache = FigureCache()
+register_cache_stats("figures", _figure_cache.stats)
+
+
+def figure_cache_stats() -> dict:
+    """Statystyki pamięci podręcznej figur porównawczych (trafienia/chybienia)."""
+    return _figure_cache.stats()
+
+
+def clear_figure_cache() -> None:
+    """Usuwa figury bazowe z pamięci podręcznej (np. przed pomiarem zimnego startu)."""
+    _figure_cache.clear()
+
+
+def _build_comparison_base(times: np.ndarray, bins: HistogramBins, title: str,
+                           color: str) -> tuple[go.Figure, int, float]:
+    """Buduje figurę bazową: histogram kohorty i linię średniej."""
+    avg_minutes = np.nanmean(times) / 60
     
-    fig = px.histogram(
-        df_gender, 
-        x='Czas_minuty', 
-        nbins=40,
-        title=f"Rozkład czasów ukończenia półmaratonu dla płci: {gender_display}",
-        labels={"Czas_minuty": "Czas ukończenia (minuty)", "count": "Liczba uczestników"},
-        color_discrete_sequence=['#636EFA'],
+    fig = go.Figure(histogram_bar_trace(bins, marker_color=color))
+    fig.update_layout(
+        title=title,
         width=500, 
-        height=500
+        height=500,
+        bargap=0
     )
     
-    # Dodanie linii referencyjnych
     fig.add_vline(
-        x=predicted_minutes, 
-        line_dash="dash", 
-        line_color="red",
-        annotation_text="Twój wynik", 
-        annotation_position="top right"
-    )
-    
-    fig.add_vline(
-        x=avg_gender_minutes, 
+        x=avg_minutes, 
         line_dash="dot", 
         line_color="green",
         annotation_text="Średnia", 
@@ -76,11 +165,77 @@ def create_gender_comparison_chart(reference_df: pd.DataFrame, user_gender: str,
         showlegend=False
     )
     
-    return fig, group_count_gender, avg_gender_minutes
+    return fig, len(times), avg_minutes
+
+
+def _with_user_line(base: go.Figure, predicted_minutes: float) -> go.Figure:
+    """
+    Kopiuje figurę bazową i dodaje linię "Twój wynik".
+    Kształt i adnotacja odpowiadają add_vline(annotation_position="top right"),
+    ale są dodawane bezpośrednio, co jest kilkukrotnie szybsze.
+    """
+    fig = go.Figure(base)
+    fig.add_shape(type='line', x0=predicted_minutes, x1=predicted_minutes,
+                  xref='x', y0=0, y1=1, yref='y domain',
+                  line=dict(color='red', dash='dash'))
+    fig.add_annotation(text="Twój wynik", x=predicted_minutes, xref='x', xanchor='left',
+                       y=1, yref='y domain', yanchor='top', showarrow=False)
+    return fig
+
+
+def _comparison_chart(reference_df: pd.DataFrame, cohort_cube: Optional[CohortCube],
+                      gender: Optional[str], age_from: float, age_to: float,
+                      predicted_minutes: float, title: str,
+                      color: str) -> Tuple[object, int, float]:
+    """
+    Wspólna logika wykresów porównawczych: figura bazowa z pamięci podręcznej
+    (gdy dostępna jest kostka kohort) plus nakładka użytkownika.
+    """
+    def build():
+        times = _cohort_times(reference_df, cohort_cube, gender, age_from, age_to)
+        if len(times) == 0:
+            return None, 0, 0
+        bins = _cohort_histogram(times, cohort_cube, gender, age_from, age_to)
+        return _build_comparison_base(times, bins, title, color)
+
+    if cohort_cube is not None:
+        key = (cohort_cube.version, gender, age_from, age_to, title, color)
+        base, count, avg_minutes = _figure_cache.get_or_build(key, build)
+    else:
+        base, count, avg_minutes = build()
+
+    if base is None:
+        return None, 0, 0
+    return _with_user_line(base, predicted_minutes), count, avg_minutes
+
+
+def create_gender_comparison_chart(reference_df: pd.DataFrame, user_gender: str, 
+                                 predicted_minutes: float,
+                                 cohort_cube: Optional[CohortCube] = None) -> Tuple[object, int, float]:
+    """
+    Tworzy wykres porównawczy dla danej płci.
+    
+    Args:
+        reference_df: DataFrame z danymi referencyjnymi
+        user_gender: Płeć użytkownika ('M' lub 'K')
+        predicted_minutes: Przewidywany czas w minutach
+        cohort_cube: Opcjonalna kostka kohort (pozwala pominąć filtrowanie DataFrame
+            i korzystać z pamięci podręcznej figur)
+        
+    Returns:
+        Tuple: (figura_plotly, liczba_osób, średnia_w_minutach)
+    """
+    gender_display = "Mężczyzna" if user_gender == "M" else "Kobieta"
+    return _comparison_chart(
+        reference_df, cohort_cube, user_gender, -np.inf, np.inf, predicted_minutes,
+        title=f"Rozkład czasów ukończenia półmaratonu dla płci: {gender_display}",
+        color='#636EFA'
+    )
 
 
 def create_age_comparison_chart(reference_df: pd.DataFrame, user_age: int, 
-                              predicted_minutes: float) -> Tuple[object, int, float]:
+                              predicted_minutes: float,
+                              cohort_cube: Optional[CohortCube] = None) -> Tuple[object, int, float]:
     """
     Tworzy wykres porównawczy dla danej grupy wiekowej.
     
@@ -88,55 +243,75 @@ def create_age_comparison_chart(reference_df: pd.DataFrame, user_age: int,
         reference_df: DataFrame z danymi referencyjnymi
         user_age: Wiek użytkownika
         predicted_minutes: Przewidywany czas w minutach
+        cohort_cube: Opcjonalna kostka kohort (pozwala pominąć filtrowanie DataFrame
+            i korzystać z pamięci podręcznej figur)
         
     Returns:
         Tuple: (figura_plotly, liczba_osób, średnia_w_minutach)
     """
-    df_age = reference_df[reference_df['Wiek'].between(user_age-1, user_age+1)].copy()
-    group_count_age = len(df_age)
-    
-    if group_count_age == 0:
-        return None, 0, 0
-    
-    df_age['Czas_minuty'] = df_age['Czas'] / 60
-    avg_age_minutes = df_age['Czas'].mean() / 60
-    
-    fig = px.histogram(
-        df_age, 
-        x='Czas_minuty', 
-        nbins=40,
+    return _comparison_chart(
+        reference_df, cohort_cube, None, user_age - 1, user_age + 1, predicted_minutes,
         title=f"Rozkład czasów ukończenia półmaratonu dla wieku: {user_age} ±1 rok",
-        labels={"Czas_minuty": "Czas ukończenia (minuty)", "count": "Liczba uczestników"},
-        color_discrete_sequence=['#00CC96'],
-        width=500, 
-        height=500
+        color='#00CC96'
     )
+
+
+def create_tempo_density_chart(density: ScatterDensity, user_tempo: float,
+                               predicted_seconds: float) -> go.Figure:
+    """
+    Tworzy wykres gęstości tempo na 5km vs czas półmaratonu.
+
+    Zamiast wszystkich punktów rysuje dwuwymiarowy histogram, warstwową
+    próbkę punktów oraz znacznik użytkownika.
     
-    # Dodanie linii referencyjnych
-    fig.add_vline(
-        x=predicted_minutes, 
-        line_dash="dash", 
-        line_color="red",
-        annotation_text="Twój wynik", 
-        annotation_position="top right"
-    )
+    Args:
+        density: Gęstość policzona raz dla danych referencyjnych
+        user_tempo: Tempo użytkownika na 5km (min/km)
+        predicted_seconds: Przewidywany czas w sekundach
+        
+    Returns:
+        go.Figure: Wykres plotly
+    """
+    fig = go.Figure(go.Heatmap(
+        x=density.x_centers,
+        y=density.y_centers,
+        z=density.heatmap_z(),
+        colorscale='Blues',
+        colorbar=dict(title='Liczba biegaczy'),
+        hovertemplate='Tempo: %{x:.2f} min/km<br>Czas: %{y:.0f} s<br>Liczba: %{z}<extra></extra>',
+        name='Gęstość'
+    ))
     
-    fig.add_vline(
-        x=avg_age_minutes, 
-        line_dash="dot", 
-        line_color="green",
-        annotation_text="Średnia", 
-        annotation_position="bottom right"
-    )
+    sample = density.sample
+    for gender, part in sample.groupby('Płeć', observed=True, sort=False):
+        fig.add_trace(go.Scatter(
+            x=part['5 km Tempo'],
+            y=part['Czas'],
+            mode='markers',
+            marker=dict(size=4, color=GENDER_COLORS.get(gender), opacity=0.5),
+            name=f"{gender} (próbka)"
+        ))
+    
+    # Punkt użytkownika
+    fig.add_trace(go.Scatter(
+        x=[user_tempo],
+        y=[predicted_seconds],
+        mode='markers',
+        marker=dict(size=15, color='red', symbol='star'),
+        name='Twój wynik',
+        showlegend=True
+    ))
     
-    fig.update_traces(hovertemplate='Czas: %{x:.1f} min<br>Liczba osób: %{y}<extra></extra>')
     fig.update_layout(
-        xaxis_title="Czas ukończenia (minuty)", 
-        yaxis_title="Liczba uczestników",
-        showlegend=False
+        title="Zależność między tempem na 5km a czasem półmaratonu",
+        xaxis_title='Tempo na 5km (min/km)',
+        yaxis_title='Czas półmaratonu (sekundy)',
+        template="plotly_dark",
+        height=500,
+        showlegend=True
     )
     
-    return fig, group_count_age, avg_age_minutes
+    return fig
 
 
 def display_model_metrics():
@@ -169,27 +344,64 @@ def display_examples_sidebar():
             st.rerun()
 
 
-def display_usage_stats():
-    """Wyświetla statystyki użytkowania w sidebar."""
+def _session_usage_stats() -> dict:
+    """Statystyki użytkowania z session state (inicjalizowane przy pierwszym użyciu)."""
     import time
     
-    # Inicjalizacja statystyk w session state
     if 'usage_stats' not in st.session_state:
         st.session_state['usage_stats'] = {
             'predictions_made': 0,
-            'start_time': time.time()
+            'start_time': time.time(),
+            'stages': StageStats()
         }
+    return st.session_state['usage_stats']
+
+
+def display_usage_stats():
+    """Wyświetla statystyki użytkowania w sidebar."""
+    import time
+    
+    # Inicjalizacja statystyk w session state
+    usage_stats = _session_usage_stats()
     
     st.sidebar.markdown("### 📊 Statystyki sesji")
     
-    predictions_count = st.session_state['usage_stats']['predictions_made']
-    session_duration = time.time() - st.session_state['usage_stats']['start_time']
+    predictions_count = usage_stats['predictions_made']
+    session_duration = time.time() - usage_stats['start_time']
     
     st.sidebar.metric("Przewidywania wykonane", predictions_count)
     st.sidebar.metric("Czas sesji", f"{session_duration/60:.1f} min")
+    
+    cache_stats = figure_cache_stats()
+    if cache_stats['hits'] + cache_stats['misses']:
+        st.sidebar.metric("Cache wykresów (trafienia)", f"{cache_stats['hit_ratio']:.0%}",
+                          f"{cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']}")
+
+    stage_stats = usage_stats.setdefault('stages', StageStats())
+    if stage_stats.traces:
+        with st.sidebar.expander("⏱️ Czasy etapów", expanded=False):
+            st.dataframe(stage_timings_table(stage_stats), use_container_width=True)
+            st.caption(f"Ostatnie żądanie: {stage_stats.last_trace_id} "
+                       f"(p50/p95 z ostatnich {stage_stats.window} żądań)")
+
+
+def stage_timings_table(stage_stats: StageStats) -> pd.DataFrame:
+    """Tabela czasów etapów w milisekundach: ostatni, p50, p95 i liczba pomiarów."""
+    summary = stage_stats.summary()
+    return pd.DataFrame({
+        'ostatni [ms]': [row['last'] * 1000 for row in summary.values()],
+        'p50 [ms]': [row['p50'] * 1000 for row in summary.values()],
+        'p95 [ms]': [row['p95'] * 1000 for row in summary.values()],
+        'pomiary': [row['count'] for row in summary.values()],
+    }, index=pd.Index(list(summary), name='etap')).round(1)
 
 
 def increment_prediction_counter():
     """Zwiększa licznik przewidywań."""
     if 'usage_stats' in st.session_state:
         st.session_state['usage_stats']['predictions_made'] += 1
+
+
+def record_request_trace(trace: Trace):
+    """Dodaje czasy etapów zakończonego żądania do statystyk sesji."""
+    _session_usage_stats().setdefault('stages', StageStats()).record(trace)
@@ -0,0 +1,129 @@
+# =============================================================================
+# TESTY WSADOWEJ EKSTRAKCJI DANYCH
+# =============================================================================
+
+import json
+import os
+import re
+import sys
+import threading
+from types import SimpleNamespace
+
+import pandas as pd
+
+# Dodanie głównego katalogu do ścieżki
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from src.core.metrics import OPENAI_REQUESTS, REGEX_FALLBACKS  # noqa: E402
+from src.utils.batch_extraction import (  # noqa: E402
+    BatchItem,
+    extract_user_data_batch,
+    plan_batches,
+)
+from src.utils.extraction_cache import BACKEND_OPENAI, ExtractionCache  # noqa: E402
+
+# Niejednoznaczne dla parsera lokalnego (regex wybiera 'M'), więc trafia do OpenAI
+AMBIGUOUS = "Mam {age} lat, jestem kobietą, tempo 4:45"
+
+
+class FakeBatchOpenAI:
+    """Klient odpowiadający kobietą dla każdego id z zapytania (z wyjątkiem pominiętych)."""
+
+    def __init__(self, skip_ids=(), invalid_ids=()):
+        self.requests = []
+        self.skip_ids = set(skip_ids)
+        self.invalid_ids = set(invalid_ids)
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        prompt = kwargs['messages'][1]['content']
+        items = json.loads(prompt[prompt.rindex('\n') + 1:])
+        with self._lock:
+            self.requests.append([item['id'] for item in items])
+        answer = []
+        for item in items:
+            if item['id'] in self.skip_ids:
+                continue
+            age = int(re.search(r'\d+', item['text']).group())
+            tempo = 99.0 if item['id'] in self.invalid_ids else 4.75
+            answer.append({"id": item['id'], "Wiek": age, "Płeć": "K", "5 km Tempo": tempo})
+        message = SimpleNamespace(content=json.dumps(answer))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class TestPlanBatches:
+    """Testy podziału na partie według budżetu tokenów."""
+
+    def test_respects_budget_and_item_limit(self):
+        items = [BatchItem(i, "x" * 30) for i in range(10)]
+
+        assert [len(batch) for batch in plan_batches(items, token_budget=10_000, max_items=4)] \
+            == [4, 4, 2]
+        small = plan_batches(items, token_budget=450, max_items=50)
+        assert len(small) > 1
+        assert [item.row_id for batch in small for item in batch] == list(range(10))
+
+    def test_oversized_item_gets_own_batch(self):
+        items = [BatchItem(0, "x" * 10_000), BatchItem(1, "krótki")]
+        assert [len(batch) for batch in plan_batches(items, token_budget=500)] == [1, 1]
+
+
+class TestExtractUserDataBatch:
+    """Testy extract_user_data_batch."""
+
+    def test_only_ambiguous_rows_go_to_openai(self):
+        client = FakeBatchOpenAI()
+        texts = pd.Series(["28 lat, kobieta, tempo 4:45", AMBIGUOUS.format(age=30), ""],
+                          index=[7, 8, 9])
+        frame = extract_user_data_batch(texts, client, use_cache=False)
+
+        assert list(frame.index) == [7, 8, 9]
+        assert list(frame['extraction_tier']) == ['local', 'openai', 'none']
+        assert frame.loc[8, 'Płeć'] == 'K'
+        assert client.requests == [[1]]
+
+    def test_split_into_batches_with_per_row_fallback(self):
+        client = FakeBatchOpenAI(skip_ids={3}, invalid_ids={5})
+        texts = [AMBIGUOUS.format(age=20 + i) for i in range(12)]
+        frame = extract_user_data_batch(texts, client, use_cache=False, max_items=4)
+
+        assert sorted(len(ids) for ids in client.requests) == [4, 4, 4]
+        assert frame.loc[3, 'extraction_tier'] == 'regex_fallback'
+        assert frame.loc[5, 'extraction_tier'] == 'regex_fallback'
+        assert frame.loc[5, 'Płeć'] == 'M'
+        assert (frame.drop(index=[3, 5])['extraction_tier'] == 'openai').all()
+        assert list(frame['Wiek']) == list(range(20, 32))
+
+    def test_without_client_uses_regex(self):
+        fallbacks = REGEX_FALLBACKS.value(reason="no_client")
+        frame = extract_user_data_batch([AMBIGUOUS.format(age=30)], None, use_cache=False)
+        assert frame.loc[0, 'extraction_tier'] == 'regex_fallback'
+        assert REGEX_FALLBACKS.value(reason="no_client") == fallbacks + 1
+
+    def test_batch_requests_and_fallbacks_counted(self):
+        successes = OPENAI_REQUESTS.value(outcome="success")
+        invalid = OPENAI_REQUESTS.value(outcome="invalid_data")
+        fallbacks = REGEX_FALLBACKS.value(reason="openai_failed")
+        # Partia 0-3: częściowa odpowiedź, partia 4-7: bez poprawnych wierszy
+        client = FakeBatchOpenAI(skip_ids={3, 4, 5}, invalid_ids={6, 7})
+        texts = [AMBIGUOUS.format(age=20 + i) for i in range(8)]
+
+        extract_user_data_batch(texts, client, use_cache=False, max_items=4)
+
+        assert OPENAI_REQUESTS.value(outcome="success") == successes + 1
+        assert OPENAI_REQUESTS.value(outcome="invalid_data") == invalid + 1
+        assert REGEX_FALLBACKS.value(reason="openai_failed") == fallbacks + 5
+
+    def test_openai_results_are_cached(self, tmp_path):
+        cache = ExtractionCache(str(tmp_path / "cache.sqlite3"))
+        client = FakeBatchOpenAI()
+        texts = [AMBIGUOUS.format(age=30)]
+
+        extract_user_data_batch(texts, client, cache)
+        frame = extract_user_data_batch(texts, client, cache)
+
+        assert len(client.requests) == 1
+        assert frame.loc[0, 'extraction_tier'] == 'cache'
+        assert cache.get(texts[0]).backend == BACKEND_OPENAI
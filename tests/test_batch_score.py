@@ -0,0 +1,93 @@
+# =============================================================================
+# TESTY PRZETWARZANIA WSADOWEGO
+# Testy strumieniowego przewidywania z plików CSV
+# =============================================================================
+
+import os
+import sys
+
+import pandas as pd
+import pytest  # type: ignore[import-untyped]
+
+# Dodanie głównego katalogu do ścieżki
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.batch_score import detect_separator, main, prepare_features, score_csv  # noqa: E402
+
+
+@pytest.fixture
+def semicolon_csv(tmp_path):
+    """Plik w formacie dane/halfmarathon_*.csv (separator ';', kolumna 'Rocznik')."""
+    path = tmp_path / "lista_startowa.csv"
+    path.write_text(
+        "Miejsce;Imię;Płeć;Rocznik;5 km Tempo;Czas\n"
+        "1;ANNA;K;1996.0;4.75;01:30:00\n"
+        "2;JAN;M;1984.0;5.0;01:50:00\n"
+        "3;EWA;K;;;\n"
+        "4;PIOTR;M;1990.0;4.2;01:25:00\n"
+        "5;OLA;K;2000.0;5.5;01:55:00\n",
+        encoding="utf-8",
+    )
+    return path
+
+
+class TestBatchScore:
+    """Testy punktu wejścia python -m src.batch_score."""
+
+    def test_detect_separator(self, semicolon_csv, tmp_path):
+        comma = tmp_path / "df.csv"
+        comma.write_text("Płeć,Wiek,5 km Tempo\nM,30,5.0\n", encoding="utf-8")
+        assert detect_separator(str(semicolon_csv)) == ';'
+        assert detect_separator(str(comma)) == ','
+
+    def test_prepare_features_from_birth_year(self):
+        chunk = pd.DataFrame({'Płeć': ['K'], 'Rocznik': ['1996.0'], '5 km Tempo': ['4.75']})
+        features = prepare_features(chunk, reference_year=2024)
+        assert features['Wiek'].iloc[0] == 28
+        assert features['5 km Tempo'].iloc[0] == 4.75
+
+    def test_score_csv_in_chunks(self, semicolon_csv, tmp_path):
+        output = tmp_path / "wyniki.csv"
+        report = score_csv(str(semicolon_csv), str(output), chunk_size=2)
+
+        assert report.rows == 5
+        assert report.valid_rows == 4
+        assert len(report.chunk_seconds) == 3
+
+        result = pd.read_csv(output, sep=';')
+        assert len(result) == 5
+        assert list(result['is_valid']) == [True, True, False, True, True]
+        assert result['prediction_time'].iloc[0] == "1:44:15"
+        assert "Wiek powinien" in result['errors'].iloc[2]
+
+    def test_worker_pool_matches_in_process(self, semicolon_csv, tmp_path):
+        in_process, pooled = tmp_path / "wyniki.csv", tmp_path / "wyniki_pula.csv"
+        score_csv(str(semicolon_csv), str(in_process), chunk_size=2)
+        report = score_csv(str(semicolon_csv), str(pooled), chunk_size=2, workers=2)
+
+        assert report.valid_rows == 4
+        assert pooled.read_text(encoding="utf-8") == in_process.read_text(encoding="utf-8")
+
+    def test_parquet_output(self, semicolon_csv, tmp_path):
+        pytest.importorskip("pyarrow")
+        output = tmp_path / "wyniki.parquet"
+        assert main([str(semicolon_csv), "-o", str(output), "--chunk-size", "2"]) == 0
+
+        result = pd.read_parquet(output)
+        assert len(result) == 5
+        assert result['is_valid'].sum() == 4
+
+    def test_free_text_column(self, tmp_path):
+        path = tmp_path / "zgloszenia.csv"
+        path.write_text(
+            "Numer;Opis\n"
+            "1;28 lat, kobieta, tempo 4:45\n"
+            "2;brak danych\n",
+            encoding="utf-8",
+        )
+        output = tmp_path / "wyniki.csv"
+        report = score_csv(str(path), str(output), text_column="Opis")
+
+        assert report.valid_rows == 1
+        result = pd.read_csv(output, sep=';')
+        assert list(result['is_valid']) == [True, False]
@@ -0,0 +1,95 @@
+# =============================================================================
+# TESTY ZESTAWU BENCHMARKÓW
+# Porównanie wyników z linią bazową, metadane środowiska i kody wyjścia
+# =============================================================================
+
+import copy
+import json
+import os
+import sys
+
+# Dodanie głównego katalogu do ścieżki
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from benchmarks import suite  # noqa: E402
+
+
+def _results(**timings):
+    return {
+        'format_version': suite.SUITE_FORMAT_VERSION,
+        'quick': False,
+        'environment': {'python': '3.11.7', 'machine': 'x86_64', 'processor': '', 'cpu_count': 4,
+                        'packages': {'numpy': '1.26.4'}},
+        'results': {name: {'min': value, 'median': value} for name, value in timings.items()},
+    }
+
+
+class TestCompare:
+    """Testy porównania z linią bazową."""
+
+    def test_flags_regression_and_improvement(self):
+        baseline = _results(a=1.0, b=1.0, c=1.0)
+        current = _results(a=1.3, b=0.5, c=1.1)
+
+        statuses = {c.name: c.status for c in suite.compare_results(baseline, current, 0.25)}
+
+        assert statuses == {'a': 'regression', 'b': 'improvement', 'c': 'ok'}
+
+    def test_skips_stages_missing_in_baseline(self):
+        comparisons = suite.compare_results(_results(a=1.0), _results(a=1.0, new=2.0))
+
+        assert [c.name for c in comparisons] == ['a']
+
+    def test_reports_environment_differences(self):
+        baseline = _results(a=1.0)
+        current = copy.deepcopy(baseline)
+        current['environment']['cpu_count'] = 8
+        current['environment']['packages']['numpy'] = '2.0.0'
+
+        differences = suite.environment_differences(baseline, current)
+
+        assert differences == ["cpu_count: 4 -> 8", "numpy: 1.26.4 -> 2.0.0"]
+        assert "REGRESJA" not in suite.format_comparison(
+            suite.compare_results(baseline, current), differences)
+
+    def test_compare_exit_code(self, tmp_path):
+        baseline_path, current_path = tmp_path / "baseline.json", tmp_path / "current.json"
+        baseline_path.write_text(json.dumps(_results(a=1.0)), encoding='utf-8')
+
+        current_path.write_text(json.dumps(_results(a=1.1)), encoding='utf-8')
+        assert suite.main(["compare", str(baseline_path), str(current_path)]) == 0
+
+        current_path.write_text(json.dumps(_results(a=2.0)), encoding='utf-8')
+        assert suite.main(["compare", str(baseline_path), str(current_path)]) == 1
+        assert suite.main(["compare", str(baseline_path), str(current_path),
+                           "--threshold", "1.5"]) == 0
+
+
+class TestRun:
+    """Testy uruchomienia pomiarów."""
+
+    def test_measure_reports_per_call_times(self):
+        timing = suite.measure(lambda: sum(range(100)), min_seconds=0.001, repeat=3)
+
+        assert timing['repeat'] == 3 and timing['number'] >= 1
+        assert 0 < timing['min'] <= timing['median']
+
+    def test_quick_run_writes_json_with_metadata(self, tmp_path):
+        output = tmp_path / "results.json"
+
+        assert suite.main(["--quick", "--stage", "regex", "--stage", "validation",
+                           "-o", str(output)]) == 0
+
+        results = json.loads(output.read_text(encoding='utf-8'))
+        assert set(results['results']) == {"regex.extract_corpus", "regex.extract_long",
+                                           "validation.validate_user_data"}
+        assert results['results']["regex.extract_corpus"]['items'] == len(suite.CORPUS)
+        assert results['environment']['python']
+        assert 'numpy' in results['environment']['packages']
+
+    def test_stored_baseline_covers_all_stages(self):
+        with open(suite.BASELINE_PATH, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+
+        assert set(baseline['results']) == {stage.name for stage in suite.STAGES}
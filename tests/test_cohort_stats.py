@@ -0,0 +1,99 @@
+# =============================================================================
+# TESTY KOSTKI STATYSTYK KOHORT
+# Statystyki okien wiekowych muszą zgadzać się z filtrowaniem DataFrame
+# =============================================================================
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest  # type: ignore[import-untyped]
+
+# Dodanie głównego katalogu do ścieżki
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from src.utils.cohort_stats import CohortCube  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def reference_df():
+    return pd.read_csv(os.path.join(ROOT_DIR, "df_cleaned.csv"))
+
+
+@pytest.fixture(scope="module")
+def cube(reference_df):
+    return CohortCube(reference_df)
+
+
+def _filter(reference_df, gender, age, age_range):
+    mask = (reference_df['Wiek'] >= age - age_range) & (reference_df['Wiek'] <= age + age_range)
+    if gender is not None:
+        mask &= reference_df['Płeć'] == gender
+    return reference_df[mask]
+
+
+class TestCohortCube:
+    """Testy zgodności kostki z filtrami używanymi w app.py."""
+
+    @pytest.mark.parametrize("gender,age", [('K', 28), ('M', 35), ('M', 18), ('K', 66),
+                                            (None, 40), ('M', 90), ('K', 30.5)])
+    def test_window_matches_dataframe_filter(self, reference_df, cube, gender, age):
+        similar = _filter(reference_df, gender, age, 5)
+        window = cube.around(gender, age, 5)
+
+        assert window.count == len(similar)
+        if len(similar) == 0:
+            assert np.isnan(window.mean_time)
+            return
+        assert window.mean_time == pytest.approx(similar['Czas'].mean(), rel=1e-12)
+        assert window.mean_tempo == pytest.approx(similar['5 km Tempo'].mean(), rel=1e-12)
+        assert window.min_time == similar['Czas'].min()
+        np.testing.assert_array_equal(np.sort(window.times()), np.sort(similar['Czas']))
+
+        for seconds in (5500.0, 6255.45, float(similar['Czas'].iloc[0])):
+            assert window.count_slower(seconds) == (similar['Czas'] > seconds).sum()
+
+    def test_missing_values(self):
+        frame = pd.DataFrame({
+            'Płeć': ['M', 'M', 'M', 'K'],
+            'Wiek': [30.0, 31.0, np.nan, 30.0],
+            'Czas': [6000.0, np.nan, 5000.0, 7000.0],
+            '5 km Tempo': [5.0, 5.5, 4.0, np.nan],
+        })
+        window = CohortCube(frame).around('M', 30, 1)
+
+        assert window.count == 2
+        assert window.mean_time == 6000.0
+        assert window.mean_tempo == 5.25
+        assert window.min_time == 6000.0
+        assert window.count_slower(5000.0) == 1
+        assert np.isnan(CohortCube(frame).around('K', 30, 1).mean_tempo)
+
+
+class TestCohortHistogram:
+    """Testy histogramów liczonych po stronie serwera."""
+
+    def test_counts_cover_window(self, reference_df, cube):
+        bins = cube.histogram('M', 23, 33, nbins=20, scale=60)
+        similar = _filter(reference_df, 'M', 28, 5)
+
+        assert bins.counts.sum() == len(similar)
+        assert bins.edges[0] <= similar['Czas'].min() / 60 < bins.edges[1]
+        assert bins.edges[-2] <= similar['Czas'].max() / 60 < bins.edges[-1]
+        np.testing.assert_allclose(np.diff(bins.edges), bins.width)
+        expected, _ = np.histogram(similar['Czas'] / 60, bins=bins.edges)
+        np.testing.assert_array_equal(bins.counts, expected)
+
+    def test_histogram_is_cached_per_cohort_and_spec(self, cube):
+        first = cube.histogram('K', 25, 35, nbins=40, scale=60)
+
+        assert cube.histogram('K', 25, 35, nbins=40, scale=60) is first
+        assert cube.histogram('K', 25, 35, nbins=20, scale=60) is not first
+        assert cube.histogram('K', 26, 35, nbins=40, scale=60) is not first
+
+    def test_empty_window(self, cube):
+        bins = cube.histogram('M', 90, 95, nbins=20)
+        assert len(bins.counts) == 0
+        assert bins.width == 0.0
@@ -0,0 +1,207 @@
+# =============================================================================
+# TESTY RDZENIA PRZEWIDYWANIA (src.core)
+# Przewidywanie bez Streamlit, typowane wyjątki i pamięć podręczna zasobów
+# =============================================================================
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest  # type: ignore[import-untyped]
+
+# Dodanie głównego katalogu do ścieżki
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from src.core import (  # noqa: E402
+    InvalidInputError,
+    ModelUnavailableError,
+    Predictor,
+    PredictorError,
+    ReferenceDataError,
+    get_predictor,
+    load_reference_data,
+    load_reference_index,
+)
+from src.core.caching import cached_resource  # noqa: E402
+from src.utils.validation import validate_user_data  # noqa: E402
+
+# Budżet czasu importu src.core i pierwszego przewidywania (w sekundach)
+CORE_PREDICTION_BUDGET = float(os.getenv("CORE_PREDICTION_BUDGET", "1.0"))
+
+RUNNER = {'Wiek': 28, 'Płeć': 'K', '5 km Tempo': 4.75}
+
+
+class TestPredictor:
+    """Testy przewidywania przez src.core."""
+
+    def test_predict(self):
+        prediction = get_predictor().predict(RUNNER)
+
+        assert prediction.engine == "native"
+        assert prediction.seconds == pytest.approx(6255.45, abs=0.01)
+        assert prediction.time == "1:44:15"
+
+    def test_invalid_input_raises(self):
+        with pytest.raises(InvalidInputError) as excinfo:
+            get_predictor().predict({'Wiek': 5, 'Płeć': 'X', '5 km Tempo': 4.5})
+
+        assert len(excinfo.value.errors) >= 2
+        assert isinstance(excinfo.value, ValueError)
+        assert isinstance(excinfo.value, PredictorError)
+
+    def test_missing_key_raises_invalid_input(self):
+        with pytest.raises(InvalidInputError):
+            get_predictor().predict({'Wiek': 30}, validate=False)
+
+    def test_predict_many_matches_predict(self):
+        records = [RUNNER, {'Wiek': 45, 'Płeć': 'M', '5 km Tempo': 5.5},
+                   {'Wiek': 'abc', 'Płeć': 'M', '5 km Tempo': 5.0}]
+        result = get_predictor().predict_many(records)
+
+        assert list(result['is_valid']) == [True, True, False]
+        assert result['prediction_label'].iloc[0] == pytest.approx(get_predictor().predict(RUNNER).seconds)
+
+    def test_predict_many_keeps_empty_records(self):
+        records = [{}, RUNNER, {'Wiek': 45, 'Płeć': 'M'}, {}]
+        result = get_predictor().predict_many(records)
+
+        # Każdy rekord wejściowy ma dokładnie jeden wiersz wyniku
+        assert list(result.index) == [0, 1, 2, 3]
+        assert list(result['is_valid']) == [False, True, False, False]
+        assert result['errors'].iloc[0] == ["Brak pola: Wiek", "Brak pola: Płeć", "Brak pola: 5 km Tempo"]
+        assert result['errors'].iloc[2] == ["Brak pola: 5 km Tempo"]
+        assert result['prediction_label'].iloc[1] == pytest.approx(get_predictor().predict(RUNNER).seconds)
+
+        only_empty = get_predictor().predict_many([{}, {}])
+        assert list(only_empty['is_valid']) == [False, False]
+        assert only_empty['errors'].iloc[1] == validate_user_data({})[1]
+
+    def test_model_unavailable(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("src.core.predictor.is_available", lambda name: False)
+        predictor = Predictor(native_model_path=str(tmp_path / "brak.json"),
+                              model_path=str(tmp_path / "brak"))
+
+        assert predictor.engine == "pycaret"
+        with pytest.raises(ModelUnavailableError):
+            predictor.predict(RUNNER)
+
+    def test_get_predictor_is_shared(self):
+        assert get_predictor() is get_predictor()
+
+    def test_import_without_streamlit(self):
+        code = ("import json, sys, time; started = time.perf_counter(); "
+                "from src.core import get_predictor; "
+                "prediction = get_predictor().predict(%r); "
+                "print(json.dumps({'seconds': time.perf_counter() - started, "
+                "'streamlit': 'streamlit' in sys.modules, 'pycaret': 'pycaret' in sys.modules, "
+                "'time': prediction.time}))" % (RUNNER,))
+        completed = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR,
+                                   capture_output=True, text=True, check=True)
+        report = json.loads(completed.stdout.strip().splitlines()[-1])
+
+        assert report['time'] == "1:44:15"
+        assert not report['streamlit']
+        assert not report['pycaret']
+        assert report['seconds'] <= CORE_PREDICTION_BUDGET, (
+            f"Import i przewidywanie trwały {report['seconds']:.2f} s "
+            f"(budżet {CORE_PREDICTION_BUDGET:.2f} s)")
+
+
+class TestReferenceData:
+    """Testy danych referencyjnych z src.core."""
+
+    def test_shared_frame(self):
+        assert load_reference_data() is load_reference_data()
+        assert len(load_reference_index()) == len(load_reference_data())
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(ReferenceDataError) as excinfo:
+            load_reference_data(str(tmp_path / "brak.csv"))
+
+        assert excinfo.value.path == str(tmp_path / "brak.csv")
+
+
+class TestCachedResource:
+    """Testy dekoratora cached_resource."""
+
+    def test_caches_by_arguments(self):
+        calls = []
+
+        @cached_resource()
+        def build(name, size=1):
+            calls.append((name, size))
+            return object()
+
+        assert build("a") is build("a")
+        assert build("a", size=2) is not build("a")
+        assert build.cache_info()['size'] == 2
+        assert len(calls) == 2
+
+        build.cache_clear()
+        build("a")
+        assert len(calls) == 3
+
+    def test_ttl_expires(self):
+        @cached_resource(ttl=0.05)
+        def build():
+            return object()
+
+        first = build()
+        assert build() is first
+        time.sleep(0.1)
+        assert build() is not first
+
+    def test_exceptions_not_cached(self):
+        attempts = []
+
+        @cached_resource()
+        def build():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise OSError("pierwsza próba")
+            return "ok"
+
+        with pytest.raises(OSError):
+            build()
+        assert build() == "ok"
+
+    def test_single_flight(self):
+        calls = []
+        barrier = threading.Barrier(8)
+
+        @cached_resource()
+        def build():
+            calls.append(1)
+            time.sleep(0.1)
+            return object()
+
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(build())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+
+    def test_maxsize_evicts_oldest(self):
+        @cached_resource(maxsize=2)
+        def build(value):
+            return [value]
+
+        first = build(1)
+        build(2)
+        build(3)
+
+        assert build.cache_info()['size'] == 2
+        assert build(1) is not first
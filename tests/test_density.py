@@ -0,0 +1,58 @@
+# =============================================================================
+# TESTY TRYBU GĘSTOŚCI WYKRESU TEMPO VS CZAS
+# =============================================================================
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest  # type: ignore[import-untyped]
+
+# Dodanie głównego katalogu do ścieżki
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from src.utils.density import ScatterDensity, use_density_mode  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def reference_df():
+    return pd.read_csv(os.path.join(ROOT_DIR, "df_cleaned.csv"))
+
+
+class TestScatterDensity:
+    """Testy histogramu 2D i warstwowej próbki."""
+
+    def test_grid_covers_all_points(self, reference_df):
+        density = ScatterDensity(reference_df, bins=(30, 20), sample_size=500)
+
+        assert density.counts.shape == (20, 30)
+        assert density.counts.sum() == len(reference_df)
+        assert np.isnan(density.heatmap_z()).sum() == (density.counts == 0).sum()
+
+    def test_sample_is_stratified_by_gender(self, reference_df):
+        density = ScatterDensity(reference_df, sample_size=1000)
+        expected = reference_df['Płeć'].value_counts(normalize=True)
+        observed = density.sample['Płeć'].value_counts(normalize=True)
+
+        assert abs(len(density.sample) - 1000) <= len(expected)
+        for gender, share in expected.items():
+            assert observed[gender] == pytest.approx(share, abs=0.01)
+
+    def test_sample_is_deterministic(self, reference_df):
+        first = ScatterDensity(reference_df, sample_size=200).sample
+        second = ScatterDensity(reference_df, sample_size=200).sample
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_small_frame_keeps_all_points(self):
+        frame = pd.DataFrame({'5 km Tempo': [5.0, 6.0, np.nan], 'Czas': [6000, 7000, 8000],
+                              'Płeć': ['M', 'K', 'M']})
+        density = ScatterDensity(frame, bins=(4, 4), sample_size=10)
+
+        assert density.n_points == 2
+        assert len(density.sample) == 2
+
+    def test_threshold(self):
+        assert use_density_mode(10_001, threshold=10_000)
+        assert not use_density_mode(10_000, threshold=10_000)
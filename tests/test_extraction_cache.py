@@ -0,0 +1,242 @@
+# =============================================================================
+# TESTY PAMIĘCI PODRĘCZNEJ EKSTRAKCJI
+# =============================================================================
+
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest  # type: ignore[import-untyped]
+
+# Dodanie głównego katalogu do ścieżki
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from src.utils.data_processing import (  # noqa: E402
+    TIER_CACHE,
+    TIER_DEADLINE,
+    TIER_LOCAL,
+    TIER_NONE,
+    TIER_OPENAI,
+    TIER_REGEX_FALLBACK,
+    TierStats,
+    extract_user_data,
+    extract_user_data_detailed,
+)
+from src.utils.extraction_cache import (  # noqa: E402
+    BACKEND_OPENAI,
+    BACKEND_REGEX,
+    ExtractionCache,
+    normalize_input,
+)
+
+
+class FakeOpenAI:
+    """Klient zwracający stałą odpowiedź i zliczający zapytania."""
+
+    def __init__(self, response: str, delay: float = 0.0):
+        self.calls = 0
+        self.timeouts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self._response = response
+        self._delay = delay
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        self.timeouts.append(kwargs.get('timeout'))
+        time.sleep(self._delay)
+        message = SimpleNamespace(content=self._response)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ExtractionCache(str(tmp_path / "cache.sqlite3"))
+
+
+class TestExtractionCache:
+    """Testy warstw pamięci podręcznej."""
+
+    def test_normalize_input(self):
+        assert normalize_input("  Mam 28 LAT,\tjestem  kobietą ") == "mam 28 lat, jestem kobietą"
+        # NFKC: znak złożony i rozłożony dają ten sam klucz
+        assert normalize_input("kobietą") == normalize_input("kobietą")
+
+    def test_memory_and_disk_tiers(self, tmp_path, cache):
+        data = {'Wiek': 28, 'Płeć': 'K', '5 km Tempo': 4.75}
+        cache.put("Mam 28 lat", data, BACKEND_OPENAI)
+
+        entry = cache.get("  mam 28   LAT ")
+        assert entry.data == data
+        assert entry.backend == BACKEND_OPENAI
+        assert cache.stats()['memory_hits'] == 1
+
+        reopened = ExtractionCache(str(tmp_path / "cache.sqlite3"))
+        assert reopened.get("MAM 28 LAT").data == data
+        assert reopened.stats()['disk_hits'] == 1
+        assert reopened.get("inny tekst") is None
+        assert reopened.stats()['hit_ratio'] == 0.5
+
+    def test_ttl(self, tmp_path):
+        cache = ExtractionCache(str(tmp_path / "cache.sqlite3"), ttl=0.05)
+        cache.put("tekst", {'Wiek': 30}, BACKEND_REGEX)
+        time.sleep(0.1)
+
+        assert cache.get("tekst") is None
+        assert ExtractionCache(str(tmp_path / "cache.sqlite3"), ttl=0.05).get("tekst") is None
+
+    def test_size_eviction(self, tmp_path):
+        cache = ExtractionCache(str(tmp_path / "cache.sqlite3"), max_entries=2, memory_size=1)
+        for text in ("a", "b", "c"):
+            cache.put(text, {'Wiek': 30}, BACKEND_REGEX)
+
+        reopened = ExtractionCache(str(tmp_path / "cache.sqlite3"))
+        assert reopened.get("a") is None
+        assert reopened.get("b") is not None
+        assert reopened.get("c") is not None
+
+    def test_memory_hits_keep_entry_from_eviction(self, tmp_path):
+        cache = ExtractionCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+        cache.put("a", {'Wiek': 30}, BACKEND_REGEX)
+        cache.put("b", {'Wiek': 31}, BACKEND_REGEX)
+        # Trafienie z pamięci czyni "a" świeższym od "b" także w SQLite
+        assert cache.get("a") is not None
+        cache.put("c", {'Wiek': 32}, BACKEND_REGEX)
+
+        reopened = ExtractionCache(str(tmp_path / "cache.sqlite3"))
+        assert reopened.get("a") is not None
+        assert reopened.get("b") is None
+        assert reopened.get("c") is not None
+
+    def test_memory_hits_flushed_after_interval(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite3")
+        cache = ExtractionCache(path, access_flush_interval=0.0)
+        cache.put("tekst", {'Wiek': 30}, BACKEND_REGEX)
+        stored = cache._db.execute("SELECT last_access FROM extraction_cache").fetchone()[0]
+        time.sleep(0.01)
+        cache.get("tekst")
+
+        reopened = ExtractionCache(path)
+        accessed = reopened._db.execute("SELECT last_access FROM extraction_cache").fetchone()[0]
+        assert accessed > stored
+
+    def test_memory_only(self):
+        cache = ExtractionCache(db_path=None)
+        cache.put("tekst", {'Wiek': 30}, BACKEND_REGEX)
+        assert cache.get("TEKST").data == {'Wiek': 30}
+
+
+class TestCachedExtraction:
+    """Testy extract_user_data z pamięcią podręczną."""
+
+    def test_repeat_input_skips_openai(self, cache):
+        client = FakeOpenAI('{"Wiek": 28, "Płeć": "K", "5 km Tempo": 4.75}')
+
+        first = extract_user_data("Mam 28 lat, jestem kobietą, tempo 4:45", client, cache)
+        second = extract_user_data("mam 28 lat,  jestem kobietą, tempo 4:45", client, cache)
+
+        assert first == second == {'Wiek': 28, 'Płeć': 'K', '5 km Tempo': 4.75}
+        assert client.calls == 1
+        assert cache.get("mam 28 lat, jestem kobietą, tempo 4:45").backend == BACKEND_OPENAI
+
+    def test_regex_entry_is_retried_with_openai(self, cache):
+        # Tekst niejednoznaczny (dwa wieki), więc parser lokalny eskaluje do OpenAI
+        text = "Kobieta 42 lata, mąż 45 lat, tempo 6:10"
+        regex_result = extract_user_data(text, None, cache)
+        assert cache.get(text).backend == BACKEND_REGEX
+
+        client = FakeOpenAI('{"Wiek": 42, "Płeć": "K", "5 km Tempo": 6.17}')
+        assert extract_user_data(text, None, cache) == regex_result
+        assert extract_user_data(text, client, cache)['5 km Tempo'] == 6.17
+        assert client.calls == 1
+        assert cache.get(text).backend == BACKEND_OPENAI
+
+    def test_failed_extraction_is_not_cached(self, cache):
+        assert extract_user_data("brak danych", None, cache) is None
+        assert cache.get("brak danych") is None
+
+
+class TestTieredExtraction:
+    """Testy warstwowej ekstrakcji: parser lokalny, potem OpenAI."""
+
+    def test_confident_input_skips_openai(self):
+        client = FakeOpenAI('{"Wiek": 99, "Płeć": "M", "5 km Tempo": 9.0}')
+        outcome = extract_user_data_detailed("28 lat, kobieta, tempo 4:45", client, use_cache=False)
+
+        assert outcome.tier == TIER_LOCAL
+        assert outcome.data == {'Wiek': 28, 'Płeć': 'K', '5 km Tempo': 4.75}
+        assert client.calls == 0
+
+    def test_ambiguous_input_escalates(self):
+        client = FakeOpenAI('{"Wiek": 28, "Płeć": "K", "5 km Tempo": 4.75}')
+        outcome = extract_user_data_detailed("Mam 28 lat, jestem kobietą, tempo 4:45", client,
+                                             use_cache=False)
+
+        assert outcome.tier == TIER_OPENAI
+        assert outcome.data['Płeć'] == 'K'
+        assert outcome.confidence < 1.0
+        assert client.calls == 1
+
+    def test_fallback_and_none(self):
+        text = "Mam 28 lat, jestem kobietą, tempo 4:45"
+        outcome = extract_user_data_detailed(text, FakeOpenAI("to nie JSON"), use_cache=False)
+        assert outcome.tier == TIER_REGEX_FALLBACK
+        assert outcome.data is not None
+
+        assert extract_user_data_detailed("brak danych", None, use_cache=False).tier == TIER_NONE
+
+    def test_cached_tier(self, cache):
+        client = FakeOpenAI('{"Wiek": 28, "Płeć": "K", "5 km Tempo": 4.75}')
+        text = "Mam 28 lat, jestem kobietą, tempo 4:45"
+        extract_user_data_detailed(text, client, cache)
+
+        assert extract_user_data_detailed(text, client, cache).tier == TIER_CACHE
+        assert client.calls == 1
+
+    def test_tier_stats(self):
+        stats = TierStats()
+        stats.record(TIER_LOCAL, 0.001)
+        stats.record(TIER_LOCAL, 0.003)
+        stats.record(TIER_OPENAI, 1.0)
+
+        result = stats.stats()
+        assert result['total'] == 3
+        assert result['tiers'][TIER_LOCAL]['count'] == 2
+        assert result['tiers'][TIER_LOCAL]['mean_seconds'] == pytest.approx(0.002)
+        assert result['llm_share'] == pytest.approx(1 / 3)
+
+
+class TestDeadlineExtraction:
+    """Testy ekstrakcji z terminem odpowiedzi OpenAI."""
+
+    TEXT = "Mam 28 lat, jestem kobietą, tempo 4:45"
+
+    def test_answer_in_time_wins(self):
+        client = FakeOpenAI('{"Wiek": 28, "Płeć": "K", "5 km Tempo": 4.75}', delay=0.01)
+        outcome = extract_user_data_detailed(self.TEXT, client, use_cache=False, deadline=2.0)
+
+        assert outcome.tier == TIER_OPENAI
+        assert outcome.data['Płeć'] == 'K'
+        # Limit czasu HTTP nie przekracza terminu
+        assert 0 < client.timeouts[0] <= 2.0
+
+    def test_slow_answer_falls_back_to_regex(self):
+        client = FakeOpenAI('{"Wiek": 28, "Płeć": "K", "5 km Tempo": 4.75}', delay=0.5)
+        started = time.perf_counter()
+        outcome = extract_user_data_detailed(self.TEXT, client, use_cache=False, deadline=0.05)
+
+        assert time.perf_counter() - started < 0.4
+        assert outcome.tier == TIER_DEADLINE
+        assert outcome.data == {'Wiek': 28, 'Płeć': 'M', '5 km Tempo': 4.75}
+
+    def test_percentiles(self):
+        stats = TierStats()
+        for ms in range(1, 101):
+            stats.record(TIER_LOCAL, ms / 1000)
+
+        p50, p99 = stats.percentiles()
+        assert p50 == pytest.approx(0.050)
+        assert p99 == pytest.approx(0.099)
+        assert stats.stats()['p99_seconds'] == p99
+        assert TierStats().percentiles() == (0.0, 0.0)
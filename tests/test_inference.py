@@ -0,0 +1,103 @@
+# =============================================================================
+# TESTY NATYWNEGO SILNIKA PRZEWIDYWANIA
+# Testy zgodności silnika NumPy z modelem PyCaret
+# =============================================================================
+
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest  # type: ignore[import-untyped]
+
+# Dodanie głównego katalogu do ścieżki
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from src.utils.inference import (  # noqa: E402
+    NATIVE_TOLERANCE_SECONDS,
+    NativeHuberModel,
+    export_pipeline,
+    load_native_model,
+)
+
+NATIVE_MODEL_FILE = os.path.join(ROOT_DIR, "huber_model_halfmarathon_time.json")
+MODEL_FILE = os.path.join(ROOT_DIR, "huber_model_halfmarathon_time")
+
+
+@pytest.fixture(scope="module")
+def native_model():
+    model = load_native_model(NATIVE_MODEL_FILE, MODEL_FILE)
+    assert model is not None
+    return model
+
+
+class TestNativeHuberModel:
+    """Testy silnika NumPy bez udziału PyCaret."""
+
+    def test_known_predictions(self, native_model):
+        """Wyniki zgodne z predict_model dla znanych przypadków."""
+        woman = {'Wiek': 28, 'Płeć': 'K', '5 km Tempo': 4.75, '5 km Czas': 1425.0}
+        man = {'Wiek': 40, 'Płeć': 'M', '5 km Tempo': 5.0, '5 km Czas': 1500.0}
+
+        assert native_model.predict_record(woman) == pytest.approx(
+            6255.454036, abs=NATIVE_TOLERANCE_SECONDS)
+        assert native_model.predict_record(man) == pytest.approx(
+            6568.726685, abs=NATIVE_TOLERANCE_SECONDS)
+
+    def test_record_and_batch_agree(self, native_model):
+        """Ścieżka pojedyncza i wektorowa dają ten sam wynik."""
+        frame = pd.DataFrame({
+            'Wiek': [28, 40, 65],
+            'Płeć': ['K', 'M', 'K'],
+            '5 km Tempo': [4.75, 5.0, 6.1],
+            '5 km Czas': [1425.0, 1500.0, 1830.0],
+        })
+        batch = native_model.predict(frame)
+        single = [native_model.predict_record(row) for row in frame.to_dict('records')]
+        np.testing.assert_allclose(batch, single, atol=1e-9)
+
+    def test_missing_and_unknown_values(self, native_model):
+        """Braki są imputowane, a nieznana płeć kodowana jak w PyCaret."""
+        missing = {'Wiek': math.nan, 'Płeć': math.nan, '5 km Tempo': 5.0, '5 km Czas': 1500.0}
+        unknown = {'Wiek': 28, 'Płeć': 'X', '5 km Tempo': 4.75, '5 km Czas': 1425.0}
+
+        assert native_model.predict_record(missing) == pytest.approx(
+            native_model.predict_record({**missing, 'Wiek': 39.301575479805216, 'Płeć': 'M'}))
+        assert native_model.predict_record(unknown) == pytest.approx(
+            6279.264993, abs=NATIVE_TOLERANCE_SECONDS)
+
+    def test_scaling_is_folded_into_coefficients(self, native_model):
+        """Skalowanie zapisane w eksporcie jest uwzględniane w przewidywaniu."""
+        params = dict(native_model.params)
+        params['scaling'] = {'Wiek': [0.5, 10.0]}
+        scaled = NativeHuberModel(params)
+        record = {'Wiek': 30, 'Płeć': 'M', '5 km Tempo': 5.0, '5 km Czas': 1500.0}
+
+        expected = native_model.predict_record({**record, 'Wiek': 30 * 0.5 + 10.0})
+        assert scaled.predict_record(record) == pytest.approx(expected)
+
+    def test_stale_export_is_rejected(self, tmp_path):
+        """Eksport niezgodny z plikiem .pkl nie jest używany."""
+        stale_model = tmp_path / "model"
+        (tmp_path / "model.pkl").write_bytes(b"inny model")
+        assert load_native_model(NATIVE_MODEL_FILE, str(stale_model)) is None
+
+
+class TestExportAgainstPyCaret:
+    """Porównanie z predict_model (wymaga zainstalowanego PyCaret)."""
+
+    def test_matches_predict_model(self, native_model):
+        regression = pytest.importorskip("pycaret.regression")
+        pipeline = regression.load_model(MODEL_FILE, verbose=False)
+
+        reference = pd.read_csv(os.path.join(ROOT_DIR, "df_cleaned.csv"))
+        frame = reference[['Wiek', 'Płeć', '5 km Tempo', '5 km Czas']].sample(
+            500, random_state=0)
+        expected = regression.predict_model(pipeline, data=frame, verbose=False)
+
+        np.testing.assert_allclose(
+            native_model.predict(frame), expected['prediction_label'].to_numpy(),
+            atol=NATIVE_TOLERANCE_SECONDS)
+        assert export_pipeline(pipeline)['coef'] == native_model.params['coef']
@@ -0,0 +1,109 @@
+# =============================================================================
+# TESTY WERYFIKACJI KLUCZA OPENAI API
+# =============================================================================
+
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest  # type: ignore[import-untyped]
+from openai import AuthenticationError
+
+# Dodanie głównego katalogu do ścieżki
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from src.utils.key_verification import (  # noqa: E402
+    STATUS_ERROR,
+    STATUS_INVALID,
+    STATUS_PENDING,
+    STATUS_VALID,
+    KeyVerifier,
+    key_fingerprint,
+    verify_key_remote,
+)
+
+VALID_KEY = "sk-valid-key"
+INVALID_KEY = "sk-revoked-key"
+
+
+class FakeModelsClientFactory:
+    """Tworzy klientów, których models.list() czeka na sygnał i zlicza wywołania."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, api_key):
+        return SimpleNamespace(models=SimpleNamespace(list=lambda: self._list(api_key)))
+
+    def _list(self, api_key):
+        self.calls += 1
+        self.release.wait(5)
+        if api_key == INVALID_KEY:
+            # Odpowiedź 401 bez zależności od wersji klienta HTTP biblioteki openai
+            error = AuthenticationError.__new__(AuthenticationError)
+            Exception.__init__(error, "Incorrect API key")
+            raise error
+        if api_key == "sk-network-down":
+            raise ConnectionError("network down")
+        return []
+
+
+@pytest.fixture
+def factory():
+    return FakeModelsClientFactory()
+
+
+class TestKeyVerification:
+    """Testy weryfikacji klucza w tle z pamięcią wyników."""
+
+    def test_fingerprint_does_not_contain_key(self):
+        fingerprint = key_fingerprint(VALID_KEY)
+        assert len(fingerprint) == 64
+        assert VALID_KEY not in fingerprint
+        assert fingerprint == key_fingerprint(f" {VALID_KEY} ")
+
+    def test_remote_results(self, factory):
+        assert verify_key_remote(VALID_KEY, factory).status == STATUS_VALID
+        assert verify_key_remote(INVALID_KEY, factory).status == STATUS_INVALID
+        assert verify_key_remote("sk-network-down", factory).status == STATUS_ERROR
+        assert verify_key_remote("abc", factory).status == STATUS_INVALID
+        assert factory.calls == 3
+
+    def test_status_is_non_blocking_and_cached(self, factory):
+        verifier = KeyVerifier(client_factory=factory)
+        factory.release.clear()
+
+        assert verifier.status(VALID_KEY).status == STATUS_PENDING
+        assert verifier.status(VALID_KEY).status == STATUS_PENDING
+        factory.release.set()
+
+        assert verifier.verify(VALID_KEY).is_valid
+        for _ in range(5):
+            assert verifier.status(VALID_KEY).is_valid
+        assert factory.calls == 1
+
+        # Klucz przechowywany jest wyłącznie jako skrót
+        assert VALID_KEY not in repr(verifier._results)  # pylint: disable=protected-access
+
+    def test_ttl_and_force(self, factory):
+        verifier = KeyVerifier(ttl=0.0, client_factory=factory)
+        verifier.verify(VALID_KEY)
+        verifier.verify(VALID_KEY)
+        assert factory.calls == 2
+
+        cached = KeyVerifier(client_factory=factory)
+        cached.verify(VALID_KEY)
+        cached.verify(VALID_KEY, force=True)
+        assert factory.calls == 4
+
+    def test_invalid_key_is_reported(self, factory):
+        verifier = KeyVerifier(client_factory=factory)
+        result = verifier.verify(INVALID_KEY)
+
+        assert result.status == STATUS_INVALID
+        assert "nieprawidłowy" in result.message
+        assert verifier.status("").status == STATUS_INVALID
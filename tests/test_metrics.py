@@ -0,0 +1,181 @@
+# =============================================================================
+# TESTY METRYK PROCESU
+# Format tekstowy Prometheus, liczniki przewidywań, ekstrakcji i pamięci
+# podręcznych, aktywne sesje oraz eksport na porcie i do pliku
+# =============================================================================
+
+import os
+import sys
+import urllib.request
+
+import pandas as pd
+import pytest  # type: ignore[import-untyped]
+
+# Dodanie głównego katalogu do ścieżki
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from src.core import InvalidInputError, get_predictor  # noqa: E402
+from src.core import metrics  # noqa: E402
+from src.core.caching import cache_stats, cached_resource  # noqa: E402
+from src.core.metrics import (  # noqa: E402
+    CONTENT_TYPE,
+    EXTRACTION_SECONDS,
+    OPENAI_REQUESTS,
+    PREDICTION_ERRORS,
+    PREDICTIONS,
+    REGEX_FALLBACKS,
+    MetricsExporter,
+    MetricsRegistry,
+    SessionTracker,
+)
+from src.utils.data_processing import extract_user_data_detailed  # noqa: E402
+
+RUNNER = {'Wiek': 28, 'Płeć': 'M', '5 km Tempo': 4.75}
+
+
+class FailingCompletions:
+    def create(self, **_kwargs):
+        raise ConnectionError("brak sieci")
+
+
+class FailingClient:
+    """Klient OpenAI, którego każde zapytanie kończy się błędem."""
+
+    def __init__(self):
+        self.chat = type("Chat", (), {'completions': FailingCompletions()})()
+
+
+class TestRegistry:
+    """Testy formatu tekstowego Prometheus."""
+
+    def test_counter_and_gauge_format(self):
+        registry = MetricsRegistry(prefix="test_")
+        counter = registry.counter("requests_total", "Zapytania", ["route"])
+        gauge = registry.gauge("sessions", "Sesje")
+        counter.inc(route="/predict")
+        counter.inc(2, route='a"b\\c')
+        gauge.set(3)
+
+        text = registry.render()
+
+        assert "# TYPE test_requests_total counter" in text
+        assert 'test_requests_total{route="/predict"} 1.0' in text
+        assert 'test_requests_total{route="a\\"b\\\\c"} 2.0' in text
+        assert "test_sessions 3.0" in text
+        assert text.endswith("\n")
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry(prefix="test_")
+        histogram = registry.histogram("latency_seconds", "Czas", ["tier"], buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 5.0):
+            histogram.observe(value, tier="local")
+
+        lines = registry.render().splitlines()
+
+        assert 'test_latency_seconds_bucket{tier="local",le="0.1"} 1.0' in lines
+        assert 'test_latency_seconds_bucket{tier="local",le="1.0"} 3.0' in lines
+        assert 'test_latency_seconds_bucket{tier="local",le="+Inf"} 4.0' in lines
+        assert 'test_latency_seconds_count{tier="local"} 4.0' in lines
+        assert 'test_latency_seconds_sum{tier="local"} 6.25' in lines
+        assert histogram.count(tier="local") == 4
+
+    def test_rejects_wrong_labels_and_conflicting_registration(self):
+        registry = MetricsRegistry(prefix="test_")
+        counter = registry.counter("errors_total", "Błędy", ["type"])
+
+        with pytest.raises(ValueError):
+            counter.inc(kind="x")
+        with pytest.raises(ValueError):
+            registry.gauge("errors_total", "Błędy", ["type"])
+        assert registry.counter("errors_total", "Błędy", ["type"]) is counter
+
+    def test_session_tracker_forgets_idle_sessions(self):
+        tracker = SessionTracker(idle_timeout=60)
+        tracker.touch("a")
+        tracker.touch("b")
+        tracker._last_seen["a"] -= 120  # pylint: disable=protected-access
+
+        assert tracker.active() == 1
+
+
+class TestInstrumentation:
+    """Testy liczników aktualizowanych przez rdzeń i ekstrakcję."""
+
+    def test_predictions_and_errors_counted(self):
+        predictions = PREDICTIONS.value(engine="native", mode="single")
+        errors = PREDICTION_ERRORS.value(type="InvalidInputError")
+
+        get_predictor().predict(RUNNER)
+        with pytest.raises(InvalidInputError):
+            get_predictor().predict({'Wiek': 5, 'Płeć': 'M', '5 km Tempo': 4.75})
+
+        assert PREDICTIONS.value(engine="native", mode="single") == predictions + 1
+        assert PREDICTION_ERRORS.value(type="InvalidInputError") == errors + 1
+
+    def test_batch_counts_records(self):
+        frame = pd.DataFrame({'Wiek': [28, 40, 'x'], 'Płeć': ['M', 'K', 'M'],
+                              '5 km Tempo': [4.75, 5.5, 5.0]})
+        predictions = PREDICTIONS.value(engine="native", mode="batch")
+        errors = PREDICTION_ERRORS.value(type="InvalidInputError")
+
+        get_predictor().predict_many(frame)
+
+        assert PREDICTIONS.value(engine="native", mode="batch") == predictions + 2
+        assert PREDICTION_ERRORS.value(type="InvalidInputError") == errors + 1
+
+    def test_openai_failure_falls_back_to_regex(self):
+        requests = OPENAI_REQUESTS.value(outcome="error")
+        fallbacks = REGEX_FALLBACKS.value(reason="openai_failed")
+        extractions = EXTRACTION_SECONDS.count(tier="regex_fallback")
+
+        outcome = extract_user_data_detailed("Mam 28 lat, jestem mężczyzną, tempo 4:45",
+                                             openai_client=FailingClient(), use_cache=False,
+                                             confidence_threshold=1.1)
+
+        assert outcome.tier == "regex_fallback"
+        assert OPENAI_REQUESTS.value(outcome="error") == requests + 1
+        assert REGEX_FALLBACKS.value(reason="openai_failed") == fallbacks + 1
+        assert EXTRACTION_SECONDS.count(tier="regex_fallback") == extractions + 1
+
+    def test_cached_resource_hits_exported(self):
+        @cached_resource()
+        def metrics_test_resource(value):
+            return value * 2
+
+        for _ in range(3):
+            metrics_test_resource(1)
+
+        assert cache_stats()["test_metrics.metrics_test_resource"] == {'hits': 2, 'misses': 1}
+        assert ('kalkulator_cache_hits_total{cache="test_metrics.metrics_test_resource"} 2.0'
+                in metrics.render_metrics())
+
+
+class TestExport:
+    """Testy eksportu metryk."""
+
+    def test_http_endpoint(self):
+        exporter = MetricsExporter(port=0)
+        try:
+            with urllib.request.urlopen(exporter.url, timeout=10) as response:
+                body = response.read().decode('utf-8')
+                content_type = response.headers['Content-Type']
+        finally:
+            exporter.stop()
+
+        assert content_type == CONTENT_TYPE
+        assert "# TYPE kalkulator_predictions_total counter" in body
+        assert "kalkulator_active_sessions" in body
+
+    def test_scrape_file_written_atomically(self, tmp_path):
+        path = tmp_path / "kalkulator.prom"
+        exporter = MetricsExporter(path=str(path), interval=60)
+        metrics.touch_session("test-session")
+        exporter.stop()
+
+        text = path.read_text(encoding='utf-8')
+        assert "# TYPE kalkulator_extraction_seconds histogram" in text
+        assert [name for name in os.listdir(tmp_path)] == ["kalkulator.prom"]
+
+    def test_disabled_by_default(self):
+        assert metrics.start_metrics_exporter(0, "") is None
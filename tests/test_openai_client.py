@@ -0,0 +1,86 @@
+# =============================================================================
+# TESTY WSPÓLNEGO KLIENTA OPENAI
+# =============================================================================
+
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest  # type: ignore[import-untyped]
+
+# Dodanie głównego katalogu do ścieżki
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from src.utils.openai_client import OpenAIClientFactory, key_fingerprint  # noqa: E402
+
+
+class _ModelsHandler(BaseHTTPRequestHandler):
+    """Minimalny serwer /v1/models z keep-alive (HTTP/1.1)."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        body = json.dumps({"object": "list", "data": []}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        pass
+
+
+@pytest.fixture
+def models_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ModelsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+class TestOpenAIClientFactory:
+    """Testy fabryki klientów ze wspólną pulą połączeń."""
+
+    def test_clients_are_shared_per_key(self):
+        factory = OpenAIClientFactory(base_url="http://127.0.0.1:9/v1")
+
+        first = factory.get("sk-one")
+        assert factory.get(" sk-one ") is first
+        second = factory.get("sk-two")
+        assert second is not first
+        assert second._client is first._client  # pylint: disable=protected-access
+        assert factory.get("") is None
+        assert factory.stats()['clients'] == 2
+        factory.close()
+
+    def test_timeouts_and_retries(self):
+        factory = OpenAIClientFactory(connect_timeout=2, read_timeout=7, max_retries=3)
+        client = factory.get("sk-test")
+
+        assert client.timeout.connect == 2
+        assert client.timeout.read == 7
+        assert client.max_retries == 3
+        factory.close()
+
+    def test_connections_are_reused(self, models_server):
+        factory = OpenAIClientFactory(base_url=models_server, max_retries=0)
+        for key in ("sk-one", "sk-two"):
+            for _ in range(3):
+                factory.get(key).models.list()
+
+        stats = factory.stats()
+        assert stats['requests'] == 6
+        assert stats['connections_opened'] == 1
+        assert stats['reused_requests'] == 5
+        assert stats['open_connections'] == 1
+        factory.close()
+
+    def test_fingerprint(self):
+        assert key_fingerprint("sk-abc") == key_fingerprint(" sk-abc\n")
+        assert "sk-abc" not in key_fingerprint("sk-abc")
@@ -0,0 +1,161 @@
+# =============================================================================
+# TESTY PROFILOWANIA PRZEBIEGU
+# Próbkowanie stosu, zestawienia top-N, tracemalloc, zapis profilu
+# oraz włączanie flagą środowiskową i parametrem zapytania
+# =============================================================================
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+# Dodanie głównego katalogu do ścieżki
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from src.core import profiling  # noqa: E402
+from src.core.profiling import (  # noqa: E402
+    RerunProfile,
+    SamplingProfiler,
+    profiling_requested,
+    start_profile,
+    top_functions,
+)
+from src.core.tracing import start_trace  # noqa: E402
+
+
+def busy_loop(seconds: float) -> int:
+    total = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        total += sum(range(200))
+    return total
+
+
+def allocate_blocks() -> list:
+    return [bytearray(1024) for _ in range(512)]
+
+
+class TestSampling:
+    """Testy próbkującego profilera i zestawień."""
+
+    def test_samples_profiled_thread(self):
+        profiler = SamplingProfiler(interval=0.001).start()
+        busy_loop(0.1)
+        seconds = profiler.stop()
+
+        top_self, top_cumulative = top_functions(profiler.stacks)
+        assert profiler.samples > 0
+        assert sum(profiler.stacks.values()) <= seconds
+        assert top_self[0]['function'].startswith("busy_loop (tests/test_profiling.py:")
+        # Ramki pytest wspólne dla wszystkich próbek nie zasłaniają profilowanego kodu
+        assert any(row['function'].startswith("busy_loop") for row in top_cumulative[:2])
+
+    def test_recursion_counted_once_per_sample(self):
+        a, b = ("f.py", 1, "a"), ("f.py", 5, "b")
+        stacks = {(a, b, a): 0.5, (a,): 0.25}
+
+        top_self, top_cumulative = top_functions(profiling.Counter(stacks))
+
+        assert top_cumulative[0] == {'function': "a (f.py:1)", 'self_ms': 750.0, 'total_ms': 750.0}
+        assert top_self[0]['function'] == "a (f.py:1)"
+
+    def test_timeout_closes_profile(self, tmp_path):
+        profile = RerunProfile(profile_dir=str(tmp_path), interval=0.001, max_seconds=0.02).start()
+        busy_loop(0.2)
+
+        report = profile.stop()
+        assert report.complete is False
+        assert not tracemalloc.is_tracing()
+
+
+class TestRerunProfile:
+    """Testy profilu przebiegu."""
+
+    def test_report_written_with_trace_id(self, tmp_path):
+        profile = start_profile(profile_dir=str(tmp_path))
+        with start_trace("oblicz", trace_file="", trace_id=profile.trace_id) as trace:
+            blocks = allocate_blocks()
+            busy_loop(0.05)
+        report = profile.stop()
+
+        assert trace.trace_id == report.trace_id
+        assert report.complete and report.samples > 0
+        assert report.path == str(tmp_path / f"profile-{trace.trace_id}.json")
+        assert report.top_allocations[0]['location'].startswith("tests/test_profiling.py:")
+        assert report.peak_memory_kib >= len(blocks)
+        assert profile.stop() is report
+        assert not tracemalloc.is_tracing()
+
+        saved = json.loads((tmp_path / f"profile-{trace.trace_id}.json").read_text(encoding='utf-8'))
+        assert saved['trace_id'] == trace.trace_id
+        assert saved['top_self'] == report.top_self
+        folded = (tmp_path / f"profile-{trace.trace_id}.folded").read_text(encoding='utf-8')
+        assert "busy_loop (tests/test_profiling.py:" in folded
+
+    def test_keeps_foreign_tracemalloc_running(self):
+        tracemalloc.start()
+        try:
+            profile = start_profile(profile_dir="")
+            blocks = allocate_blocks()
+            report = profile.stop()
+            assert tracemalloc.is_tracing()
+        finally:
+            tracemalloc.stop()
+
+        assert report.path is None
+        assert report.top_allocations[0]['size_kib'] >= len(blocks)
+
+    def test_interrupted_rerun_saved_as_incomplete(self, tmp_path):
+        first = start_profile(profile_dir=str(tmp_path))
+        # Kolejny przebieg w tym samym wątku (poprzedni przerwany przez st.rerun())
+        second = start_profile(profile_dir=str(tmp_path))
+        second.stop()
+
+        assert first.report.complete is False
+        assert second.report.complete is True
+
+    def test_single_profile_across_sessions(self, tmp_path):
+        started = threading.Event()
+        finish = threading.Event()
+        results = []
+
+        def other_session():
+            profile = start_profile(profile_dir=str(tmp_path))
+            started.set()
+            finish.wait(10)
+            profile.stop()
+
+        thread = threading.Thread(target=other_session)
+        thread.start()
+        started.wait(10)
+        results.append(start_profile(profile_dir=str(tmp_path)))
+        finish.set()
+        thread.join()
+
+        assert results == [None]
+
+
+class TestFlags:
+    """Testy włączania profilowania."""
+
+    def test_disabled_by_default(self, monkeypatch):
+        monkeypatch.setattr(profiling, "PROFILE_RERUNS", False)
+        monkeypatch.setattr(profiling, "PROFILE_TOKEN", "")
+
+        assert profiling_requested(None) is False
+        assert profiling_requested("1") is False
+
+    def test_query_parameter_requires_token(self, monkeypatch):
+        monkeypatch.setattr(profiling, "PROFILE_RERUNS", False)
+        monkeypatch.setattr(profiling, "PROFILE_TOKEN", "sekret")
+
+        assert profiling_requested("sekret") is True
+        assert profiling_requested("1") is False
+
+    def test_environment_flag(self, monkeypatch):
+        monkeypatch.setattr(profiling, "PROFILE_RERUNS", True)
+
+        assert profiling_requested(None) is True
@@ -0,0 +1,159 @@
+# =============================================================================
+# TESTY KOLUMNOWEJ PAMIĘCI PODRĘCZNEJ DANYCH REFERENCYJNYCH
+# Dane z pamięci podręcznej muszą być identyczne z pd.read_csv + schematem
+# =============================================================================
+
+import logging
+import mmap
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest  # type: ignore[import-untyped]
+
+# Dodanie głównego katalogu do ścieżki
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from src.utils import reference_data  # noqa: E402
+from src.utils.reference_data import (  # noqa: E402
+    REFERENCE_SCHEMA,
+    CACHE_DIR_MODE,
+    apply_reference_schema,
+    cache_dir_for,
+    cache_version_dir,
+    column_memory,
+    read_reference_data,
+    write_columnar_cache,
+)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "df_cleaned.csv"
+    shutil.copy(os.path.join(ROOT_DIR, "df_cleaned.csv"), path)
+    return str(path)
+
+
+class TestReadReferenceData:
+    """Testy budowy, odczytu i unieważniania pamięci podręcznej."""
+
+    def test_cache_matches_csv(self, csv_path):
+        expected = apply_reference_schema(pd.read_csv(csv_path))
+
+        first = read_reference_data(csv_path)
+        assert os.path.isfile(os.path.join(cache_version_dir(csv_path), "meta.json"))
+        second = read_reference_data(csv_path)
+
+        pd.testing.assert_frame_equal(first, expected)
+        pd.testing.assert_frame_equal(second, expected)
+
+    def test_numeric_columns_are_memory_mapped(self, csv_path):
+        read_reference_data(csv_path)
+        df = read_reference_data(csv_path)
+
+        for values in (df['Tempo'].to_numpy(), df['Czas'].array._data):
+            assert isinstance(values, np.memmap) or isinstance(values.base, (np.memmap, mmap.mmap))
+
+    def test_cache_rebuilds_when_csv_changes(self, csv_path):
+        read_reference_data(csv_path)
+
+        frame = pd.read_csv(csv_path).head(10)
+        frame.to_csv(csv_path, index=False)
+        os.utime(csv_path, ns=(0, 0))
+
+        df = read_reference_data(csv_path)
+        assert len(df) == 10
+        pd.testing.assert_frame_equal(df, apply_reference_schema(pd.read_csv(csv_path)))
+        # Poprzednia wersja zostaje - mogą ją mieć zmapowaną działające procesy
+        assert len(os.listdir(cache_dir_for(csv_path))) == 2
+
+    def test_published_version_is_readable_by_others(self, csv_path):
+        read_reference_data(csv_path)
+
+        assert os.stat(cache_version_dir(csv_path)).st_mode & 0o777 == CACHE_DIR_MODE
+
+    def test_concurrent_writer_keeps_published_version(self, csv_path):
+        first = read_reference_data(csv_path)
+        published = cache_version_dir(csv_path)
+        meta_before = os.stat(os.path.join(published, "meta.json")).st_mtime_ns
+
+        # Drugi proces budujący tę samą wersję nie podmienia zmapowanych plików
+        assert write_columnar_cache(apply_reference_schema(pd.read_csv(csv_path)), csv_path) == published
+
+        assert os.listdir(cache_dir_for(csv_path)) == [os.path.basename(published)]
+        assert os.stat(os.path.join(published, "meta.json")).st_mtime_ns == meta_before
+        pd.testing.assert_frame_equal(read_reference_data(csv_path), first)
+
+    def test_disabled_cache(self, csv_path):
+        df = read_reference_data(csv_path, use_cache=False)
+
+        assert len(df) == len(pd.read_csv(csv_path))
+        assert not os.path.exists(cache_dir_for(csv_path))
+
+    def test_missing_csv_raises(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            read_reference_data(str(tmp_path / "brak.csv"))
+
+    def test_memory_report_logged_once_per_process(self, csv_path, caplog, monkeypatch):
+        def reports():
+            found = [r for r in caplog.records if "Pamięć danych referencyjnych" in r.message]
+            caplog.clear()
+            return found
+
+        with caplog.at_level(logging.INFO, logger="src.utils.reference_data"):
+            read_reference_data(csv_path)
+            built = reports()
+            read_reference_data(csv_path)
+            repeated = reports()
+            # Nowy proces (np. pracownik puli) wczytuje gotową pamięć podręczną
+            monkeypatch.setattr(reference_data, "_memory_reported", set())
+            read_reference_data(csv_path)
+            warm = reports()
+
+        assert [r.levelno for r in built] == [logging.INFO]
+        assert repeated == []
+        assert [r.levelno for r in warm] == [logging.INFO]
+        assert "->" in warm[0].getMessage()
+
+    def test_memory_report_per_column_in_debug(self, csv_path, caplog):
+        with caplog.at_level(logging.DEBUG, logger="src.utils.reference_data"):
+            read_reference_data(csv_path)
+            read_reference_data(csv_path)
+
+        per_column = [r for r in caplog.records if "na kolumnę" in r.message]
+        assert len(per_column) == 2
+        assert "Czas:" in per_column[0].getMessage()
+
+
+class TestReferenceSchema:
+    """Testy jawnego schematu typów danych referencyjnych."""
+
+    def test_schema_dtypes_and_values(self):
+        raw = pd.read_csv(os.path.join(ROOT_DIR, "df_cleaned.csv"))
+        typed = apply_reference_schema(raw)
+
+        for name, dtype in REFERENCE_SCHEMA.items():
+            assert str(typed[name].dtype) == dtype
+        for name in raw.columns:
+            if 'Tempo' in name:
+                np.testing.assert_allclose(typed[name].to_numpy(np.float64, na_value=np.nan),
+                                           raw[name], rtol=1e-6)
+            elif raw[name].dtype == object:
+                assert (typed[name].astype(object) == raw[name]).all()
+            else:
+                np.testing.assert_array_equal(typed[name].to_numpy(np.float64, na_value=np.nan),
+                                              raw[name])
+        assert sum(column_memory(typed).values()) < sum(column_memory(raw).values()) / 4
+
+    def test_lossy_integer_column_is_kept(self):
+        raw = pd.DataFrame({'Czas': [6000.5, np.nan], 'Wiek': [30.0, 300.0],
+                            '5 km Czas': [1500.0, np.nan]})
+        typed = apply_reference_schema(raw)
+
+        assert typed['Czas'].dtype == np.float64
+        assert typed['Wiek'].dtype == np.float64
+        assert str(typed['5 km Czas'].dtype) == 'UInt16'
+        assert typed['5 km Czas'].isna().tolist() == [False, True]
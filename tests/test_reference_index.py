@@ -0,0 +1,55 @@
+# =============================================================================
+# TESTY INDEKSU CZASÓW REFERENCYJNYCH
+# Wyniki wyszukiwania binarnego muszą być identyczne ze skanowaniem DataFrame
+# =============================================================================
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest  # type: ignore[import-untyped]
+
+# Dodanie głównego katalogu do ścieżki
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from src.utils.reference_index import ReferenceIndex  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def reference_df():
+    return pd.read_csv(os.path.join(ROOT_DIR, "df_cleaned.csv"))
+
+
+class TestReferenceIndex:
+    """Testy zgodności indeksu ze skanowaniem kolumny 'Czas'."""
+
+    @pytest.mark.parametrize("seconds", [4000.0, 4456.0, 6255.45, 7200.0, 11000.0])
+    def test_percentile_matches_scan(self, reference_df, seconds):
+        index = ReferenceIndex(reference_df)
+        expected = (reference_df['Czas'] < seconds).mean() * 100
+        assert index.percentile(seconds) == expected
+
+    @pytest.mark.parametrize("gender", ['M', 'K'])
+    def test_gender_queries_match_scan(self, reference_df, gender):
+        index = ReferenceIndex(reference_df)
+        group = reference_df[reference_df['Płeć'] == gender]['Czas']
+        for seconds in (4456.0, 6500.0, 8000.0):
+            assert index.percentile(seconds, gender) == (group < seconds).mean() * 100
+            assert index.faster_than(seconds, gender) == (group > seconds).sum()
+            assert index.expected_place(seconds, gender) == (group < seconds).sum() + 1
+
+    def test_missing_times_and_years(self):
+        frame = pd.DataFrame({
+            'Płeć': ['M', 'K', 'M', 'K', 'M'],
+            'Czas': [5000.0, np.nan, 6000.0, 7000.0, 6000.0],
+            'Rok': [2023, 2023, 2024, 2024, 2024],
+        })
+        index = ReferenceIndex(frame)
+
+        assert index.percentile(6500.0) == (frame['Czas'] < 6500.0).mean() * 100
+        assert index.faster_than(6000.0) == 1
+        assert index.expected_place(6000.0, year=2024) == 1
+        assert index.percentile(6500.0, 'M', 2024) == 100.0
+        assert index.percentile(6500.0, 'K', 2022) == 50.0
@@ -0,0 +1,90 @@
+# =============================================================================
+# TESTY ZGODNOŚCI JEDNOPRZEBIEGOWEGO EKSTRAKTORA REGEX
+# Wyniki muszą być identyczne z poprzednią implementacją (siedem re.search)
+# =============================================================================
+
+import os
+import random
+import sys
+
+import pytest  # type: ignore[import-untyped]
+
+# Dodanie głównego katalogu do ścieżki
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from benchmarks.regex_extraction import (  # noqa: E402
+    LONG_INPUT,
+    SHORT_INPUTS,
+    legacy_extract_data_with_regex,
+)
+from src.utils.validation import extract_data_with_regex  # noqa: E402
+
+# Uzgodniony korpus: przykłady z aplikacji, przypadki brzegowe każdego wzorca
+# tempa oraz zachowania, które celowo pozostają bez zmian
+CORPUS = SHORT_INPUTS + [
+    LONG_INPUT,
+    "Mam 28 lat, jestem kobietą, tempo 4:45",
+    "Kobieta lat 35, biegam 5.30 min/km",
+    "Tempo mam 6,20, jestem facetem i mam 42 lata",
+    "Mężczyzna, 28 lat, 4:45/km",
+    "jestem chłopem, 50 lat, 7.5",
+    "jestem biegaczem, 33 lata, 5.5 min",
+    "1234 lat k 5.3 min",
+    "5.305 min 30 lat m 4,5",
+    "30 lat k 123:456",
+    "tempo 12.5 tempo: 4.5, 40 lat, facet",
+    "biegam 123.4 i 5,5, 30 lat m",
+    "biegam szybko 5,55, 29 lat, kobieta",
+    "45 l m 6.0",
+    "45 roku k 6:5 i 6.12",
+    "20 years, K, 4.2minut na km",
+    "25 lat\nkobieta\ntempo:\t5:10",
+    "KOBIETA 31 LAT TEMPO 5,45",
+    "Facet 30 lat",
+    "30 lat, tempo 5:00",
+    "kobieta, tempo 5:00",
+    "",
+    "   ",
+    "١٢ lat k ٤.٥ min",
+    "ｋ 30 lat 5.5",
+]
+
+
+def _random_text(rng: random.Random) -> str:
+    """Losowy tekst złożony ze słów kluczowych, liczb i separatorów."""
+    words = ["mam", "lat", "l", "roku", "years", "lata", "jestem", "kobietą", "kobieta",
+             "kobietę", "mężczyzna", "mężczyzną", "k", "m", "K", "facet", "chłop", "tempo",
+             "tempo:", "biegam", "min", "minut", "minuty", "na", "km", "/km", "5km", "w"]
+    separators = ["", " ", "  ", ", ", ",", ".", ":", "\n", "\t", "/"]
+    parts = []
+    for _ in range(rng.randint(1, 10)):
+        if rng.random() < 0.4:
+            parts.append(rng.choice([
+                str(rng.randint(0, 99)),
+                str(rng.randint(0, 99999)),
+                f"{rng.randint(0, 99)}{rng.choice('.,:')}{rng.randint(0, 999)}",
+            ]))
+        else:
+            parts.append(rng.choice(words))
+        parts.append(rng.choice(separators))
+    return "".join(parts)
+
+
+class TestSinglePassExtractor:
+    """Testy zgodności z poprzednią implementacją."""
+
+    @pytest.mark.parametrize("text", CORPUS)
+    def test_corpus_matches_legacy(self, text):
+        assert extract_data_with_regex(text) == legacy_extract_data_with_regex(text)
+
+    def test_random_texts_match_legacy(self):
+        rng = random.Random(2024)
+        for _ in range(5000):
+            text = _random_text(rng)
+            assert extract_data_with_regex(text) == legacy_extract_data_with_regex(text), text
+
+    def test_known_gender_quirk_is_preserved(self):
+        # "m" na końcu słowa "mam" jest dopasowywane wcześniej niż "kobietą"
+        result = extract_data_with_regex("Mam 28 lat, jestem kobietą, tempo 4:45")
+        assert result == {'Wiek': 28, 'Płeć': 'M', '5 km Tempo': 4.75}
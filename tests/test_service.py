@@ -0,0 +1,170 @@
+# =============================================================================
+# TESTY SERWISU HTTP
+# Endpointy /predict, /parse, /predict/batch, /health i /metrics na serwisie
+# uruchomionym w tle na localhost
+# =============================================================================
+
+import asyncio
+import functools
+import json
+import os
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+import pytest  # type: ignore[import-untyped]
+
+# Dodanie głównego katalogu do ścieżki
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from src import service  # noqa: E402
+from src.core import ModelUnavailableError, Predictor  # noqa: E402
+from src.utils.data_processing import extract_user_data_detailed  # noqa: E402
+
+RUNNER = {'Wiek': 28, 'Płeć': 'M', '5 km Tempo': 4.75}
+
+
+def _call(url, path, body=None, raw=None):
+    data = raw if raw is not None else (None if body is None else json.dumps(body).encode("utf-8"))
+    request = urllib.request.Request(url + path, data=data, method="GET" if data is None else "POST")
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.fixture(scope="module")
+def service_url():
+    app = service.create_app(
+        workers=2, batch_limit=5,
+        extract=functools.partial(extract_user_data_detailed, openai_client=None, use_cache=False))
+    server, thread, url = service.start_background_server(app)
+    yield url
+    server.should_exit = True
+    thread.join(timeout=10)
+
+
+class TestService:
+    """Testy endpointów serwisu."""
+
+    def test_health(self, service_url):
+        status, body = _call(service_url, "/health")
+
+        assert status == 200
+        assert body['status'] == "ok"
+        assert body['engine'] == "native"
+        assert body['pool']['workers'] == 2
+
+    def test_predict(self, service_url):
+        status, body = _call(service_url, "/predict", RUNNER)
+
+        assert status == 200
+        assert body == {'seconds': pytest.approx(6231.64), 'time': "1:43:51", 'engine': "native"}
+
+    def test_predict_invalid_input(self, service_url):
+        status, body = _call(service_url, "/predict", {'Wiek': 5, 'Płeć': 'X', '5 km Tempo': 4.5})
+
+        assert status == 422
+        assert body['error'] == "invalid_input"
+        assert len(body['errors']) == 2
+
+    def test_malformed_json(self, service_url):
+        status, body = _call(service_url, "/predict", raw=b"{nie json")
+
+        assert status == 400
+        assert body['error'] == "invalid_json"
+
+    def test_predict_batch(self, service_url):
+        status, body = _call(service_url, "/predict/batch",
+                             {'records': [RUNNER, {'Wiek': 'abc', 'Płeć': 'M', '5 km Tempo': 5}]})
+
+        assert status == 200
+        assert body['count'] == 2 and body['valid'] == 1
+        assert body['results'][0]['time'] == "1:43:51"
+        assert body['results'][1]['seconds'] is None
+        assert body['results'][1]['errors']
+
+    def test_predict_batch_limit(self, service_url):
+        status, body = _call(service_url, "/predict/batch", [RUNNER] * 6)
+
+        assert status == 413
+        assert body['error'] == "batch_too_large"
+
+    def test_parse(self, service_url):
+        status, body = _call(service_url, "/parse",
+                             {'text': "Mam 28 lat, jestem mężczyzną, tempo 4:45"})
+
+        assert status == 200
+        assert body['data'] == RUNNER
+        assert body['tier'] == "local"
+        assert body['prediction']['time'] == "1:43:51"
+
+    def test_parse_unreadable_text(self, service_url):
+        status, body = _call(service_url, "/parse", {'text': "lubię biegać"})
+
+        assert status == 422
+        assert body['prediction'] is None
+        assert body['errors']
+
+    def test_concurrent_requests(self, service_url):
+        results = []
+
+        def worker():
+            results.append(_call(service_url, "/predict", RUNNER))
+
+        threads = [threading.Thread(target=worker) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert [status for status, _ in results] == [200] * 16
+
+    def test_metrics(self, service_url):
+        _call(service_url, "/predict", RUNNER)
+        with urllib.request.urlopen(service_url + "/metrics", timeout=30) as response:
+            content_type = response.headers['Content-Type']
+            body = response.read().decode('utf-8')
+
+        assert content_type.startswith("text/plain; version=0.0.4")
+        assert 'kalkulator_predictions_total{engine="native",mode="single"}' in body
+
+
+class TestServiceErrors:
+    """Testy obsługi błędów i przeciążenia."""
+
+    def test_model_unavailable(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("src.core.predictor.is_available", lambda name: False)
+        predictor = Predictor(native_model_path=str(tmp_path / "brak.json"),
+                              model_path=str(tmp_path / "brak"))
+        with pytest.raises(ModelUnavailableError) as excinfo:
+            predictor.predict(RUNNER)
+        response = service._error_from_exception(excinfo.value)
+
+        assert response.status_code == 503
+        assert json.loads(response.body)['error'] == "model_unavailable"
+
+    def test_pool_rejects_when_full(self):
+        pool = service.ModelPool(workers=1, queue_limit=1)
+        release = threading.Event()
+
+        async def scenario():
+            first = asyncio.ensure_future(pool.run(release.wait))
+            await asyncio.sleep(0.05)
+            with pytest.raises(service.ServiceOverloadedError):
+                await pool.run(lambda: None)
+            release.set()
+            await first
+
+        asyncio.run(scenario())
+        pool.shutdown()
+        assert pool.rejected == 1
+
+    def test_json_fallback_without_orjson(self, monkeypatch):
+        monkeypatch.setattr(service, "ORJSON_AVAILABLE", False)
+        response = service.FastJSONResponse({'time': "1:43:51", 'Płeć': "K"})
+
+        assert json.loads(response.body) == {'time': "1:43:51", 'Płeć': "K"}
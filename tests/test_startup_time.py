@@ -0,0 +1,73 @@
+# =============================================================================
+# TESTY CZASU STARTU
+# Import modułów aplikacji musi zmieścić się w budżecie czasu, a ciężkie
+# zależności (PyCaret) mają być ładowane dopiero przy pierwszym użyciu
+# =============================================================================
+
+import os
+import sys
+
+import pytest  # type: ignore[import-untyped]
+
+# Dodanie głównego katalogu do ścieżki
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from benchmarks.startup_profile import (  # noqa: E402
+    CORE_MODULES,
+    LAZY_PACKAGES,
+    package_breakdown,
+    parse_importtime,
+    profile_imports,
+)
+from src.utils import lazy_imports  # noqa: E402
+
+# Budżet czasu importu modułów src.utils (w sekundach), nadpisywany zmienną środowiskową
+STARTUP_IMPORT_BUDGET = float(os.getenv("STARTUP_IMPORT_BUDGET", "3.0"))
+
+
+class TestStartupTime:
+    """Testy budżetu czasu importu."""
+
+    def test_core_imports_within_budget(self):
+        total, timings = profile_imports(CORE_MODULES)
+
+        breakdown = ", ".join(f"{name} {seconds:.2f} s"
+                              for name, seconds in package_breakdown(timings)[:5])
+        assert total <= STARTUP_IMPORT_BUDGET, (
+            f"Import trwał {total:.2f} s (budżet {STARTUP_IMPORT_BUDGET:.2f} s): {breakdown}")
+
+        loaded = {timing.module.split('.')[0] for timing in timings}
+        assert not loaded & set(LAZY_PACKAGES)
+
+    def test_parse_importtime(self):
+        stderr = ("import time: self [us] | cumulative | imported package\n"
+                  "import time:       100 |        100 |     pandas.core\n"
+                  "import time:       300 |        400 |   pandas\n"
+                  "import time:        50 |         50 | json\n")
+        timings = parse_importtime(stderr)
+
+        assert [t.module for t in timings] == ["pandas.core", "pandas", "json"]
+        assert [t.depth for t in timings] == [2, 1, 0]
+        assert package_breakdown(timings) == [("pandas", pytest.approx(0.0004)),
+                                              ("json", pytest.approx(0.00005))]
+
+
+class TestLazyImports:
+    """Testy leniwego importu."""
+
+    def test_load_module_is_cached(self):
+        module = lazy_imports.load_module("json")
+        assert module is lazy_imports.load_module("json")
+        assert "json" in lazy_imports.import_times()
+
+    def test_missing_module(self):
+        assert lazy_imports.load_module("nie_ma_takiego_modulu") is None
+        assert not lazy_imports.is_available("nie_ma_takiego_modulu.sub")
+        assert lazy_imports.is_available("json")
+
+    def test_preload_in_background(self):
+        thread = lazy_imports.preload_in_background(["colorsys"])
+        thread.join(5)
+        assert lazy_imports.load_module("colorsys") is not None
+        assert lazy_imports.preload_in_background(["colorsys"]) is None
@@ -0,0 +1,125 @@
+# =============================================================================
+# TESTY POMIARU CZASU ETAPÓW
+# Ślady żądań, spany, zrzut do pliku i przesuwne percentyle etapów
+# =============================================================================
+
+import json
+import logging
+import os
+import sys
+import threading
+
+import pytest  # type: ignore[import-untyped]
+
+# Dodanie głównego katalogu do ścieżki
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from src.core.tracing import (  # noqa: E402
+    Span,
+    StageStats,
+    Trace,
+    annotate,
+    current_trace,
+    span,
+    start_span,
+    start_trace,
+)
+
+
+class TestTrace:
+    """Testy śladu i spanów."""
+
+    def test_spans_recorded_in_order(self):
+        with start_trace("oblicz", trace_file="") as trace:
+            with span("extraction"):
+                pass
+            with span("prediction"):
+                pass
+            annotate(engine="native")
+
+        assert [item.stage for item in trace.spans] == ["extraction", "prediction"]
+        assert trace.attributes == {'engine': "native"}
+        assert trace.total_seconds >= sum(trace.durations().values())
+        assert len(trace.trace_id) == 16
+
+    def test_start_span_closed_explicitly(self):
+        with start_trace("oblicz", trace_file="") as trace:
+            figures = start_span("figures")
+            with span("inner"):
+                pass
+            figures.close()
+
+        assert [item.stage for item in trace.spans] == ["inner", "figures"]
+        assert trace.spans[1].seconds >= trace.spans[0].seconds
+
+    def test_span_without_trace_is_noop(self):
+        assert current_trace() is None
+        with span("extraction"):
+            annotate(engine="native")
+        assert current_trace() is None
+
+    def test_failed_span_records_error(self):
+        with pytest.raises(ValueError):
+            with start_trace("oblicz", trace_file="") as trace:
+                with span("prediction"):
+                    raise ValueError("błąd")
+
+        assert trace.spans[0].error == "ValueError"
+        assert trace.to_dict()['spans'][0]['error'] == "ValueError"
+        assert current_trace() is None
+
+    def test_traces_are_isolated_between_threads(self):
+        seen = []
+
+        def worker():
+            seen.append(current_trace())
+
+        with start_trace("oblicz", trace_file=""):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+
+        assert seen == [None]
+
+    def test_structured_log_and_dump(self, tmp_path, caplog):
+        path = tmp_path / "traces.jsonl"
+        with caplog.at_level(logging.INFO, logger="src.core.tracing"):
+            for _ in range(2):
+                with start_trace("oblicz", trace_file=str(path)) as trace:
+                    with span("cohort"):
+                        pass
+
+        records = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+        assert len(records) == 2
+        assert records[-1]['trace_id'] == trace.trace_id
+        assert records[-1]['spans'][0]['stage'] == "cohort"
+        assert caplog.records[-1].trace['trace_id'] == trace.trace_id
+
+
+class TestStageStats:
+    """Testy przesuwnych statystyk etapów."""
+
+    @staticmethod
+    def _trace(**durations) -> Trace:
+        trace = Trace("oblicz", spans=[Span(stage, 0.0, seconds) for stage, seconds in durations.items()])
+        trace.total_seconds = sum(durations.values())
+        return trace
+
+    def test_last_and_percentiles(self):
+        stats = StageStats()
+        for value in range(1, 101):
+            stats.record(self._trace(prediction=value / 1000))
+
+        summary = stats.summary()
+        assert summary['prediction'] == {'last': 0.1, 'p50': 0.05, 'p95': 0.095, 'count': 100}
+        assert summary['total']['count'] == 100
+        assert stats.traces == 100
+
+    def test_window_limits_samples(self):
+        stats = StageStats(window=3)
+        for value in (10.0, 1.0, 2.0, 3.0):
+            stats.record(self._trace(cohort=value))
+
+        assert stats.summary()['cohort']['p95'] == 3.0
+        assert stats.summary()['cohort']['count'] == 3
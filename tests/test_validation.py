@@ -10,8 +10,11 @@ import os
 # Dodanie głównego katalogu do ścieżki
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.utils.validation import is_valid_age, is_valid_tempo, is_valid_gender, validate_user_data
-from src.utils.model_utils import calculate_5km_time
+import pandas as pd
+
+from src.utils.validation import (is_valid_age, is_valid_tempo, is_valid_gender, validate_user_data,
+                                  validate_user_data_batch, extract_data_with_confidence)
+from src.utils.model_utils import calculate_5km_time, calculate_5km_time_batch, predict_many
 
 
 class TestValidation:
@@ -83,6 +86,52 @@ class TestValidation:
         assert not is_valid
         assert len(errors) == 3
 
+    def test_validate_user_data_batch(self):
+        """Test walidacji wsadowej - te same komunikaty co validate_user_data."""
+        records = [
+            {'Wiek': 25, 'Płeć': 'M', '5 km Tempo': 4.5},
+            {'Wiek': 5, 'Płeć': 'X', '5 km Tempo': 15.0},
+            {'Wiek': '30', 'Płeć': 'K', '5 km Tempo': '5.0'},
+            {'Wiek': 'abc', 'Płeć': None, '5 km Tempo': 'abc'},
+            {'Wiek': 99.9, 'Płeć': 'K', '5 km Tempo': 3.0},
+        ]
+        frame = pd.DataFrame.from_records(records)
+        valid, errors = validate_user_data_batch(frame)
+
+        for row, record in enumerate(records):
+            expected_valid, expected_errors = validate_user_data(record)
+            assert valid.iloc[row] == expected_valid
+            assert errors.iloc[row] == expected_errors
+
+        # Brakująca kolumna
+        valid, errors = validate_user_data_batch(frame.drop(columns=['Płeć']))
+        assert not valid.any()
+        assert errors.iloc[0] == ["Brak pola: Płeć"]
+
+    def test_extract_data_with_confidence(self):
+        """Test oceny pewności parsera lokalnego."""
+        data, confidence = extract_data_with_confidence("28 lat, kobieta, tempo 4:45")
+        assert data == {'Wiek': 28, 'Płeć': 'K', '5 km Tempo': 4.75}
+        assert confidence == 1.0
+
+        # Odległość "5km" nie jest liczbą konkurującą z tempem
+        assert extract_data_with_confidence("Kobieta, 42 lata, czas na 5km to 6:10")[1] == 1.0
+
+        # Sprzeczne wzmianki: dwie płcie / dwa wieki
+        assert extract_data_with_confidence("Kobieta i mężczyzna, 30 lat, tempo 5:00")[1] == 0.75
+        assert extract_data_with_confidence("Kobieta 42 lata, mąż 45 lat, tempo 6:10")[1] == 0.5
+
+        # Brak któregoś pola
+        assert extract_data_with_confidence("Facet 30 lat") == (None, 0.0)
+        assert extract_data_with_confidence("") == (None, 0.0)
+
+    def test_confidence_flags_mam_misread_as_male(self):
+        """"Mam" odczytane jako płeć 'M' obniża pewność mimo jednej wzmianki o płci."""
+        data, confidence = extract_data_with_confidence("Mam 28 lat, jestem kobietą, tempo 4:45")
+        assert data['Płeć'] == 'M'
+        # Płeć z wyniku nie pokrywa się z jedyną jawną wzmianką ("kobietą")
+        assert confidence == 0.75
+
 
 class TestModelUtils:
     """Testy funkcji modelowych."""
@@ -103,6 +152,32 @@ class TestModelUtils:
         assert calculate_5km_time("5:00") == 1500.0  # 5.0 min/km * 5km * 60s = 1500s
         assert calculate_5km_time("4:45") == 1425.0  # 4.75 min/km * 5km * 60s = 1425s
 
+    def test_calculate_5km_time_batch(self):
+        """Test wektorowego obliczania czasu 5km."""
+        numeric = pd.Series([5.0, 4.5, 6.0])
+        assert list(calculate_5km_time_batch(numeric)) == [1500.0, 1350.0, 1800.0]
+
+        mixed = pd.Series(["4:30", "6.0", 5.0])
+        assert list(calculate_5km_time_batch(mixed)) == [
+            calculate_5km_time(value) for value in mixed
+        ]
+
+    def test_predict_many(self):
+        """Test przewidywania wsadowego z maską błędów."""
+        records = [
+            {'Wiek': 28, 'Płeć': 'K', '5 km Tempo': 4.75},
+            {'Wiek': 5, 'Płeć': 'M', '5 km Tempo': 5.0},
+            {'Wiek': 40, 'Płeć': 'M', '5 km Tempo': 5.0},
+        ]
+        result = predict_many(records)
+
+        assert list(result['is_valid']) == [True, False, True]
+        assert result['errors'].iloc[1] == ["Wiek powinien być liczbą z zakresu 10-100 lat"]
+        assert pd.isna(result['prediction_label'].iloc[1])
+        assert result['prediction_label'].iloc[0] == pytest.approx(6255.45, abs=0.01)
+        assert result['prediction_time'].iloc[0] == "1:44:15"
+        assert result['prediction_time'].iloc[2] == "1:49:28"
+
 
 # Uruchomienie testów
 if __name__ == "__main__":
@@ -0,0 +1,86 @@
+# =============================================================================
+# TESTY WYKRESÓW PORÓWNAWCZYCH
+# Pamięć podręczna figur bazowych i nakładka użytkownika
+# =============================================================================
+
+import os
+import sys
+
+import pandas as pd
+import pytest  # type: ignore[import-untyped]
+
+# Dodanie głównego katalogu do ścieżki
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from src.utils import visualization  # noqa: E402
+from src.utils.cohort_stats import CohortCube  # noqa: E402
+from src.utils.visualization import (  # noqa: E402
+    FigureCache,
+    create_age_comparison_chart,
+    create_gender_comparison_chart,
+    figure_cache_stats,
+)
+
+
+@pytest.fixture(scope="module")
+def reference_df():
+    return pd.read_csv(os.path.join(ROOT_DIR, "df_cleaned.csv"))
+
+
+@pytest.fixture(scope="module")
+def cube(reference_df):
+    return CohortCube(reference_df)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(visualization, "_figure_cache", FigureCache(maxsize=2))
+
+
+def _user_line(fig):
+    return [shape.x0 for shape in fig.layout.shapes if shape.line.color == 'red']
+
+
+class TestComparisonFigureCache:
+    """Testy pamięci podręcznej figur porównawczych."""
+
+    def test_base_figure_is_reused(self, reference_df, cube):
+        first, count, avg = create_gender_comparison_chart(reference_df, 'K', 110.0, cube)
+        second, count2, avg2 = create_gender_comparison_chart(reference_df, 'K', 95.0, cube)
+
+        assert figure_cache_stats()['hits'] == 1
+        assert figure_cache_stats()['misses'] == 1
+        assert (count, avg) == (count2, avg2)
+        assert _user_line(first) == [110.0]
+        assert _user_line(second) == [95.0]
+        assert first.data[0].y.tolist() == second.data[0].y.tolist()
+
+    def test_cached_figure_matches_uncached(self, reference_df, cube):
+        cached, count, avg = create_age_comparison_chart(reference_df, 30, 120.0, cube)
+        plain, plain_count, plain_avg = create_age_comparison_chart(reference_df, 30, 120.0)
+
+        assert count == plain_count
+        assert avg == pytest.approx(plain_avg)
+        assert cached.to_plotly_json() == plain.to_plotly_json()
+
+    def test_cache_is_bounded(self, reference_df, cube):
+        for age in (25, 30, 35):
+            create_age_comparison_chart(reference_df, age, 120.0, cube)
+        create_age_comparison_chart(reference_df, 25, 120.0, cube)
+
+        stats = figure_cache_stats()
+        assert stats['size'] == 2
+        assert stats['misses'] == 4
+
+    def test_dataset_version_is_part_of_key(self, reference_df, cube):
+        other = CohortCube(reference_df.head(1000))
+        assert other.version != cube.version
+
+        _, count, _ = create_gender_comparison_chart(reference_df, 'M', 100.0, cube)
+        _, other_count, _ = create_gender_comparison_chart(reference_df, 'M', 100.0, other)
+        assert other_count < count
+        assert figure_cache_stats()['misses'] == 2
+
+    def test_empty_cohort(self, reference_df, cube):
+        assert create_age_comparison_chart(reference_df, 95, 120.0, cube) == (None, 0, 0)
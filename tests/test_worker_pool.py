@@ -0,0 +1,156 @@
+# =============================================================================
+# TESTY WIELOPROCESOWEJ PULI PRZEWIDYWANIA
+# Pamięć współdzielona, eksport indeksu i kostki do tablic oraz zgodność
+# wyników procesów roboczych z przewidywaniem w bieżącym procesie
+# =============================================================================
+
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest  # type: ignore[import-untyped]
+
+# Dodanie głównego katalogu do ścieżki
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from src.core import (  # noqa: E402
+    InvalidInputError,
+    Predictor,
+    get_predictor,
+    load_cohort_cube,
+    load_reference_index,
+)
+from src.core.shared_arrays import SharedArrays  # noqa: E402
+from src.core.worker_pool import COHORT_AGE_RANGE, PredictionWorkerPool, rank_prediction  # noqa: E402
+from src.utils.cohort_stats import CohortCube  # noqa: E402
+from src.utils.reference_index import ReferenceIndex  # noqa: E402
+
+RUNNER = {'Wiek': 28, 'Płeć': 'M', '5 km Tempo': 4.75}
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with PredictionWorkerPool(processes=2) as worker_pool:
+        yield worker_pool
+
+
+class TestSharedArrays:
+    """Testy bloku pamięci współdzielonej."""
+
+    def test_attach_sees_same_data(self):
+        arrays = {'a': np.arange(10, dtype=np.float64), 'b': np.array([1, 2, 3], dtype=np.int16)}
+        owner = SharedArrays.create(arrays)
+        try:
+            attached = SharedArrays.attach(owner.spec)
+            np.testing.assert_array_equal(attached.arrays['a'], arrays['a'])
+            np.testing.assert_array_equal(attached.arrays['b'], arrays['b'])
+            assert not attached.arrays['a'].flags.writeable
+            attached.close()
+        finally:
+            owner.close()
+
+    def test_owner_close_unlinks(self):
+        owner = SharedArrays.create({'a': np.zeros(4)})
+        spec = owner.spec
+        owner.close()
+
+        with pytest.raises(FileNotFoundError):
+            SharedArrays.attach(spec)
+
+    def test_rejects_object_arrays(self):
+        with pytest.raises(TypeError):
+            SharedArrays.create({'a': np.array(['M', None], dtype=object)})
+
+
+class TestArrayExport:
+    """Testy odtwarzania indeksu i kostki z płaskich tablic."""
+
+    def test_reference_index_round_trip(self):
+        index = load_reference_index()
+        restored = ReferenceIndex.from_arrays(*index.to_arrays())
+
+        assert len(restored) == len(index)
+        for gender in (None, 'M', 'K'):
+            assert restored.percentile(6231.64, gender) == index.percentile(6231.64, gender)
+
+    def test_cohort_cube_round_trip(self):
+        cube = load_cohort_cube()
+        restored = CohortCube.from_arrays(*cube.to_arrays())
+
+        assert restored.version == cube.version
+        original, copy = cube.around('K', 35, 5), restored.around('K', 35, 5)
+        assert (copy.count, copy.count_slower(7000)) == (original.count, original.count_slower(7000))
+        assert copy.mean_time == pytest.approx(original.mean_time)
+
+
+class TestPredictionWorkerPool:
+    """Testy puli procesów przewidywania."""
+
+    def test_submit_matches_in_process(self, pool):
+        result = pool.submit(RUNNER).result(timeout=60)
+        expected = rank_prediction(get_predictor().predict(RUNNER), RUNNER,
+                                   load_reference_index(), load_cohort_cube())
+
+        assert result == expected
+        assert result.time == "1:43:51"
+        assert result.cohort_count == 3236
+
+    def test_submit_each_matches_submit(self, pool):
+        other = {'Wiek': 45, 'Płeć': 'K', '5 km Tempo': 5.5}
+        results = pool.submit_each([RUNNER, other]).result(timeout=60)
+
+        assert results == [pool.submit(RUNNER).result(timeout=60),
+                           pool.submit(other).result(timeout=60)]
+
+    def test_invalid_input_propagates(self, pool):
+        with pytest.raises(InvalidInputError) as excinfo:
+            pool.submit({'Wiek': 5, 'Płeć': 'M', '5 km Tempo': 4.75}).result(timeout=60)
+
+        assert excinfo.value.errors == ['Wiek powinien być liczbą z zakresu 10-100 lat']
+
+    def test_predict_many_keeps_order(self, pool):
+        frame = pd.DataFrame({'Wiek': [28, 40, 'x'] * 50, 'Płeć': ['M', 'K', 'M'] * 50,
+                              '5 km Tempo': [4.75, 5.5, 5.0] * 50})
+        result = pool.predict_many(frame, chunk_size=40)
+        expected = get_predictor().predict_many(frame)
+
+        assert list(result.index) == list(frame.index)
+        pd.testing.assert_series_equal(result['prediction_label'], expected['prediction_label'])
+        assert result['percentile'].iloc[0] == pytest.approx(
+            load_reference_index().percentile(result['prediction_label'].iloc[0]))
+        assert math.isnan(result['percentile'].iloc[2])
+
+    def test_predict_many_records_keep_empty_dicts(self, pool):
+        records = [{}, RUNNER, {'Wiek': 40}] * 3
+        result = pool.predict_many(records, chunk_size=4)
+
+        assert list(result.index) == list(range(len(records)))
+        assert list(result['is_valid']) == [False, True, False] * 3
+        assert result['errors'].iloc[6] == ["Brak pola: Wiek", "Brak pola: Płeć", "Brak pola: 5 km Tempo"]
+        assert result['prediction_label'].iloc[4] == pytest.approx(get_predictor().predict(RUNNER).seconds)
+
+    def test_render_fields_match_cohort_window(self, pool):
+        result = pool.submit(RUNNER).result(timeout=60)
+        window = load_cohort_cube().around(RUNNER['Płeć'], RUNNER['Wiek'], COHORT_AGE_RANGE)
+
+        # Sekcja wyników aplikacji renderuje się z RankedPrediction bez kostki kohort
+        assert result.cohort_mean_tempo == pytest.approx(window.mean_tempo)
+        assert result.cohort_min_time == window.min_time
+
+    def test_empty_batch_uses_pool_model(self, tmp_path, monkeypatch):
+        missing = str(tmp_path / "brak_modelu")
+        used_paths = []
+        monkeypatch.setattr(Predictor, "predict_many",
+                            lambda self, data: used_paths.append(self.native_model_path))
+
+        with PredictionWorkerPool(processes=1, native_model_path=missing + ".json",
+                                  model_path=missing) as other_pool:
+            other_pool.predict_many([])
+
+        assert used_paths == [missing + ".json"]
+
+    def test_warm_up_starts_all_processes(self, pool):
+        assert len(pool.warm_up()) == pool.processes